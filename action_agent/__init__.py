@@ -1 +1,4 @@
-from .agent import root_agent as root_agent
+from shared_tools.lazy import lazy_exports
+
+# root_agent (and google.adk with it) is loaded on first access
+__getattr__ = lazy_exports(__name__, {"root_agent": ".agent"})
@@ -1,14 +1,14 @@
 """
 Clean Action Agent using shared tools - demonstrates best practices
 """
-from google.adk.agents import Agent
-from google.adk.tools import FunctionTool
-import json
+from shared_tools.lazy import function_tool, lazy_attributes
+from shared_tools.records import Action, ActionPlan
+from shared_tools.templates import TEMPLATES
 
-# Import shared tools (no duplication!)
-from shared_tools import REFUND_TOOL, SEND_COMMUNICATION_TOOL
+NEXT_STEPS = ("Execute action tools", "Send customer communication", "Update records")
 
-def coordinate_action_execution(action_type: str, order_id: str, amount: float = 0.0, customer_email: str = "customer@example.com") -> str:
+def coordinate_action_execution(action_type: str, order_id: str, amount: float = 0.0, customer_email: str = "customer@example.com",
+                                locale: str = "en") -> str:
     """
     Coordinate the execution of a specific action based on the action type.
     
@@ -20,72 +20,62 @@ def coordinate_action_execution(action_type: str, order_id: str, amount: float =
         order_id: The order ID for the action.
         amount: The amount for refunds (if applicable).
         customer_email: The customer's email address for communication.
+        locale: The customer's locale for the drafted communication (e.g. "en", "es-MX").
 
     Returns:
         A summary of the action coordination and next steps.
     """
+    return plan_action(Action(action_type), order_id, amount, customer_email, locale).to_json(indent=2)
+
+def plan_action(action: Action, order_id: str, amount: float = 0.0, customer_email: str = "customer@example.com",
+                locale: str = "en") -> ActionPlan:
+    """The coordination plan behind coordinate_action_execution, as a record."""
     execution_summary = []
-    recommended_communication = ""
     
     # Coordinate based on action type
-    if action_type == "full_refund":
+    if action is Action.FULL_REFUND:
         execution_summary.append(f"🔄 COORDINATING: Full refund of ${amount} for order {order_id}")
         execution_summary.append("📋 STEPS: Process refund → Send confirmation → Update customer record")
-        recommended_communication = f"""Dear Valued Customer,
-
-We have processed a full refund of ${amount} for your order {order_id}. The refund will appear in your account within 3-5 business days.
-
-We sincerely apologize for the inconvenience and appreciate your understanding.
-
-Best regards,
-Customer Experience Team"""
         
-    elif action_type == "reship_express":
+    elif action is Action.RESHIP_EXPRESS:
         execution_summary.append(f"🔄 COORDINATING: Express re-shipment for order {order_id}")
         execution_summary.append("📋 STEPS: Prepare replacement → Expedited shipping → Tracking notification")
-        recommended_communication = f"""Dear Valued Customer,
-
-We are expediting a replacement for your order {order_id}. You will receive tracking information within the next hour.
-
-Expected delivery: 1-2 business days.
-
-Best regards,
-Customer Experience Team"""
         
-    elif action_type == "generate_coupon":
+    elif action is Action.GENERATE_COUPON:
         execution_summary.append("🔄 COORDINATING: Generating goodwill coupon for customer")
         execution_summary.append("📋 STEPS: Create coupon code → Set expiration → Send to customer")
-        recommended_communication = """Dear Valued Customer,
-
-As a gesture of goodwill, we're providing you with a special discount for your next purchase.
-
-Thank you for your patience and continued loyalty.
-
-Best regards,
-Customer Experience Team"""
         
     else:
-        execution_summary.append(f"🔄 COORDINATING: Standard follow-up for {action_type}")
-        recommended_communication = "Standard follow-up communication recommended."
+        execution_summary.append(f"🔄 COORDINATING: Standard follow-up for {action}")
+    
+    # Customer wording comes from the shared template registry
+    template_action = action.value if TEMPLATES.has(action.value) else "follow_up"
+    recommended_communication = TEMPLATES.render(template_action, "email", locale,
+                                                 {"amount": amount, "order_id": order_id})
     
     execution_summary.append(f"📧 COMMUNICATION READY: Email drafted for {customer_email}")
     execution_summary.append("✅ COORDINATION COMPLETE: Ready for tool execution")
     
-    return json.dumps({
-        "coordination_summary": execution_summary,
-        "recommended_communication": recommended_communication,
-        "next_steps": ["Execute action tools", "Send customer communication", "Update records"]
-    }, indent=2)
-
-# Create the action agent using shared tools + agent-specific logic
-root_agent = Agent(
-    name="action_agent", 
-    model="gemini-2.0-flash",
-    description="Specialized agent for executing resolutions and communicating with customers using shared action tools.",
-    instruction="""You are an Action Agent for customer issue resolution.
+    return ActionPlan(
+        action=action,
+        coordination_summary=tuple(execution_summary),
+        recommended_communication=recommended_communication,
+        next_steps=NEXT_STEPS
+    )
+
+def _build_root_agent():
+    """Create the action agent using shared tools + agent-specific logic."""
+    from google.adk.agents import Agent
+    from shared_tools.action_tools import REFUND_TOOL, SEND_COMMUNICATION_TOOL
+    
+    return Agent(
+        name="action_agent", 
+        model="gemini-2.0-flash",
+        description="Specialized agent for executing resolutions and communicating with customers using shared action tools.",
+        instruction="""You are an Action Agent for customer issue resolution.
 
 Your job is to:
-1. Use REFUND_TOOL to process refunds when needed
+1. Use REFUND_TOOL to process refunds when needed, with idempotency_key "refund:<transcript_id>:<order_id>" for the issue being resolved (use the same key if you retry)
 2. Use SEND_COMMUNICATION_TOOL to notify customers of actions taken
 3. Use coordinate_action_execution to plan and coordinate complex action sequences
 
@@ -95,9 +85,12 @@ Example workflow:
 1. Call REFUND_TOOL if refund is needed
 2. Call SEND_COMMUNICATION_TOOL to notify customer
 3. Call coordinate_action_execution to summarize and plan follow-up""",
-    tools=[
-        REFUND_TOOL,                    # Shared tool - call when refund needed
-        SEND_COMMUNICATION_TOOL,        # Shared tool - call to notify customer
-        FunctionTool(coordinate_action_execution) # Agent-specific logic - call for coordination
-    ]
-)
+        tools=[
+            REFUND_TOOL,                    # Shared tool - call when refund needed
+            SEND_COMMUNICATION_TOOL,        # Shared tool - call to notify customer
+            function_tool(coordinate_action_execution) # Agent-specific logic - call for coordination
+        ]
+    )
+
+# root_agent is built on first access (see shared_tools/lazy.py)
+__getattr__ = lazy_attributes(__name__, {"root_agent": _build_root_agent})
@@ -0,0 +1,209 @@
+"""
+Streaming batch processor - runs a JSONL file of customer issues through the
+triage → solution → action workflow in constant memory
+
+Each input line is a JSON object with customer_id, transcript_id and
+issue_description, optionally order_id and order_value (the demo order is
+used when absent); any other fields are ignored. Results are written as
+JSONL in input order, one line per issue.
+
+The pipeline is a chain of generators:
+    read_issues  → streams (line number, end offset, issue) from the input
+    process      → keeps at most max_in_flight issues on a worker pool; the
+                   reader is only advanced when the oldest issue finishes,
+                   which is the backpressure that bounds memory
+    writer       → appends results and periodically checkpoints
+
+The checkpoint records the input byte offset and output byte offset of the
+last result written. Restarting with the same paths truncates any partial
+output past that point and resumes reading from the recorded offset, so no
+issue is processed twice and none is lost. Refunds are recorded in the
+file-backed ledger of ``shared_tools/refunds.py``, so an issue redone after
+a crash is not paid again; runs refuse to start with an in-memory ledger.
+"""
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional, Tuple
+
+REQUIRED_FIELDS = ("customer_id", "transcript_id", "issue_description")
+# Optional fields passed on to the workflow (the demo order when absent)
+ORDER_FIELDS = ("order_id", "order_value")
+
+
+def _workflow(name: str):
+    if name == "orchestrator":
+        from customer_rescue_orchestrator.agent import orchestrate_customer_issue
+        return orchestrate_customer_issue
+    if name == "swarm":
+        from customer_experience_rescue_swarm.agent import process_customer_issue
+        return process_customer_issue
+    raise ValueError(f"Unknown workflow: {name}. Available: orchestrator, swarm")
+
+
+def checkpoint_path_for(output_path: str) -> str:
+    return output_path + ".checkpoint"
+
+
+def load_checkpoint(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return {"input_offset": 0, "output_offset": 0, "lines": 0}
+
+
+def save_checkpoint(path: str, checkpoint: dict):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump(checkpoint, handle)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_issues(input_path: str, start_offset: int = 0, start_line: int = 0) -> Iterator[Tuple[int, int, Optional[dict], Optional[str]]]:
+    """
+    Stream issues from a JSONL file starting at a byte offset.
+
+    Yields:
+        (line_number, end_offset, issue, error) tuples. Blank lines are
+        skipped; malformed lines yield issue=None with an error message.
+    """
+    with open(input_path, "rb") as handle:
+        handle.seek(start_offset)
+        offset = start_offset
+        line_number = start_line
+        for raw in handle:
+            offset += len(raw)
+            line_number += 1
+            if not raw.strip():
+                continue
+            try:
+                issue = json.loads(raw)
+                if not isinstance(issue, dict):
+                    raise ValueError("expected a JSON object")
+                missing = [field for field in REQUIRED_FIELDS if field not in issue]
+                if missing:
+                    raise ValueError(f"missing fields: {', '.join(missing)}")
+            except ValueError as exc:
+                yield line_number, offset, None, f"Invalid issue on line {line_number}: {exc}"
+                continue
+            yield line_number, offset, issue, None
+
+
+def _run_issue(workflow, line_number: int, issue: dict) -> dict:
+    outcome = {
+        "line": line_number,
+        "customer_id": issue["customer_id"],
+        "transcript_id": issue["transcript_id"],
+    }
+    if "issue_id" in issue:
+        outcome["issue_id"] = issue["issue_id"]
+    try:
+        outcome["result"] = workflow(issue["customer_id"], issue["transcript_id"], issue["issue_description"],
+                                     **{field: issue[field] for field in ORDER_FIELDS if field in issue})
+        outcome["status"] = "success"
+    except Exception as exc:
+        outcome["error"] = str(exc)
+        outcome["status"] = "error"
+    return outcome
+
+
+def process(issues, workflow, workers: int, max_in_flight: int) -> Iterator[Tuple[int, int, dict]]:
+    """
+    Run issues through ``workflow`` on a pool of ``workers`` threads.
+
+    At most ``max_in_flight`` issues are submitted but not yet yielded;
+    results come out in input order.
+
+    Yields:
+        (line_number, end_offset, outcome) tuples
+    """
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as executor:
+        for line_number, offset, issue, error in issues:
+            if issue is None:
+                future = None
+                outcome = {"line": line_number, "status": "error", "error": error}
+            else:
+                future = executor.submit(_run_issue, workflow, line_number, issue)
+                outcome = None
+            pending.append((line_number, offset, future, outcome))
+            while len(pending) >= max_in_flight:
+                yield _resolve(pending.popleft())
+        while pending:
+            yield _resolve(pending.popleft())
+
+
+def _resolve(entry):
+    line_number, offset, future, outcome = entry
+    return line_number, offset, future.result() if future is not None else outcome
+
+
+def run_batch(input_path: str, output_path: str, workflow: str = "orchestrator", workers: int = 8,
+              max_in_flight: Optional[int] = None, checkpoint_every: int = 100,
+              resume: bool = True, progress_every: int = 1000, log=sys.stderr) -> dict:
+    """
+    Process ``input_path`` into ``output_path``, resuming from the checkpoint
+    when ``resume`` is set.
+
+    Returns:
+        A summary with counts of processed, succeeded and failed issues.
+    """
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    max_in_flight = max_in_flight or workers * 4
+    if max_in_flight < workers:
+        raise ValueError("max_in_flight must be at least workers")
+    workflow_fn = _workflow(workflow)
+    # A resumed run redoes the issues after the last checkpoint; only a
+    # ledger that outlives this process keeps it from refunding them twice
+    from shared_tools.refunds import require_durable_ledger
+    require_durable_ledger("batch processor")
+    checkpoint_path = checkpoint_path_for(output_path)
+
+    checkpoint = {"input_offset": 0, "output_offset": 0, "lines": 0}
+    if resume and os.path.exists(output_path):
+        saved = load_checkpoint(checkpoint_path)
+        # Only trust a checkpoint whose output is still on disk in full
+        if os.path.getsize(output_path) >= saved["output_offset"]:
+            checkpoint = saved
+    summary = {"processed": 0, "succeeded": 0, "failed": 0, "resumed_from_line": checkpoint["lines"]}
+
+    with open(output_path, "r+b" if checkpoint["output_offset"] else "wb") as output:
+        # Drop anything written after the last checkpoint; it is redone below
+        output.seek(checkpoint["output_offset"])
+        output.truncate()
+
+        started = time.perf_counter()
+        last_line = checkpoint["lines"]
+        last_offset = checkpoint["input_offset"]
+        since_checkpoint = 0
+        issues = read_issues(input_path, checkpoint["input_offset"], checkpoint["lines"])
+        for line_number, offset, outcome in process(issues, workflow_fn, workers, max_in_flight):
+            output.write(json.dumps(outcome, ensure_ascii=False).encode("utf-8") + b"\n")
+            summary["processed"] += 1
+            summary["succeeded" if outcome["status"] == "success" else "failed"] += 1
+            last_line, last_offset = line_number, offset
+            since_checkpoint += 1
+            if since_checkpoint >= checkpoint_every:
+                output.flush()
+                os.fsync(output.fileno())
+                save_checkpoint(checkpoint_path, {"input_offset": offset, "output_offset": output.tell(),
+                                                  "lines": line_number})
+                since_checkpoint = 0
+            if log is not None and progress_every and summary["processed"] % progress_every == 0:
+                rate = summary["processed"] / (time.perf_counter() - started)
+                print(f"processed {summary['processed']} issues (line {line_number}, {rate:.0f}/s)", file=log)
+
+        output.flush()
+        os.fsync(output.fileno())
+        save_checkpoint(checkpoint_path, {"input_offset": last_offset, "output_offset": output.tell(),
+                                          "lines": last_line})
+
+    summary["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+    return summary
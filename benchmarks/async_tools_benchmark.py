@@ -0,0 +1,89 @@
+"""
+Benchmark: blocking shared tools vs async tools on pooled clients
+
+Starts the in-process stub backend with artificial latency and performs the
+same batch of CRM lookups (cache cleared before each run):
+  1. blocking   - crm_lookup_tool called one after another, the way an event
+                  loop that calls sync tools inline has to serve them
+  2. async      - crm_lookup_tool_async fanned out with asyncio.gather over a
+                  backend pool of --pool-size connections
+and the raw GET /customers requests behind them, all issued at once:
+  3. admitted   - BackendPool.arequest_json, which lets --pool-size requests
+                  into the AsyncClient at a time
+  4. unbounded  - straight to the AsyncClient, every request queued in
+                  httpcore's connection pool (what the admission semaphore
+                  avoids: the pool rescans its waiting requests as each
+                  connection frees up)
+
+Usage:
+    python -m benchmarks.async_tools_benchmark --requests 200 --latency 0.02 --pool-size 50
+"""
+import argparse
+import asyncio
+import time
+
+from shared_tools import configure_backend, get_backend_pool
+from shared_tools.crm_tools import CRM_CACHE, crm_lookup_tool, crm_lookup_tool_async
+from shared_tools.stub_backend import StubBackendServer
+
+
+def run_blocking(customer_ids):
+    start = time.perf_counter()
+    for customer_id in customer_ids:
+        crm_lookup_tool(customer_id)
+    return time.perf_counter() - start
+
+
+async def run_async(customer_ids):
+    start = time.perf_counter()
+    await asyncio.gather(*(crm_lookup_tool_async(customer_id) for customer_id in customer_ids))
+    return time.perf_counter() - start
+
+
+async def run_raw(customer_ids, admitted: bool):
+    pool = get_backend_pool()
+    start = time.perf_counter()
+    if admitted:
+        await asyncio.gather(*(pool.arequest_json("crm", "GET", f"/customers/{customer_id}")
+                               for customer_id in customer_ids))
+    else:
+        client = pool.async_client("crm")
+        await asyncio.gather(*(client.get(f"/customers/{customer_id}") for customer_id in customer_ids))
+    elapsed = time.perf_counter() - start
+    await pool.aclose()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.02, help="Stub backend latency in seconds")
+    parser.add_argument("--pool-size", type=int, default=50)
+    args = parser.parse_args()
+
+    customer_ids = [f"C{i:05d}" for i in range(args.requests)]
+    with StubBackendServer(latency=args.latency) as server:
+        # A generous timeout, so the unbounded run finishes instead of timing out
+        configure_backend("crm", base_url=server.url, pool_size=args.pool_size, timeout=120)
+        try:
+            blocking = run_blocking(customer_ids)
+            # Every run must reach the backend, not the CRM cache
+            CRM_CACHE.clear()
+            pooled = asyncio.run(run_async(customer_ids))
+            admitted = asyncio.run(run_raw(customer_ids, admitted=True))
+            unbounded = asyncio.run(run_raw(customer_ids, admitted=False))
+        finally:
+            configure_backend("crm", base_url="")
+            get_backend_pool().close()
+
+    print(f"requests={args.requests} latency={args.latency * 1000:.0f}ms pool_size={args.pool_size}")
+    print(f"  blocking : {blocking:8.3f}s  {args.requests / blocking:10.1f} req/s")
+    print(f"  async    : {pooled:8.3f}s  {args.requests / pooled:10.1f} req/s")
+    print(f"  speedup  : {blocking / pooled:8.1f}x")
+    print("raw requests, all issued at once:")
+    print(f"  admitted : {admitted:8.3f}s  {args.requests / admitted:10.1f} req/s")
+    print(f"  unbounded: {unbounded:8.3f}s  {args.requests / unbounded:10.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark: backend round-trips of CRM and order-status lookups, single vs
+coalesced vs bulk
+
+Runs --lookups lookups of distinct customers and orders (so the CRM cache
+cannot help) against the in-process stub backend, which counts requests
+per route:
+  1. single    - one GET per lookup (coalescing off)
+  2. coalesced - the same single-ID calls from --threads threads, batched
+                 by the coalescers within their window
+  3. bulk      - crm_bulk_lookup_tool / order_status_bulk_tool with lists
+                 of --bulk-size IDs
+and, for the async tools, the same single and coalesced runs with
+--threads concurrent tasks.
+
+Usage:
+    python -m benchmarks.coalescing_benchmark --lookups 2000 --threads 32 --latency 0.005
+"""
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from shared_tools import configure_backend, get_backend_pool
+from shared_tools.crm_tools import (CRM_CACHE, CRM_COALESCER, crm_bulk_lookup_tool, crm_lookup_tool,
+                                    crm_lookup_tool_async)
+from shared_tools.policy_tools import ORDER_COALESCER, order_status_bulk_tool, order_status_tool, order_status_tool_async
+from shared_tools.stub_backend import StubBackendServer
+
+
+def _ids(lookups: int, run: int):
+    # Fresh IDs per run, so no run is served from an earlier run's cache
+    return [f"C{run}{index:06d}" for index in range(lookups)], [f"O-{run}{index:06d}" for index in range(lookups)]
+
+
+def _sync_run(customers, orders, threads: int, bulk_size: int = 0):
+    if bulk_size:
+        for start in range(0, len(customers), bulk_size):
+            crm_bulk_lookup_tool(customers[start:start + bulk_size])
+            order_status_bulk_tool(orders[start:start + bulk_size])
+        return
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(lambda pair: (crm_lookup_tool(pair[0]), order_status_tool(pair[1])), zip(customers, orders)))
+
+
+async def _async_run(customers, orders, threads: int):
+    limit = asyncio.Semaphore(threads)
+
+    async def one(customer_id, order_id):
+        async with limit:
+            await asyncio.gather(crm_lookup_tool_async(customer_id), order_status_tool_async(order_id))
+
+    await asyncio.gather(*(one(customer_id, order_id) for customer_id, order_id in zip(customers, orders)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=32, help="Concurrent callers")
+    parser.add_argument("--latency", type=float, default=0.005, help="Stub backend latency per call in seconds")
+    parser.add_argument("--window", type=float, default=0.002, help="Coalescing window in seconds")
+    parser.add_argument("--bulk-size", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    runs = [
+        ("single", "sync", 0.0, 0),
+        ("coalesced", "sync", args.window, 0),
+        ("bulk", "sync", 0.0, args.bulk_size),
+        ("single", "async", 0.0, 0),
+        ("coalesced", "async", args.window, 0),
+    ]
+    print(f"lookups={args.lookups} threads={args.threads} latency={args.latency * 1000:.1f}ms "
+          f"window={args.window * 1000:.1f}ms bulk_size={args.bulk_size}")
+    with StubBackendServer(latency=args.latency) as server:
+        for name in ("crm", "logistics"):
+            configure_backend(name, base_url=server.url, pool_size=args.threads)
+        try:
+            for run, (mode, flavour, window, bulk_size) in enumerate(runs, 1):
+                CRM_CACHE.clear()
+                CRM_COALESCER.max_wait = ORDER_COALESCER.max_wait = window
+                customers, orders = _ids(args.lookups, run)
+                server.round_trips.clear()
+                start = time.perf_counter()
+                if flavour == "sync":
+                    _sync_run(customers, orders, args.threads, bulk_size)
+                else:
+                    asyncio.run(_async_run(customers, orders, args.threads))
+                elapsed = time.perf_counter() - start
+                print(f"  {flavour:<5} {mode:<9} {elapsed:7.2f}s  {2 * args.lookups / elapsed:9.0f} lookups/s  "
+                      f"round-trips {sum(server.round_trips.values()):>6}  {json.dumps(dict(server.round_trips))}")
+        finally:
+            for name in ("crm", "logistics"):
+                configure_backend(name, base_url="")
+            get_backend_pool().close()
+    print(f"  coalescers: {json.dumps({c.name: c.stats()['average_batch_size'] for c in (CRM_COALESCER, ORDER_COALESCER)})}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark: BM25 policy index build, persistence, incremental refresh and query latency
+
+Generates --docs synthetic policy documents in a temporary directory and
+measures:
+  - full build from scratch and save to disk
+  - cold load of the persisted index
+  - no-op refresh (nothing changed) and incremental refresh after editing
+    --edits files
+  - top-k query latency (p50/p99) over --queries random queries, unfiltered
+    and restricted to the tier the query names (what policy_lookup_tool does)
+
+Usage:
+    python -m benchmarks.policy_index_benchmark --docs 5000 --queries 1000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from shared_tools.policy_index import PolicyIndex, tiers_of
+
+TOPICS = ("lost package", "damaged item", "late delivery", "wrong item", "refund",
+          "replacement", "coupon", "billing", "subscription", "return label",
+          "warranty", "price match", "gift card", "store pickup", "international shipping")
+TIERS = ("Gold Tier", "Silver Tier", "VIP", "Platinum")
+FILLER = (
+    "agents must verify the order number and confirm the shipping address before "
+    "offering any resolution the resolution is recorded in the crm and a confirmation "
+    "is sent by email within one business day exceptions require manager approval "
+    "carrier claims are filed automatically for insured shipments"
+).split()
+
+
+def write_corpus(root: str, count: int, rng: random.Random):
+    for i in range(count):
+        topic = rng.choice(TOPICS)
+        paragraphs = [f"# {topic.title()} policy {i}"]
+        for _ in range(rng.randint(3, 6)):
+            tier = rng.choice(TIERS)
+            words = rng.sample(FILLER, 20)
+            paragraphs.append(
+                f"For {tier} customers with a {topic}, offer a "
+                f"{rng.choice(('full refund', 'replacement', 'reship with express shipping', 'goodwill coupon'))}. "
+                + " ".join(words) + "."
+            )
+        with open(os.path.join(root, f"policy_{i:05d}.md"), "w", encoding="utf-8") as handle:
+            handle.write("\n\n".join(paragraphs))
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--edits", type=int, default=5)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as root:
+        write_corpus(root, args.docs, rng)
+
+        index = PolicyIndex(root)
+        summary, build_time = timed(index.load_or_build)
+        size_mb = os.path.getsize(index.index_path) / 1e6
+        print(f"docs={args.docs} chunks={len(index)} terms={len(index.postings)} index={size_mb:.1f}MB")
+        print(f"  full build + save     : {build_time * 1000:9.1f}ms  ({summary['added']} files)")
+
+        reloaded = PolicyIndex(root)
+        _, load_time = timed(reloaded.load)
+        print(f"  cold load             : {load_time * 1000:9.1f}ms")
+
+        _, noop_time = timed(reloaded.refresh)
+        print(f"  no-op refresh         : {noop_time * 1000:9.1f}ms")
+
+        for i in rng.sample(range(args.docs), args.edits):
+            with open(os.path.join(root, f"policy_{i:05d}.md"), "a", encoding="utf-8") as handle:
+                handle.write("\n\nGold Tier customers may also request a store credit instead of a refund.")
+        summary, refresh_time = timed(reloaded.refresh)
+        print(f"  incremental refresh   : {refresh_time * 1000:9.1f}ms  ({summary['updated']} files re-indexed)")
+
+        queries = [f"policy for {rng.choice(TOPICS)} for {rng.choice(TIERS)} customer" for _ in range(args.queries)]
+        for label, filtered in (("query", False), ("tier query", True)):
+            latencies = []
+            for query in queries:
+                start = time.perf_counter()
+                tier = next(iter(tiers_of(query))) if filtered else None
+                reloaded.search(query, top_k=args.top_k, tier=tier)
+                latencies.append((time.perf_counter() - start) * 1000)
+            latencies.sort()
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            print(f"  {label + ' p50 / p99':<22}: {statistics.median(latencies):9.2f}ms / {p99:.2f}ms  "
+                  f"(max {latencies[-1]:.2f}ms)")
+
+
+if __name__ == "__main__":
+    main()
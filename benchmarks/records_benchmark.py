@@ -0,0 +1,143 @@
+"""
+Benchmark: memory per record and hand-off cost of the slotted records vs
+the loose dicts and JSON strings they replace
+
+Memory (tracemalloc, bytes per record over --records records):
+  customers  - CRM dicts vs CustomerRecord vs CustomerTable columns
+  decisions  - triage decision dicts vs TriageDecision records
+  rankings   - ranked-solution dicts vs SolutionRanking records
+
+Hand-off, per issue over --issues generated issues (triage decision plus
+solution ranking passed from one step to the next):
+  json     - build dicts, json.dumps(indent=2), json.loads on the other side
+             (how the agent logic functions passed results)
+  records  - pass the records as objects
+  boundary - records serialized with to_json(), as the tool functions do
+
+Decisions and rankings are checked to serialize identically both ways.
+
+Usage:
+    python -m benchmarks.records_benchmark --records 100000 --issues 100000
+"""
+import argparse
+import json
+import random
+import time
+import tracemalloc
+
+from shared_tools.records import CustomerRecord, CustomerTable
+from solution_agent.ranking import POLICY_FEATURES, rank
+from triage_agent.agent import _triage_decision
+
+STATUSES = ("Silver Tier", "Gold Tier", "VIP", "Platinum", "Bronze")
+ISSUE_TYPES = ("damaged", "wrong_item", "late_delivery")
+POLICIES = tuple(f"Policy: eligible for a {phrase}." for phrases in POLICY_FEATURES.values() for phrase in phrases) + (
+    "Policy: store credit only.",)
+
+
+def legacy_triage_decision(customer_ltv, customer_status, severe_dissatisfaction) -> dict:
+    """The triage rules as they built a fresh dict per call."""
+    high_value_customer = customer_ltv > 500 or customer_status in ("Gold Tier", "VIP", "Platinum")
+    if high_value_customer and severe_dissatisfaction:
+        return {"escalate": True, "priority": "HIGH",
+                "reason": f"High-value {customer_status} customer with severe dissatisfaction detected",
+                "recommended_actions": ["immediate_response", "manager_review", "retention_measures"]}
+    elif high_value_customer:
+        return {"escalate": True, "priority": "MEDIUM",
+                "reason": f"High-value {customer_status} customer requires attention",
+                "recommended_actions": ["priority_handling", "personalized_response"]}
+    elif severe_dissatisfaction:
+        return {"escalate": True, "priority": "MEDIUM", "reason": "Severe customer dissatisfaction detected",
+                "recommended_actions": ["empathetic_response", "solution_focused"]}
+    return {"escalate": False, "priority": "LOW",
+            "reason": "Standard issue, can be handled through normal channels",
+            "recommended_actions": ["standard_support_process"]}
+
+
+def build_issues(count: int, seed: int) -> list:
+    rng = random.Random(seed)
+    return [(round(rng.uniform(0, 1000), 2), rng.choice(STATUSES), rng.random() < 0.3, rng.choice(ISSUE_TYPES),
+             rng.choice(POLICIES), round(rng.uniform(5, 500), 2), f"O-{index}") for index in range(count)]
+
+
+def bytes_per_item(build, count: int) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del held
+    return (after - before) / count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--issues", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args(argv)
+
+    issues = build_issues(max(args.records, args.issues), args.seed)
+    # CRM payloads as they arrive off the wire, one object per customer
+    crm_json = [json.dumps({"ltv": ltv, "status": status, "recent_order_count": index % 20})
+                for index, (ltv, status, *_) in enumerate(issues[:args.records])]
+    sample = issues[:args.records]
+
+    print(f"memory per record ({args.records} records):")
+    rows = [
+        ("customers", lambda: [json.loads(payload) for payload in crm_json],
+         lambda: [CustomerRecord.from_dict(json.loads(payload)) for payload in crm_json],
+         lambda: CustomerTable(json.loads(payload) for payload in crm_json)),
+        ("decisions", lambda: [legacy_triage_decision(ltv, status, severe) for ltv, status, severe, *_ in sample],
+         lambda: [_triage_decision(ltv, status, severe) for ltv, status, severe, *_ in sample], None),
+        ("rankings", lambda: [rank(status, issue_type, policy, value, order_id).to_dict()
+                              for _, status, _, issue_type, policy, value, order_id in sample],
+         lambda: [rank(status, issue_type, policy, value, order_id)
+                  for _, status, _, issue_type, policy, value, order_id in sample], None),
+    ]
+    for name, as_dicts, as_records, as_table in rows:
+        # Parsing builds throwaway dicts; measure what is left held afterwards
+        line = f"  {name:<10} dicts {bytes_per_item(as_dicts, args.records):7.1f} B   " \
+               f"records {bytes_per_item(as_records, args.records):7.1f} B"
+        if as_table is not None:
+            line += f"   table {bytes_per_item(as_table, args.records):7.1f} B"
+        print(line)
+
+    work = issues[:args.issues]
+    for ltv, status, severe, issue_type, policy, value, order_id in work[:2000]:
+        assert _triage_decision(ltv, status, severe).to_dict() == legacy_triage_decision(ltv, status, severe)
+        assert json.loads(rank(status, issue_type, policy, value, order_id).to_json()) == \
+            rank(status, issue_type, policy, value, order_id).to_dict()
+
+    def handoff_json():
+        for ltv, status, severe, issue_type, policy, value, order_id in work:
+            decision = json.loads(json.dumps(legacy_triage_decision(ltv, status, severe), indent=2))
+            if decision["escalate"]:
+                ranking = json.loads(json.dumps(rank(status, issue_type, policy, value, order_id).to_dict(), indent=2))
+                ranking["recommended_solution"]["action"]
+
+    def handoff_records():
+        for ltv, status, severe, issue_type, policy, value, order_id in work:
+            decision = _triage_decision(ltv, status, severe)
+            if decision.escalate:
+                rank(status, issue_type, policy, value, order_id).recommended.action
+
+    def handoff_boundary():
+        for ltv, status, severe, issue_type, policy, value, order_id in work:
+            decision = _triage_decision(ltv, status, severe)
+            decision.to_json(indent=2)
+            if decision.escalate:
+                rank(status, issue_type, policy, value, order_id).to_json(indent=2)
+
+    print(f"hand-off per issue ({args.issues} issues, decisions and rankings identical):")
+    timings = {}
+    for name, run in (("json", handoff_json), ("records", handoff_records), ("boundary", handoff_boundary)):
+        start = time.perf_counter()
+        run()
+        timings[name] = time.perf_counter() - start
+        print(f"  {name:<9} {timings[name] * 1000:8.1f}ms  {args.issues / timings[name]:9.0f} issues/s  "
+              f"{timings['json'] / timings[name]:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Benchmark: model calls saved by the response cache on a stream with retries
+and reworded re-sends
+
+Drives triage_agent.root_agent through an ADK Runner with the scripted
+model from session_soak (no network), against the stub CRM backend. Every
+request opens a new session, as retries and dashboards do. A share of the
+requests (--duplicate-rate) re-sends an earlier request, half of them
+verbatim and half reworded. During the run, --changes customer records are
+updated in the CRM. After each update, entries built on the old record must
+not be served.
+
+Runs the stream once with the cache off and once with it on. For each run it
+reports model calls, tool calls and wall time, plus the cache's own stats.
+
+Usage:
+    python -m benchmarks.response_cache_benchmark --requests 2000 --customers 200
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from google.genai import types
+
+from benchmarks.session_soak import ScriptedModel
+from shared_tools import configure_backend
+from shared_tools.crm_tools import CRM_CACHE
+from shared_tools.response_cache import ResponseCache
+from shared_tools.sessions import BoundedSessionService, create_runner
+from shared_tools.stub_backend import StubBackendServer
+from triage_agent.agent import make_triage_decision, root_agent
+
+APP_NAME = "triage_agent"
+ISSUES = ("a damaged item", "a late delivery", "a missing refund", "being charged twice")
+REWORDINGS = (
+    "{text}.",
+    "{text}!!",
+    "Re: {text}",
+    "{lower_first}, please check",
+)
+
+
+class CountingModel(ScriptedModel):
+    """Scripted model that counts its calls."""
+
+    calls: int = 0
+
+    async def generate_content_async(self, llm_request, stream: bool = False):
+        self.calls += 1
+        async for response in super().generate_content_async(llm_request, stream):
+            yield response
+
+
+def request_stream(requests: int, customers: int, duplicate_rate: float, changes: int, seed: int):
+    """Yield ("request", text) and ("change", customer_id) events."""
+    rng = random.Random(seed)
+    sent = []
+    change_at = set(rng.sample(range(requests // 4, requests), min(changes, requests - requests // 4)))
+    for index in range(requests):
+        if index in change_at and sent:
+            yield "change", rng.choice(sent)[0]
+        if sent and rng.random() < duplicate_rate:
+            customer_id, text = rng.choice(sent)
+            if rng.random() < 0.5:
+                template = rng.choice(REWORDINGS)
+                text = template.format(text=text, lower_first=text[0].lower() + text[1:])
+        else:
+            customer_id = f"C{10000 + rng.randrange(customers)}"
+            text = f"Customer {customer_id} with transcript T12345 is complaining about {rng.choice(ISSUES)}"
+            sent.append((customer_id, text))
+        yield "request", text
+
+
+async def run(cache: ResponseCache, events, server: StubBackendServer) -> dict:
+    model = CountingModel()
+    agent = root_agent.clone(update={"model": model, "before_model_callback": None, **cache.callbacks(make_triage_decision)})
+    runner = create_runner(agent, APP_NAME, BoundedSessionService(max_sessions=100), auto_create_session=True)
+    tool_calls = 0
+    requests = 0
+    start = time.perf_counter()
+    for kind, value in events:
+        if kind == "change":
+            record = server.fixtures["customers"].setdefault(value, {"ltv": 100, "status": "Silver Tier",
+                                                                     "recent_order_count": 1})
+            record["ltv"] += 1000
+            continue
+        requests += 1
+        message = types.Content(role="user", parts=[types.Part(text=value)])
+        async for event in runner.run_async(user_id="dashboard", session_id=f"request-{requests}",
+                                            new_message=message):
+            tool_calls += len(event.get_function_calls())
+    await runner.close()
+    return {"requests": requests, "model_calls": model.calls, "tool_calls": tool_calls,
+            "seconds": round(time.perf_counter() - start, 2)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--customers", type=int, default=200)
+    parser.add_argument("--duplicate-rate", type=float, default=0.5)
+    parser.add_argument("--changes", type=int, default=20, help="CRM record updates during the run")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    print(f"requests={args.requests} customers={args.customers} duplicate_rate={args.duplicate_rate} "
+          f"changes={args.changes} seed={args.seed}")
+    for name, cache in (("off", ResponseCache(enabled=False)), ("on", ResponseCache())):
+        events = request_stream(args.requests, args.customers, args.duplicate_rate, args.changes, args.seed)
+        with StubBackendServer() as server:
+            configure_backend("crm", base_url=server.url)
+            CRM_CACHE.clear()
+            try:
+                result = asyncio.run(run(cache, events, server))
+            finally:
+                configure_backend("crm", base_url="")
+        print(f"  cache {name:<4} {json.dumps(result)}")
+        if cache.enabled:
+            stats = cache.stats()
+            stats.pop("agents")
+            print(f"             {json.dumps(stats)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Benchmark: queue time of VIP escalations behind a bulk backlog, first come
+first served vs the priority scheduler
+
+A backlog of --bulk routine issues (Silver customers with calm transcripts,
+plus every --gold-every-th one from a Gold customer) is queued at once;
+then VIP customers with severe transcripts call in at --vip-rate per second
+for --duration seconds. Every issue is classified by the orchestrator's
+triage_priority against the stub backend (HIGH/MEDIUM/LOW plus LTV), and
+every job holds a worker for --service seconds, standing in for a workflow
+waiting on its backends. Both runs use --workers workers, which the backlog
+keeps saturated:
+  1. fifo     - one lane, no limits: jobs start in arrival order
+  2. priority - PriorityScheduler lanes (weights 8:3:1, LOW limited to half
+                the workers, aging after --aging seconds)
+
+Queue time (submit to start) is reported per lane: p50/p99/max and SLA
+breaches, from the scheduler's own stats() in the priority run. Exits
+non-zero if the priority run's HIGH p99 exceeds --high-sla.
+
+Usage:
+    python -m benchmarks.scheduler_benchmark --bulk 3000 --workers 16 --service 0.02 --vip-rate 20
+"""
+import argparse
+import itertools
+import threading
+import time
+
+from customer_rescue_orchestrator.agent import triage_priority
+from shared_tools import configure_backend
+from shared_tools.backends import BACKEND_NAMES
+from shared_tools.records import Priority
+from shared_tools.scheduler import LANES, PriorityScheduler
+from shared_tools.stub_backend import StubBackendServer
+
+CALM = "Customer: My order arrived late.\nAgent: Sorry about that, I have updated the delivery notes."
+SEVERE = "Customer: This is unacceptable and I am furious. I want to cancel my account."
+
+
+def build_fixtures(bulk: int, vips: int, gold_every: int):
+    customers, transcripts, backlog, live = {}, {}, [], []
+    for index in range(bulk):
+        gold = gold_every and index % gold_every == 0
+        customers[f"B{index}"] = {"ltv": 900 if gold else 100, "status": "Gold Tier" if gold else "Silver Tier",
+                                  "recent_order_count": 2}
+        transcripts[f"TB{index}"] = CALM
+        backlog.append({"customer_id": f"B{index}", "transcript_id": f"TB{index}"})
+    for index in range(vips):
+        customers[f"V{index}"] = {"ltv": 5000, "status": "VIP", "recent_order_count": 12}
+        transcripts[f"TV{index}"] = SEVERE
+        live.append({"customer_id": f"V{index}", "transcript_id": f"TV{index}"})
+    return customers, transcripts, backlog, live
+
+
+def run(scheduler: PriorityScheduler, backlog, live, service: float, vip_rate: float, fifo: bool) -> dict:
+    """Queue the backlog, feed the live calls at vip_rate; returns queue times per classified lane."""
+    waits = {lane: [] for lane in LANES}
+    lock = threading.Lock()
+
+    def job(lane, submitted):
+        started = time.monotonic()
+        with lock:
+            waits[lane].append(started - submitted)
+        time.sleep(service)
+
+    def submit(classified):
+        lane, ltv = classified
+        if fifo:
+            return scheduler.submit(job, lane, time.monotonic(), priority=Priority.LOW)
+        return scheduler.submit(job, lane, time.monotonic(), priority=lane, ltv=ltv)
+
+    futures = [submit(classified) for classified in backlog]
+    for classified in live:
+        futures.append(submit(classified))
+        time.sleep(1 / vip_rate)
+    for future in futures:
+        future.result()
+    return waits
+
+
+def percentile(ordered, fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bulk", type=int, default=3000, help="Routine issues queued up front")
+    parser.add_argument("--gold-every", type=int, default=10, help="Every n-th backlog issue is a Gold customer")
+    parser.add_argument("--vip-rate", type=float, default=20.0, help="VIP escalations per second")
+    parser.add_argument("--duration", type=float, default=3.0, help="Seconds of VIP arrivals")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--service", type=float, default=0.02, help="Seconds each job holds a worker")
+    parser.add_argument("--aging", type=float, default=3.0, help="Seconds before a job moves up a lane")
+    parser.add_argument("--high-sla", type=float, default=0.25, help="HIGH queue-time target in seconds")
+    parser.add_argument("--latency", type=float, default=0.002, help="Stub backend latency per call in seconds")
+    args = parser.parse_args(argv)
+
+    customers, transcripts, backlog, live = build_fixtures(args.bulk, int(args.vip_rate * args.duration),
+                                                           args.gold_every)
+    with StubBackendServer(latency=args.latency, customers=customers, transcripts=transcripts) as server:
+        for name in BACKEND_NAMES:
+            configure_backend(name, base_url=server.url)
+        backlog = [triage_priority(issue) for issue in backlog]
+        live = [triage_priority(issue) for issue in live]
+
+    counts = {lane: sum(1 for classified, _ in itertools.chain(backlog, live) if classified is lane) for lane in LANES}
+    capacity = args.workers / args.service
+    print(f"issues: {', '.join(f'{lane.value}={counts[lane]}' for lane in LANES)}   workers={args.workers} "
+          f"service={args.service * 1000:.0f}ms (capacity {capacity:.0f}/s)   VIP rate {args.vip_rate:.0f}/s "
+          f"for {args.duration:.0f}s")
+    slas = {Priority.HIGH: args.high_sla, Priority.MEDIUM: 10 * args.high_sla, Priority.LOW: 100 * args.high_sla}
+
+    high_p99 = None
+    for mode in ("fifo", "priority"):
+        fifo = mode == "fifo"
+        if fifo:
+            scheduler = PriorityScheduler(workers=args.workers, aging=float("inf"), ltv_scale=0, slas=slas)
+        else:
+            scheduler = PriorityScheduler(workers=args.workers, limits={Priority.LOW: max(1, args.workers // 2)},
+                                          aging=args.aging, slas=slas)
+        started = time.perf_counter()
+        with scheduler:
+            waits = run(scheduler, backlog, live, args.service, args.vip_rate, fifo)
+        elapsed = time.perf_counter() - started
+        print(f"{mode:<9} {elapsed:6.2f}s total")
+        # Queue times by triaged lane (the priority run's scheduler reports the same per lane)
+        stats = scheduler.stats()["lanes"]
+        for lane in LANES:
+            ordered = sorted(waits[lane])
+            if not ordered:
+                continue
+            breaches = sum(1 for wait in ordered if wait > slas[lane])
+            line = f"  {lane.value:<6} n={len(ordered):<5} p50 {percentile(ordered, 0.5) * 1000:8.1f}ms  " \
+                   f"p99 {percentile(ordered, 0.99) * 1000:8.1f}ms  max {ordered[-1] * 1000:8.1f}ms  " \
+                   f"SLA {slas[lane] * 1000:.0f}ms breached by {breaches}"
+            if not fifo:
+                line += f"  (promoted {stats[lane.value]['promoted']})"
+            print(line)
+        if not fifo:
+            high_p99 = stats[Priority.HIGH.value]["queue_seconds"]["p99"]
+
+    if high_p99 > args.high_sla:
+        raise SystemExit(f"HIGH p99 queue time {high_p99 * 1000:.1f}ms exceeds the {args.high_sla * 1000:.0f}ms SLA")
+    print(f"HIGH p99 queue time {high_p99 * 1000:.1f}ms within the {args.high_sla * 1000:.0f}ms SLA under saturation")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Soak test: session memory of the triage agent under a long stream of turns
+
+Drives triage_agent.root_agent through an ADK Runner, with a scripted
+stand-in for the model (CRM lookup -> transcript retrieval -> triage
+decision -> final answer, no network), for --requests turns spread over
+--users returning customers. Each customer keeps talking in the same
+session, so history accumulates the way it does in ADK Web.
+
+Runs the same stream against:
+  1. memory  - ADK's InMemorySessionService (keeps every event forever)
+  2. bounded - shared_tools.sessions.BoundedSessionService
+and reports RSS along the way and its growth over the second half of the
+run, which should be flat for the bounded store.
+
+Usage:
+    python -m benchmarks.session_soak --requests 10000 --users 2000
+"""
+import argparse
+import asyncio
+import gc
+import json
+import random
+import re
+import subprocess
+import sys
+import time
+
+from google.adk.models import BaseLlm, LlmResponse
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from shared_tools.sessions import BoundedSessionService, create_runner
+from triage_agent.agent import root_agent
+
+APP_NAME = "triage_agent"
+ANALYSIS = ("Based on the CRM record and the call transcript, the customer is {status} with a lifetime "
+            "value of ${ltv}. The transcript shows {sentiment}. Recommended next step: {step}. ") * 3
+USAGE = types.GenerateContentResponseUsageMetadata(prompt_token_count=0, candidates_token_count=0,
+                                                   total_token_count=0)
+
+
+class ScriptedModel(BaseLlm):
+    """Plays the triage agent's tool sequence without calling a model."""
+
+    model: str = "scripted-triage"
+
+    async def generate_content_async(self, llm_request, stream: bool = False):
+        calls = [part.function_response for content in llm_request.contents
+                 for part in content.parts or () if part.function_response]
+        latest = llm_request.contents[-1]
+        if latest.role == "user" and not any(part.function_response for part in latest.parts or ()):
+            text = " ".join(part.text for part in latest.parts if part.text)
+            customer_id = re.search(r"C\d+", text).group(0)
+            yield _call("crm_lookup_tool", customer_id=customer_id)
+            return
+        last = calls[-1]
+        if last.name == "crm_lookup_tool":
+            yield _call("transcript_retrieval_tool", transcript_id="T12345")
+        elif last.name == "transcript_retrieval_tool":
+            customer = next(call.response for call in reversed(calls) if call.name == "crm_lookup_tool")
+            yield _call("make_triage_decision", customer_ltv=customer.get("ltv", 0),
+                        customer_status=customer.get("status", "unknown"),
+                        transcript_sentiment=str(last.response)[:200])
+        else:
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=ANALYSIS.format(
+                status="Gold Tier", ltv=1200, sentiment="severe dissatisfaction", step="escalate"))]),
+                usage_metadata=USAGE)
+
+
+def _call(name: str, **args) -> LlmResponse:
+    return LlmResponse(content=types.Content(role="model", parts=[
+        types.Part(function_call=types.FunctionCall(name=name, args=args))]), usage_metadata=USAGE)
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/status", encoding="ascii") as handle:
+        for line in handle:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+async def soak(session_service, requests: int, users: int, seed: int, samples: int = 10):
+    agent = root_agent.clone(update={"model": ScriptedModel(), "before_model_callback": None})
+    runner = create_runner(agent, APP_NAME, session_service, auto_create_session=True)
+    rng = random.Random(seed)
+    rss = []
+    every = max(1, requests // samples)
+    start = time.perf_counter()
+    for index in range(requests):
+        user = rng.randrange(users)
+        message = types.Content(role="user", parts=[types.Part(
+            text=f"Customer C{10000 + user} is complaining about order O-{index:06d}, transcript T12345")])
+        async for _ in runner.run_async(user_id=f"user-{user}", session_id=f"session-{user}", new_message=message):
+            pass
+        if (index + 1) % every == 0:
+            gc.collect()
+            rss.append(round(_rss_mb(), 1))
+    await runner.close()
+    return rss, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=10_000)
+    parser.add_argument("--users", type=int, default=2000, help="Distinct returning customers (sessions)")
+    parser.add_argument("--max-sessions", type=int, default=500)
+    parser.add_argument("--store", choices=("both", "memory", "bounded"), default="both")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--quiet", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    stores = {
+        "memory": InMemorySessionService,
+        "bounded": lambda: BoundedSessionService(max_sessions=args.max_sessions),
+    }
+    if args.store == "both":
+        # One interpreter per store, so each starts from a clean heap
+        print(f"requests={args.requests} users={args.users} max_sessions={args.max_sessions} seed={args.seed}")
+        for name in stores:
+            subprocess.run([sys.executable, "-m", "benchmarks.session_soak",
+                            *(argv if argv is not None else sys.argv[1:]), "--store", name, "--quiet"], check=True)
+        return
+    if not args.quiet:
+        print(f"requests={args.requests} users={args.users} max_sessions={args.max_sessions} seed={args.seed}")
+    service = stores[args.store]()
+    baseline = _rss_mb()
+    rss, elapsed = asyncio.run(soak(service, args.requests, args.users, args.seed))
+    half = len(rss) // 2
+    growth = (rss[-1] - rss[half - 1]) * 1024 / (args.requests - args.requests * half // len(rss))
+    print(f"  {args.store:<8} {elapsed:7.1f}s  rss {baseline:7.1f}MB -> {rss[-1]:7.1f}MB  "
+          f"second-half growth {growth:6.2f}KB/request  samples {rss}")
+    if isinstance(service, BoundedSessionService):
+        print(f"           {json.dumps(service.stats())}")
+
+
+if __name__ == "__main__":
+    main()
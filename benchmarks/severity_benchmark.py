@@ -0,0 +1,104 @@
+"""
+Benchmark: compiled Aho-Corasick severity scoring vs per-phrase substring scans
+
+Builds a synthetic lexicon of --phrases phrases (the shared dissatisfaction
+lexicon plus generated two/three-word phrases) and --transcripts transcripts
+of roughly --transcript-kb KB each, then compares:
+  1. naive    - any(phrase in transcript.lower() for phrase in lexicon), the
+                pattern previously copied into every triage path
+  2. compiled - SeverityScorer.score, one pass over the lowercased transcript
+
+Both must agree on which transcripts are severe.
+
+Usage:
+    python -m benchmarks.severity_benchmark --phrases 1000 --transcript-kb 8
+"""
+import argparse
+import random
+import time
+
+from shared_tools.severity import DISSATISFACTION_LEXICON, SeverityScorer
+
+# Filler vocabulary for transcripts
+WORDS = (
+    "order refund package delivery late broken missing support agent manager "
+    "call wait hours days week replacement charge billing account cancel "
+    "subscription item box tracking driver store online website app email "
+    "phone slow again still nobody promised told waiting wrong size color "
+    "return label"
+).split()
+
+# Vocabulary for generated lexicon phrases. It does not overlap the filler,
+# so only the seeded severe phrases match and the naive scan cannot stop
+# early on calm transcripts (its worst case, and the common one).
+LEXICON_WORDS = (
+    "terrible awful rude useless disappointed frustrated ridiculous unacceptable "
+    "scam lawyer chargeback complaint escalate supervisor incompetent lied "
+    "disgusting pathetic outrageous horrible nightmare joke insulting ignored"
+).split()
+
+
+def build_lexicon(size: int, rng: random.Random) -> dict:
+    lexicon = dict(DISSATISFACTION_LEXICON)
+    while len(lexicon) < size:
+        phrase = " ".join(rng.choice(LEXICON_WORDS) for _ in range(rng.randint(2, 4)))
+        lexicon.setdefault(phrase, 1.0)
+    return lexicon
+
+
+def build_transcripts(count: int, size_kb: float, rng: random.Random) -> list:
+    transcripts = []
+    for i in range(count):
+        words = []
+        length = 0
+        while length < size_kb * 1024:
+            word = rng.choice(WORDS)
+            words.append(word.upper() if rng.random() < 0.05 else word)
+            length += len(word) + 1
+        if i % 2:
+            words.insert(rng.randrange(len(words)), "furious")
+        transcripts.append("Customer: " + " ".join(words))
+    return transcripts
+
+
+def naive_severe(transcript: str, phrases: list) -> bool:
+    return any(phrase in transcript.lower() for phrase in phrases)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--phrases", type=int, default=1000)
+    parser.add_argument("--transcripts", type=int, default=200)
+    parser.add_argument("--transcript-kb", type=float, default=8.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    lexicon = build_lexicon(args.phrases, rng)
+    phrases = list(lexicon)
+    transcripts = build_transcripts(args.transcripts, args.transcript_kb, rng)
+
+    start = time.perf_counter()
+    scorer = SeverityScorer(lexicon)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    naive = [naive_severe(t, phrases) for t in transcripts]
+    naive_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    compiled = [scorer.score(t).severe for t in transcripts]
+    compiled_time = time.perf_counter() - start
+
+    assert naive == compiled, "compiled scorer disagrees with naive substring scan"
+
+    total_kb = sum(len(t) for t in transcripts) / 1024
+    print(f"phrases={len(phrases)} transcripts={len(transcripts)} total={total_kb:.0f}KB "
+          f"(automaton build {build_time * 1000:.1f}ms, {len(scorer.matcher._transitions)} states)")
+    print(f"  naive    : {naive_time * 1000:9.1f}ms  {total_kb / naive_time:10.0f} KB/s")
+    print(f"  compiled : {compiled_time * 1000:9.1f}ms  {total_kb / compiled_time:10.0f} KB/s")
+    print(f"  speedup  : {naive_time / compiled_time:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark: compiled rule-table solution ranking vs the original if-chain
+
+Compares, over --issues generated issues (tiers x issue types x policy
+snippets from the local policy corpus and a few synthetic ones):
+  1. legacy   - the original rank_solutions body (nested if-chains that
+                lowercase the status and policy text per check, then
+                json.dumps(indent=2))
+  2. tool     - solution_agent.agent.rank_solutions (compiled table, compact JSON)
+  3. batch    - solution_agent.ranking.rank_batch (structured results, no JSON)
+
+All three must produce the same rankings. Solution IDs are compared after
+renumbering by rank: the legacy code numbered a premium reship without a
+full refund as solution 2, giving two solutions with ID 2.
+
+Usage:
+    python -m benchmarks.solution_ranking_benchmark --issues 50000
+"""
+import argparse
+import json
+import random
+import time
+
+from shared_tools.policy_tools import policy_lookup_tool
+from solution_agent.agent import rank_solutions
+from solution_agent.ranking import rank_batch
+
+STATUSES = ("Silver Tier", "Gold Tier", "VIP", "Platinum", "gold tier member", "Super VIP", "")
+ISSUE_TYPES = ("damaged", "wrong_item", "late_delivery", "lost_package", "billing")
+SYNTHETIC_POLICIES = (
+    "No matching policy found.",
+    "Customers may request a Replacement within 30 days.",
+    "We will RESHIP the order at no cost.",
+    "A full refund or replacement is available for damaged goods.",
+)
+
+
+def legacy_rank_solutions(customer_status: str, issue_type: str, policy_text: str, order_value: float = 100.0) -> str:
+    ranked_solutions = []
+    if "gold tier" in customer_status.lower() or "vip" in customer_status.lower():
+        if "full refund" in policy_text.lower():
+            ranked_solutions.append({
+                "solution_id": 1,
+                "action": "full_refund",
+                "params": {"order_id": "O-9987", "amount": order_value},
+                "explanation": f"Customer is {customer_status} - immediate full refund is appropriate",
+                "priority": "HIGH"
+            })
+        if "replacement" in policy_text.lower() or "reship" in policy_text.lower():
+            ranked_solutions.append({
+                "solution_id": 2,
+                "action": "reship_express",
+                "params": {"order_id": "O-9987"},
+                "explanation": "Premium customer gets expedited replacement",
+                "priority": "HIGH"
+            })
+    else:
+        if "replacement" in policy_text.lower():
+            ranked_solutions.append({
+                "solution_id": 1,
+                "action": "reship_standard",
+                "params": {"order_id": "O-9987"},
+                "explanation": "Standard replacement with regular shipping",
+                "priority": "MEDIUM"
+            })
+    ranked_solutions.append({
+        "solution_id": len(ranked_solutions) + 1,
+        "action": "generate_coupon",
+        "params": {"value": 25 if "gold" in customer_status.lower() else 15, "unit": "percent"},
+        "explanation": f"Goodwill gesture appropriate for {customer_status} customer",
+        "priority": "LOW"
+    })
+    return json.dumps({
+        "ranked_solutions": ranked_solutions,
+        "recommended_solution": ranked_solutions[0] if ranked_solutions else None
+    }, indent=2)
+
+
+def renumbered(ranking_json: str) -> dict:
+    ranking = json.loads(ranking_json)
+    for position, solution in enumerate(ranking["ranked_solutions"], start=1):
+        solution["solution_id"] = position
+    ranking["recommended_solution"] = ranking["ranked_solutions"][0]
+    return ranking
+
+
+def build_issues(count: int, seed: int) -> list:
+    policies = [policy_lookup_tool(f"policy for {issue.replace('_', ' ')} for {status} customer")
+                for issue in ISSUE_TYPES for status in ("Silver Tier", "Gold Tier")]
+    policies.extend(SYNTHETIC_POLICIES)
+    rng = random.Random(seed)
+    return [
+        {
+            "customer_status": rng.choice(STATUSES),
+            "issue_type": rng.choice(ISSUE_TYPES),
+            "policy_text": rng.choice(policies),
+            "order_value": round(rng.uniform(5, 500), 2),
+        }
+        for _ in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--issues", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+
+    issues = build_issues(args.issues, args.seed)
+    argument_tuples = [(i["customer_status"], i["issue_type"], i["policy_text"], i["order_value"]) for i in issues]
+
+    start = time.perf_counter()
+    legacy = [legacy_rank_solutions(*arguments) for arguments in argument_tuples]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tool = [rank_solutions(*arguments) for arguments in argument_tuples]
+    tool_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = rank_batch(issues)
+    batch_time = time.perf_counter() - start
+
+    for old, new, structured in zip(legacy, tool, batch):
+        assert renumbered(old) == json.loads(new) == structured.to_dict(), "compiled ranking disagrees with legacy"
+
+    print(f"issues={args.issues} (all rankings identical)")
+    for name, elapsed in (("legacy", legacy_time), ("tool", tool_time), ("batch", batch_time)):
+        print(f"  {name:<7}: {elapsed * 1000:9.1f}ms  {args.issues / elapsed:10.0f} issues/s  "
+              f"{legacy_time / elapsed:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
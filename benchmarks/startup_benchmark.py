@@ -0,0 +1,95 @@
+"""
+Benchmark: cold-start import time of the agent packages and worker entry points
+
+Each scenario runs in a fresh interpreter under ``python -X importtime`` and
+reports the wall time of the statement, whether google.adk was loaded, and
+the modules with the largest self import time. Scenarios:
+  - worker paths (batch CLI, orchestrator and swarm workflow functions,
+    shared_tools) must not load google.adk at all;
+  - ``import <agent package>`` is what ADK Web discovery does per agent;
+  - ``<agent package>.root_agent`` is the first build of the agent, where
+    google.adk is loaded.
+
+With --budget-ms, exits non-zero when a worker path takes longer or loads
+google.adk, so the check can guard cold start of autoscaled workers.
+
+Usage:
+    python -m benchmarks.startup_benchmark --repeat 5 --top 5
+    python -m benchmarks.startup_benchmark --budget-ms 400
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+AGENTS = ("triage_agent", "solution_agent", "action_agent",
+          "customer_experience_rescue_swarm", "customer_rescue_orchestrator")
+
+# name -> (statement, is a worker path that must stay free of google.adk)
+SCENARIOS = {
+    "main (batch CLI)": ("import main", True),
+    "orchestrator workflow": ("from customer_rescue_orchestrator.agent import orchestrate_customer_issue", True),
+    "swarm workflow": ("from customer_experience_rescue_swarm.agent import process_customer_issue", True),
+    "shared_tools": ("import shared_tools", True),
+    **{f"import {agent}": (f"import {agent}", True) for agent in AGENTS},
+    **{f"{agent}.root_agent": (f"import {agent}; {agent}.root_agent", False) for agent in AGENTS},
+}
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+exec({statement!r})
+elapsed = time.perf_counter() - start
+print("RESULT", elapsed, int("google.adk.tools" in sys.modules or "google.genai" in sys.modules), file=sys.stderr)
+"""
+
+
+def measure(statement: str):
+    """Run ``statement`` in a fresh interpreter; return (seconds, adk_loaded, {module: self_us})."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")])))
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", PROBE.format(statement=statement)],
+                               cwd=root, env=env, capture_output=True, text=True)
+    if completed.returncode:
+        raise SystemExit(f"{statement!r} failed:\n{completed.stderr[-2000:]}")
+    self_times = {}
+    elapsed = adk_loaded = None
+    for line in completed.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            self_us, _, module = line[len("import time:"):].split("|", 2)
+            if self_us.strip().isdigit():
+                self_times[module.strip()] = int(self_us)
+        elif line.startswith("RESULT "):
+            _, seconds, loaded = line.split()
+            elapsed, adk_loaded = float(seconds), loaded == "1"
+    return elapsed, adk_loaded, self_times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per scenario (median reported)")
+    parser.add_argument("--top", type=int, default=3, help="Slowest modules (self time) listed per scenario")
+    parser.add_argument("--budget-ms", type=float, help="Fail if a worker path is slower or loads google.adk")
+    args = parser.parse_args(argv)
+
+    failures = []
+    print(f"{'scenario':<45} {'median':>9}  {'google.adk':<10} slowest modules (self time)")
+    for name, (statement, worker) in SCENARIOS.items():
+        runs = [measure(statement) for _ in range(args.repeat)]
+        elapsed = statistics.median(run[0] for run in runs)
+        adk_loaded = any(run[1] for run in runs)
+        slowest = sorted(runs[-1][2].items(), key=lambda item: -item[1])[:args.top]
+        modules = ", ".join(f"{module} {self_us / 1000:.0f}ms" for module, self_us in slowest)
+        print(f"{name:<45} {elapsed * 1000:7.1f}ms  {'loaded' if adk_loaded else '-':<10} {modules}")
+        if worker and args.budget_ms is not None:
+            if adk_loaded:
+                failures.append(f"{name}: loads google.adk")
+            if elapsed * 1000 > args.budget_ms:
+                failures.append(f"{name}: {elapsed * 1000:.1f}ms > {args.budget_ms:.0f}ms budget")
+    if failures:
+        raise SystemExit("cold start budget exceeded:\n  " + "\n  ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Benchmark: streaming triage vs re-scoring the transcript so far on every
+utterance
+
+Generates --calls calls of --utterances utterances each; half carry a
+dissatisfaction phrase somewhere past the middle. Each call is triaged:
+  1. rescan    - score_severity over the whole transcript so far after
+                 each utterance (what polling a growing transcript costs)
+  2. streaming - stream_triage, which scans only the new utterance
+
+and the time per utterance is reported for the first and last tenth of
+each call: flat for streaming, growing with call length for rescan. Both
+must escalate at the same utterance and end with the score of the joined
+transcript.
+
+Usage:
+    python -m benchmarks.streaming_triage_benchmark --calls 40 --utterances 300
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from shared_tools.records import CustomerRecord, Tier
+from shared_tools.severity import DISSATISFACTION_LEXICON, score_severity
+from triage_agent.streaming import stream_triage
+
+FILLER = ("Customer: I called about my order from last week.", "Agent: Let me pull that up for you.",
+          "Customer: It was supposed to arrive on Tuesday.", "Agent: I can see the tracking details here.")
+CUSTOMER = CustomerRecord(ltv=100, tier=Tier.SILVER, recent_order_count=1)
+
+
+def build_calls(calls: int, utterances: int, seed: int) -> list:
+    rng = random.Random(seed)
+    transcripts = []
+    for _ in range(calls):
+        lines = [rng.choice(FILLER) for _ in range(utterances)]
+        if rng.random() < 0.5:
+            position = rng.randrange(utterances // 2, utterances)
+            lines[position] = f"Customer: I am {rng.choice(list(DISSATISFACTION_LEXICON))} about this."
+        transcripts.append(lines)
+    return transcripts
+
+
+def rescan(lines: list, timings: list):
+    escalated_at = None
+    for index in range(len(lines)):
+        start = time.perf_counter()
+        result = score_severity("\n".join(lines[:index + 1]))
+        timings[index] += time.perf_counter() - start
+        if result.severe and escalated_at is None:
+            escalated_at = index + 1
+    return escalated_at, result.score
+
+
+async def streaming(lines: list, timings: list):
+    """Feed utterances one at a time, timing each until stream_triage has taken it in."""
+    arrived = asyncio.Queue()
+
+    async def feed():
+        while True:
+            line = await arrived.get()
+            if line is None:
+                return
+            yield line
+
+    updates = stream_triage(CUSTOMER, feed())
+    consumer = asyncio.ensure_future(_drain(updates))
+    for index, line in enumerate(lines):
+        start = time.perf_counter()
+        await arrived.put(line)
+        await asyncio.sleep(0)
+        timings[index] += time.perf_counter() - start
+    await arrived.put(None)
+    return await consumer
+
+
+async def _drain(updates):
+    escalated_at = final = None
+    async for update in updates:
+        if update.event == "escalate":
+            escalated_at = update.utterances
+        elif update.event == "final":
+            final = update.score
+    return escalated_at, final
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=40)
+    parser.add_argument("--utterances", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=13)
+    args = parser.parse_args(argv)
+
+    calls = build_calls(args.calls, args.utterances, args.seed)
+    rescan_timings = [0.0] * args.utterances
+    stream_timings = [0.0] * args.utterances
+
+    start = time.perf_counter()
+    rescanned = [rescan(lines, rescan_timings) for lines in calls]
+    rescan_total = time.perf_counter() - start
+
+    async def run_streaming():
+        return [await streaming(lines, stream_timings) for lines in calls]
+
+    start = time.perf_counter()
+    streamed = asyncio.run(run_streaming())
+    stream_total = time.perf_counter() - start
+
+    for lines, old, new in zip(calls, rescanned, streamed):
+        assert old == new, (old, new)
+        assert new[1] == score_severity("\n".join(lines)).score
+    escalated = sum(1 for escalated_at, _ in streamed if escalated_at is not None)
+
+    tenth = max(1, args.utterances // 10)
+    per_call = args.calls / 1e6
+    print(f"calls={args.calls} utterances={args.utterances} escalated={escalated} (same utterance both ways)")
+    for name, timings, total in (("rescan", rescan_timings, rescan_total), ("streaming", stream_timings, stream_total)):
+        first = sum(timings[:tenth]) / tenth / per_call
+        last = sum(timings[-tenth:]) / tenth / per_call
+        print(f"  {name:<9} total {total:7.2f}s   per utterance: first tenth {first:8.1f}us  "
+              f"last tenth {last:8.1f}us")
+
+
+if __name__ == "__main__":
+    main()
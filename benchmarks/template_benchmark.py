@@ -0,0 +1,174 @@
+"""
+Benchmark: compiled template registry vs the original per-call f-string bodies
+
+Renders --messages notifications drawn from the three places that used to
+build bodies inline:
+  - action agent drafts (full_refund / reship_express / generate_coupon)
+  - orchestrator resolution notices (status x solution explanation)
+  - swarm resolution summaries (status x solution)
+Order IDs are unique per message and amounts come from --amounts distinct
+values, so refund and reship drafts mostly miss the render cache while
+coupons and the workflow notices mostly hit it.
+
+Per-message stream, in arrival order:
+  1. legacy   - the original f-string bodies, built per message
+  2. uncached - compiled templates with the render cache disabled
+  3. render   - shared registry, one render() per message (adaptive cache)
+
+Bulk send, --batch recipients per action template:
+  4. legacy loop   - the original body function called per recipient
+  5. render_batch  - one call per template (single generated comprehension)
+
+Every path must produce the same bodies as the legacy code.
+
+Usage:
+    python -m benchmarks.template_benchmark --messages 200000
+"""
+import argparse
+import random
+import time
+
+from shared_tools.templates import BUILTIN_TEMPLATES, TEMPLATES, TemplateRegistry
+
+STATUSES = ("Silver Tier", "Gold Tier", "VIP", "Platinum")
+EXPLANATIONS = ("Full refund processed for damaged item - Gold Tier customer",
+                "Replacement item shipped with express delivery")
+SOLUTIONS = ("full refund processed", "replacement offered")
+
+
+def legacy_action_body(action_type: str, order_id: str, amount: float) -> str:
+    if action_type == "full_refund":
+        return f"""Dear Valued Customer,
+
+We have processed a full refund of ${amount} for your order {order_id}. The refund will appear in your account within 3-5 business days.
+
+We sincerely apologize for the inconvenience and appreciate your understanding.
+
+Best regards,
+Customer Experience Team"""
+    elif action_type == "reship_express":
+        return f"""Dear Valued Customer,
+
+We are expediting a replacement for your order {order_id}. You will receive tracking information within the next hour.
+
+Expected delivery: 1-2 business days.
+
+Best regards,
+Customer Experience Team"""
+    elif action_type == "generate_coupon":
+        return """Dear Valued Customer,
+
+As a gesture of goodwill, we're providing you with a special discount for your next purchase.
+
+Thank you for your patience and continued loyalty.
+
+Best regards,
+Customer Experience Team"""
+    return "Standard follow-up communication recommended."
+
+
+def legacy_resolution_notice(customer_status: str, explanation: str) -> str:
+    return f"""Dear {customer_status} Customer,
+
+We sincerely apologize for the issue with your recent order. 
+
+We have immediately processed the following resolution:
+{explanation}
+
+Thank you for your patience and continued loyalty.
+
+Best regards,
+Customer Experience Team"""
+
+
+def legacy_resolution_summary(customer_status: str, solution: str) -> str:
+    return f"""Dear Valued Customer,
+
+I sincerely apologize for the issue with your recent order. As a {customer_status} customer, 
+we want to make this right immediately.
+
+I have processed a {solution} for you.
+
+Best regards,
+Customer Experience Team"""
+
+
+def legacy_render(action: str, params: dict) -> str:
+    if action == "resolution_notice":
+        return legacy_resolution_notice(params["customer_status"], params["explanation"])
+    if action == "resolution_summary":
+        return legacy_resolution_summary(params["customer_status"], params["solution"])
+    return legacy_action_body(action, params["order_id"], params["amount"])
+
+
+def generate_messages(count: int, amounts: int, seed: int):
+    rng = random.Random(seed)
+    values = [round(rng.uniform(5, 500), 2) for _ in range(amounts)]
+    messages = []
+    for index in range(count):
+        kind = rng.random()
+        if kind < 0.6:
+            action = rng.choice(("full_refund", "reship_express", "generate_coupon"))
+            params = {"order_id": f"O-{index:07d}", "amount": rng.choice(values)}
+        elif kind < 0.8:
+            action = "resolution_notice"
+            params = {"customer_status": rng.choice(STATUSES), "explanation": rng.choice(EXPLANATIONS)}
+        else:
+            action = "resolution_summary"
+            params = {"customer_status": rng.choice(STATUSES), "solution": rng.choice(SOLUTIONS)}
+        messages.append((action, params))
+    return messages
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument("--amounts", type=int, default=200, help="Distinct refund amounts")
+    parser.add_argument("--batch", type=int, default=100_000, help="Recipients per bulk send")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    messages = generate_messages(args.messages, args.amounts, args.seed)
+    uncached = TemplateRegistry(cache_size=0)
+    uncached.register_all(BUILTIN_TEMPLATES)
+
+    legacy, legacy_time = timed(lambda: [legacy_render(action, params) for action, params in messages])
+    plain, plain_time = timed(lambda: [uncached.render(action, "email", "en", params) for action, params in messages])
+    rendered, render_time = timed(lambda: [TEMPLATES.render(action, "email", "en", params) for action, params in messages])
+    for name, bodies in (("uncached", plain), ("render", rendered)):
+        check(name, legacy, bodies)
+
+    print(f"messages={len(messages)} distinct amounts={args.amounts} seed={args.seed}  (all bodies identical)")
+    print("per-message stream:")
+    for name, elapsed in (("legacy", legacy_time), ("uncached", plain_time), ("render", render_time)):
+        print(f"  {name:<13} {elapsed * 1000:9.1f}ms  {elapsed / len(messages) * 1e9:7.0f}ns/msg  "
+              f"{legacy_time / elapsed:5.2f}x")
+    print(f"  render cache: {TEMPLATES.cache_info()}")
+
+    print(f"bulk send ({args.batch} recipients per template):")
+    rng = random.Random(args.seed)
+    for action in ("full_refund", "reship_express", "generate_coupon"):
+        recipients = [{"order_id": f"O-{index:07d}", "amount": round(rng.uniform(5, 500), 2)}
+                      for index in range(args.batch)]
+        legacy, legacy_time = timed(lambda: [legacy_action_body(action, r["order_id"], r["amount"])
+                                             for r in recipients])
+        batched, batch_time = timed(lambda: TEMPLATES.render_batch(action, "email", "en", recipients))
+        check(f"render_batch {action}", legacy, batched)
+        print(f"  {action:<16} legacy {legacy_time * 1000:8.1f}ms  render_batch {batch_time * 1000:8.1f}ms  "
+              f"{legacy_time / batch_time:5.2f}x")
+
+
+def check(name: str, expected: list, actual: list):
+    mismatches = sum(1 for want, got in zip(expected, actual) if want != got)
+    if mismatches or len(expected) != len(actual):
+        raise SystemExit(f"{name}: {mismatches} bodies differ from the legacy code")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark: memory-mapped transcript store under a large corpus
+
+Writes --transcripts synthetic transcripts of about --transcript-kb KB into a
+temporary TranscriptStore, then scores every one of them twice:
+  1. get          - fetch the full text and score it
+  2. iter_chunks  - stream the transcript and score it chunk by chunk
+
+Anonymous RSS (process heap, excluding the page cache backing the mapped
+segment) is sampled throughout and should stay flat as the corpus grows.
+
+Usage:
+    python -m benchmarks.transcript_store_benchmark --transcripts 100000 --transcript-kb 2
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from shared_tools.severity import score_severity, score_severity_chunks
+from shared_tools.transcript_store import TranscriptStore
+
+SENTENCES = (
+    "Customer: I ordered a blender last week and it still has not arrived.",
+    "Agent: I am sorry to hear that, let me check the tracking for you.",
+    "Customer: The tracking page has said out for delivery for three days.",
+    "Agent: I can see the package is delayed at the regional depot.",
+    "Customer: This is the worst experience I have ever had with an online store.",
+    "Agent: I understand, I will arrange a replacement with express shipping.",
+    "Customer: Thank you, that would help a lot.",
+)
+
+
+def rss_anon_mb() -> float:
+    """Anonymous resident memory in MB (Linux), or 0 when unavailable."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as handle:
+            for line in handle:
+                if line.startswith("RssAnon:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def make_transcript(rng: random.Random, size_kb: float) -> str:
+    lines = []
+    length = 0
+    while length < size_kb * 1024:
+        line = rng.choice(SENTENCES)
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines)
+
+
+def run_pass(store, ids, label, score_one):
+    samples = []
+    severe = 0
+    start = time.perf_counter()
+    step = max(1, len(ids) // 5)
+    for i, transcript_id in enumerate(ids, 1):
+        severe += score_one(store, transcript_id)
+        if i % step == 0:
+            samples.append(f"{rss_anon_mb():.0f}")
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<12}: {elapsed:7.2f}s  {len(ids) / elapsed:9.0f} transcripts/s  "
+          f"severe={severe}  RssAnon MB at 20%..100%: {' '.join(samples)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transcripts", type=int, default=100_000)
+    parser.add_argument("--transcript-kb", type=float, default=2.0)
+    parser.add_argument("--chunk-size", type=int, default=4096)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"RssAnon at start: {rss_anon_mb():.0f}MB")
+        store = TranscriptStore(directory)
+        start = time.perf_counter()
+        for i in range(args.transcripts):
+            store.append(f"T{i:07d}", make_transcript(rng, args.transcript_kb))
+        write_time = time.perf_counter() - start
+        segment_mb = os.path.getsize(os.path.join(directory, "transcripts.seg")) / 1e6
+        print(f"transcripts={args.transcripts} segment={segment_mb:.0f}MB written in {write_time:.1f}s; "
+              f"RssAnon after write: {rss_anon_mb():.0f}MB")
+
+        ids = list(store.ids())
+        rng.shuffle(ids)
+        run_pass(store, ids, "get", lambda s, t: score_severity(s.get(t)).severe)
+        run_pass(store, ids, "iter_chunks",
+                 lambda s, t: score_severity_chunks(s.iter_chunks(t, args.chunk_size)).severe)
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
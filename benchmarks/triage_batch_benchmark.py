@@ -0,0 +1,81 @@
+"""
+Benchmark: vectorized batch triage vs looping make_triage_decision
+
+Generates a synthetic backlog of --rows tickets (LTV, tier, severity score)
+and compares:
+  1. scalar     - make_triage_decision per row on a --scalar-rows sample
+                  (scores the sentiment text and serializes JSON, as the tool does)
+  2. rules      - the bare triage rules per row on the same sample
+  3. vectorized - triage_batch over all rows
+
+That both make identical decisions is checked by
+tests/test_batch_triage.py; this script only times them.
+
+Usage:
+    python -m benchmarks.triage_batch_benchmark --rows 2000000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from shared_tools.severity import DISSATISFACTION_LEXICON, SEVERE_THRESHOLD
+from triage_agent.agent import _triage_decision, make_triage_decision
+from triage_agent.batch_triage import TIER_CODES, triage_batch
+
+FILLER = "Customer: my order came late and I called support twice about it"
+
+
+def build_backlog(rows: int, seed: int):
+    rng = np.random.default_rng(seed)
+    ltv = rng.lognormal(mean=5.5, sigma=1.2, size=rows)
+    tier_code = rng.choice(np.array([1, 2, 3, 4], dtype=np.uint8), size=rows, p=[0.7, 0.22, 0.06, 0.02])
+    severity_score = rng.choice(np.array([0.0, 1.0, 2.0, 3.0]), size=rows, p=[0.6, 0.25, 0.1, 0.05])
+    return ltv, tier_code, severity_score
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--scalar-rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    ltv, tier_code, severity_score = build_backlog(args.rows, args.seed)
+    names = {code: name for name, code in TIER_CODES.items()}
+    sample = min(args.scalar_rows, args.rows)
+    sample_ltv = ltv[:sample].tolist()
+    sample_status = [names[code] for code in tier_code[:sample].tolist()]
+    sample_score = severity_score[:sample].tolist()
+    # Texts with as many lexicon phrases as the row's score, for the scalar tool
+    phrases = list(DISSATISFACTION_LEXICON)
+    sample_text = [" ".join([FILLER] + phrases[:int(score)]) for score in sample_score]
+
+    start = time.perf_counter()
+    for row_ltv, status, text in zip(sample_ltv, sample_status, sample_text):
+        make_triage_decision(row_ltv, status, text)
+    scalar_per_row = (time.perf_counter() - start) / sample
+
+    start = time.perf_counter()
+    for row_ltv, status, score in zip(sample_ltv, sample_status, sample_score):
+        _triage_decision(row_ltv, status, score >= SEVERE_THRESHOLD)
+    rules_per_row = (time.perf_counter() - start) / sample
+
+    start = time.perf_counter()
+    result = triage_batch(ltv, tier_code, severity_score)
+    vectorized_time = time.perf_counter() - start
+
+    scalar_time = scalar_per_row * args.rows
+    rules_time = rules_per_row * args.rows
+    escalated = int(result.escalate.sum())
+    print(f"rows={args.rows} escalated={escalated} ({escalated / args.rows:.1%}); "
+          f"scalar timings extrapolated from {sample} rows")
+    print(f"  scalar     : {scalar_time * 1000:10.1f}ms  {args.rows / scalar_time:12.0f} rows/s")
+    print(f"  rules      : {rules_time * 1000:10.1f}ms  {args.rows / rules_time:12.0f} rows/s")
+    print(f"  vectorized : {vectorized_time * 1000:10.1f}ms  {args.rows / vectorized_time:12.0f} rows/s")
+    print(f"  speedup    : {scalar_time / vectorized_time:9.0f}x vs scalar, "
+          f"{rules_time / vectorized_time:.0f}x vs rules")
+
+
+if __name__ == "__main__":
+    main()
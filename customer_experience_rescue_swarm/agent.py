@@ -1,19 +1,24 @@
 """
 Clean Customer Experience Rescue Swarm using shared tools - demonstrates best practices
 """
-from google.adk.agents import Agent
-from google.adk.tools import FunctionTool
-
 # Import shared tools (no more duplication!)
-from shared_tools import (
-    CRM_LOOKUP_TOOL,
-    TRANSCRIPT_RETRIEVAL_TOOL, 
-    POLICY_LOOKUP_TOOL,
-    REFUND_TOOL,
-    SEND_COMMUNICATION_TOOL
-)
+from shared_tools.crm_tools import crm_lookup_tool, iter_transcript_chunks
+from shared_tools.lazy import function_tool, lazy_attributes
+from shared_tools.outbound import enqueue_communication
+from shared_tools.policy_tools import policy_lookup_tool, top_policy_snippet
+from shared_tools.records import CustomerRecord, Tier
+from shared_tools.refunds import ALREADY_REFUNDED, submit_refund
+from shared_tools.severity import score_severity_chunks
+from shared_tools.templates import render_message
+from shared_tools.tracing import traced
+
+# Order refunded when the caller does not name one (the demo order)
+DEFAULT_ORDER_ID = "O-9987"
+DEFAULT_ORDER_VALUE = 75.50
 
-def process_customer_issue(customer_id: str, transcript_id: str, issue_description: str) -> str:
+@traced("swarm.workflow")
+def process_customer_issue(customer_id: str, transcript_id: str, issue_description: str,
+                           order_id: str = DEFAULT_ORDER_ID, order_value: float = DEFAULT_ORDER_VALUE) -> str:
     """
     Complete workflow to process a customer issue from triage to resolution.
     Updated to use shared tools - demonstrates consolidated agent with clean architecture.
@@ -22,57 +27,61 @@ def process_customer_issue(customer_id: str, transcript_id: str, issue_descripti
         customer_id: The ID of the customer
         transcript_id: The ID of the transcript
         issue_description: Description of the customer issue
+        order_id: The order the issue is about
+        order_value: The order's value, refunded in full when that is the chosen solution
 
     Returns:
         A summary of actions taken
     """
-    # Use shared tools instead of duplicated functions
-    from shared_tools.crm_tools import crm_lookup_tool, transcript_retrieval_tool
-    from shared_tools.policy_tools import policy_lookup_tool
-    from shared_tools.action_tools import refund_tool, send_communication_tool
-    
     # Step 1: Triage
-    customer_details = crm_lookup_tool(customer_id)
-    transcript_text = transcript_retrieval_tool(transcript_id)
+    customer_details = CustomerRecord.from_dict(crm_lookup_tool(customer_id))
     
-    # Check for escalation criteria
-    severe_dissatisfaction = any(phrase in transcript_text.lower() 
-                               for phrase in ["never again", "worst experience", "damaged", "unhappy"])
+    # Check for escalation criteria, scanning the transcript as it streams in
+    severe_dissatisfaction = score_severity_chunks(iter_transcript_chunks(transcript_id)).severe
     
-    if (customer_details["ltv"] > 500 or customer_details["status"] in ["Gold Tier", "VIP"]) and severe_dissatisfaction:
+    if (customer_details.ltv > 500 or customer_details.tier in (Tier.GOLD, Tier.VIP)) and severe_dissatisfaction:
         # Step 2: Find solution
-        policy = policy_lookup_tool(f"policy for damaged item for {customer_details['status']} customer")
+        policy = policy_lookup_tool(f"policy for damaged item for {customer_details.status} customer")
         
         # Step 3: Execute resolution
-        if "full refund" in policy.lower():
-            refund_tool("O-9987", 75.50)
-            solution = "full refund processed"
+        if "full refund" in top_policy_snippet(policy).lower():
+            # Keyed by transcript so a retried run never refunds the issue twice
+            refund = submit_refund(order_id, order_value,
+                                   idempotency_key=f"refund:{transcript_id}:{order_id}").result()
+            if refund.get("status") == ALREADY_REFUNDED:
+                solution = "full refund already issued"
+            else:
+                solution = "full refund processed"
         else:
             solution = "replacement offered"
         
         # Step 4: Communicate
-        email_body = f"""Dear Valued Customer,
-
-I sincerely apologize for the issue with your recent order. As a {customer_details['status']} customer, 
-we want to make this right immediately.
-
-I have processed a {solution} for you.
-
-Best regards,
-Customer Experience Team"""
+        email_body = render_message("resolution_summary", {"customer_status": customer_details.status,
+                                                           "solution": solution})
         
-        send_communication_tool("customer@example.com", "email", email_body)
+        # Queued for background delivery; keyed by transcript so a retried run never emails twice
+        enqueue_communication("customer@example.com", "email", email_body, message_id=f"resolution:{transcript_id}")
         
-        return f"Issue escalated and resolved: {solution}. Customer notified via email."
+        return f"Issue escalated and resolved: {solution}. Customer notification queued for email."
     else:
         return "Issue does not meet escalation criteria. Standard support process recommended."
 
-# Define the main agent for ADK Web discovery
-root_agent = Agent(
-    name="customer_experience_rescue_swarm",
-    model="gemini-2.0-flash",
-    description="A swarm of agents that work together to resolve customer issues through triage, solution finding, and action execution.",
-    instruction="""You are a Customer Experience Rescue Swarm. Your job is to:
+def _build_root_agent():
+    """Define the main agent for ADK Web discovery."""
+    from google.adk.agents import Agent
+    from shared_tools import (
+        CRM_LOOKUP_TOOL,
+        TRANSCRIPT_RETRIEVAL_TOOL,
+        POLICY_LOOKUP_TOOL,
+        REFUND_TOOL,
+        SEND_COMMUNICATION_TOOL
+    )
+    
+    return Agent(
+        name="customer_experience_rescue_swarm",
+        model="gemini-2.0-flash",
+        description="A swarm of agents that work together to resolve customer issues through triage, solution finding, and action execution.",
+        instruction="""You are a Customer Experience Rescue Swarm. Your job is to:
 
 1. Analyze customer complaints and issues
 2. Determine if escalation is needed based on customer value and issue severity  
@@ -89,14 +98,17 @@ Use the available tools to:
 - Handle the complete customer issue workflow
 
 When a user describes a customer issue, use the process_customer_issue function to handle it end-to-end.""",
-    tools=[
-        # Use shared tools (imported at top)
-        CRM_LOOKUP_TOOL,
-        TRANSCRIPT_RETRIEVAL_TOOL,
-        POLICY_LOOKUP_TOOL,
-        REFUND_TOOL,
-        SEND_COMMUNICATION_TOOL,
-        # Keep the consolidated workflow function
-        FunctionTool(process_customer_issue)
-    ]
-)
+        tools=[
+            # Use shared tools (imported above)
+            CRM_LOOKUP_TOOL,
+            TRANSCRIPT_RETRIEVAL_TOOL,
+            POLICY_LOOKUP_TOOL,
+            REFUND_TOOL,
+            SEND_COMMUNICATION_TOOL,
+            # Keep the consolidated workflow function
+            function_tool(process_customer_issue)
+        ]
+    )
+
+# root_agent is built on first access (see shared_tools/lazy.py)
+__getattr__ = lazy_attributes(__name__, {"root_agent": _build_root_agent})
@@ -1,20 +1,32 @@
 """
 Clean Multi-Agent Orchestrator using shared tools and clean agents
 """
-from google.adk.agents import Agent
-from google.adk.tools import FunctionTool
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 import json
+import os
+import threading
+import time
 
 # Import shared tools for direct use
-from shared_tools import (
-    CRM_LOOKUP_TOOL, 
-    TRANSCRIPT_RETRIEVAL_TOOL,
-    POLICY_LOOKUP_TOOL,
-    REFUND_TOOL,
-    SEND_COMMUNICATION_TOOL
-)
+from shared_tools.action_tools import refund_tool, send_communication_tool
+from shared_tools.crm_tools import crm_lookup_tool, iter_transcript_chunks, transcript_retrieval_tool
+from shared_tools.dag import Dag, Step
+from shared_tools.lazy import function_tool, lazy_attributes
+from shared_tools.outbound import enqueue_communication
+from shared_tools.policy_tools import order_status_tool, policy_lookup_tool, top_policy_snippet
+from shared_tools.records import Action, CustomerRecord, Priority, Solution, Tier
+from shared_tools.refunds import ALREADY_REFUNDED, submit_refund
+from shared_tools.scheduler import PriorityScheduler, lane_for
+from shared_tools.severity import score_severity_chunks
+from shared_tools.templates import render_message
+from shared_tools.tracing import set_attribute, span
 
-def orchestrate_customer_issue(customer_id: str, transcript_id: str, issue_description: str) -> str:
+# Order refunded when the caller does not name one (the demo order)
+DEFAULT_ORDER_ID = "O-9987"
+DEFAULT_ORDER_VALUE = 75.50
+
+def orchestrate_customer_issue(customer_id: str, transcript_id: str, issue_description: str,
+                               order_id: str = DEFAULT_ORDER_ID, order_value: float = DEFAULT_ORDER_VALUE) -> str:
     """
     Orchestrates the complete customer issue resolution using clean architecture.
     
@@ -25,106 +37,503 @@ def orchestrate_customer_issue(customer_id: str, transcript_id: str, issue_descr
         customer_id: The ID of the customer
         transcript_id: The ID of the transcript  
         issue_description: Description of the customer issue
+        order_id: The order the issue is about
+        order_value: The order's value, refunded in full when that is the chosen solution
         
     Returns:
         A detailed summary of the multi-agent workflow execution
     """
+    return _run_orchestration(customer_id, transcript_id, issue_description,
+                              order_id=order_id, order_value=order_value)
+
+def _lookup_customer(customer_id: str) -> CustomerRecord:
+    return CustomerRecord.from_dict(crm_lookup_tool(customer_id))
+
+def _analyze_transcript(transcript_id: str):
+    """Score a transcript's severity by streaming it chunk by chunk."""
+    severity = score_severity_chunks(iter_transcript_chunks(transcript_id))
+    set_attribute("severity.score", severity.score)
+    return severity
+
+def _lookup_order_status(order_id: str) -> dict:
+    return order_status_tool(order_id)
+
+def _is_high_value(customer: CustomerRecord) -> bool:
+    return customer.ltv > 500 or customer.tier in (Tier.GOLD, Tier.VIP)
+
+def _triage(customer: CustomerRecord, severity) -> dict:
+    escalate = _is_high_value(customer) and severity.severe
+    set_attribute("customer.status", customer.status)
+    set_attribute("triage.escalate", escalate)
+    return {"escalate": escalate, "severe_dissatisfaction": severity.severe}
+
+def _escalated(triage: dict, **_) -> bool:
+    return triage["escalate"]
+
+def _speculate_policy(customer: CustomerRecord, **_) -> bool:
+    # High-value customers are escalated whenever the transcript is severe,
+    # so their policy lookup is worth starting before triage has decided.
+    return _is_high_value(customer)
+
+def _lookup_policy(customer: CustomerRecord, issue_description: str) -> str:
+    return policy_lookup_tool(f"policy for {issue_description} for {customer.status} customer")
+
+def _select_solution(policy: str, order_id: str, order_value: float) -> Solution:
+    if "full refund" in top_policy_snippet(policy).lower():
+        solution = Solution(
+            action=Action.FULL_REFUND,
+            params=(("order_id", order_id), ("amount", order_value)),
+            explanation="Full refund processed for damaged item - Gold Tier customer"
+        )
+    else:
+        solution = Solution(
+            action=Action.REPLACEMENT,
+            params=(("order_id", order_id),),
+            explanation="Replacement item shipped with express delivery"
+        )
+    set_attribute("solution.action", solution.action.value)
+    return solution
+
+def _execute_action(solution: Solution, customer: CustomerRecord, transcript_id: str, order_id: str) -> dict:
+    email_body = render_message("resolution_notice", {"customer_status": customer.status,
+                                                      "explanation": solution.explanation})
+    set_attribute("action", solution.action.value)
+    refunded = None
+    already_refunded = False
+    if solution.action is Action.FULL_REFUND:
+        # Keyed by transcript, so a retried workflow never refunds the issue twice;
+        # the refund engine batches it with other workflows' refunds.
+        idempotency_key = f"refund:{transcript_id}:{order_id}"
+        set_attribute("refund.idempotency_key", idempotency_key)
+        refund = submit_refund(solution.param("order_id"), solution.param("amount"),
+                               idempotency_key=idempotency_key).result()
+        refunded = solution.param("amount")
+        already_refunded = refund.get("status") == ALREADY_REFUNDED
+    
+    # Queue the customer communication; the outbound queue delivers it in
+    # the background, so a slow email provider does not hold up the workflow.
+    # Keyed by transcript, so a retried workflow never emails twice.
+    message_id = enqueue_communication("customer@example.com", "email", email_body,
+                                       message_id=f"resolution:{transcript_id}")
+    set_attribute("notification.channel", "email")
+    set_attribute("notification.message_id", message_id)
+    return {"refunded": refunded, "already_refunded": already_refunded, "message_id": message_id}
+
+# The workflow as a dependency graph: the CRM lookup, transcript analysis and
+# order status lookup need only the request, so they run concurrently;
+# triage waits for the first two, and the solution and action steps run only
+# when triage escalates. For high-value customers the policy lookup and
+# solution ranking start speculatively as soon as the CRM lookup returns,
+# alongside transcript analysis, and are kept only if triage escalates; the
+# action step has side effects and always waits for triage.
+ORCHESTRATOR_DAG = Dag("orchestrator", params=("customer_id", "transcript_id", "issue_description",
+                                               "order_id", "order_value"), steps=[
+    Step("customer", _lookup_customer, inputs=("customer_id",)),
+    Step("severity", _analyze_transcript, inputs=("transcript_id",)),
+    Step("order_status", _lookup_order_status, inputs=("order_id",)),
+    Step("triage", _triage, inputs=("customer", "severity"), inline=True),
+    Step("policy", _lookup_policy, inputs=("customer", "issue_description"), after=("triage",),
+         when=_escalated, speculate=_speculate_policy),
+    Step("solution", _select_solution, inputs=("policy", "order_id", "order_value"), inline=True,
+         speculate=True),
+    Step("action", _execute_action, inputs=("solution", "customer", "transcript_id", "order_id")),
+])
+
+# Worker threads shared by single-issue workflows for their concurrent steps
+ORCHESTRATOR_WORKERS = int(os.environ.get("CX_ORCHESTRATOR_WORKERS", "8"))
+# Speculative policy lookups for high-value customers (CX_ORCHESTRATOR_SPECULATE=0 disables)
+ORCHESTRATOR_SPECULATE = os.environ.get("CX_ORCHESTRATOR_SPECULATE", "1").lower() not in ("0", "false", "off")
+_step_executor = None
+_step_executor_lock = threading.Lock()
+
+def _get_step_executor() -> ThreadPoolExecutor:
+    global _step_executor
+    with _step_executor_lock:
+        if _step_executor is None:
+            _step_executor = ThreadPoolExecutor(max_workers=ORCHESTRATOR_WORKERS,
+                                                thread_name_prefix="orchestrator-step")
+        return _step_executor
+
+def _run_orchestration(customer_id: str, transcript_id: str, issue_description: str, step_executor=None,
+                       order_id: str = DEFAULT_ORDER_ID, order_value: float = DEFAULT_ORDER_VALUE,
+                       results: dict = None) -> str:
+    """
+    Run the triage → solution → action workflow for a single issue.
+
+    Shared by the single-issue tool and the bulk entry point. The steps run
+    as ORCHESTRATOR_DAG on ``step_executor`` (default: a shared pool of
+    CX_ORCHESTRATOR_WORKERS threads), each recorded as a span under one
+    "orchestrator.workflow" span. ``results`` holds step results already
+    computed for the issue (e.g. by ``triage_priority``), which are reused
+    instead of run again.
+    """
+    with span("orchestrator.workflow", customer_id=customer_id, transcript_id=transcript_id,
+              issue_description=issue_description) as workflow_span:
+        run = ORCHESTRATOR_DAG.run({
+            "customer_id": customer_id,
+            "transcript_id": transcript_id,
+            "issue_description": issue_description,
+            "order_id": order_id,
+            "order_value": order_value,
+        }, step_executor or _get_step_executor(), speculate=ORCHESTRATOR_SPECULATE, results=results)
+        summary = _summarize(run, customer_id, issue_description)
+        workflow_span.set_attribute("dag.critical_path", " → ".join(run.critical_path()))
+        workflow_span.set_attribute("dag.wall_ms", round(run.wall_time * 1000, 3))
+        workflow_span.set_attribute("dag.step_ms", round(run.step_time() * 1000, 3))
+        for name, outcome in run.speculation.items():
+            workflow_span.set_attribute(f"dag.speculation.{name}", outcome)
+        workflow_span.set_attribute("summary.size", len(summary))
+        return summary
+
+def _summarize(run, customer_id: str, issue_description: str) -> str:
+    results = run.results
+    customer_details = results["customer"]
+    triage = results["triage"]
+    
     workflow_log = []
     workflow_log.append("🚀 STARTING CLEAN MULTI-AGENT WORKFLOW")
     workflow_log.append("=" * 50)
     
-    # Step 1: Triage Phase - Using shared tools directly
+    # Step 1: Triage Phase
     workflow_log.append("🔍 STEP 1: TRIAGE PHASE")
+    workflow_log.append(f"  • Customer: {customer_details.status} (LTV: ${customer_details.ltv})")
+    workflow_log.append(f"  • Orders: {customer_details.recent_order_count} recent orders")
+    workflow_log.append(f"  • Severe dissatisfaction detected: {triage['severe_dissatisfaction']}")
+    workflow_log.append(f"  • ✅ TRIAGE DECISION: {'ESCALATE' if triage['escalate'] else 'STANDARD PROCESS'}")
     
-    from shared_tools.crm_tools import crm_lookup_tool
-    from shared_tools.crm_tools import transcript_retrieval_tool
-    
-    customer_details = crm_lookup_tool(customer_id)
-    transcript_text = transcript_retrieval_tool(transcript_id)
-    
-    workflow_log.append(f"  • Customer: {customer_details['status']} (LTV: ${customer_details['ltv']})")
-    workflow_log.append(f"  • Orders: {customer_details['recent_order_count']} recent orders")
-    
-    # Triage decision logic
-    severe_dissatisfaction = any(phrase in transcript_text.lower() 
-                               for phrase in ["never again", "worst experience", "damaged", "unhappy"])
-    
-    escalate = (customer_details["ltv"] > 500 or customer_details["status"] in ["Gold Tier", "VIP"]) and severe_dissatisfaction
-    
-    workflow_log.append(f"  • Severe dissatisfaction detected: {severe_dissatisfaction}")
-    workflow_log.append(f"  • ✅ TRIAGE DECISION: {'ESCALATE' if escalate else 'STANDARD PROCESS'}")
-    
-    if not escalate:
+    if not triage["escalate"]:
         workflow_log.append("⏹️ Issue does not meet escalation criteria. Workflow complete.")
         return "\n".join(workflow_log)
     
-    # Step 2: Solution Phase - Using shared tools
+    # Step 2: Solution Phase
+    best_solution = results["solution"]
     workflow_log.append("\n💡 STEP 2: SOLUTION PHASE")
+    workflow_log.append(f"  • Policy retrieved: {results['policy'][:100]}...")
+    workflow_log.append(f"  • Order status: {results['order_status'].get('status', 'unknown')}")
+    workflow_log.append(f"  • ✅ SOLUTION SELECTED: {best_solution.action}")
     
-    from shared_tools.policy_tools import policy_lookup_tool
-    
-    
-    policy = policy_lookup_tool(f"policy for {issue_description} for {customer_details['status']} customer")
-    workflow_log.append(f"  • Policy retrieved: {policy[:100]}...")
-    
-    # Solution ranking
-    best_solution = None
-    if "full refund" in policy.lower():
-        best_solution = {
-            "action": "full_refund",
-            "params": {"order_id": "O-9987", "amount": 75.50},
-            "explanation": "Full refund processed for damaged item - Gold Tier customer"
-        }
-    else:
-        best_solution = {
-            "action": "replacement",
-            "params": {"order_id": "O-9987"},
-            "explanation": "Replacement item shipped with express delivery"
-        }
-    
-    workflow_log.append(f"  • ✅ SOLUTION SELECTED: {best_solution['action']}")
-    
-    # Step 3: Action Phase - Using shared tools
+    # Step 3: Action Phase
+    action = results["action"]
     workflow_log.append("\n⚡ STEP 3: ACTION PHASE")
-    
-    from shared_tools.action_tools import refund_tool, send_communication_tool
-    
-    # Execute the action
-    if best_solution["action"] == "full_refund":
-        refund_tool(best_solution["params"]["order_id"], best_solution["params"]["amount"])
-        workflow_log.append(f"  • Refund processed: ${best_solution['params']['amount']}")
-    
-    # Send customer communication
-    email_body = f"""Dear {customer_details['status']} Customer,
-
-We sincerely apologize for the issue with your recent order. 
-
-We have immediately processed the following resolution:
-{best_solution['explanation']}
-
-Thank you for your patience and continued loyalty.
-
-Best regards,
-Customer Experience Team"""
-    
-    send_communication_tool("customer@example.com", "email", email_body)
-    workflow_log.append("  • ✅ Customer notification sent")
+    if action["already_refunded"]:
+        workflow_log.append(f"  • Refund already issued earlier: ${action['refunded']} (not paid again)")
+    elif action["refunded"] is not None:
+        workflow_log.append(f"  • Refund processed: ${action['refunded']}")
+    workflow_log.append(f"  • ✅ Customer notification queued (message {action['message_id']})")
     
     # Final summary
     workflow_log.append("\n🎯 WORKFLOW SUMMARY")
     workflow_log.append("=" * 50)
-    workflow_log.append(f"Customer: {customer_id} ({customer_details['status']})")
+    workflow_log.append(f"Customer: {customer_id} ({customer_details.status})")
     workflow_log.append(f"Issue: {issue_description}")
-    workflow_log.append(f"Resolution: {best_solution['action']}")
+    workflow_log.append(f"Resolution: {best_solution.action}")
     workflow_log.append("Status: ✅ COMPLETED SUCCESSFULLY")
     workflow_log.append("\n📊 ARCHITECTURE NOTES:")
     workflow_log.append("• Used shared_tools for all common functions")
     workflow_log.append("• Eliminated code duplication")
     workflow_log.append("• Clean separation of concerns")
     workflow_log.append("• ADK best practices followed")
+    workflow_log.append(f"• Independent steps ran in parallel: {run.wall_time * 1000:.1f}ms wall for "
+                        f"{run.step_time() * 1000:.1f}ms of steps; critical path "
+                        f"{' → '.join(run.critical_path())}")
+    if run.speculation.get("policy") == "hit":
+        workflow_log.append("• Policy lookup and solution ranking started speculatively during "
+                            "transcript analysis (high-value customer)")
     
     return "\n".join(workflow_log)
 
+def get_speculation_stats() -> dict:
+    """
+    Speculation metrics for the orchestrator workflow, per speculative step:
+    runs started ahead of triage, hits (kept because triage escalated),
+    misses (discarded; ``cancelled`` ones never ran), hit rate, seconds of
+    discarded work and seconds of head start gained on hits.
+    """
+    return ORCHESTRATOR_DAG.speculation_stats()
+
+def orchestrate_customer_issues_bulk(issues, max_concurrency: int = 16):
+    """
+    Orchestrates many customer issues with bounded concurrency.
+    
+    Issues are pulled lazily from the iterable, so at most ``max_concurrency``
+    workflows are in flight at any time, and results are yielded as soon as
+    each one finishes (completion order, not input order). Within each
+    workflow the independent steps of ORCHESTRATOR_DAG (CRM lookup,
+    transcript analysis, order status) run concurrently.
+    
+    Args:
+        issues: Iterable of dicts with customer_id, transcript_id and issue_description
+            (and optionally order_id and order_value)
+        max_concurrency: Maximum number of issues processed at the same time
+        
+    Yields:
+        A dictionary per issue with its input index, ids, status and either
+        the workflow summary ("result") or the error message ("error")
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+    
+    issue_iter = iter(enumerate(issues))
+    in_flight = {}
+    
+    with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="orchestrator") as workflow_executor, \
+         ThreadPoolExecutor(max_workers=3 * max_concurrency, thread_name_prefix="orchestrator-step") as step_executor:
+        
+        def submit_next() -> bool:
+            try:
+                index, issue = next(issue_iter)
+            except StopIteration:
+                return False
+            future = workflow_executor.submit(
+                lambda: _run_orchestration(
+                    issue["customer_id"],
+                    issue["transcript_id"],
+                    issue["issue_description"],
+                    step_executor,
+                    order_id=issue.get("order_id", DEFAULT_ORDER_ID),
+                    order_value=issue.get("order_value", DEFAULT_ORDER_VALUE),
+                )
+            )
+            in_flight[future] = (index, issue)
+            return True
+        
+        while len(in_flight) < max_concurrency and submit_next():
+            pass
+        
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, issue = in_flight.pop(future)
+                outcome = {
+                    "index": index,
+                    "customer_id": issue.get("customer_id"),
+                    "transcript_id": issue.get("transcript_id"),
+                }
+                try:
+                    outcome["result"] = future.result()
+                    outcome["status"] = "success"
+                except Exception as exc:
+                    outcome["error"] = str(exc)
+                    outcome["status"] = "error"
+                submit_next()
+                yield outcome
+
+# Issues classified per batch of the prioritized entry point
+PRIORITY_INTAKE_BATCH = 64
+# Threads classifying issues for their lane. Kept apart from the step pools,
+# so a slow CRM or transcript fetch neither blocks the caller submitting an
+# issue nor takes threads from running workflows' steps.
+PRIORITY_INTAKE_WORKERS = int(os.environ.get("CX_ORCHESTRATOR_INTAKE_WORKERS", "8"))
+_scheduler = None
+_scheduler_step_executor = None
+_intake_executor = None
+_scheduler_lock = threading.Lock()
+
+def triage_priority(issue: dict, results: dict = None):
+    """
+    Scheduling lane and customer LTV for an issue, before its workflow runs.
+
+    An issue that already carries a "priority" (e.g. from an upstream
+    triage) keeps it. Otherwise the triage rules run on the CRM record and
+    the transcript's severity: HIGH for a high-value customer with severe
+    dissatisfaction (the issues this workflow escalates), MEDIUM for either
+    one, LOW for the rest.
+
+    Args:
+        issue: Dict with customer_id and transcript_id (and optionally priority)
+        results: Optional dict that receives the CRM record and severity
+            under ORCHESTRATOR_DAG's "customer" and "severity" step names;
+            handed to the workflow, it saves looking them up and scanning
+            the transcript a second time.
+
+    Returns:
+        (Priority, ltv)
+    """
+    results = {} if results is None else results
+    customer = results["customer"] = _lookup_customer(issue["customer_id"])
+    if issue.get("priority"):
+        return lane_for(issue["priority"]), customer.ltv
+    severity = results["severity"] = _analyze_transcript(issue["transcript_id"])
+    high_value = _is_high_value(customer)
+    if high_value and severity.severe:
+        return Priority.HIGH, customer.ltv
+    return (Priority.MEDIUM if high_value or severity.severe else Priority.LOW), customer.ltv
+
+def _get_scheduler():
+    """The shared PriorityScheduler (CX_SCHEDULER_*) and the step pool its workflows use."""
+    global _scheduler, _scheduler_step_executor
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = PriorityScheduler.from_env()
+            # Enough step threads that no workflow waits behind another
+            # lane's steps, which would undo the lane ordering
+            _scheduler_step_executor = ThreadPoolExecutor(max_workers=3 * _scheduler.workers,
+                                                          thread_name_prefix="scheduler-step")
+        return _scheduler, _scheduler_step_executor
+
+def _get_intake_executor() -> ThreadPoolExecutor:
+    """The pool issues are classified on before they are scheduled (CX_ORCHESTRATOR_INTAKE_WORKERS)."""
+    global _intake_executor
+    with _scheduler_lock:
+        if _intake_executor is None:
+            _intake_executor = ThreadPoolExecutor(max_workers=PRIORITY_INTAKE_WORKERS,
+                                                  thread_name_prefix="orchestrator-intake")
+        return _intake_executor
+
+def _run_scheduled(issue: dict, step_executor, queued_at: float, results: dict = None):
+    queue_seconds = time.monotonic() - queued_at
+    summary = _run_orchestration(
+        issue["customer_id"],
+        issue["transcript_id"],
+        issue["issue_description"],
+        step_executor,
+        order_id=issue.get("order_id", DEFAULT_ORDER_ID),
+        order_value=issue.get("order_value", DEFAULT_ORDER_VALUE),
+        results=results,
+    )
+    return summary, queue_seconds
+
+def submit_customer_issue(customer_id: str, transcript_id: str, issue_description: str,
+                          order_id: str = DEFAULT_ORDER_ID, order_value: float = DEFAULT_ORDER_VALUE,
+                          priority: str = None) -> Future:
+    """
+    Queue one issue on the shared priority scheduler (live traffic).
+
+    Returns at once: the issue is triaged for its lane (see
+    ``triage_priority``; only the CRM lookup when ``priority`` is given) on
+    the intake pool and then queued, and its workflow reuses the CRM
+    record and severity from that triage.
+
+    Returns:
+        A Future resolving to the workflow summary
+    """
+    issue = {"customer_id": customer_id, "transcript_id": transcript_id,
+             "issue_description": issue_description, "order_id": order_id, "order_value": order_value,
+             "priority": priority}
+    results = {}
+    summary = Future()
+
+    def unwrap(done: Future):
+        if done.exception() is not None:
+            summary.set_exception(done.exception())
+        else:
+            summary.set_result(done.result()[0])
+
+    def schedule(classified: Future):
+        try:
+            lane, ltv = classified.result()
+        except Exception:
+            # Unclassified issues are neither dropped nor let ahead of escalations
+            lane, ltv = Priority.MEDIUM, 0.0
+        try:
+            scheduler, step_executor = _get_scheduler()
+            queued = scheduler.submit(_run_scheduled, issue, step_executor, time.monotonic(), results,
+                                      priority=lane, ltv=ltv)
+        except Exception as exc:
+            summary.set_exception(exc)
+            return
+        queued.add_done_callback(unwrap)
+
+    _get_intake_executor().submit(triage_priority, issue, results).add_done_callback(schedule)
+    return summary
+
+def orchestrate_customer_issues_prioritized(issues, scheduler=None, max_pending: int = 1024,
+                                            classify=triage_priority):
+    """
+    Orchestrates many customer issues through priority lanes.
+
+    Where the bulk entry point runs issues first come, first served, this
+    one triages each issue for its lane (``classify``, run concurrently on
+    the intake pool per batch of PRIORITY_INTAKE_BATCH issues) and queues it on a
+    PriorityScheduler, so escalations for Gold/VIP customers start ahead of
+    routine work queued earlier, including live issues queued with
+    ``submit_customer_issue`` on the same scheduler.
+
+    Args:
+        issues: Iterable of dicts with customer_id, transcript_id and issue_description
+            (and optionally order_id, order_value and priority)
+        scheduler: PriorityScheduler to queue on (default: the shared one)
+        max_pending: Maximum number of issues queued or running at a time
+        classify: Function of (issue, results) returning (priority, ltv) for
+            an issue; step results it leaves in ``results`` are reused by the
+            issue's workflow (see ``triage_priority``)
+
+    Yields:
+        A dictionary per issue, in completion order, with its input index,
+        ids, status, the workflow summary ("result") or error message
+        ("error"), its lane ("priority") and how long it was queued
+        ("queue_seconds")
+    """
+    if max_pending < 1:
+        raise ValueError("max_pending must be at least 1")
+    if scheduler is None:
+        scheduler, step_executor = _get_scheduler()
+        own_steps = None
+    else:
+        own_steps = step_executor = ThreadPoolExecutor(max_workers=3 * scheduler.workers,
+                                                       thread_name_prefix="scheduler-step")
+    issue_iter = iter(enumerate(issues))
+    in_flight = {}
+    exhausted = False
+
+    def submit_batch():
+        nonlocal exhausted
+        batch = []
+        for index, issue in issue_iter:
+            batch.append((index, issue))
+            if len(batch) >= min(PRIORITY_INTAKE_BATCH, max_pending - len(in_flight)):
+                break
+        else:
+            exhausted = True
+        results = [{} for _ in batch]
+        lanes = [_get_intake_executor().submit(classify, issue, found)
+                 for (_, issue), found in zip(batch, results)]
+        for (index, issue), lane, found in zip(batch, lanes, results):
+            try:
+                priority, ltv = lane.result()
+            except Exception:
+                # Unclassified issues are neither dropped nor let ahead of escalations
+                priority, ltv = Priority.MEDIUM, 0.0
+            future = scheduler.submit(_run_scheduled, issue, step_executor, time.monotonic(), found,
+                                      priority=priority, ltv=ltv)
+            in_flight[future] = (index, issue, lane_for(priority))
+
+    try:
+        while not exhausted and len(in_flight) < max_pending:
+            submit_batch()
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, issue, priority = in_flight.pop(future)
+                outcome = {
+                    "index": index,
+                    "customer_id": issue.get("customer_id"),
+                    "transcript_id": issue.get("transcript_id"),
+                    "priority": priority.value,
+                }
+                try:
+                    outcome["result"], outcome["queue_seconds"] = future.result()
+                    outcome["status"] = "success"
+                except Exception as exc:
+                    outcome["error"] = str(exc)
+                    outcome["status"] = "error"
+                yield outcome
+            while not exhausted and len(in_flight) < max_pending:
+                submit_batch()
+    finally:
+        if own_steps is not None:
+            own_steps.shutdown(wait=False)
+
+def get_scheduler_stats() -> dict:
+    """
+    Per-lane metrics of the shared priority scheduler: jobs queued, running
+    and finished, promotions by aging, queue-time p50/p95/p99/max and SLA
+    breaches (see shared_tools/scheduler.py).
+    """
+    scheduler, _ = _get_scheduler()
+    return scheduler.stats()
+
 def test_individual_tool(tool_name: str, test_params: str) -> str:
     """
     Test individual shared tools for debugging and validation.
@@ -139,34 +548,39 @@ def test_individual_tool(tool_name: str, test_params: str) -> str:
     params = json.loads(test_params)
     
     if tool_name == "crm_lookup":
-        from shared_tools.crm_tools import crm_lookup_tool
         return json.dumps(crm_lookup_tool(params['customer_id']))
         
     elif tool_name == "transcript_retrieval":
-        from shared_tools.crm_tools import transcript_retrieval_tool
         return transcript_retrieval_tool(params['transcript_id'])
         
     elif tool_name == "policy_lookup":
-        from shared_tools.policy_tools import policy_lookup_tool
         return policy_lookup_tool(params['query'])
         
     elif tool_name == "refund":
-        from shared_tools.action_tools import refund_tool
-        return json.dumps(refund_tool(params['order_id'], params['amount']))
+        return json.dumps(refund_tool(params['order_id'], params['amount'], params['idempotency_key']))
         
     elif tool_name == "communication":
-        from shared_tools.action_tools import send_communication_tool
         return json.dumps(send_communication_tool(params['recipient'], params['channel'], params['body']))
         
     else:
         return f"Unknown tool: {tool_name}. Available: crm_lookup, transcript_retrieval, policy_lookup, refund, communication"
 
-# Create the clean orchestrator agent
-root_agent = Agent(
-    name="customer_rescue_orchestrator",
-    model="gemini-2.0-flash", 
-    description="Clean multi-agent orchestrator that demonstrates proper shared tools architecture and eliminates code duplication.",
-    instruction="""You are the Customer Rescue Orchestrator - a clean implementation demonstrating ADK best practices.
+def _build_root_agent():
+    """Create the clean orchestrator agent."""
+    from google.adk.agents import Agent
+    from shared_tools import (
+        CRM_LOOKUP_TOOL, 
+        TRANSCRIPT_RETRIEVAL_TOOL,
+        POLICY_LOOKUP_TOOL,
+        REFUND_TOOL,
+        SEND_COMMUNICATION_TOOL
+    )
+    
+    return Agent(
+        name="customer_rescue_orchestrator",
+        model="gemini-2.0-flash", 
+        description="Clean multi-agent orchestrator that demonstrates proper shared tools architecture and eliminates code duplication.",
+        instruction="""You are the Customer Rescue Orchestrator - a clean implementation demonstrating ADK best practices.
 
 🏗️ **ARCHITECTURE HIGHLIGHTS:**
 • Uses shared_tools for all common functions (no duplication!)
@@ -188,15 +602,18 @@ root_agent = Agent(
 - Individual tools: test_individual_tool("crm_lookup", '{"customer_id": "C67890"}')
 
 This implementation eliminates all code duplication and follows ADK best practices!""",
-    tools=[
-        # Include key shared tools for direct access
-        CRM_LOOKUP_TOOL,
-        TRANSCRIPT_RETRIEVAL_TOOL, 
-        POLICY_LOOKUP_TOOL,
-        REFUND_TOOL,
-        SEND_COMMUNICATION_TOOL,
-        # Orchestrator-specific functions
-        FunctionTool(orchestrate_customer_issue),
-        FunctionTool(test_individual_tool)
-    ]
-)
+        tools=[
+            # Include key shared tools for direct access
+            CRM_LOOKUP_TOOL,
+            TRANSCRIPT_RETRIEVAL_TOOL, 
+            POLICY_LOOKUP_TOOL,
+            REFUND_TOOL,
+            SEND_COMMUNICATION_TOOL,
+            # Orchestrator-specific functions
+            function_tool(orchestrate_customer_issue),
+            function_tool(test_individual_tool)
+        ]
+    )
+
+# root_agent is built on first access (see shared_tools/lazy.py)
+__getattr__ = lazy_attributes(__name__, {"root_agent": _build_root_agent})
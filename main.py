@@ -1,6 +1,47 @@
-def main():
-    print("Hello from agentic-cx-rescue-swarm!")
+"""
+Command-line entry point - streams a JSONL file of customer issues through
+the rescue workflow
+
+Usage:
+    python main.py issues.jsonl -o results.jsonl --workers 8
+
+Each input line needs customer_id, transcript_id and issue_description.
+Progress is checkpointed next to the output file; re-running the same
+command after a crash resumes where it stopped (use --restart to start over).
+"""
+import argparse
+import json
+import sys
+
+from batch_processor import run_batch
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Process a JSONL file of customer issues.")
+    parser.add_argument("input", help="JSONL file with one issue per line")
+    parser.add_argument("-o", "--output", help="JSONL results file (default: <input>.results.jsonl)")
+    parser.add_argument("--workflow", choices=("orchestrator", "swarm"), default="orchestrator",
+                        help="orchestrate_customer_issue or process_customer_issue")
+    parser.add_argument("--workers", type=int, default=8, help="Issues processed concurrently")
+    parser.add_argument("--max-in-flight", type=int, default=None,
+                        help="Issues read ahead of the oldest unfinished one (default: 4 x workers)")
+    parser.add_argument("--checkpoint-every", type=int, default=100, help="Results between checkpoints")
+    parser.add_argument("--restart", action="store_true", help="Ignore any checkpoint and start from the top")
+    args = parser.parse_args(argv)
+
+    output = args.output or args.input + ".results.jsonl"
+    summary = run_batch(
+        args.input,
+        output,
+        workflow=args.workflow,
+        workers=args.workers,
+        max_in_flight=args.max_in_flight,
+        checkpoint_every=args.checkpoint_every,
+        resume=not args.restart,
+    )
+    print(json.dumps({"output": output, **summary}), file=sys.stderr)
+    return 0 if summary["failed"] == 0 else 1
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
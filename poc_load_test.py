@@ -0,0 +1,460 @@
+"""
+POC load test - drives the orchestrator, the consolidated swarm and the
+individual agents' logic functions at configurable concurrency, fully offline
+
+A seeded scenario generator produces customers across tiers, transcripts
+across severities and issues that do or do not hit a specific policy. The
+CRM, logistics, payments and communications backends are served by the
+in-process stub backend (with configurable latency) loaded with those
+scenarios, and policy lookups go through the local policy index. Where an
+agent would normally take a model turn, a DeterministicModel stands in, so
+two runs with the same seed issue the same tool calls.
+
+Every request runs under a root span; the tool, backend, workflow-phase and
+model spans recorded beneath it make up the per-phase breakdown. Nested
+spans each report their own share of request time, so shares overlap.
+
+Usage:
+    python poc_load_test.py --target all --requests 500 --concurrency 16
+    python poc_load_test.py --target orchestrator --json results/run.json
+
+Reported per target: p50/p95/p99 latency, throughput, success rate, RSS
+growth per request and a per-phase latency breakdown.
+
+Refunds go to an in-memory ledger unless CX_REFUND_LEDGER is set, so a
+second run with the same seed pays its refunds again instead of finding
+them already refunded.
+"""
+import argparse
+import gc
+import hashlib
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List
+
+from shared_tools import configure_backend, get_backend_pool, get_outbound_queue
+from shared_tools.stub_backend import StubBackendServer
+from shared_tools.tracing import InMemoryCollector, add_exporter, remove_exporter, span
+
+TIERS = (
+    # (status, ltv range, share of customers)
+    ("Silver Tier", (20, 400), 0.70),
+    ("Gold Tier", (600, 3000), 0.22),
+    ("VIP", (3000, 12000), 0.06),
+    ("Platinum", (12000, 40000), 0.02),
+)
+
+TRANSCRIPTS = {
+    "severe": (
+        "Customer: The item arrived damaged and I am furious. This is the worst experience I have ever had.",
+        "Customer: I am very unhappy, the package was damaged again. Never again will I order from you.",
+        "Customer: I am angry that nobody has called me back about the damaged order.",
+    ),
+    "mild": (
+        "Customer: My order is a few days late, can you tell me when it will arrive?",
+        "Customer: I was charged twice for shipping, could you look into it?",
+    ),
+    "calm": (
+        "Customer: I am happy with my purchase, I just wanted to update my address.",
+        "Customer: Thanks for the quick delivery, I have a question about the warranty.",
+    ),
+}
+SEVERITY_MIX = (("severe", 0.35), ("mild", 0.35), ("calm", 0.30))
+
+# issue_type -> (issue description, whether the policy corpus covers it)
+ISSUE_TYPES = {
+    "damaged": ("damaged item", True),
+    "lost_package": ("lost package", True),
+    "late_delivery": ("late delivery", True),
+    "wrong_item": ("wrong item received", True),
+    "billing": ("duplicate billing charge on invoice", False),
+}
+
+
+@dataclass
+class Scenario:
+    scenario_id: int
+    customer_id: str
+    status: str
+    ltv: int
+    recent_order_count: int
+    transcript_id: str
+    severity: str
+    issue_type: str
+    issue_description: str
+    policy_hit: bool
+    order_id: str
+    order_value: float
+
+
+def _weighted_choice(rng: random.Random, options):
+    return rng.choices([name for name, _ in options], weights=[weight for _, weight in options])[0]
+
+
+def generate_test_scenarios(count: int = 100, seed: int = 42, customer_pool: int = None) -> List[Scenario]:
+    """
+    Generate ``count`` reproducible scenarios.
+
+    Customers are drawn from a pool of ``customer_pool`` IDs (default:
+    count // 4) so repeat customers exercise the CRM cache as in production.
+    """
+    rng = random.Random(seed)
+    customer_pool = customer_pool or max(1, count // 4)
+    customers = {}
+    for i in range(customer_pool):
+        status = _weighted_choice(rng, [(name, share) for name, _, share in TIERS])
+        low, high = next(ltv_range for name, ltv_range, _ in TIERS if name == status)
+        customers[f"C{i:06d}"] = {"ltv": rng.randint(low, high), "status": status,
+                                  "recent_order_count": rng.randint(1, 40)}
+    customer_ids = list(customers)
+
+    scenarios = []
+    for i in range(count):
+        customer_id = rng.choice(customer_ids)
+        severity = _weighted_choice(rng, SEVERITY_MIX)
+        issue_type = rng.choice(list(ISSUE_TYPES))
+        description, policy_hit = ISSUE_TYPES[issue_type]
+        scenarios.append(Scenario(
+            scenario_id=i,
+            customer_id=customer_id,
+            status=customers[customer_id]["status"],
+            ltv=customers[customer_id]["ltv"],
+            recent_order_count=customers[customer_id]["recent_order_count"],
+            transcript_id=f"T{i:07d}",
+            severity=severity,
+            issue_type=issue_type,
+            issue_description=description,
+            policy_hit=policy_hit,
+            order_id=f"O-{i:07d}",
+            order_value=round(rng.uniform(10, 500), 2),
+        ))
+    return scenarios
+
+
+def scenario_fixtures(scenarios: List[Scenario], seed: int = 42) -> dict:
+    """Backend fixture data (customers, transcripts, orders) for the stub server."""
+    rng = random.Random(seed)
+    fixtures = {"customers": {}, "transcripts": {}, "orders": {}}
+    for scenario in scenarios:
+        fixtures["customers"][scenario.customer_id] = {
+            "ltv": scenario.ltv, "status": scenario.status, "recent_order_count": scenario.recent_order_count,
+        }
+        fixtures["transcripts"][scenario.transcript_id] = rng.choice(TRANSCRIPTS[scenario.severity])
+        fixtures["orders"][scenario.order_id] = {"status": "delivered", "delivery_date": "2023-10-26"}
+    return fixtures
+
+
+class DeterministicModel:
+    """
+    Offline stand-in for the model turns the agents would otherwise take.
+
+    Every answer is a pure function of its input, and ``latency`` seconds
+    are slept per turn to mimic model response time.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _turn(self):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def summarize_sentiment(self, transcript: str) -> str:
+        """Return a sentiment summary that quotes the transcript, as the agent does."""
+        self._turn()
+        return f"Sentiment analysis of the call: {transcript}"
+
+    def pick_solution(self, ranked_solutions_json: str) -> dict:
+        """Pick the recommended solution from rank_solutions output."""
+        self._turn()
+        return json.loads(ranked_solutions_json)["recommended_solution"]
+
+    def choose_channel(self, customer_id: str) -> str:
+        self._turn()
+        digest = hashlib.sha1(customer_id.encode("utf-8")).digest()
+        return "sms" if digest[0] % 4 == 0 else "email"
+
+
+def _step(name: str, func, *args):
+    """Run one agent-side step (logic function or model turn) under its own span."""
+    with span(name):
+        return func(*args)
+
+
+def _run_triage(scenario: Scenario, model: DeterministicModel):
+    from shared_tools.crm_tools import crm_lookup_tool, transcript_retrieval_tool
+    from triage_agent.agent import TRIAGE_FAST_PATH, make_triage_decision
+
+    # Clear-cut cases are settled before the model turn, as in the agent
+    if TRIAGE_FAST_PATH.enabled:
+        decision = TRIAGE_FAST_PATH.decide(scenario.customer_id, scenario.transcript_id)
+        if decision is not None:
+            return decision
+    customer = crm_lookup_tool(scenario.customer_id)
+    transcript = transcript_retrieval_tool(scenario.transcript_id)
+    sentiment = _step("model.summarize_sentiment", model.summarize_sentiment, transcript)
+    return _step("agent.make_triage_decision", make_triage_decision, customer["ltv"], customer["status"],
+                 sentiment)
+
+
+def _run_solution(scenario: Scenario, model: DeterministicModel):
+    from shared_tools.policy_tools import order_status_tool, policy_lookup_tool
+    from solution_agent.agent import rank_solutions
+
+    policy = policy_lookup_tool(f"policy for {scenario.issue_description} for {scenario.status} customer")
+    order_status_tool(scenario.order_id)
+    ranked = _step("agent.rank_solutions", rank_solutions, scenario.status, scenario.issue_type, policy,
+                   scenario.order_value)
+    return _step("model.pick_solution", model.pick_solution, ranked)
+
+
+def _run_action(scenario: Scenario, model: DeterministicModel):
+    from action_agent.agent import coordinate_action_execution
+    from shared_tools.action_tools import refund_tool, send_communication_tool
+
+    action = "full_refund" if scenario.severity == "severe" else "generate_coupon"
+    if action == "full_refund":
+        refund_tool(scenario.order_id, scenario.order_value, f"refund:{scenario.transcript_id}:{scenario.order_id}")
+    plan = json.loads(_step("agent.coordinate_action_execution", coordinate_action_execution, action,
+                            scenario.order_id, scenario.order_value))
+    channel = _step("model.choose_channel", model.choose_channel, scenario.customer_id)
+    return send_communication_tool(f"{scenario.customer_id}@example.com", channel,
+                                   plan["recommended_communication"])
+
+
+def _run_orchestrator(scenario: Scenario, model: DeterministicModel):
+    from customer_rescue_orchestrator.agent import orchestrate_customer_issue
+
+    return orchestrate_customer_issue(scenario.customer_id, scenario.transcript_id, scenario.issue_description,
+                                      order_id=scenario.order_id, order_value=scenario.order_value)
+
+
+def _run_swarm(scenario: Scenario, model: DeterministicModel):
+    from customer_experience_rescue_swarm.agent import process_customer_issue
+
+    return process_customer_issue(scenario.customer_id, scenario.transcript_id, scenario.issue_description,
+                                  order_id=scenario.order_id, order_value=scenario.order_value)
+
+
+TARGETS: Dict[str, Callable] = {
+    "orchestrator": _run_orchestrator,
+    "swarm": _run_swarm,
+    "triage": _run_triage,
+    "solution": _run_solution,
+    "action": _run_action,
+}
+
+
+def _rss_mb() -> float:
+    """Current resident set size in MB (Linux), falling back to peak RSS."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as handle:
+            for line in handle:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+
+class POCMonitor:
+    """Thread-safe collector of request latencies, phase timings, errors and memory samples."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: List[float] = []
+        self.phase_totals: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.memory_samples: List[float] = []
+        self._lock = threading.Lock()
+        self.started_at = None
+        self.finished_at = None
+
+    def start(self):
+        gc.collect()
+        self.memory_samples.append(_rss_mb())
+        self.started_at = time.perf_counter()
+
+    def record(self, latency: float, phases: Dict[str, float], error: Exception = None):
+        with self._lock:
+            self.latencies.append(latency)
+            for name, duration in phases.items():
+                self.phase_totals.setdefault(name, []).append(duration)
+            if error is not None:
+                key = type(error).__name__
+                self.errors[key] = self.errors.get(key, 0) + 1
+
+    def sample_memory(self):
+        with self._lock:
+            self.memory_samples.append(_rss_mb())
+
+    def finish(self):
+        self.finished_at = time.perf_counter()
+        gc.collect()
+        self.memory_samples.append(_rss_mb())
+
+    def report(self) -> dict:
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+        elapsed = (self.finished_at or time.perf_counter()) - self.started_at
+        failures = sum(self.errors.values())
+        rss_growth = self.memory_samples[-1] - self.memory_samples[0] if self.memory_samples else 0.0
+        return {
+            "target": self.name,
+            "requests": count,
+            "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(count / elapsed, 1) if elapsed else 0.0,
+            "success_rate": round((count - failures) / count, 4) if count else 0.0,
+            "latency_ms": {
+                "p50": round(_percentile(latencies, 0.50) * 1000, 3),
+                "p95": round(_percentile(latencies, 0.95) * 1000, 3),
+                "p99": round(_percentile(latencies, 0.99) * 1000, 3),
+                "max": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+            },
+            "rss_mb": {
+                "start": round(self.memory_samples[0], 1) if self.memory_samples else 0.0,
+                "end": round(self.memory_samples[-1], 1) if self.memory_samples else 0.0,
+                "growth_kb_per_request": round(rss_growth * 1024 / count, 3) if count else 0.0,
+            },
+            "phases_ms": {
+                name: {
+                    "mean": round(statistics.fmean(values) * 1000, 3),
+                    "p95": round(_percentile(sorted(values), 0.95) * 1000, 3),
+                    "share": round(sum(values) / sum(self.latencies), 3) if sum(self.latencies) else 0.0,
+                }
+                for name, values in self.phase_totals.items()
+            },
+            "errors": dict(self.errors),
+        }
+
+
+def run_load_test(target: str, scenarios: List[Scenario], concurrency: int = 10,
+                  model: DeterministicModel = None) -> dict:
+    """Run every scenario through ``target`` with ``concurrency`` workers and return the report."""
+    runner = TARGETS[target]
+    model = model or DeterministicModel()
+    if target == "orchestrator":
+        from customer_rescue_orchestrator.agent import ORCHESTRATOR_DAG
+
+        ORCHESTRATOR_DAG.speculation.reset()
+    monitor = POCMonitor(target)
+    sample_every = max(1, len(scenarios) // 20)
+
+    def run_one(scenario: Scenario):
+        error = None
+        with span("load_test.request", scenario_id=scenario.scenario_id) as root:
+            try:
+                runner(scenario, model)
+            except Exception as exc:
+                error = exc
+        phases: Dict[str, float] = {}
+        for child in collector.pop_trace(root.trace_id):
+            if child is not root:
+                phases[child.name] = phases.get(child.name, 0.0) + child.duration
+        monitor.record(root.duration, phases, error)
+        if scenario.scenario_id % sample_every == 0:
+            monitor.sample_memory()
+
+    collector = add_exporter(InMemoryCollector())
+    monitor.start()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f"load-{target}") as executor:
+            list(executor.map(run_one, scenarios))
+    finally:
+        remove_exporter(collector)
+    monitor.finish()
+    report = monitor.report()
+    report["model_calls"] = model.calls
+    if target == "orchestrator":
+        from customer_rescue_orchestrator.agent import get_speculation_stats
+
+        report["speculation"] = get_speculation_stats()
+    return report
+
+
+def print_report(report: dict, out=sys.stdout):
+    latency = report["latency_ms"]
+    rss = report["rss_mb"]
+    print(f"{report['target']:<13} {report['requests']:>6} req  {report['throughput_rps']:>9.1f} req/s  "
+          f"p50 {latency['p50']:>8.2f}ms  p95 {latency['p95']:>8.2f}ms  p99 {latency['p99']:>8.2f}ms  "
+          f"ok {report['success_rate'] * 100:5.1f}%  rss +{rss['growth_kb_per_request']:.2f}KB/req  "
+          f"model calls {report.get('model_calls', 0)}", file=out)
+    for name, phase in sorted(report["phases_ms"].items(), key=lambda item: -item[1]["share"]):
+        print(f"    {name:<34} mean {phase['mean']:>8.3f}ms  p95 {phase['p95']:>8.3f}ms  "
+              f"{phase['share'] * 100:5.1f}%", file=out)
+    for name, counters in report.get("speculation", {}).items():
+        print(f"    speculative {name:<22} started {counters['started']:>6}  hit rate "
+              f"{counters['hit_rate'] * 100:5.1f}%  wasted {counters['wasted_seconds'] * 1000:8.1f}ms  "
+              f"({counters['cancelled']} cancelled before running)", file=out)
+    if report["errors"]:
+        print(f"    errors: {report['errors']}", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=("all",) + tuple(TARGETS), default="all")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--backend-latency", type=float, default=0.005,
+                        help="Stub backend latency per call in seconds")
+    parser.add_argument("--model-latency", type=float, default=0.0,
+                        help="Deterministic model latency per turn in seconds")
+    parser.add_argument("--pool-size", type=int, default=64, help="Connections per backend")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Also write the reports to this JSON file")
+    args = parser.parse_args(argv)
+    os.environ.setdefault("CX_REFUND_LEDGER", ":memory:")
+
+    scenarios = generate_test_scenarios(args.requests, seed=args.seed)
+    targets = list(TARGETS) if args.target == "all" else [args.target]
+    backends = ("crm", "logistics", "payments", "communications")
+    reports = []
+    with StubBackendServer(latency=args.backend_latency, **scenario_fixtures(scenarios, args.seed)) as server:
+        for name in backends:
+            configure_backend(name, base_url=server.url, pool_size=args.pool_size)
+        try:
+            print(f"scenarios={len(scenarios)} concurrency={args.concurrency} "
+                  f"backend_latency={args.backend_latency * 1000:.1f}ms model_latency={args.model_latency * 1000:.1f}ms "
+                  f"seed={args.seed}")
+            for target in targets:
+                report = run_load_test(target, scenarios, args.concurrency, DeterministicModel(args.model_latency))
+                print_report(report)
+                reports.append(report)
+            # Communications are only queued by the workflows; deliver them
+            # while the stub is still up so the run ends with nothing pending.
+            outbound = get_outbound_queue()
+            outbound.flush(timeout=60)
+            outbound_stats = outbound.stats()
+            print(f"outbound: {outbound_stats['delivered']} delivered, {outbound_stats['failed']} failed, "
+                  f"{outbound_stats['retried']} retried after the runs")
+        finally:
+            for name in backends:
+                configure_backend(name, base_url="")
+            get_backend_pool().close()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as handle:
+            json.dump({"config": vars(args), "scenario": asdict(scenarios[0]) if scenarios else None,
+                       "reports": reports}, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
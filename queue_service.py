@@ -0,0 +1,312 @@
+"""
+Work-queue service - headless mode that feeds customer issues from a durable
+queue to a pool of worker processes
+
+Usage:
+    python queue_service.py enqueue issues.jsonl
+    python queue_service.py serve --workers 8
+    python queue_service.py stats
+    python queue_service.py dead-letters
+    python queue_service.py requeue-dead
+
+Each worker is a separate process (one per core by default) running its
+own loop: lease an issue from the queue (``shared_tools/work_queue.py``),
+run it through the workflow (``process_customer_issue`` by default), and ack
+the result or nack the error. While an issue runs, a heartbeat renews its
+lease every third of the visibility timeout, so only a worker that has
+died or hung lets its issue become visible to the others. Issues that keep
+failing end up dead-lettered after ``CX_QUEUE_MAX_ATTEMPTS`` deliveries.
+
+SIGTERM or SIGINT starts a graceful shutdown: workers finish the issue in
+hand and exit; any still running after ``--drain-timeout`` seconds are
+killed and their issues released back to the queue at once. Crashed
+workers are restarted.
+
+A redelivered issue may already have been refunded by the worker that lost
+it, so every worker records refunds in the same file-backed ledger (see
+``shared_tools/refunds.py``); the service refuses to start when
+CX_REFUND_LEDGER is ":memory:".
+
+Configuration (besides the CX_QUEUE_* settings of the queue itself):
+    CX_QUEUE_WORKERS=<cores>   worker processes
+"""
+import argparse
+import functools
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from typing import Callable, Optional
+
+from batch_processor import ORDER_FIELDS, REQUIRED_FIELDS, read_issues
+from shared_tools.refunds import require_durable_ledger
+from shared_tools.work_queue import WorkQueue
+
+DEFAULT_POLL_INTERVAL = 0.5
+DEFAULT_DRAIN_TIMEOUT = 30.0
+
+
+def worker_id(pid: Optional[int] = None) -> str:
+    """Lease owner name of a worker process; unique across hosts sharing a queue."""
+    return f"{socket.gethostname()}:{pid or os.getpid()}"
+
+
+class _Heartbeat:
+    """Renews a lease in the background while the issue is being worked on."""
+
+    def __init__(self, queue: WorkQueue, item_id: str, owner: str):
+        self._queue = queue
+        self._item_id = item_id
+        self._owner = owner
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="lease-heartbeat", daemon=True)
+        self.lost = False
+
+    def _run(self):
+        while not self._done.wait(self._queue.visibility_timeout / 3):
+            if not self._queue.extend(self._item_id, self._owner):
+                self.lost = True
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._done.set()
+        self._thread.join()
+
+
+def _workflow(name: str) -> Callable[[str, str, str], str]:
+    if name == "swarm":
+        from customer_experience_rescue_swarm.agent import process_customer_issue
+        return process_customer_issue
+    if name == "orchestrator":
+        from customer_rescue_orchestrator.agent import orchestrate_customer_issue
+        return orchestrate_customer_issue
+    raise ValueError(f"Unknown workflow: {name}. Available: swarm, orchestrator")
+
+
+def process_item(queue: WorkQueue, item: dict, workflow, owner: str) -> str:
+    """
+    Run one leased item through ``workflow`` and settle it on the queue.
+
+    Returns:
+        "done", "retry" or "dead" for a settled item, or "lost" if the lease
+        expired meanwhile (another worker owns the item now).
+    """
+    issue = item["payload"]
+    missing = [field for field in REQUIRED_FIELDS if not isinstance(issue, dict) or field not in issue]
+    if missing:
+        # Redelivery cannot fix a malformed issue
+        settled = queue.nack(item["item_id"], owner, f"Missing fields: {', '.join(missing)}", retry=False)
+        return "dead" if settled else "lost"
+    with _Heartbeat(queue, item["item_id"], owner) as heartbeat:
+        try:
+            result = workflow(issue["customer_id"], issue["transcript_id"], issue["issue_description"],
+                              **{field: issue[field] for field in ORDER_FIELDS if field in issue})
+            error = None
+        except Exception as exc:
+            result, error = None, f"{type(exc).__name__}: {exc}"
+    if heartbeat.lost:
+        return "lost"
+    if error is None:
+        return "done" if queue.ack(item["item_id"], owner, result) else "lost"
+    if not queue.nack(item["item_id"], owner, error):
+        return "lost"
+    return "retry" if item["attempts"] < queue.max_attempts else "dead"
+
+
+def worker_main(queue_factory: Callable[[], WorkQueue], workflow: str, stop,
+                poll_interval: float = DEFAULT_POLL_INTERVAL):
+    """
+    Worker process loop: lease, process and settle issues until ``stop`` is set.
+
+    Args:
+        queue_factory: Picklable zero-argument callable opening the queue
+            in this process.
+        workflow: "swarm" or "orchestrator".
+        stop: multiprocessing.Event shared with the supervisor.
+        poll_interval: Seconds to wait when the queue has nothing ready.
+    """
+    # Shutdown is the supervisor's call: Ctrl-C and a group-wide SIGTERM
+    # only ask this worker to stop after the issue in hand. The handler sets
+    # a plain flag; touching ``stop`` from it could deadlock on its lock.
+    terminated = []
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *_: terminated.append(True))
+    require_durable_ledger("queue worker")
+    queue = queue_factory()
+    run = _workflow(workflow)
+    owner = worker_id()
+    try:
+        while not (terminated or stop.is_set()):
+            items = queue.lease(owner)
+            if not items:
+                stop.wait(poll_interval)
+                continue
+            process_item(queue, items[0], run, owner)
+    finally:
+        queue.close()
+
+
+def run_service(queue_factory: Callable[[], WorkQueue], workers: Optional[int] = None, workflow: str = "swarm",
+                poll_interval: float = DEFAULT_POLL_INTERVAL, drain_timeout: float = DEFAULT_DRAIN_TIMEOUT,
+                exit_when_empty: bool = False, report_every: float = 10.0, log=sys.stderr) -> dict:
+    """
+    Supervise ``workers`` processes draining the queue until told to stop.
+
+    Args:
+        queue_factory: Picklable zero-argument callable returning the queue;
+            called once here and once in every worker.
+        workers: Worker processes (default ``CX_QUEUE_WORKERS`` or the core count).
+        workflow: "swarm" (``process_customer_issue``) or "orchestrator".
+        poll_interval: Idle wait of a worker with nothing to lease.
+        drain_timeout: Seconds workers get to finish on shutdown before they
+            are killed.
+        exit_when_empty: Stop once nothing is queued or leased (batch runs).
+        report_every: Seconds between progress lines on ``log``.
+
+    Returns:
+        Queue counts at shutdown plus elapsed seconds and worker restarts.
+    """
+    workers = workers or int(os.environ.get("CX_QUEUE_WORKERS", 0)) or os.cpu_count() or 1
+    _workflow(workflow)  # fail fast on a bad name, before any process starts
+    require_durable_ledger("queue service")
+    queue = queue_factory()
+    # spawn, not fork: a worker must not inherit the supervisor's threads or
+    # SQLite handles, and startup is cheap now that agents load lazily
+    context = multiprocessing.get_context("spawn")
+    stop = context.Event()
+    target = functools.partial(worker_main, queue_factory, workflow, stop, poll_interval)
+    processes = []
+
+    def start():
+        process = context.Process(target=target, name="cx-queue-worker", daemon=False)
+        process.start()
+        return process
+
+    signals = []
+    previous = {sig: signal.signal(sig, lambda signum, _frame: signals.append(signum))
+                for sig in (signal.SIGINT, signal.SIGTERM)}
+    started = time.perf_counter()
+    restarts = 0
+    next_report = started + report_every
+    try:
+        processes = [start() for _ in range(workers)]
+        while True:
+            time.sleep(poll_interval)
+            if signals:
+                if log is not None:
+                    print(f"received {signal.Signals(signals[0]).name}, draining workers", file=log)
+                break
+            for index, process in enumerate(processes):
+                if not process.is_alive():
+                    # Crashed mid-issue: hand its lease back instead of waiting out the timeout
+                    queue.release(worker_id(process.pid))
+                    processes[index] = start()
+                    restarts += 1
+            counts = queue.counts()
+            now = time.perf_counter()
+            if log is not None and report_every and now >= next_report:
+                print(f"queue {json.dumps(counts)} workers={workers}", file=log)
+                next_report = now + report_every
+            if exit_when_empty and counts["queued"] == 0 and counts["leased"] == 0:
+                break
+    finally:
+        stop.set()
+        deadline = time.monotonic() + drain_timeout
+        for process in processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+        for process in processes:
+            if process.is_alive():
+                process.kill()
+                process.join()
+                queue.release(worker_id(process.pid))
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+    summary = dict(queue.counts(), elapsed_seconds=round(time.perf_counter() - started, 3), restarts=restarts)
+    queue.close()
+    return summary
+
+
+def enqueue_file(queue: WorkQueue, input_path: str, chunk_size: int = 1000) -> dict:
+    """
+    Queue every valid issue of a JSONL file; an ``issue_id`` field becomes the item ID.
+
+    Lines are checked the way the batch processor checks them: a line that
+    is not a JSON object with the required fields is skipped and reported,
+    so it neither aborts the enqueue partway nor reaches a worker.
+
+    Returns:
+        {"submitted": issues queued, "rejected": one error message per skipped line}
+    """
+    queued = 0
+    rejected = []
+    chunk = []
+    for _, _, issue, error in read_issues(input_path):
+        if error is not None:
+            rejected.append(error)
+            continue
+        chunk.append(issue)
+        if len(chunk) >= chunk_size:
+            queue.put_many(chunk, [issue.get("issue_id") for issue in chunk])
+            queued += len(chunk)
+            chunk = []
+    if chunk:
+        queue.put_many(chunk, [issue.get("issue_id") for issue in chunk])
+        queued += len(chunk)
+    return {"submitted": queued, "rejected": rejected}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queue", help="Queue database (default: CX_QUEUE_PATH or work_queue.db)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    enqueue = commands.add_parser("enqueue", help="Queue the issues of a JSONL file")
+    enqueue.add_argument("input")
+    serve = commands.add_parser("serve", help="Run the worker pool")
+    serve.add_argument("--workers", type=int, help="Worker processes (default: CX_QUEUE_WORKERS or core count)")
+    serve.add_argument("--workflow", choices=("swarm", "orchestrator"), default="swarm")
+    serve.add_argument("--drain-timeout", type=float, default=DEFAULT_DRAIN_TIMEOUT)
+    serve.add_argument("--exit-when-empty", action="store_true", help="Stop once the queue is drained")
+    commands.add_parser("stats", help="Item counts per status")
+    dead = commands.add_parser("dead-letters", help="List dead-lettered issues")
+    dead.add_argument("--limit", type=int, default=100)
+    commands.add_parser("requeue-dead", help="Queue all dead-lettered issues again")
+    args = parser.parse_args(argv)
+
+    overrides = {"path": args.queue} if args.queue else {}
+    queue_factory = functools.partial(WorkQueue.from_env, **overrides)
+    if args.command == "serve":
+        summary = run_service(queue_factory, args.workers, args.workflow, drain_timeout=args.drain_timeout,
+                              exit_when_empty=args.exit_when_empty)
+        print(json.dumps(summary), file=sys.stderr)
+        return 0
+    queue = queue_factory()
+    try:
+        if args.command == "enqueue":
+            result = enqueue_file(queue, args.input)
+            for error in result["rejected"]:
+                print(error, file=sys.stderr)
+            print(json.dumps({"submitted": result["submitted"], "rejected": len(result["rejected"]),
+                              **queue.counts()}))
+            return 1 if result["rejected"] else 0
+        elif args.command == "stats":
+            print(json.dumps(queue.counts()))
+        elif args.command == "dead-letters":
+            for item in queue.dead_letters(args.limit):
+                print(json.dumps(item, ensure_ascii=False))
+        elif args.command == "requeue-dead":
+            print(json.dumps({"requeued": queue.requeue_dead()}))
+    finally:
+        queue.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
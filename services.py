@@ -0,0 +1,13 @@
+"""
+Custom ADK Web services - loaded by ``adk web`` from the agents directory
+
+Registers the bounded session store (shared_tools/sessions.py) under the
+``bounded://`` scheme:
+
+    adk web --session_service_uri bounded://
+"""
+from google.adk.cli.service_registry import get_service_registry
+
+from shared_tools.sessions import bounded_session_factory
+
+get_service_registry().register_session_service("bounded", bounded_session_factory)
@@ -2,9 +2,55 @@
 Shared tools initialization - exports all tools for easy import
 """
 
-from .crm_tools import CRM_LOOKUP_TOOL, TRANSCRIPT_RETRIEVAL_TOOL
-from .action_tools import SEND_COMMUNICATION_TOOL, REFUND_TOOL  
-from .policy_tools import POLICY_LOOKUP_TOOL, ORDER_STATUS_TOOL
+from .lazy import lazy_exports
+
+# Exports are imported from their module on first access, so importing the
+# package (or one plain function from it) does not load google.adk.
+__getattr__ = lazy_exports(__name__, {
+    'CRM_LOOKUP_TOOL': '.crm_tools',
+    'TRANSCRIPT_RETRIEVAL_TOOL': '.crm_tools',
+    'CRM_BULK_LOOKUP_TOOL': '.crm_tools',
+    'CRM_BULK_LOOKUP_TOOL_ASYNC': '.crm_tools',
+    'CRM_LOOKUP_TOOL_ASYNC': '.crm_tools',
+    'TRANSCRIPT_RETRIEVAL_TOOL_ASYNC': '.crm_tools',
+    'SEND_COMMUNICATION_TOOL': '.action_tools',
+    'REFUND_TOOL': '.action_tools',
+    'SEND_COMMUNICATION_TOOL_ASYNC': '.action_tools',
+    'REFUND_TOOL_ASYNC': '.action_tools',
+    'COMMUNICATION_STATUS_TOOL': '.action_tools',
+    'COMMUNICATION_STATUS_TOOL_ASYNC': '.action_tools',
+    'POLICY_LOOKUP_TOOL': '.policy_tools',
+    'ORDER_STATUS_TOOL': '.policy_tools',
+    'POLICY_LOOKUP_TOOL_ASYNC': '.policy_tools',
+    'ORDER_STATUS_TOOL_ASYNC': '.policy_tools',
+    'ORDER_STATUS_BULK_TOOL': '.policy_tools',
+    'ORDER_STATUS_BULK_TOOL_ASYNC': '.policy_tools',
+    'configure_backend': '.backends',
+    'get_backend_pool': '.backends',
+    'get_cache_stats': '.cache',
+    'get_coalescer_stats': '.coalescer',
+    'get_refund_engine': '.refunds',
+    'submit_refund': '.refunds',
+    'delivery_status': '.outbound',
+    'enqueue_communication': '.outbound',
+    'get_outbound_queue': '.outbound',
+    'TEMPLATES': '.templates',
+    'render_message': '.templates',
+    'create_runner': '.sessions',
+    'get_session_service': '.sessions',
+    'RESPONSE_CACHE': '.response_cache',
+    'get_response_cache_stats': '.response_cache',
+    'CustomerRecord': '.records',
+    'TriageDecision': '.records',
+    'Solution': '.records',
+    'SolutionRanking': '.records',
+    'ActionPlan': '.records',
+    'CustomerTable': '.records',
+    'Tier': '.records',
+    'Priority': '.records',
+    'Action': '.records',
+    'PriorityScheduler': '.scheduler',
+})
 
 # Export all tools for easy importing
 __all__ = [
@@ -12,6 +58,46 @@ __all__ = [
     'TRANSCRIPT_RETRIEVAL_TOOL', 
     'SEND_COMMUNICATION_TOOL',
     'REFUND_TOOL',
+    'COMMUNICATION_STATUS_TOOL',
     'POLICY_LOOKUP_TOOL',
-    'ORDER_STATUS_TOOL'
+    'ORDER_STATUS_TOOL',
+    # Multi-get variants: one backend call for a list of IDs
+    'CRM_BULK_LOOKUP_TOOL',
+    'ORDER_STATUS_BULK_TOOL',
+    # Non-blocking variants backed by the pooled backend clients
+    'CRM_LOOKUP_TOOL_ASYNC',
+    'TRANSCRIPT_RETRIEVAL_TOOL_ASYNC',
+    'SEND_COMMUNICATION_TOOL_ASYNC',
+    'REFUND_TOOL_ASYNC',
+    'COMMUNICATION_STATUS_TOOL_ASYNC',
+    'POLICY_LOOKUP_TOOL_ASYNC',
+    'ORDER_STATUS_TOOL_ASYNC',
+    'CRM_BULK_LOOKUP_TOOL_ASYNC',
+    'ORDER_STATUS_BULK_TOOL_ASYNC',
+    'configure_backend',
+    'get_backend_pool',
+    'get_cache_stats',
+    'get_coalescer_stats',
+    'get_refund_engine',
+    'submit_refund',
+    'enqueue_communication',
+    'delivery_status',
+    'get_outbound_queue',
+    'TEMPLATES',
+    'render_message',
+    'create_runner',
+    'get_session_service',
+    'RESPONSE_CACHE',
+    'get_response_cache_stats',
+    # Typed records passed between the triage, solution and action steps
+    'CustomerRecord',
+    'TriageDecision',
+    'Solution',
+    'SolutionRanking',
+    'ActionPlan',
+    'CustomerTable',
+    'Tier',
+    'Priority',
+    'Action',
+    'PriorityScheduler'
 ]
@@ -1,37 +1,133 @@
 """
 Shared communication tools for all agents
 """
-from google.adk.tools import FunctionTool
+import asyncio
 
+from .lazy import lazy_tools
+from .outbound import delivery_status, enqueue_communication
+from .refunds import RefundError, get_refund_engine
+from .tracing import traced
+
+@traced("tool.send_communication")
 def send_communication_tool(recipient: str, channel: str, body: str) -> dict:
     """
     Sends a communication to a customer.
 
+    The message is queued on the shared outbound queue, which delivers it in
+    the background batched and rate limited per channel; the call returns as
+    soon as it is queued.
+
     Args:
         recipient: The recipient of the communication.
         channel: The channel of the communication (e.g., "email", "sms").
         body: The body of the communication.
 
     Returns:
-        A dictionary with the communication status.
+        A dictionary with the queued status and the message ID to check
+        delivery with.
     """
-    print(f"Communication sent to {recipient} via {channel}: {body}")
-    return {"status": "success"}
+    return {"status": "queued", "message_id": enqueue_communication(recipient, channel, body)}
 
-def refund_tool(order_id: str, amount: float) -> dict:
+@traced("tool.refund")
+def refund_tool(order_id: str, amount: float, idempotency_key: str) -> dict:
     """
     Issues a refund for a given order.
 
+    Refunds go through the shared refund engine: they are batched with other
+    refunds in flight and deduplicated by idempotency key, so a retried call
+    with the same key never refunds twice.
+
+    Args:
+        order_id: The ID of the order to refund.
+        amount: The amount to refund.
+        idempotency_key: Identifies this refund request, e.g.
+            "refund:<transcript_id>:<order_id>". Reuse it when retrying the
+            same request; a new refund needs a new key.
+
+    Returns:
+        A dictionary with the refund status: "success", "already_refunded"
+        when this key was paid before (nothing is paid again), or "failed".
+    """
+    try:
+        return get_refund_engine().submit(order_id, amount, idempotency_key).result()
+    except RefundError as exc:
+        return {"status": "failed", "error": str(exc)}
+
+@traced("tool.send_communication")
+async def send_communication_tool_async(recipient: str, channel: str, body: str) -> dict:
+    """
+    Sends a communication to a customer without blocking the event loop.
+
+    Args:
+        recipient: The recipient of the communication.
+        channel: The channel of the communication (e.g., "email", "sms").
+        body: The body of the communication.
+
+    Returns:
+        A dictionary with the queued status and the message ID to check
+        delivery with.
+    """
+    return {"status": "queued", "message_id": enqueue_communication(recipient, channel, body)}
+
+@traced("tool.refund")
+async def refund_tool_async(order_id: str, amount: float, idempotency_key: str) -> dict:
+    """
+    Issues a refund for a given order without blocking the event loop.
+
     Args:
         order_id: The ID of the order to refund.
         amount: The amount to refund.
+        idempotency_key: Identifies this refund request (see refund_tool).
 
     Returns:
         A dictionary with the refund status.
     """
-    print(f"Refund of ${amount} for order {order_id} processed successfully.")
-    return {"status": "success"}
+    try:
+        return await asyncio.wrap_future(get_refund_engine().submit(order_id, amount, idempotency_key))
+    except RefundError as exc:
+        return {"status": "failed", "error": str(exc)}
+
+@traced("tool.communication_status")
+def communication_status_tool(message_id: str) -> dict:
+    """
+    Checks the delivery status of a communication.
+
+    Args:
+        message_id: The message ID returned when the communication was sent.
+
+    Returns:
+        A dictionary with the delivery status (queued, sending, retrying,
+        delivered or failed), attempts and last error.
+    """
+    status = delivery_status(message_id)
+    if status is None:
+        return {"message_id": message_id, "status": "unknown"}
+    return status
+
+@traced("tool.communication_status")
+async def communication_status_tool_async(message_id: str) -> dict:
+    """
+    Checks the delivery status of a communication without blocking the event loop.
+
+    Args:
+        message_id: The message ID returned when the communication was sent.
+
+    Returns:
+        A dictionary with the delivery status (queued, sending, retrying,
+        delivered or failed), attempts and last error.
+    """
+    status = delivery_status(message_id)
+    if status is None:
+        return {"message_id": message_id, "status": "unknown"}
+    return status
 
-# Export as ADK FunctionTool instances
-SEND_COMMUNICATION_TOOL = FunctionTool(send_communication_tool)
-REFUND_TOOL = FunctionTool(refund_tool)
+# Export as ADK FunctionTool instances (built on first access, see lazy.py)
+__getattr__ = lazy_tools(
+    __name__,
+    SEND_COMMUNICATION_TOOL="send_communication_tool",
+    REFUND_TOOL="refund_tool",
+    SEND_COMMUNICATION_TOOL_ASYNC="send_communication_tool_async",
+    REFUND_TOOL_ASYNC="refund_tool_async",
+    COMMUNICATION_STATUS_TOOL="communication_status_tool",
+    COMMUNICATION_STATUS_TOOL_ASYNC="communication_status_tool_async",
+)
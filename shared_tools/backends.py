@@ -0,0 +1,244 @@
+"""
+Shared connection-pooled backend clients for all tools
+
+Each backend (CRM, policy, logistics, payments, communications) gets its own
+keep-alive connection pools (blocking and async) and timeout. Backends without a configured base URL are served by the in-process mock
+data, so the tools keep working offline.
+
+Configuration comes from environment variables, e.g.:
+    CX_CRM_URL=http://crm.internal:8080
+    CX_CRM_POOL_SIZE=50
+    CX_CRM_TIMEOUT=2.5
+"""
+import asyncio
+import os
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+from .tracing import span
+
+if TYPE_CHECKING:
+    import httpx
+
+BACKEND_NAMES = ("crm", "policy", "logistics", "payments", "communications")
+
+DEFAULT_POOL_SIZE = 20
+DEFAULT_TIMEOUT = 5.0
+
+
+@dataclass
+class BackendConfig:
+    """Connection settings for a single backend."""
+    name: str
+    base_url: Optional[str] = None
+    pool_size: int = DEFAULT_POOL_SIZE
+    timeout: float = DEFAULT_TIMEOUT
+
+    @classmethod
+    def from_env(cls, name: str) -> "BackendConfig":
+        prefix = f"CX_{name.upper()}_"
+        return cls(
+            name=name,
+            base_url=os.environ.get(prefix + "URL") or None,
+            pool_size=int(os.environ.get(prefix + "POOL_SIZE", DEFAULT_POOL_SIZE)),
+            timeout=float(os.environ.get(prefix + "TIMEOUT", DEFAULT_TIMEOUT)),
+        )
+
+
+class BackendPool:
+    """
+    Registry of pooled HTTP clients, one per backend.
+
+    Every backend owns an ``httpx.Client`` whose connection pool holds
+    ``pool_size`` keep-alive connections, used by the blocking tools. The
+    async tools use an ``httpx.AsyncClient`` with the same limits, one per
+    event loop (an async connection pool cannot be shared between loops),
+    so they do non-blocking I/O on the loop itself. A semaphore of
+    ``pool_size`` per client admits requests to it: httpcore rescans its
+    queue of waiting requests whenever a connection frees up, so thousands
+    of requests queued inside the pool slow every request down
+    (benchmarks/async_tools_benchmark.py shows the difference).
+
+    An async client is closed on its own loop when that loop shuts down
+    (``asyncio.run`` returning), and the pool holds its loops only weakly.
+    """
+
+    def __init__(self):
+        self._configs = {name: BackendConfig.from_env(name) for name in BACKEND_NAMES}
+        self._clients = {}
+        # backend -> {event loop (weak): (AsyncClient, admission semaphore, closer)}
+        self._async_clients = {name: weakref.WeakKeyDictionary() for name in BACKEND_NAMES}
+        self._lock = threading.Lock()
+
+    def configure(self, name: str, base_url: Optional[str] = None,
+                  pool_size: Optional[int] = None, timeout: Optional[float] = None) -> BackendConfig:
+        """Override the settings of a backend and drop its existing client."""
+        if name not in self._configs:
+            raise ValueError(f"Unknown backend: {name}. Available: {', '.join(BACKEND_NAMES)}")
+        config = self._configs[name]
+        if base_url is not None:
+            config.base_url = base_url or None
+        if pool_size is not None:
+            config.pool_size = pool_size
+        if timeout is not None:
+            config.timeout = timeout
+        self._release(name)
+        return config
+
+    def config(self, name: str) -> BackendConfig:
+        return self._configs[name]
+
+    def is_remote(self, name: str) -> bool:
+        """True when the backend has a base URL and should be called over HTTP."""
+        return self._configs[name].base_url is not None
+
+    def client(self, name: str) -> "httpx.Client":
+        with self._lock:
+            client = self._clients.get(name)
+            if client is None:
+                # Imported with the first client: processes on the mock
+                # backends never pay for httpx at startup
+                import httpx
+
+                client = httpx.Client(**self._client_settings(name))
+                self._clients[name] = client
+            return client
+
+    def async_client(self, name: str) -> "httpx.AsyncClient":
+        """The async client of a backend for the running event loop."""
+        return self._async_slot(name)[0]
+
+    def _async_slot(self, name: str):
+        loop = asyncio.get_running_loop()
+        ended = []
+        with self._lock:
+            clients = self._async_clients[name]
+            slot = clients.get(loop)
+            if slot is None:
+                import httpx
+
+                # Loops closed without shutting down their async generators
+                # (loop.close() rather than asyncio.run) never closed their clients
+                ended = [(other, clients.pop(other)) for other in list(clients) if other.is_closed()]
+                client = httpx.AsyncClient(**self._client_settings(name))
+                slot = (client, asyncio.Semaphore(self._configs[name].pool_size),
+                        _park(self._close_with_loop(name, weakref.ref(loop), client)))
+                clients[loop] = slot
+        for other, stale in ended:
+            _discard(other, stale)
+        return slot
+
+    async def _close_with_loop(self, name: str, loop_ref: weakref.ref, client: "httpx.AsyncClient"):
+        """
+        Async generator parked at its first ``yield`` for as long as the loop
+        runs. ``asyncio.run`` closes a loop's async generators before ending
+        it, which runs the ``finally`` while the client's connections can
+        still be shut down on that loop.
+        """
+        try:
+            yield
+        finally:
+            loop = loop_ref()
+            with self._lock:
+                slot = self._async_clients[name].get(loop) if loop is not None else None
+                if slot is not None and slot[0] is client:
+                    del self._async_clients[name][loop]
+            await client.aclose()
+
+    def _client_settings(self, name: str) -> dict:
+        import httpx
+
+        config = self._configs[name]
+        return {
+            "base_url": config.base_url,
+            "limits": httpx.Limits(max_connections=config.pool_size, max_keepalive_connections=config.pool_size),
+            "timeout": config.timeout,
+        }
+
+    def request_json(self, name: str, method: str, path: str, **kwargs):
+        """Blocking request against a backend, returning the decoded JSON body."""
+        with span(f"backend.{name}", method=method, path=path) as current:
+            response = self.client(name).request(method, path, **kwargs)
+            current.set_attribute("http.status_code", response.status_code)
+            current.set_attribute("response.size", len(response.content))
+            response.raise_for_status()
+            return response.json()
+
+    async def arequest_json(self, name: str, method: str, path: str, **kwargs):
+        """Non-blocking request against a backend, returning the decoded JSON body."""
+        client, admission, _ = self._async_slot(name)
+        with span(f"backend.{name}", method=method, path=path) as current:
+            async with admission:
+                response = await client.request(method, path, **kwargs)
+            current.set_attribute("http.status_code", response.status_code)
+            current.set_attribute("response.size", len(response.content))
+            response.raise_for_status()
+            return response.json()
+
+    async def aclose(self):
+        """Close the async clients of the running event loop (call before the loop ends)."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            slots = [by_loop.pop(loop) for by_loop in self._async_clients.values() if loop in by_loop]
+        for _, _, closer in slots:
+            await closer.aclose()
+
+    def _release(self, name: str):
+        with self._lock:
+            client = self._clients.pop(name, None)
+            slots = list(self._async_clients[name].items())
+            self._async_clients[name].clear()
+        if client is not None:
+            client.close()
+        # Async clients are bound to their loops, which may be gone
+        for loop, slot in slots:
+            _discard(loop, slot)
+
+    def close(self):
+        """Close every client, the async ones on their own loops where those are still open."""
+        for name in BACKEND_NAMES:
+            self._release(name)
+
+
+def _park(closer):
+    """Step an async generator to its first ``yield``, which registers it with the running loop."""
+    try:
+        closer.asend(None).send(None)
+    except StopIteration:
+        pass
+    return closer
+
+
+def _discard(loop: asyncio.AbstractEventLoop, slot: tuple):
+    """Close an evicted async client on its loop, or as far as it can be once that loop is closed."""
+    closer = slot[2]
+    if not loop.is_closed():
+        asyncio.run_coroutine_threadsafe(closer.aclose(), loop)
+        return
+    # The connections' transports belong to the closed loop, so they cannot
+    # be shut down on another; the client is marked closed and its sockets
+    # go with the transports. Finishing the generator here also keeps it
+    # from being finalized on the closed loop later.
+    step = closer.aclose()
+    try:
+        step.send(None)
+    except Exception:  # StopIteration, or the closed loop refusing the shutdown
+        pass
+    finally:
+        step.close()
+
+
+_backend_pool = BackendPool()
+
+
+def get_backend_pool() -> BackendPool:
+    """Return the process-wide backend pool shared by all tools."""
+    return _backend_pool
+
+
+def configure_backend(name: str, base_url: Optional[str] = None,
+                      pool_size: Optional[int] = None, timeout: Optional[float] = None) -> BackendConfig:
+    """Configure a backend on the shared pool (see ``BackendPool.configure``)."""
+    return _backend_pool.configure(name, base_url=base_url, pool_size=pool_size, timeout=timeout)
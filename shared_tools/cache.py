@@ -0,0 +1,273 @@
+"""
+Shared result caching for tools - TTL expiry, LRU eviction and single-flight
+
+Usage:
+    CRM_CACHE = TTLCache.from_env("crm_lookup", maxsize=10_000, ttl=300)
+
+    @cached(CRM_CACHE)
+    def crm_lookup_tool(customer_id: str) -> dict: ...
+
+    @cached(CRM_CACHE)
+    async def crm_lookup_tool_async(customer_id: str) -> dict: ...
+
+Sync and async tools may share one cache. Concurrent misses on the same key
+are collapsed into a single backend call whose result every waiter receives.
+Per-cache settings can be overridden with CX_CACHE_<NAME>_TTL and
+CX_CACHE_<NAME>_SIZE.
+"""
+import asyncio
+import copy
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from .tracing import set_attribute
+
+_registry = {}
+
+# _claim state -> outcome recorded on the caller's tool span
+_TRACE_OUTCOMES = {"hit": "hit", "wait": "coalesced", "lead": "miss"}
+
+
+class TTLCache:
+    """
+    Bounded mapping whose entries expire ``ttl`` seconds after being stored.
+
+    When full, the least recently used entry is evicted. All operations are
+    thread-safe; counters are exposed through ``stats()``.
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 300.0, clock=time.monotonic):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()
+        # key -> (Future, leader_is_async) for computations in progress
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.coalesced = 0
+        _registry[name] = self
+
+    @classmethod
+    def from_env(cls, name: str, maxsize: int = 1024, ttl: float = 300.0) -> "TTLCache":
+        prefix = f"CX_CACHE_{name.upper()}_"
+        return cls(
+            name,
+            maxsize=int(os.environ.get(prefix + "SIZE", maxsize)),
+            ttl=float(os.environ.get(prefix + "TTL", ttl)),
+        )
+
+    def _get_locked(self, key):
+        """Return (found, value); caller must hold the lock."""
+        entry = self._data.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._data[key]
+            self.expirations += 1
+            return False, None
+        self._data.move_to_end(key)
+        return True, value
+
+    def _put_locked(self, key, value):
+        self._data[key] = (self._clock() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key, default=None):
+        with self._lock:
+            found, value = self._get_locked(key)
+            if found:
+                self.hits += 1
+                return value
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._put_locked(key, value)
+
+    def get_many(self, keys):
+        """
+        Look several keys up under one lock acquisition.
+
+        Returns:
+            ({key: value} for the keys found, [keys missing, in order])
+        """
+        found, missing = {}, []
+        with self._lock:
+            for key in keys:
+                hit, value = self._get_locked(key)
+                if hit:
+                    self.hits += 1
+                    found[key] = value
+                else:
+                    self.misses += 1
+                    missing.append(key)
+        return found, missing
+
+    def put_many(self, items: dict):
+        with self._lock:
+            for key, value in items.items():
+                self._put_locked(key, value)
+
+    def invalidate(self, key) -> bool:
+        """Drop a single entry; returns True if it was present."""
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def _claim(self, key, is_async: bool):
+        """
+        Look the key up and, on a miss, either join the computation already
+        in flight or become its leader.
+
+        Returns ("hit", value), ("wait", future) or ("lead", future).
+        """
+        with self._lock:
+            found, value = self._get_locked(key)
+            if found:
+                self.hits += 1
+                return "hit", value
+            pending = self._pending.get(key)
+            # A sync caller must not wait on an async leader: if both share
+            # the event loop thread, the leader could never finish.
+            if pending is not None and (is_async or not pending[1]):
+                self.coalesced += 1
+                return "wait", pending[0]
+            self.misses += 1
+            future = Future()
+            if pending is None:
+                self._pending[key] = (future, is_async)
+            return "lead", future
+
+    def _settle(self, key, future: Future, value=None, error: BaseException = None):
+        with self._lock:
+            if error is None:
+                self._put_locked(key, value)
+            pending = self._pending.get(key)
+            if pending is not None and pending[0] is future:
+                del self._pending[key]
+        if error is None:
+            future.set_result(value)
+        else:
+            future.set_exception(error)
+            # Mark retrieved so unobserved failures are not logged as leaks
+            future.exception()
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, calling ``compute()`` once on a miss."""
+        state, payload = self._claim(key, is_async=False)
+        set_attribute("cache." + self.name, _TRACE_OUTCOMES[state])
+        if state == "hit":
+            return payload
+        if state == "wait":
+            return payload.result()
+        try:
+            value = compute()
+        except BaseException as exc:
+            self._settle(key, payload, error=exc)
+            raise
+        self._settle(key, payload, value)
+        return value
+
+    async def aget_or_compute(self, key, compute):
+        """Async counterpart of ``get_or_compute``; ``compute`` returns an awaitable."""
+        state, payload = self._claim(key, is_async=True)
+        set_attribute("cache." + self.name, _TRACE_OUTCOMES[state])
+        if state == "hit":
+            return payload
+        if state == "wait":
+            return await asyncio.wrap_future(payload)
+        try:
+            value = await compute()
+        except BaseException as exc:
+            self._settle(key, payload, error=exc)
+            raise
+        self._settle(key, payload, value)
+        return value
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "name": self.name,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            # Share of calls answered without a backend call of their own
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
+
+
+def cached(cache: TTLCache, key=None):
+    """
+    Decorator caching a tool's result in ``cache``.
+
+    Works on both plain and ``async`` functions and keeps the wrapped
+    signature, so the result can still be registered as an ADK FunctionTool.
+    Mutable results are shallow-copied on the way out so callers cannot
+    alter the cached entry.
+
+    Args:
+        cache: Any object with ``get_or_compute``/``aget_or_compute`` (e.g. ``TTLCache``).
+        key: Optional function mapping the call arguments to a cache key;
+            defaults to the bound call arguments.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        def make_key(args, kwargs):
+            if key is not None:
+                return key(*args, **kwargs)
+            # ADK passes tool arguments by keyword while direct callers use
+            # positions; bind them so both spellings share one entry.
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return tuple(bound.arguments.values())
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                value = await cache.aget_or_compute(make_key(args, kwargs), lambda: func(*args, **kwargs))
+                return copy.copy(value)
+            async_wrapper.cache = cache
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            value = cache.get_or_compute(make_key(args, kwargs), lambda: func(*args, **kwargs))
+            return copy.copy(value)
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
+
+
+def get_cache_stats() -> dict:
+    """Return the counters of every cache created in this process, keyed by name."""
+    return {name: cache.stats() for name, cache in _registry.items()}
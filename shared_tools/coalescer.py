@@ -0,0 +1,197 @@
+"""
+Shared request coalescing - gathers concurrent single-key lookups into one
+multi-get backend call
+
+Usage:
+    CRM_COALESCER = BatchCoalescer.from_env("crm", fetch_customers)
+
+    record = CRM_COALESCER.get("C67890")            # blocks for the batch
+    record = await CRM_COALESCER.aget("C67890")     # same, without blocking the loop
+
+A lookup waits at most ``max_wait`` seconds for company: the batch is sent
+as soon as ``max_batch_size`` distinct keys are waiting or the oldest has
+waited the window out. Keys requested more than once in a window are
+fetched once. Every caller gets its own key's result (or the batch's
+error) through a future, so callers keep the single-key interface.
+
+Per-backend settings can be overridden with CX_<BACKEND>_BATCH_WINDOW
+(seconds; 0 turns coalescing off) and CX_<BACKEND>_BATCH_SIZE.
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, List, Optional
+
+from .tracing import span
+
+DEFAULT_BATCH_WINDOW = 0.002
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_CONCURRENT_BATCHES = 4
+
+_registry = {}
+
+
+class BatchCoalescer:
+    """
+    Micro-batcher turning concurrent ``get(key)`` calls into ``fetch_many(keys)`` calls.
+
+    Args:
+        name: Backend name, used for settings, spans and stats.
+        fetch_many: Callable taking a list of distinct keys and returning a
+            dict with a result per key; keys missing from it fail with
+            KeyError.
+        max_batch_size: Distinct keys per backend call.
+        max_wait: Longest a key waits for its batch to fill, in seconds.
+        max_concurrent_batches: Batches that may be awaiting the backend at
+            once; further batches wait for a free slot.
+    """
+
+    def __init__(self, name: str, fetch_many: Callable[[List[Hashable]], Dict[Hashable, object]],
+                 max_batch_size: int = DEFAULT_BATCH_SIZE, max_wait: float = DEFAULT_BATCH_WINDOW,
+                 max_concurrent_batches: int = DEFAULT_CONCURRENT_BATCHES):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.name = name
+        self.fetch_many = fetch_many
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_concurrent_batches = max_concurrent_batches
+        self._batch_slots = threading.BoundedSemaphore(max_concurrent_batches)
+        self._condition = threading.Condition()
+        # key -> futures of its callers, in arrival order; _opened_at is when
+        # the oldest waiting key arrived
+        self._waiting: Dict[Hashable, List[Future]] = {}
+        self._opened_at = 0.0
+        self._executor = None
+        self._thread = None
+        self.requests = 0
+        self.batches = 0
+        self.keys_fetched = 0
+        self.deduplicated = 0
+        self.errors = 0
+        _registry[name] = self
+
+    @classmethod
+    def from_env(cls, name: str, fetch_many, max_batch_size: int = DEFAULT_BATCH_SIZE,
+                 max_wait: float = DEFAULT_BATCH_WINDOW) -> "BatchCoalescer":
+        prefix = f"CX_{name.upper()}_"
+        return cls(
+            name,
+            fetch_many,
+            max_batch_size=int(os.environ.get(prefix + "BATCH_SIZE", max_batch_size)),
+            max_wait=float(os.environ.get(prefix + "BATCH_WINDOW", max_wait)),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_wait > 0
+
+    def submit(self, key: Hashable) -> Future:
+        """Queue ``key`` for the next batch; returns a future resolving to its result."""
+        future = Future()
+        with self._condition:
+            self.requests += 1
+            waiters = self._waiting.get(key)
+            if waiters is None:
+                if not self._waiting:
+                    self._opened_at = time.monotonic()
+                self._waiting[key] = [future]
+            else:
+                self.deduplicated += 1
+                waiters.append(future)
+            self._ensure_thread()
+            self._condition.notify()
+        return future
+
+    def get(self, key: Hashable):
+        """Result for ``key``, fetched in a batch with any concurrent lookups."""
+        return self.submit(key).result()
+
+    async def aget(self, key: Hashable):
+        """Async counterpart of ``get``."""
+        return await asyncio.wrap_future(self.submit(key))
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent_batches,
+                                                thread_name_prefix=f"{self.name}-batch")
+            self._thread = threading.Thread(target=self._run, name=f"{self.name}-coalescer", daemon=True)
+            self._thread.start()
+
+    def _next_batch(self) -> Dict[Hashable, List[Future]]:
+        """Block until a batch is due (full or window elapsed) and take it."""
+        with self._condition:
+            while True:
+                if self._waiting:
+                    due = self._opened_at + self.max_wait
+                    now = time.monotonic()
+                    if len(self._waiting) >= self.max_batch_size or now >= due:
+                        keys = list(self._waiting)[:self.max_batch_size]
+                        batch = {key: self._waiting.pop(key) for key in keys}
+                        # Keys left over start a new window now
+                        self._opened_at = now
+                        return batch
+                    self._condition.wait(due - now)
+                else:
+                    self._condition.wait()
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            self._batch_slots.acquire()
+            self._executor.submit(self._flush_and_release, batch)
+
+    def _flush_and_release(self, batch: Dict[Hashable, List[Future]]):
+        try:
+            self._flush(batch)
+        finally:
+            self._batch_slots.release()
+
+    def _flush(self, batch: Dict[Hashable, List[Future]]):
+        keys = list(batch)
+        try:
+            with span(f"{self.name}.batch", size=len(keys)):
+                results = self.fetch_many(keys)
+        except Exception as exc:
+            with self._condition:
+                self.batches += 1
+                self.errors += 1
+            for futures in batch.values():
+                for future in futures:
+                    future.set_exception(exc)
+            return
+        with self._condition:
+            self.batches += 1
+            self.keys_fetched += len(keys)
+        for key, futures in batch.items():
+            for future in futures:
+                if key in results:
+                    future.set_result(results[key])
+                else:
+                    future.set_exception(KeyError(key))
+
+    def stats(self) -> dict:
+        with self._condition:
+            waiting = len(self._waiting)
+        return {
+            "name": self.name,
+            "enabled": self.enabled,
+            "max_wait": self.max_wait,
+            "max_batch_size": self.max_batch_size,
+            "requests": self.requests,
+            "batches": self.batches,
+            "keys_fetched": self.keys_fetched,
+            "deduplicated": self.deduplicated,
+            "errors": self.errors,
+            "waiting": waiting,
+            # Backend round-trips avoided versus one call per lookup
+            "round_trips_saved": self.requests - waiting - self.batches,
+            "average_batch_size": self.keys_fetched / self.batches if self.batches else 0.0,
+        }
+
+
+def get_coalescer_stats() -> dict:
+    """Return the counters of every coalescer created in this process, keyed by name."""
+    return {name: coalescer.stats() for name, coalescer in _registry.items()}
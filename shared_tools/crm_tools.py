@@ -1,8 +1,76 @@
 """
 Shared CRM tools for all agents
 """
-from google.adk.tools import FunctionTool
+import copy
+import os
+import threading
+from typing import Dict, Iterator, List, Optional
 
+from .backends import get_backend_pool
+from .cache import TTLCache, cached
+from .coalescer import BatchCoalescer
+from .lazy import lazy_tools
+from .tracing import traced
+from .transcript_store import DEFAULT_CHUNK_SIZE, TranscriptStore
+
+# Directory of the memory-mapped transcript store; transcripts found there are
+# served locally before falling back to the CRM backend.
+TRANSCRIPT_STORE_DIR = os.environ.get("CX_TRANSCRIPT_STORE") or None
+
+_transcript_store = None
+_transcript_store_lock = threading.Lock()
+
+# Customer tiers change rarely; the same customer shows up across many
+# transcripts and is looked up by every agent that touches the issue.
+CRM_CACHE = TTLCache.from_env("crm_lookup", maxsize=10_000, ttl=300)
+
+def _mock_customer_record(customer_id: str) -> dict:
+    if customer_id == "C67890":
+        return {"ltv": 1500, "status": "Gold Tier", "recent_order_count": 12}
+    else:
+        return {"ltv": 100, "status": "Silver Tier", "recent_order_count": 1}
+
+def _mock_transcript(transcript_id: str) -> str:
+    if transcript_id == "T12345":
+        return "Customer: I am very unhappy with my recent purchase. The item arrived damaged. I will never buy from you again. This is the worst experience I have ever had."
+    else:
+        return "Customer: I am happy with my purchase."
+
+def _fetch_customers(customer_ids: List[str]) -> Dict[str, dict]:
+    """One CRM round-trip for several customers."""
+    pool = get_backend_pool()
+    if pool.is_remote("crm"):
+        return pool.request_json("crm", "POST", "/customers/batch", json={"customer_ids": customer_ids})["customers"]
+    return {customer_id: _mock_customer_record(customer_id) for customer_id in customer_ids}
+
+async def _fetch_customers_async(customer_ids: List[str]) -> Dict[str, dict]:
+    pool = get_backend_pool()
+    if pool.is_remote("crm"):
+        return (await pool.arequest_json("crm", "POST", "/customers/batch",
+                                         json={"customer_ids": customer_ids}))["customers"]
+    return {customer_id: _mock_customer_record(customer_id) for customer_id in customer_ids}
+
+# Concurrent lookups of different customers that miss the cache (a burst of
+# issues, the orchestrator's parallel steps) share one batch call.
+CRM_COALESCER = BatchCoalescer.from_env("crm", _fetch_customers)
+
+def _cached_customers(customer_ids: List[str]):
+    """Split a bulk lookup into cached records and the IDs still to fetch."""
+    found, missing = CRM_CACHE.get_many([(customer_id,) for customer_id in dict.fromkeys(customer_ids)])
+    return {key[0]: copy.copy(value) for key, value in found.items()}, [key[0] for key in missing]
+
+def get_transcript_store() -> Optional[TranscriptStore]:
+    """Return the shared transcript store, or None when CX_TRANSCRIPT_STORE is unset."""
+    global _transcript_store
+    if TRANSCRIPT_STORE_DIR is None:
+        return None
+    with _transcript_store_lock:
+        if _transcript_store is None:
+            _transcript_store = TranscriptStore(TRANSCRIPT_STORE_DIR)
+        return _transcript_store
+
+@traced("tool.crm_lookup")
+@cached(CRM_CACHE)
 def crm_lookup_tool(customer_id: str) -> dict:
     """
     Fetches customer data from the CRM.
@@ -13,11 +81,32 @@ def crm_lookup_tool(customer_id: str) -> dict:
     Returns:
         A dictionary containing the customer's LTV, status, and recent order count.
     """
-    if customer_id == "C67890":
-        return {"ltv": 1500, "status": "Gold Tier", "recent_order_count": 12}
-    else:
-        return {"ltv": 100, "status": "Silver Tier", "recent_order_count": 1}
+    pool = get_backend_pool()
+    if pool.is_remote("crm"):
+        if CRM_COALESCER.enabled:
+            return CRM_COALESCER.get(customer_id)
+        return pool.request_json("crm", "GET", f"/customers/{customer_id}")
+    return _mock_customer_record(customer_id)
+
+@traced("tool.crm_bulk_lookup")
+def crm_bulk_lookup_tool(customer_ids: List[str]) -> dict:
+    """
+    Fetches several customers from the CRM in one call.
 
+    Args:
+        customer_ids: The IDs of the customers to look up.
+
+    Returns:
+        A dictionary mapping each customer ID to its LTV, status, and recent order count.
+    """
+    records, missing = _cached_customers(customer_ids)
+    if missing:
+        fetched = _fetch_customers(missing)
+        CRM_CACHE.put_many({(customer_id,): fetched[customer_id] for customer_id in missing})
+        records.update((customer_id, copy.copy(fetched[customer_id])) for customer_id in missing)
+    return {customer_id: records[customer_id] for customer_id in customer_ids}
+
+@traced("tool.transcript_retrieval")
 def transcript_retrieval_tool(transcript_id: str) -> str:
     """
     Fetches the full call transcript.
@@ -28,11 +117,97 @@ def transcript_retrieval_tool(transcript_id: str) -> str:
     Returns:
         The full text of the conversation.
     """
-    if transcript_id == "T12345":
-        return "Customer: I am very unhappy with my recent purchase. The item arrived damaged. I will never buy from you again. This is the worst experience I have ever had."
-    else:
-        return "Customer: I am happy with my purchase."
+    store = get_transcript_store()
+    if store is not None and transcript_id in store:
+        return store.get(transcript_id)
+    pool = get_backend_pool()
+    if pool.is_remote("crm"):
+        return pool.request_json("crm", "GET", f"/transcripts/{transcript_id}")["text"]
+    return _mock_transcript(transcript_id)
+
+def iter_transcript_chunks(transcript_id: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Yields a transcript in chunks so it can be scanned incrementally.
+
+    Transcripts in the local store are decoded straight from the mapped
+    segment without materialising the whole text; other sources are fetched
+    once and sliced.
+
+    Args:
+        transcript_id: The ID of the transcript to retrieve.
+        chunk_size: Approximate chunk size in bytes (store) or characters.
+    """
+    store = get_transcript_store()
+    if store is not None and transcript_id in store:
+        yield from store.iter_chunks(transcript_id, chunk_size)
+        return
+    text = transcript_retrieval_tool(transcript_id)
+    for start in range(0, len(text), chunk_size):
+        yield text[start:start + chunk_size]
+
+@traced("tool.crm_lookup")
+@cached(CRM_CACHE)
+async def crm_lookup_tool_async(customer_id: str) -> dict:
+    """
+    Fetches customer data from the CRM without blocking the event loop.
+
+    Args:
+        customer_id: The ID of the customer to look up.
+
+    Returns:
+        A dictionary containing the customer's LTV, status, and recent order count.
+    """
+    pool = get_backend_pool()
+    if pool.is_remote("crm"):
+        if CRM_COALESCER.enabled:
+            return await CRM_COALESCER.aget(customer_id)
+        return await pool.arequest_json("crm", "GET", f"/customers/{customer_id}")
+    return _mock_customer_record(customer_id)
+
+@traced("tool.crm_bulk_lookup")
+async def crm_bulk_lookup_tool_async(customer_ids: List[str]) -> dict:
+    """
+    Fetches several customers from the CRM in one call without blocking the event loop.
+
+    Args:
+        customer_ids: The IDs of the customers to look up.
+
+    Returns:
+        A dictionary mapping each customer ID to its LTV, status, and recent order count.
+    """
+    records, missing = _cached_customers(customer_ids)
+    if missing:
+        fetched = await _fetch_customers_async(missing)
+        CRM_CACHE.put_many({(customer_id,): fetched[customer_id] for customer_id in missing})
+        records.update((customer_id, copy.copy(fetched[customer_id])) for customer_id in missing)
+    return {customer_id: records[customer_id] for customer_id in customer_ids}
+
+@traced("tool.transcript_retrieval")
+async def transcript_retrieval_tool_async(transcript_id: str) -> str:
+    """
+    Fetches the full call transcript without blocking the event loop.
+
+    Args:
+        transcript_id: The ID of the transcript to retrieve.
+
+    Returns:
+        The full text of the conversation.
+    """
+    store = get_transcript_store()
+    if store is not None and transcript_id in store:
+        return store.get(transcript_id)
+    pool = get_backend_pool()
+    if pool.is_remote("crm"):
+        return (await pool.arequest_json("crm", "GET", f"/transcripts/{transcript_id}"))["text"]
+    return _mock_transcript(transcript_id)
 
-# Export as ADK FunctionTool instances
-CRM_LOOKUP_TOOL = FunctionTool(crm_lookup_tool)
-TRANSCRIPT_RETRIEVAL_TOOL = FunctionTool(transcript_retrieval_tool)
+# Export as ADK FunctionTool instances (built on first access, see lazy.py)
+__getattr__ = lazy_tools(
+    __name__,
+    CRM_LOOKUP_TOOL="crm_lookup_tool",
+    CRM_BULK_LOOKUP_TOOL="crm_bulk_lookup_tool",
+    TRANSCRIPT_RETRIEVAL_TOOL="transcript_retrieval_tool",
+    CRM_LOOKUP_TOOL_ASYNC="crm_lookup_tool_async",
+    CRM_BULK_LOOKUP_TOOL_ASYNC="crm_bulk_lookup_tool_async",
+    TRANSCRIPT_RETRIEVAL_TOOL_ASYNC="transcript_retrieval_tool_async",
+)
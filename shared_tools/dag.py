@@ -0,0 +1,393 @@
+"""
+Shared step scheduler for workflows - runs a small DAG of steps, each
+declaring the inputs it needs, with independent steps in parallel
+
+Usage:
+    dag = Dag("orchestrator", params=("customer_id", "transcript_id"), steps=[
+        Step("customer", crm_lookup, inputs=("customer_id",)),
+        Step("severity", analyze, inputs=("transcript_id",)),
+        Step("triage", decide, inputs=("customer", "severity"), inline=True),
+        Step("policy", lookup_policy, inputs=("customer", "triage"),
+             when=lambda customer, triage: triage["escalate"]),
+    ])
+    run = dag.run({"customer_id": "C1", "transcript_id": "T1"}, executor)
+    run.results["policy"], run.critical_path()
+
+A step starts as soon as all of its inputs are available: ``customer`` and
+``severity`` above run concurrently on the executor, ``triage`` runs in the
+scheduling thread (``inline`` - it is cheap) once both finish. A step whose
+``when`` predicate is false is skipped, and so is every step depending on
+it. Each executed step is traced as a ``<dag name>.<step name>`` span and
+timed, and ``DagRun.critical_path`` names the chain of steps that gated the
+finish, i.e. where shaving time shortens the workflow.
+
+Speculation: a side-effect free step can name the steps that only decide
+whether it is needed as ``after`` rather than ``inputs``, and a
+``speculate`` predicate over its inputs. When the predicate holds, the step
+starts as soon as its inputs are ready, without waiting for ``after``; once
+those finish, ``when`` decides whether the result is kept (a hit) or thrown
+away, with the work cancelled if it has not started (a miss). Steps marked
+``speculate=True`` may in turn run on a speculative result; they are kept
+or discarded with it. ``Dag.speculation_stats`` reports hit rates and the
+time spent on discarded work.
+"""
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .tracing import propagate, span
+
+
+@dataclass(frozen=True)
+class Step:
+    """
+    One node of a Dag.
+
+    Args:
+        name: Step name; its result is available to later steps under it.
+        func: Called with the declared inputs as keyword arguments.
+        inputs: Names of Dag params or earlier step results the step needs.
+        when: Optional predicate over the inputs and ``after`` results as
+            keyword arguments; the step (and everything downstream of it)
+            is skipped when it is false.
+        inline: Run in the scheduling thread instead of on the executor,
+            for cheap steps not worth a thread hop.
+        after: Steps that must finish before the step's result is used,
+            passed to ``when`` but not to ``func``.
+        speculate: True, or a predicate over the inputs, allowing the step
+            to start before its ``after`` steps (or on a speculative input)
+            finish. Only for steps without side effects.
+    """
+    name: str
+    func: Callable
+    inputs: Tuple[str, ...] = ()
+    when: Optional[Callable[..., bool]] = None
+    inline: bool = False
+    after: Tuple[str, ...] = ()
+    speculate: Union[bool, Callable[..., bool]] = False
+
+    @property
+    def depends_on(self) -> Tuple[str, ...]:
+        return self.inputs + self.after
+
+
+class DagError(Exception):
+    """Raised for an invalid graph (unknown input, duplicate step, cycle)."""
+
+
+class DagRun:
+    """Outcome of one Dag.run: results, per-step timings and skipped steps."""
+
+    def __init__(self, dag: "Dag"):
+        self.dag = dag
+        self.results: Dict[str, object] = {}
+        # step name -> (start, end) in seconds since the run started
+        self.timings: Dict[str, Tuple[float, float]] = {}
+        # step name -> when its result was used; later than its end for a
+        # speculative result that was ready before it was known to be needed
+        self.ready_at: Dict[str, float] = {}
+        self.skipped: List[str] = []
+        # speculatively started step -> "hit" (kept) or "miss" (discarded)
+        self.speculation: Dict[str, str] = {}
+        self.wall_time = 0.0
+
+    def ran(self, name: str) -> bool:
+        return name in self.timings
+
+    def critical_path(self) -> List[str]:
+        """
+        The chain of executed steps that determined the finish time: the
+        last step to finish, the dependency that finished last before it,
+        and so on back to a step with no step dependencies. Speculative
+        results that were ready before they were needed are left out, as
+        their run time was hidden.
+        """
+        if not self.ready_at:
+            return []
+        path = []
+        current = max(self.ready_at, key=self.ready_at.get)
+        while True:
+            if self.ready_at[current] == self.timings[current][1]:
+                path.append(current)
+            dependencies = [name for name in self.dag.steps[current].depends_on if name in self.ready_at]
+            if not dependencies:
+                break
+            current = max(dependencies, key=self.ready_at.get)
+        path.reverse()
+        return path
+
+    def step_time(self) -> float:
+        """Sum of all executed step durations (the sequential cost)."""
+        return sum(end - start for start, end in self.timings.values())
+
+    def summary(self) -> dict:
+        path = self.critical_path()
+        return {
+            "wall_time": self.wall_time,
+            "step_time": self.step_time(),
+            "critical_path": path,
+            "critical_path_time": sum(self.timings[name][1] - self.timings[name][0] for name in path),
+            "steps": {name: {"start": start, "duration": end - start} for name, (start, end) in self.timings.items()},
+            "skipped": list(self.skipped),
+            "speculation": dict(self.speculation),
+        }
+
+
+class SpeculationStats:
+    """Thread-safe per-step counters for speculatively started steps."""
+
+    FIELDS = ("started", "hits", "misses", "cancelled", "wasted_seconds", "head_start_seconds")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._steps: Dict[str, Dict[str, float]] = {}
+
+    def add(self, step: str, **amounts: float):
+        with self._lock:
+            counters = self._steps.setdefault(step, dict.fromkeys(self.FIELDS, 0))
+            for field, amount in amounts.items():
+                counters[field] += amount
+
+    def stats(self) -> dict:
+        with self._lock:
+            report = {}
+            for step, counters in self._steps.items():
+                decided = counters["hits"] + counters["misses"]
+                report[step] = dict(counters, hit_rate=counters["hits"] / decided if decided else 0.0)
+            return report
+
+    def reset(self):
+        with self._lock:
+            self._steps.clear()
+
+
+class Dag:
+    """
+    A validated graph of Steps.
+
+    Args:
+        name: Prefix for the step spans.
+        params: Names of the values supplied to ``run``.
+        steps: The steps, in any order; inputs must name params or steps and
+            the graph must be acyclic.
+    """
+
+    def __init__(self, name: str, params: Iterable[str], steps: Sequence[Step]):
+        self.name = name
+        self.params = tuple(params)
+        self.steps: Dict[str, Step] = {}
+        for step in steps:
+            if step.name in self.steps or step.name in self.params:
+                raise DagError(f"Duplicate step name {step.name!r}")
+            self.steps[step.name] = step
+        self.dependents: Dict[str, List[str]] = {name: [] for name in self.steps}
+        for step in steps:
+            for name in step.inputs:
+                if name in self.steps:
+                    self.dependents[name].append(step.name)
+                elif name not in self.params:
+                    raise DagError(f"Step {step.name!r} needs unknown input {name!r}")
+            for name in step.after:
+                if name not in self.steps:
+                    raise DagError(f"Step {step.name!r} runs after unknown step {name!r}")
+                self.dependents[name].append(step.name)
+        self.order = self._topological_order()
+        self.speculation = SpeculationStats()
+
+    def _topological_order(self) -> List[str]:
+        pending = {name: sum(1 for dep in step.depends_on if dep in self.steps) for name, step in self.steps.items()}
+        ready = [name for name, count in pending.items() if count == 0]
+        order = []
+        while ready:
+            name = ready.pop(0)
+            order.append(name)
+            for dependent in self.dependents[name]:
+                pending[dependent] -= 1
+                if pending[dependent] == 0:
+                    ready.append(dependent)
+        if len(order) != len(self.steps):
+            raise DagError(f"Dag {self.name!r} has a cycle through {sorted(set(self.steps) - set(order))}")
+        return order
+
+    def speculation_stats(self) -> dict:
+        """
+        Per speculative step: how often it was started ahead of time, kept
+        (``hits``) or discarded (``misses``, of which ``cancelled`` never
+        ran), the ``hit_rate``, the run time thrown away with discarded
+        results (``wasted_seconds``) and how much earlier kept results were
+        started than they otherwise would have been (``head_start_seconds``).
+        """
+        return self.speculation.stats()
+
+    def run(self, params: dict, executor=None, speculate: bool = True, results: Optional[dict] = None) -> DagRun:
+        """
+        Run every step once its inputs are ready.
+
+        Steps go to ``executor`` (any concurrent.futures executor) so that
+        independent ones overlap; without an executor they run one by one
+        in topological order. Steps allowing it are started speculatively
+        unless ``speculate`` is false (or there is no executor). The first
+        step to raise aborts the run: steps not yet started are cancelled
+        and the exception propagates.
+
+        ``results`` supplies the results of steps the caller has already
+        computed, by step name; those steps do not run (and are not timed),
+        and their dependents start on the supplied values. A supplied step's
+        own step dependencies must be supplied too.
+        """
+        missing = [name for name in self.params if name not in params]
+        if missing:
+            raise DagError(f"Dag {self.name!r} is missing params {missing}")
+        supplied = dict(results or {})
+        for name in supplied:
+            if name not in self.steps:
+                raise DagError(f"Dag {self.name!r} has no step {name!r}")
+            unmet = [dep for dep in self.steps[name].depends_on if dep in self.steps and dep not in supplied]
+            if unmet:
+                raise DagError(f"Step {name!r} cannot be supplied without {unmet}")
+        run = DagRun(self)
+        values = dict(params)
+        values.update(supplied)
+        started = time.perf_counter()
+        waiting = {name: sum(1 for dep in step.depends_on if dep in self.steps) for name, step in self.steps.items()}
+        ready = [name for name in self.order if waiting[name] == 0 and name not in supplied]
+        futures = {}
+        # Speculatively started steps, until kept or discarded
+        speculative: Dict[str, Future] = {}
+        launched: Dict[str, float] = {}
+        guesses = {}
+        watching = {}
+        speculate = speculate and executor is not None
+
+        def elapsed() -> float:
+            return time.perf_counter() - started
+
+        def finish(name: str):
+            for dependent in self.dependents[name]:
+                if dependent in supplied:
+                    continue
+                waiting[dependent] -= 1
+                if waiting[dependent] == 0:
+                    ready.append(dependent)
+                else:
+                    try_speculate(self.steps[dependent])
+
+        def try_speculate(step: Step):
+            if not speculate or not step.speculate or step.name in speculative:
+                return
+            if not all(name in values or name in guesses for name in step.inputs):
+                return
+            kwargs = {name: values[name] if name in values else guesses[name] for name in step.inputs}
+            if step.speculate is not True and not step.speculate(**kwargs):
+                return
+            launched[step.name] = elapsed()
+            self.speculation.add(step.name, started=1)
+            if step.inline:
+                future = Future()
+                try:
+                    future.set_result(self._execute(step, kwargs, started))
+                except Exception as exc:
+                    future.set_exception(exc)
+            else:
+                future = executor.submit(propagate(self._execute), step, kwargs, started)
+            speculative[step.name] = future
+            watching[future] = step.name
+            if future.done():
+                guessed(future)
+
+        def guessed(future: Future):
+            # A speculative result is in: speculative dependents can build on it
+            name = watching.pop(future)
+            if future.exception() is None:
+                guesses[name] = future.result()[0]
+                for dependent in self.dependents[name]:
+                    if waiting[dependent]:
+                        try_speculate(self.steps[dependent])
+
+        def adopt(name: str):
+            future = speculative.pop(name)
+            watching.pop(future, None)
+            guesses.pop(name, None)
+            run.speculation[name] = "hit"
+            self.speculation.add(name, hits=1, head_start_seconds=elapsed() - launched[name])
+            if future.done():
+                values[name], run.timings[name] = future.result()
+                run.ready_at[name] = elapsed()
+                finish(name)
+            else:
+                futures[future] = name
+
+        def discard(name: str):
+            future = speculative.pop(name)
+            watching.pop(future, None)
+            guesses.pop(name, None)
+            run.speculation[name] = "miss"
+            if future.cancel():
+                self.speculation.add(name, misses=1, cancelled=1)
+                return
+            self.speculation.add(name, misses=1)
+
+            def record_waste(done: Future):
+                if done.exception() is None:
+                    start, end = done.result()[1]
+                    self.speculation.add(name, wasted_seconds=end - start)
+
+            future.add_done_callback(record_waste)
+
+        try:
+            for name in self.order:
+                if name in supplied:
+                    finish(name)
+            for name in self.order:
+                if waiting[name] and name not in supplied:
+                    try_speculate(self.steps[name])
+            while ready or futures:
+                while ready:
+                    step = self.steps[ready.pop(0)]
+                    skip = any(name in run.skipped for name in step.depends_on)
+                    if not skip and step.when is not None:
+                        skip = not step.when(**{name: values[name] for name in step.depends_on})
+                    if skip:
+                        run.skipped.append(step.name)
+                        if step.name in speculative:
+                            discard(step.name)
+                        finish(step.name)
+                        continue
+                    if step.name in speculative:
+                        adopt(step.name)
+                        continue
+                    kwargs = {name: values[name] for name in step.inputs}
+                    if executor is None or step.inline:
+                        values[step.name], run.timings[step.name] = self._execute(step, kwargs, started)
+                        run.ready_at[step.name] = run.timings[step.name][1]
+                        finish(step.name)
+                    else:
+                        futures[executor.submit(propagate(self._execute), step, kwargs, started)] = step.name
+                if futures:
+                    done, _ = wait([*futures, *watching], return_when=FIRST_COMPLETED)
+                    for future in done:
+                        if future in watching:
+                            guessed(future)
+                            continue
+                        if future not in futures:
+                            continue
+                        name = futures.pop(future)
+                        values[name], run.timings[name] = future.result()
+                        run.ready_at[name] = run.timings[name][1]
+                        finish(name)
+        except BaseException:
+            for future in [*futures, *speculative.values()]:
+                future.cancel()
+            raise
+        run.wall_time = time.perf_counter() - started
+        run.results = {name: values[name] for name in self.steps if name in values}
+        return run
+
+    def _execute(self, step: Step, kwargs: dict, started: float):
+        with span(f"{self.name}.{step.name}"):
+            start = time.perf_counter()
+            result = step.func(**kwargs)
+            end = time.perf_counter()
+        return result, (start - started, end - started)
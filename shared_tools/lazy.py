@@ -0,0 +1,88 @@
+"""
+Shared lazy-loading helpers - build module attributes on first access
+
+Usage:
+    # tools module: FunctionTool wrappers built when first used
+    __getattr__ = lazy_tools(__name__, CRM_LOOKUP_TOOL="crm_lookup_tool")
+
+    # package: names imported from their submodule when first used
+    __getattr__ = lazy_exports(__name__, {"TEMPLATES": ".templates"})
+
+    # agent module: root_agent built when ADK (or anyone) first asks for it
+    __getattr__ = lazy_attributes(__name__, {"root_agent": _build_root_agent})
+
+Importing google.adk costs over half a second, most of it in the first
+FunctionTool import, and every agent package used to pay it at import time
+even when only its plain workflow functions were needed (batch workers,
+load tests). With these module-level ``__getattr__`` hooks (PEP 562) the
+cost moves to the first access of a tool or agent, and is paid once: the
+built value is stored in the module, so later lookups are plain attribute
+reads.
+"""
+import importlib
+import sys
+import threading
+from typing import Callable, Dict
+
+# Factories may touch other lazy attributes (an agent's factory reads the
+# shared tools), so one reentrant lock serialises all first accesses.
+_lock = threading.RLock()
+
+
+def lazy_attributes(module_name: str, factories: Dict[str, Callable[[], object]]):
+    """
+    Return a module ``__getattr__`` that builds ``factories[name]()`` on first access.
+
+    Args:
+        module_name: ``__name__`` of the module the hook is installed in.
+        factories: Attribute name -> zero-argument factory.
+    """
+    module = sys.modules[module_name]
+
+    def __getattr__(name: str):
+        factory = factories.get(name)
+        if factory is None:
+            raise AttributeError(f"module {module_name!r} has no attribute {name!r}")
+        with _lock:
+            if name not in module.__dict__:
+                module.__dict__[name] = factory()
+        return module.__dict__[name]
+
+    return __getattr__
+
+
+def function_tool(func: Callable):
+    """Wrap ``func`` in an ADK FunctionTool, importing ADK only now."""
+    from google.adk.tools import FunctionTool
+
+    return FunctionTool(func)
+
+
+def lazy_tools(module_name: str, **tools: str):
+    """
+    Return a module ``__getattr__`` exposing FunctionTool wrappers built on first access.
+
+    Args:
+        module_name: ``__name__`` of the tools module.
+        **tools: Tool attribute name -> name of the module function it wraps.
+    """
+    module = sys.modules[module_name]
+    return lazy_attributes(module_name, {
+        name: (lambda function=function: function_tool(getattr(module, function)))
+        for name, function in tools.items()
+    })
+
+
+def lazy_exports(package_name: str, exports: Dict[str, str]):
+    """
+    Return a package ``__getattr__`` importing each export from its submodule on first access.
+
+    Args:
+        package_name: ``__name__`` of the package.
+        exports: Exported name -> relative submodule (e.g. ``".crm_tools"``).
+    """
+    return lazy_attributes(package_name, {
+        name: (lambda name=name, submodule=submodule:
+               getattr(importlib.import_module(submodule, package_name), name))
+        for name, submodule in exports.items()
+    })
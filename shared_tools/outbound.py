@@ -0,0 +1,543 @@
+"""
+Outbound communication queue - customer messages are enqueued and delivered
+in the background, batched per channel and rate limited per provider
+
+Workflows call ``enqueue_communication`` and move on; sender threads per
+channel (email, sms, ...) collect ready messages into batches of up to
+``max_batch_size`` (or whatever arrived within ``max_wait`` seconds), takes
+tokens for the batch from the channel's token bucket and hands it to the
+provider. A slow or throttling provider therefore delays its own channel's
+deliveries, never the workflow that queued them.
+
+Per-message delivery status moves queued -> sending -> delivered, with
+failed attempts going to retrying (after a jittered exponential backoff) or,
+once ``max_attempts`` is reached or the provider rejects the message, to
+failed. ``status(message_id)`` reports it.
+
+By default the queue lives in memory. With a spool path every message is
+also written to a SQLite spool when queued and updated as it is delivered;
+``recover()`` requeues whatever a previous process left undelivered under
+the same message IDs, so the provider can deduplicate them.
+
+Configuration:
+    CX_OUTBOUND_SPOOL=outbound_spool.db    spool path (unset: in-memory only)
+    CX_OUTBOUND_BATCH_SIZE=25
+    CX_OUTBOUND_BATCH_WINDOW=0.05          seconds
+    CX_OUTBOUND_MAX_ATTEMPTS=5
+    CX_OUTBOUND_<CHANNEL>_RATE=...         messages per second, 0 = unlimited
+    CX_OUTBOUND_<CHANNEL>_BURST=...        bucket capacity (default: one second of rate)
+"""
+import atexit
+import collections
+import heapq
+import itertools
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+from .backends import get_backend_pool
+from .tracing import span
+
+DEFAULT_BATCH_SIZE = 25
+DEFAULT_BATCH_WINDOW = 0.05
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_CONCURRENT_BATCHES = 2
+DEFAULT_BACKOFF = 0.5
+DEFAULT_MAX_BACKOFF = 30.0
+# Provider limits in messages per second; channels not listed are unlimited
+DEFAULT_RATES = {"email": 50.0, "sms": 10.0}
+
+QUEUED = "queued"
+SENDING = "sending"
+RETRYING = "retrying"
+DELIVERED = "delivered"
+FAILED = "failed"
+FINAL_STATUSES = (DELIVERED, FAILED)
+
+# Provider result statuses that will not succeed on retry
+PERMANENT_FAILURES = ("rejected", "invalid")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbound_messages (
+    message_id TEXT PRIMARY KEY,
+    channel TEXT NOT NULL,
+    recipient TEXT NOT NULL,
+    body TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+_PUBLIC_FIELDS = ("message_id", "channel", "recipient", "status", "attempts", "error", "created_at", "updated_at")
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter.
+
+    ``reserve`` always takes the tokens, letting the balance go negative,
+    and returns how long the caller must wait before using them; waiters
+    are thereby served in order and a batch larger than the capacity still
+    goes out at the configured rate.
+
+    Args:
+        rate: Tokens added per second; 0 disables limiting.
+        capacity: Most tokens the bucket holds (default: one second of rate).
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Take ``tokens`` and return the seconds to wait before using them."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            return max(0.0, -self._tokens / self.rate)
+
+
+class MessageSpool:
+    """
+    SQLite spool of outbound messages, one row per message ID.
+
+    Runs in WAL mode like the refund ledger; rows are inserted when queued
+    and updated with each delivery outcome.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+
+    def add(self, message: dict) -> bool:
+        """Insert a queued message; False if its ID is already spooled."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO outbound_messages "
+                "(message_id, channel, recipient, body, status, attempts, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, 0, ?, ?)",
+                (message["message_id"], message["channel"], message["recipient"], message["body"],
+                 message["status"], message["created_at"], message["updated_at"]),
+            )
+            return cursor.rowcount == 1
+
+    def record_outcomes(self, messages: List[dict]):
+        """Store the current status, attempts and error of messages (one transaction)."""
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "UPDATE outbound_messages SET status = ?, attempts = ?, error = ?, updated_at = ? "
+                "WHERE message_id = ?",
+                [(m["status"], m["attempts"], m["error"], m["updated_at"], m["message_id"]) for m in messages],
+            )
+
+    def get(self, message_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT message_id, channel, recipient, body, status, attempts, error, created_at, updated_at "
+                "FROM outbound_messages WHERE message_id = ?", (message_id,)).fetchone()
+        return self._row(row) if row else None
+
+    def undelivered(self) -> List[dict]:
+        """Messages not yet delivered or given up on, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT message_id, channel, recipient, body, status, attempts, error, created_at, updated_at "
+                "FROM outbound_messages WHERE status NOT IN (?, ?) ORDER BY created_at", FINAL_STATUSES).fetchall()
+        return [self._row(row) for row in rows]
+
+    @staticmethod
+    def _row(row) -> dict:
+        return dict(zip(("message_id", "channel", "recipient", "body", "status", "attempts", "error",
+                         "created_at", "updated_at"), row))
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._conn.execute(
+                "SELECT status, COUNT(*) FROM outbound_messages GROUP BY status").fetchall())
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def send_to_provider(channel: str, messages: List[dict]) -> List[dict]:
+    """
+    Send one batch of messages for a channel to the communications backend.
+
+    Returns one {"message_id", "status", ...} result per message; the mock
+    path (no communications URL) delivers every message.
+    """
+    pool = get_backend_pool()
+    if pool.is_remote("communications"):
+        payload = {"channel": channel, "messages": [
+            {"message_id": m["message_id"], "recipient": m["recipient"], "body": m["body"]} for m in messages]}
+        return pool.request_json("communications", "POST", "/communications/batch", json=payload)["results"]
+    for message in messages:
+        print(f"Communication sent to {message['recipient']} via {channel}: {message['body']}")
+    return [{"message_id": message["message_id"], "status": "success"} for message in messages]
+
+
+class _Channel:
+    """Queue, rate limiter and sender threads of one channel."""
+
+    def __init__(self, name: str, bucket: TokenBucket):
+        self.name = name
+        self.bucket = bucket
+        self.ready = collections.deque()       # (ready_at, message), FIFO
+        self.retries = []                      # heap of (ready_at, seq, message)
+        self.threads = []
+        self.batches = 0
+        self.sent = 0
+        self.throttled_seconds = 0.0
+
+
+class OutboundQueue:
+    """
+    Background delivery of customer communications.
+
+    Args:
+        deliver: Callable sending ``(channel, messages)`` and returning one
+            result dict per message (default: ``send_to_provider``).
+        spool: Optional MessageSpool making queued messages durable.
+        rates: Messages per second per channel; missing channels are unlimited.
+        bursts: Token bucket capacity per channel (default: one second of rate).
+        max_batch_size: Messages per provider call.
+        max_wait: Longest a ready message waits for its batch to fill, in seconds.
+        max_attempts: Delivery attempts before a message is marked failed.
+        backoff: Base retry delay in seconds, doubled per attempt and jittered.
+        max_backoff: Cap on the retry delay.
+        max_concurrent_batches: Sender threads per channel, i.e. batches that
+            may await the provider at once.
+        max_tracked: Finished messages whose status is kept in memory.
+    """
+
+    def __init__(self, deliver: Callable[[str, List[dict]], List[dict]] = send_to_provider,
+                 spool: Optional[MessageSpool] = None, rates: Optional[Dict[str, float]] = None,
+                 bursts: Optional[Dict[str, float]] = None, max_batch_size: int = DEFAULT_BATCH_SIZE,
+                 max_wait: float = DEFAULT_BATCH_WINDOW, max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                 backoff: float = DEFAULT_BACKOFF, max_backoff: float = DEFAULT_MAX_BACKOFF,
+                 max_concurrent_batches: int = DEFAULT_CONCURRENT_BATCHES, max_tracked: int = 10_000):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.deliver = deliver
+        self.spool = spool
+        self.rates = dict(DEFAULT_RATES if rates is None else rates)
+        self.bursts = dict(bursts or {})
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_concurrent_batches = max_concurrent_batches
+        self.max_tracked = max_tracked
+        self._condition = threading.Condition()
+        self._channels: Dict[str, _Channel] = {}
+        self._active: Dict[str, dict] = {}
+        self._finished: "collections.OrderedDict[str, dict]" = collections.OrderedDict()
+        self._sequence = itertools.count()
+        self._closed = False
+        self.enqueued = 0
+        self.deduplicated = 0
+        self.delivered = 0
+        self.failed = 0
+        self.retried = 0
+
+    @classmethod
+    def from_env(cls) -> "OutboundQueue":
+        rates = dict(DEFAULT_RATES)
+        bursts = {}
+        for key, value in os.environ.items():
+            if key.startswith("CX_OUTBOUND_") and key.endswith("_RATE"):
+                rates[key[len("CX_OUTBOUND_"):-len("_RATE")].lower()] = float(value)
+            elif key.startswith("CX_OUTBOUND_") and key.endswith("_BURST"):
+                bursts[key[len("CX_OUTBOUND_"):-len("_BURST")].lower()] = float(value)
+        spool_path = os.environ.get("CX_OUTBOUND_SPOOL")
+        return cls(
+            spool=MessageSpool(spool_path) if spool_path else None,
+            rates=rates,
+            bursts=bursts,
+            max_batch_size=int(os.environ.get("CX_OUTBOUND_BATCH_SIZE", DEFAULT_BATCH_SIZE)),
+            max_wait=float(os.environ.get("CX_OUTBOUND_BATCH_WINDOW", DEFAULT_BATCH_WINDOW)),
+            max_attempts=int(os.environ.get("CX_OUTBOUND_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS)),
+        )
+
+    # -- producers -----------------------------------------------------------
+
+    def enqueue(self, recipient: str, channel: str, body: str, message_id: Optional[str] = None) -> str:
+        """
+        Queue a message for delivery and return its message ID.
+
+        A message ID that is already queued, in flight or delivered is not
+        queued again, so a retried workflow never messages the customer twice.
+        """
+        now = time.time()
+        message = {"message_id": message_id or uuid.uuid4().hex, "channel": channel, "recipient": recipient,
+                   "body": body, "status": QUEUED, "attempts": 0, "error": None,
+                   "created_at": now, "updated_at": now}
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("OutboundQueue is closed")
+            if self._is_known(message["message_id"]):
+                self.deduplicated += 1
+                return message["message_id"]
+            if self.spool is not None and not self.spool.add(message):
+                spooled = self.spool.get(message["message_id"])
+                if spooled["status"] == DELIVERED:
+                    self.deduplicated += 1
+                    return message["message_id"]
+            self._finished.pop(message["message_id"], None)
+            self._schedule(message, time.monotonic())
+            self.enqueued += 1
+        return message["message_id"]
+
+    def _is_known(self, message_id: str) -> bool:
+        if message_id in self._active:
+            return True
+        finished = self._finished.get(message_id)
+        return finished is not None and finished["status"] == DELIVERED
+
+    def _schedule(self, message: dict, ready_at: float):
+        """Put a message on its channel's queue; called with the condition held."""
+        self._active[message["message_id"]] = message
+        channel = self._channel(message["channel"])
+        if ready_at <= time.monotonic():
+            channel.ready.append((ready_at, message))
+        else:
+            heapq.heappush(channel.retries, (ready_at, next(self._sequence), message))
+        self._condition.notify_all()
+
+    def _channel(self, name: str) -> _Channel:
+        channel = self._channels.get(name)
+        if channel is None:
+            bucket = TokenBucket(self.rates.get(name, 0.0), self.bursts.get(name))
+            channel = self._channels[name] = _Channel(name, bucket)
+            # Plain threads rather than an executor: the exit-time flush must
+            # still be able to send after concurrent.futures has shut down.
+            for index in range(self.max_concurrent_batches):
+                thread = threading.Thread(target=self._run, args=(channel,), name=f"outbound-{name}-{index}",
+                                          daemon=True)
+                channel.threads.append(thread)
+                thread.start()
+        return channel
+
+    def recover(self) -> int:
+        """Requeue messages a previous process left in the spool undelivered; returns how many."""
+        if self.spool is None:
+            return 0
+        recovered = 0
+        now = time.monotonic()
+        with self._condition:
+            for message in self.spool.undelivered():
+                if message["message_id"] in self._active:
+                    continue
+                self._schedule(message, now)
+                recovered += 1
+        return recovered
+
+    # -- delivery ------------------------------------------------------------
+
+    def _next_batch(self, channel: _Channel) -> List[dict]:
+        """Block until a batch is due on ``channel`` (full, window elapsed, or closing) and take it."""
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                while channel.retries and channel.retries[0][0] <= now:
+                    ready_at, _, message = heapq.heappop(channel.retries)
+                    channel.ready.append((ready_at, message))
+                deadline = channel.retries[0][0] if channel.retries else None
+                if channel.ready:
+                    due = channel.ready[0][0] + self.max_wait
+                    if len(channel.ready) >= self.max_batch_size or now >= due or self._closed:
+                        count = min(self.max_batch_size, len(channel.ready))
+                        batch = [channel.ready.popleft()[1] for _ in range(count)]
+                        for message in batch:
+                            message["status"] = SENDING
+                        return batch
+                    deadline = due if deadline is None else min(deadline, due)
+                elif self._closed and not channel.retries:
+                    return []
+                self._condition.wait(None if deadline is None else deadline - now)
+
+    def _run(self, channel: _Channel):
+        while True:
+            batch = self._next_batch(channel)
+            if not batch:
+                return
+            delay = channel.bucket.reserve(len(batch))
+            if delay > 0:
+                channel.throttled_seconds += delay
+                time.sleep(delay)
+            self._flush(channel, batch)
+
+    def _flush(self, channel: _Channel, batch: List[dict]):
+        try:
+            with span("outbound.batch", channel=channel.name, size=len(batch)):
+                results = {result["message_id"]: result for result in self.deliver(channel.name, batch)}
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+            results = {message["message_id"]: {"status": "error", "error": error} for message in batch}
+
+        now = time.time()
+        retries = []
+        with self._condition:
+            channel.batches += 1
+            channel.sent += len(batch)
+            for message in batch:
+                result = results.get(message["message_id"]) or {"status": "error",
+                                                                "error": "No result returned for message"}
+                message["attempts"] += 1
+                message["updated_at"] = now
+                if result.get("status") == "success":
+                    message["status"], message["error"] = DELIVERED, None
+                    self.delivered += 1
+                else:
+                    message["error"] = result.get("error") or f"Delivery {result.get('status', 'failed')}"
+                    if result.get("status") in PERMANENT_FAILURES or message["attempts"] >= self.max_attempts:
+                        message["status"] = FAILED
+                        self.failed += 1
+                    else:
+                        message["status"] = RETRYING
+                        retries.append((message, result.get("retry_after")))
+                        self.retried += 1
+                        continue
+                self._active.pop(message["message_id"], None)
+                self._finished[message["message_id"]] = message
+            while len(self._finished) > self.max_tracked:
+                self._finished.popitem(last=False)
+            for message, retry_after in retries:
+                self._schedule(message, time.monotonic() + self._retry_delay(message["attempts"], retry_after))
+            self._condition.notify_all()
+        if self.spool is not None:
+            try:
+                self.spool.record_outcomes(batch)
+            except Exception:
+                # Delivery outcomes stand even if they could not be recorded;
+                # unrecorded messages are redelivered by recover() under their IDs.
+                pass
+
+    def _retry_delay(self, attempts: int, retry_after=None) -> float:
+        """Full-jitter exponential backoff, never shorter than the provider's retry_after."""
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempts - 1)))
+        return max(delay, float(retry_after or 0))
+
+    # -- status --------------------------------------------------------------
+
+    def status(self, message_id: str) -> Optional[dict]:
+        """Delivery status of a message, or None if the queue has no record of it."""
+        with self._condition:
+            message = self._active.get(message_id) or self._finished.get(message_id)
+            if message is not None:
+                return {field: message[field] for field in _PUBLIC_FIELDS}
+        if self.spool is not None:
+            message = self.spool.get(message_id)
+            if message is not None:
+                return {field: message[field] for field in _PUBLIC_FIELDS}
+        return None
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued message is delivered or failed; False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._active:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def stats(self) -> dict:
+        with self._condition:
+            stats = {
+                "enqueued": self.enqueued,
+                "deduplicated": self.deduplicated,
+                "delivered": self.delivered,
+                "failed": self.failed,
+                "retried": self.retried,
+                "in_flight": len(self._active),
+                "channels": {
+                    name: {
+                        "queued": len(channel.ready) + len(channel.retries),
+                        "batches": channel.batches,
+                        "sent": channel.sent,
+                        "average_batch_size": channel.sent / channel.batches if channel.batches else 0.0,
+                        "rate_limit": channel.bucket.rate,
+                        "throttled_seconds": round(channel.throttled_seconds, 3),
+                    }
+                    for name, channel in self._channels.items()
+                },
+            }
+        if self.spool is not None:
+            stats["spool"] = self.spool.counts()
+        return stats
+
+    def close(self, timeout: Optional[float] = None):
+        """
+        Deliver what is ready, stop the sender threads and close the spool.
+
+        Messages still waiting for a retry after ``timeout`` stay in the
+        spool (if any) for the next process to recover.
+        """
+        self.flush(timeout)
+        with self._condition:
+            self._closed = True
+            for channel in self._channels.values():
+                channel.retries.clear()
+            self._condition.notify_all()
+            threads = [thread for channel in self._channels.values() for thread in channel.threads]
+        for thread in threads:
+            thread.join(timeout)
+        if self.spool is not None:
+            self.spool.close()
+
+
+_outbound_queue = None
+_outbound_queue_lock = threading.Lock()
+
+
+def get_outbound_queue() -> OutboundQueue:
+    """
+    Return the process-wide outbound queue, creating it (and recovering any
+    spooled messages) on first use. Queued messages get a few seconds to go
+    out when the interpreter exits.
+    """
+    global _outbound_queue
+    with _outbound_queue_lock:
+        if _outbound_queue is None:
+            _outbound_queue = OutboundQueue.from_env()
+            _outbound_queue.recover()
+            atexit.register(_outbound_queue.close, 5.0)
+        return _outbound_queue
+
+
+def enqueue_communication(recipient: str, channel: str, body: str, message_id: Optional[str] = None) -> str:
+    """Queue a customer message on the shared outbound queue; returns its message ID."""
+    return get_outbound_queue().enqueue(recipient, channel, body, message_id)
+
+
+def delivery_status(message_id: str) -> Optional[dict]:
+    """Delivery status of a message queued on the shared outbound queue."""
+    return get_outbound_queue().status(message_id)
@@ -0,0 +1,283 @@
+"""
+Local policy knowledge base - BM25 inverted index over a directory of policy
+documents, persisted to disk and refreshed incrementally
+
+Documents (``*.md`` / ``*.txt``) are split into paragraph chunks. The index
+keeps per-chunk term frequencies next to the postings, so when a file
+changes only its chunks are removed and re-added; unchanged files are never
+re-read. The whole index is saved as JSON and reloaded on startup.
+
+Each chunk also records the customer tiers its text names, so a search can
+be restricted to one tier's chunks (plus those naming no tier) while it
+ranks, at no extra cost per result.
+"""
+import hashlib
+import heapq
+import json
+import math
+import os
+import re
+import threading
+from typing import Dict, List, Optional
+
+POLICY_SUFFIXES = (".md", ".txt")
+INDEX_VERSION = 2
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the "
+    "this to was were will with we our you your they their customer customers "
+    "policy policies".split()
+)
+# Tokens naming a customer tier
+TIER_TERMS = frozenset(("silver", "gold", "vip", "platinum"))
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens with stopwords dropped and plurals folded."""
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token in _STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def tiers_of(text: str) -> frozenset:
+    """The customer tiers ``text`` names, as tier tokens ("gold", "vip", ...)."""
+    return TIER_TERMS.intersection(tokenize(text))
+
+
+def _split_chunks(text: str):
+    """Yield (title, paragraph) pairs; headings are folded into their paragraphs' context."""
+    title = ""
+    for block in re.split(r"\n\s*\n", text):
+        block = block.strip()
+        if not block:
+            continue
+        lines = block.splitlines()
+        while lines and lines[0].lstrip().startswith("#"):
+            title = lines.pop(0).lstrip("#").strip()
+        body = " ".join(line.strip() for line in lines).strip()
+        if body:
+            yield title, body
+
+
+class PolicyIndex:
+    """
+    BM25 index over the policy documents found under ``root``.
+
+    Args:
+        root: Directory containing the policy documents (searched recursively).
+        index_path: Where the index is persisted; defaults to
+            ``<root>/.policy_index.json``.
+        k1, b: BM25 parameters.
+    """
+
+    def __init__(self, root: str, index_path: Optional[str] = None, k1: float = 1.5, b: float = 0.75):
+        self.root = os.path.abspath(root)
+        self.index_path = index_path or os.path.join(self.root, ".policy_index.json")
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        # path (relative to root) -> {"mtime", "size", "sha1", "chunks": [chunk ids]}
+        self.files: Dict[str, dict] = {}
+        # chunk id -> {"path", "title", "text", "length", "terms": {term: tf}, "tiers": [tier]}
+        self.chunks: Dict[int, dict] = {}
+        # term -> {chunk id: tf}
+        self.postings: Dict[str, Dict[int, int]] = {}
+        # chunk id -> token count, kept flat for the scoring loop
+        self.lengths: Dict[int, int] = {}
+        # chunk id -> tiers it names, for the chunks naming any, kept flat for tier filtering
+        self.chunk_tiers: Dict[int, frozenset] = {}
+        self.total_length = 0
+        self.next_chunk_id = 0
+
+    def __len__(self):
+        return len(self.chunks)
+
+    # -- persistence -------------------------------------------------------
+
+    def load(self) -> bool:
+        """Load the persisted index; returns False if missing or incompatible."""
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as handle:
+                data = json.load(handle)
+        except (OSError, ValueError):
+            return False
+        if data.get("version") != INDEX_VERSION:
+            return False
+        with self._lock:
+            self._reset()
+            self.files = data["files"]
+            self.next_chunk_id = data["next_chunk_id"]
+            for chunk_id, chunk in data["chunks"].items():
+                self._add_chunk(int(chunk_id), chunk)
+        return True
+
+    def save(self):
+        """Persist the index atomically next to (or at) ``index_path``."""
+        with self._lock:
+            data = {
+                "version": INDEX_VERSION,
+                "files": self.files,
+                "next_chunk_id": self.next_chunk_id,
+                "chunks": {
+                    str(chunk_id): {key: chunk[key] for key in ("path", "title", "text", "terms", "tiers")}
+                    for chunk_id, chunk in self.chunks.items()
+                },
+            }
+        os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(data, handle, separators=(",", ":"))
+        os.replace(tmp_path, self.index_path)
+
+    # -- maintenance -------------------------------------------------------
+
+    def _add_chunk(self, chunk_id: int, chunk: dict):
+        terms = chunk["terms"]
+        chunk["length"] = sum(terms.values())
+        self.chunks[chunk_id] = chunk
+        self.lengths[chunk_id] = chunk["length"]
+        self.total_length += chunk["length"]
+        for term, tf in terms.items():
+            self.postings.setdefault(term, {})[chunk_id] = tf
+        if chunk["tiers"]:
+            self.chunk_tiers[chunk_id] = frozenset(chunk["tiers"])
+
+    def _remove_file(self, path: str):
+        entry = self.files.pop(path, None)
+        if entry is None:
+            return
+        for chunk_id in entry["chunks"]:
+            chunk = self.chunks.pop(chunk_id)
+            del self.lengths[chunk_id]
+            self.total_length -= chunk["length"]
+            for term in chunk["terms"]:
+                postings = self.postings[term]
+                del postings[chunk_id]
+                if not postings:
+                    del self.postings[term]
+            self.chunk_tiers.pop(chunk_id, None)
+
+    def _index_file(self, path: str, stat: os.stat_result, content: bytes, digest: str):
+        text = content.decode("utf-8", errors="replace")
+        chunk_ids = []
+        for title, body in _split_chunks(text):
+            terms = {}
+            for token in tokenize(f"{title} {body}"):
+                terms[token] = terms.get(token, 0) + 1
+            if not terms:
+                continue
+            chunk_id = self.next_chunk_id
+            self.next_chunk_id += 1
+            self._add_chunk(chunk_id, {"path": path, "title": title, "text": body, "terms": terms,
+                                       "tiers": sorted(tiers_of(body))})
+            chunk_ids.append(chunk_id)
+        self.files[path] = {"mtime": stat.st_mtime, "size": stat.st_size, "sha1": digest, "chunks": chunk_ids}
+
+    def _scan(self) -> Dict[str, os.stat_result]:
+        found = {}
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [name for name in dirnames if not name.startswith(".")]
+            for filename in filenames:
+                if filename.endswith(POLICY_SUFFIXES) and not filename.startswith("."):
+                    full_path = os.path.join(dirpath, filename)
+                    found[os.path.relpath(full_path, self.root)] = os.stat(full_path)
+        return found
+
+    def refresh(self) -> dict:
+        """
+        Bring the index in line with the files on disk.
+
+        Files whose size and mtime are unchanged are skipped without being
+        read; touched files are re-read but only re-indexed when their
+        content hash differs.
+
+        Returns:
+            Counts of added, updated, removed and unchanged files.
+        """
+        summary = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        with self._lock:
+            on_disk = self._scan() if os.path.isdir(self.root) else {}
+            for path in list(self.files):
+                if path not in on_disk:
+                    self._remove_file(path)
+                    summary["removed"] += 1
+            for path, stat in on_disk.items():
+                entry = self.files.get(path)
+                if entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+                    summary["unchanged"] += 1
+                    continue
+                with open(os.path.join(self.root, path), "rb") as handle:
+                    content = handle.read()
+                digest = hashlib.sha1(content).hexdigest()
+                if entry and entry["sha1"] == digest:
+                    entry["mtime"] = stat.st_mtime
+                    summary["unchanged"] += 1
+                    continue
+                self._remove_file(path)
+                self._index_file(path, stat, content, digest)
+                summary["updated" if entry else "added"] += 1
+        return summary
+
+    def load_or_build(self) -> dict:
+        """Load the persisted index, refresh it and save it back if anything changed."""
+        self.load()
+        summary = self.refresh()
+        if summary["added"] or summary["updated"] or summary["removed"] or not os.path.exists(self.index_path):
+            self.save()
+        return summary
+
+    # -- querying ----------------------------------------------------------
+
+    def search(self, query: str, top_k: int = 3, tier: Optional[str] = None) -> List[dict]:
+        """
+        Return the ``top_k`` chunks ranked by BM25 score.
+
+        With ``tier`` (a tier token, e.g. "silver"), chunks naming other
+        tiers but not this one are left out before ranking, so the results
+        are the best of the chunks that apply to that tier.
+
+        Each result is a dict with score, path, title and text.
+        """
+        with self._lock:
+            chunk_count = len(self.chunks)
+            if not chunk_count:
+                return []
+            lengths = self.lengths
+            # norm = k1 * (1 - b + b * length / avg_length), split into constants
+            norm_base = self.k1 * (1 - self.b)
+            norm_scale = self.k1 * self.b * chunk_count / self.total_length
+            scores: Dict[int, float] = {}
+            get_score = scores.get
+            for term in set(tokenize(query)):
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                df = len(postings)
+                weight = math.log(1 + (chunk_count - df + 0.5) / (df + 0.5)) * (self.k1 + 1)
+                for chunk_id, tf in postings.items():
+                    norm = norm_base + norm_scale * lengths[chunk_id]
+                    scores[chunk_id] = get_score(chunk_id, 0.0) + weight * tf / (tf + norm)
+            candidates = scores.items()
+            if tier is not None:
+                chunk_tiers = self.chunk_tiers
+                candidates = (item for item in candidates
+                              if item[0] not in chunk_tiers or tier in chunk_tiers[item[0]])
+            best = heapq.nlargest(top_k, candidates, key=lambda item: item[1])
+            return [
+                {
+                    "score": round(score, 4),
+                    "path": self.chunks[chunk_id]["path"],
+                    "title": self.chunks[chunk_id]["title"],
+                    "text": self.chunks[chunk_id]["text"],
+                }
+                for chunk_id, score in best
+            ]
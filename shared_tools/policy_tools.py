@@ -1,8 +1,112 @@
 """
 Shared policy and solution tools for all agents
 """
-from google.adk.tools import FunctionTool
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, List
 
+from .backends import get_backend_pool
+from .cache import TTLCache, cached
+from .coalescer import BatchCoalescer
+from .policy_index import PolicyIndex, tiers_of
+from .lazy import lazy_tools
+from .tracing import traced
+
+# Policy corpus indexed for policy_lookup_tool; set CX_POLICY_DIR to point at
+# the real knowledge base.
+POLICY_DIR = os.environ.get(
+    "CX_POLICY_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "policies")
+)
+POLICY_TOP_K = int(os.environ.get("CX_POLICY_TOP_K", 3))
+# How often lookups check the corpus for changed files (seconds)
+POLICY_REFRESH_INTERVAL = float(os.environ.get("CX_POLICY_REFRESH_INTERVAL", 60))
+
+_policy_index = None
+_policy_index_lock = threading.Lock()
+_policy_index_checked_at = 0.0
+
+def _normalize_query(query: str) -> str:
+    return " ".join(query.split())
+
+# Policies change on deploys, not per request; near-identical queries that
+# differ only in whitespace share an entry.
+POLICY_CACHE = TTLCache.from_env("policy_lookup", maxsize=2_000, ttl=3600)
+
+def _mock_policy(query: str) -> str:
+    if "lost package" in query and "gold tier" in query:
+        return "Policy Snippet 1: For Gold Tier customers with lost packages, a full refund or a free replacement with express shipping is offered."
+    else:
+        return "Policy Snippet 1: Standard policy for lost packages is to offer a replacement."
+
+def get_policy_index() -> PolicyIndex:
+    """
+    Return the shared policy index, loading or building it on first use and
+    picking up changed policy files at most every POLICY_REFRESH_INTERVAL.
+    """
+    global _policy_index, _policy_index_checked_at
+    with _policy_index_lock:
+        now = time.monotonic()
+        if _policy_index is None:
+            _policy_index = PolicyIndex(POLICY_DIR)
+            _policy_index.load_or_build()
+            _policy_index_checked_at = now
+        elif now - _policy_index_checked_at >= POLICY_REFRESH_INTERVAL:
+            _policy_index_checked_at = now
+            summary = _policy_index.refresh()
+            if summary["added"] or summary["updated"] or summary["removed"]:
+                _policy_index.save()
+                POLICY_CACHE.clear()
+        return _policy_index
+
+def _search_policies(query: str) -> str:
+    index = get_policy_index()
+    if not len(index):
+        return _mock_policy(query)
+    tiers = tiers_of(query)
+    # A query for one tier only gets chunks that name no tier or name that
+    # one, so a Silver query never sees the Gold/VIP clauses
+    tier = next(iter(tiers)) if len(tiers) == 1 else None
+    results = index.search(query, top_k=POLICY_TOP_K, tier=tier)
+    if not results:
+        return "No matching policy found."
+    return "\n".join(f"Policy Snippet {rank}: {result['text']}" for rank, result in enumerate(results, 1))
+
+def top_policy_snippet(policy: str) -> str:
+    """
+    The best-ranked snippet of a policy_lookup_tool result.
+
+    Workflows deciding on a resolution read this one snippet: the later
+    ones are only related (e.g. the out-of-stock exception to a policy).
+    """
+    return policy.split("\n", 1)[0]
+
+def _mock_order_status(order_id: str) -> dict:
+    if order_id == "O-9987":
+        return {"status": "delivered", "delivery_date": "2023-10-26"}
+    else:
+        return {"status": "in_transit"}
+
+def _fetch_orders(order_ids: List[str]) -> Dict[str, dict]:
+    """One logistics round-trip for several orders."""
+    pool = get_backend_pool()
+    if pool.is_remote("logistics"):
+        return pool.request_json("logistics", "POST", "/orders/batch", json={"order_ids": order_ids})["orders"]
+    return {order_id: _mock_order_status(order_id) for order_id in order_ids}
+
+async def _fetch_orders_async(order_ids: List[str]) -> Dict[str, dict]:
+    pool = get_backend_pool()
+    if pool.is_remote("logistics"):
+        return (await pool.arequest_json("logistics", "POST", "/orders/batch", json={"order_ids": order_ids}))["orders"]
+    return {order_id: _mock_order_status(order_id) for order_id in order_ids}
+
+# Order status is live data and is not cached, so under load concurrent
+# lookups are batched into one logistics call instead.
+ORDER_COALESCER = BatchCoalescer.from_env("logistics", _fetch_orders)
+
+@traced("tool.policy_lookup")
+@cached(POLICY_CACHE, key=_normalize_query)
 def policy_lookup_tool(query: str) -> str:
     """
     Queries the company policy knowledge base.
@@ -13,11 +117,12 @@ def policy_lookup_tool(query: str) -> str:
     Returns:
         The text content of the most relevant policy chunks.
     """
-    if "lost package" in query and "gold tier" in query:
-        return "Policy Snippet 1: For Gold Tier customers with lost packages, a full refund or a free replacement with express shipping is offered."
-    else:
-        return "Policy Snippet 1: Standard policy for lost packages is to offer a replacement."
+    pool = get_backend_pool()
+    if pool.is_remote("policy"):
+        return pool.request_json("policy", "GET", "/policies", params={"q": query})["text"]
+    return _search_policies(query)
 
+@traced("tool.order_status")
 def order_status_tool(order_id: str) -> dict:
     """
     Queries the logistics system for the status of an order.
@@ -28,11 +133,84 @@ def order_status_tool(order_id: str) -> dict:
     Returns:
         A dictionary with the order status.
     """
-    if order_id == "O-9987":
-        return {"status": "delivered", "delivery_date": "2023-10-26"}
-    else:
-        return {"status": "in_transit"}
+    pool = get_backend_pool()
+    if pool.is_remote("logistics"):
+        if ORDER_COALESCER.enabled:
+            return ORDER_COALESCER.get(order_id)
+        return pool.request_json("logistics", "GET", f"/orders/{order_id}")
+    return _mock_order_status(order_id)
+
+@traced("tool.order_status_bulk")
+def order_status_bulk_tool(order_ids: List[str]) -> dict:
+    """
+    Queries the logistics system for the status of several orders in one call.
+
+    Args:
+        order_ids: The IDs of the orders to look up.
+
+    Returns:
+        A dictionary mapping each order ID to its status.
+    """
+    statuses = _fetch_orders(list(dict.fromkeys(order_ids)))
+    return {order_id: statuses[order_id] for order_id in order_ids}
+
+@traced("tool.policy_lookup")
+@cached(POLICY_CACHE, key=_normalize_query)
+async def policy_lookup_tool_async(query: str) -> str:
+    """
+    Queries the company policy knowledge base without blocking the event loop.
+
+    Args:
+        query: The query to search for in the knowledge base.
+
+    Returns:
+        The text content of the most relevant policy chunks.
+    """
+    pool = get_backend_pool()
+    if pool.is_remote("policy"):
+        return (await pool.arequest_json("policy", "GET", "/policies", params={"q": query}))["text"]
+    # Loading, refreshing and searching the index is blocking work
+    return await asyncio.to_thread(_search_policies, query)
+
+@traced("tool.order_status")
+async def order_status_tool_async(order_id: str) -> dict:
+    """
+    Queries the logistics system for the status of an order without blocking the event loop.
+
+    Args:
+        order_id: The ID of the order to look up.
+
+    Returns:
+        A dictionary with the order status.
+    """
+    pool = get_backend_pool()
+    if pool.is_remote("logistics"):
+        if ORDER_COALESCER.enabled:
+            return await ORDER_COALESCER.aget(order_id)
+        return await pool.arequest_json("logistics", "GET", f"/orders/{order_id}")
+    return _mock_order_status(order_id)
+
+@traced("tool.order_status_bulk")
+async def order_status_bulk_tool_async(order_ids: List[str]) -> dict:
+    """
+    Queries the logistics system for the status of several orders in one call without blocking the event loop.
+
+    Args:
+        order_ids: The IDs of the orders to look up.
+
+    Returns:
+        A dictionary mapping each order ID to its status.
+    """
+    statuses = await _fetch_orders_async(list(dict.fromkeys(order_ids)))
+    return {order_id: statuses[order_id] for order_id in order_ids}
 
-# Export as ADK FunctionTool instances
-POLICY_LOOKUP_TOOL = FunctionTool(policy_lookup_tool)
-ORDER_STATUS_TOOL = FunctionTool(order_status_tool)
+# Export as ADK FunctionTool instances (built on first access, see lazy.py)
+__getattr__ = lazy_tools(
+    __name__,
+    POLICY_LOOKUP_TOOL="policy_lookup_tool",
+    ORDER_STATUS_TOOL="order_status_tool",
+    ORDER_STATUS_BULK_TOOL="order_status_bulk_tool",
+    POLICY_LOOKUP_TOOL_ASYNC="policy_lookup_tool_async",
+    ORDER_STATUS_TOOL_ASYNC="order_status_tool_async",
+    ORDER_STATUS_BULK_TOOL_ASYNC="order_status_bulk_tool_async",
+)
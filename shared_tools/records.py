@@ -0,0 +1,258 @@
+"""
+Shared records - compact typed records for customers, triage decisions,
+ranked solutions and action plans
+
+Usage:
+    from shared_tools.records import CustomerRecord, Tier
+
+    customer = CustomerRecord.from_dict(crm_lookup_tool("C67890"))
+    if customer.tier is Tier.GOLD: ...
+    customer.to_dict()                   # back to the CRM's JSON shape
+
+Inside a process the triage, solution and action steps hand these records
+to each other as plain Python objects. JSON is only produced at the edge,
+by the agent tool functions (``make_triage_decision``, ``rank_solutions``,
+``coordinate_action_execution``) and the CRM/backend tools, with
+``to_dict()`` / ``to_json()``.
+
+Records are frozen, slotted dataclasses, so they carry no per-instance
+``__dict__`` and can be shared and cached freely. Tiers, priorities and
+actions are str enums with one interned member per value: comparing them
+is an identity check, and they serialize as their plain string value.
+Values the enums do not list (a new CRM tier, an action named by the
+model) become members on first use, so no input is rejected or rewritten.
+
+For batch runs, ``CustomerTable`` keeps many customers column-wise in
+``array`` buffers (about 20 bytes per customer).
+"""
+import json
+import threading
+from array import array
+from dataclasses import dataclass
+from enum import Enum
+from typing import Iterable, Iterator, Mapping, Optional, Tuple
+
+_members_lock = threading.Lock()
+
+
+class _InternedEnum(str, Enum):
+    """
+    str enum that turns unlisted values into new members on first use.
+
+    Each distinct value maps to a single member, so members compare by
+    identity and a value seen a million times is stored once.
+    """
+
+    @classmethod
+    def _missing_(cls, value):
+        if not isinstance(value, str):
+            return None
+        with _members_lock:
+            member = cls._value2member_map_.get(value)
+            if member is None:
+                member = str.__new__(cls, value)
+                member._name_ = value
+                member._value_ = value
+                cls._value2member_map_[value] = member
+        return member
+
+    # Print and format as the plain value, like the strings they replace
+    __str__ = str.__str__
+    __format__ = str.__format__
+
+
+class Tier(_InternedEnum):
+    """Customer tier (the CRM's ``status``)."""
+    SILVER = "Silver Tier"
+    GOLD = "Gold Tier"
+    VIP = "VIP"
+    PLATINUM = "Platinum"
+
+
+class Priority(_InternedEnum):
+    LOW = "LOW"
+    MEDIUM = "MEDIUM"
+    HIGH = "HIGH"
+
+
+class Action(_InternedEnum):
+    """Resolution actions and the follow-up actions triage recommends."""
+    FULL_REFUND = "full_refund"
+    REPLACEMENT = "replacement"
+    RESHIP_EXPRESS = "reship_express"
+    RESHIP_STANDARD = "reship_standard"
+    GENERATE_COUPON = "generate_coupon"
+    IMMEDIATE_RESPONSE = "immediate_response"
+    MANAGER_REVIEW = "manager_review"
+    RETENTION_MEASURES = "retention_measures"
+    PRIORITY_HANDLING = "priority_handling"
+    PERSONALIZED_RESPONSE = "personalized_response"
+    EMPATHETIC_RESPONSE = "empathetic_response"
+    SOLUTION_FOCUSED = "solution_focused"
+    STANDARD_SUPPORT_PROCESS = "standard_support_process"
+
+
+@dataclass(frozen=True, slots=True)
+class CustomerRecord:
+    """A CRM customer record."""
+    ltv: float
+    tier: Tier
+    recent_order_count: int = 0
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "CustomerRecord":
+        """Build from the CRM's JSON shape (``ltv``, ``status``, ``recent_order_count``)."""
+        return cls(data["ltv"], Tier(data["status"]), data.get("recent_order_count", 0))
+
+    @property
+    def status(self) -> str:
+        return self.tier.value
+
+    def to_dict(self) -> dict:
+        return {"ltv": self.ltv, "status": self.tier.value, "recent_order_count": self.recent_order_count}
+
+
+@dataclass(frozen=True, slots=True)
+class TriageDecision:
+    """Outcome of the triage rules."""
+    escalate: bool
+    priority: Priority
+    reason: str
+    recommended_actions: Tuple[Action, ...]
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "TriageDecision":
+        return cls(data["escalate"], Priority(data["priority"]), data["reason"],
+                   tuple(Action(action) for action in data["recommended_actions"]))
+
+    def to_dict(self) -> dict:
+        return {
+            "escalate": self.escalate,
+            "priority": self.priority.value,
+            "reason": self.reason,
+            "recommended_actions": [action.value for action in self.recommended_actions],
+        }
+
+    def to_json(self, indent: Optional[int] = None) -> str:
+        return json.dumps(self.to_dict(), indent=indent)
+
+
+@dataclass(frozen=True, slots=True)
+class Solution:
+    """
+    One solution option.
+
+    ``params`` is a tuple of (name, value) pairs, in the order they are
+    serialized; ``param`` reads one by name. Ranked solutions carry their
+    1-based rank as ``solution_id`` and a priority; both are left out of
+    ``to_dict`` when None.
+    """
+    action: Action
+    params: Tuple[Tuple[str, object], ...]
+    explanation: str
+    priority: Optional[Priority] = None
+    solution_id: Optional[int] = None
+
+    def param(self, name: str, default=None):
+        for key, value in self.params:
+            if key == name:
+                return value
+        return default
+
+    def to_dict(self) -> dict:
+        data = {} if self.solution_id is None else {"solution_id": self.solution_id}
+        data["action"] = self.action.value
+        data["params"] = dict(self.params)
+        data["explanation"] = self.explanation
+        if self.priority is not None:
+            data["priority"] = self.priority.value
+        return data
+
+
+@dataclass(frozen=True, slots=True)
+class SolutionRanking:
+    """Solution options, best first."""
+    solutions: Tuple[Solution, ...]
+
+    @property
+    def recommended(self) -> Optional[Solution]:
+        return self.solutions[0] if self.solutions else None
+
+    def to_dict(self) -> dict:
+        ranked_solutions = [solution.to_dict() for solution in self.solutions]
+        return {
+            "ranked_solutions": ranked_solutions,
+            "recommended_solution": ranked_solutions[0] if ranked_solutions else None,
+        }
+
+    def to_json(self, indent: Optional[int] = None) -> str:
+        return json.dumps(self.to_dict(), indent=indent)
+
+
+@dataclass(frozen=True, slots=True)
+class ActionPlan:
+    """How an action is carried out and what the customer is told."""
+    action: Action
+    coordination_summary: Tuple[str, ...]
+    recommended_communication: str
+    next_steps: Tuple[str, ...]
+
+    def to_dict(self) -> dict:
+        return {
+            "coordination_summary": list(self.coordination_summary),
+            "recommended_communication": self.recommended_communication,
+            "next_steps": list(self.next_steps),
+        }
+
+    def to_json(self, indent: Optional[int] = None) -> str:
+        return json.dumps(self.to_dict(), indent=indent)
+
+
+class CustomerTable:
+    """
+    Customers stored column-wise: LTVs and order counts in ``array`` buffers,
+    tiers as one-byte indexes into ``tiers``.
+
+    Appending converts a record (or a CRM dict) into the columns; indexing
+    rebuilds a CustomerRecord. ``ltv`` can be handed to NumPy without a copy
+    (``np.frombuffer(table.ltv)``).
+    """
+
+    def __init__(self, records: Iterable = ()):
+        self.ltv = array("d")
+        self.recent_order_count = array("l")
+        self.tier_index = array("B")
+        self.tiers = []
+        self._tier_slot = {}
+        self.extend(records)
+
+    def append(self, record):
+        if not isinstance(record, CustomerRecord):
+            record = CustomerRecord.from_dict(record)
+        slot = self._tier_slot.get(record.tier)
+        if slot is None:
+            if len(self.tiers) == 256:
+                raise ValueError("CustomerTable holds at most 256 distinct tiers")
+            slot = self._tier_slot[record.tier] = len(self.tiers)
+            self.tiers.append(record.tier)
+        self.ltv.append(record.ltv)
+        self.recent_order_count.append(record.recent_order_count)
+        self.tier_index.append(slot)
+
+    def extend(self, records: Iterable):
+        for record in records:
+            self.append(record)
+
+    def __len__(self) -> int:
+        return len(self.ltv)
+
+    def __getitem__(self, row: int) -> CustomerRecord:
+        return CustomerRecord(self.ltv[row], self.tiers[self.tier_index[row]], self.recent_order_count[row])
+
+    def __iter__(self) -> Iterator[CustomerRecord]:
+        return (self[row] for row in range(len(self)))
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the column buffers."""
+        return sum(column.itemsize * len(column) for column in (self.ltv, self.recent_order_count, self.tier_index))
@@ -0,0 +1,405 @@
+"""
+Refund execution engine - idempotent, batched refunds recorded in a durable
+SQLite ledger
+
+Every refund carries an idempotency key chosen by the caller and scoped to
+the request it settles (e.g. ``refund:<transcript>:<order>``), so a retry
+of that request reuses it while a second, legitimate refund of the same
+order and amount gets a key of its own. Submitting a key that already
+succeeded returns the recorded result without touching the payment
+backend, and concurrent submissions of the same key share one future, so
+retries under load can never refund twice.
+
+Refunds are coalesced by a background batcher: a batch is sent to the
+payments backend once ``max_batch_size`` refunds are waiting or the oldest
+has waited ``max_wait`` seconds. Rows are written to the ledger as pending
+before the batch leaves the process and updated with the outcome after;
+pending rows left behind by a crash are resubmitted with their original
+keys by ``recover()``, so the backend can deduplicate them.
+
+The ledger is a file under the state directory (CX_STATE_DIR, default
+~/.cx_rescue) unless CX_REFUND_LEDGER names another, so every worker
+process on a host and every resumed batch run share one set of keys. A
+refund whose key was already paid - by this run or an earlier one - comes
+back with status ``"already_refunded"`` rather than ``"success"``, so
+callers can report it without claiming a new payment. Tests and demos can
+opt into CX_REFUND_LEDGER=:memory:, but the queue workers and the batch
+processor refuse to start with it (see ``require_durable_ledger``).
+
+Configuration:
+    CX_STATE_DIR=/var/lib/cx            state directory (default ~/.cx_rescue)
+    CX_REFUND_LEDGER=/var/lib/cx/refunds.db   ledger path (default <state dir>/refunds.db, or ":memory:")
+    CX_REFUND_BATCH_SIZE=50
+    CX_REFUND_BATCH_WINDOW=0.01         seconds
+    CX_REFUND_CONCURRENT_BATCHES=4
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from .backends import get_backend_pool
+from .tracing import span
+
+DEFAULT_STATE_DIR = os.path.join(os.path.expanduser("~"), ".cx_rescue")
+LEDGER_FILENAME = "refunds.db"
+IN_MEMORY_LEDGER = ":memory:"
+# Status of a refund whose key had already been paid; nothing is paid again
+ALREADY_REFUNDED = "already_refunded"
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_BATCH_WINDOW = 0.01
+DEFAULT_CONCURRENT_BATCHES = 4
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS refunds (
+    idempotency_key TEXT PRIMARY KEY,
+    order_id TEXT NOT NULL,
+    amount REAL NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+
+class RefundError(Exception):
+    """Raised through a refund's future when the payment backend rejects or fails it."""
+
+
+def ledger_path() -> str:
+    """Return the configured ledger path: CX_REFUND_LEDGER, else refunds.db in the state directory."""
+    configured = os.environ.get("CX_REFUND_LEDGER")
+    if configured:
+        return configured
+    return os.path.abspath(os.path.join(os.environ.get("CX_STATE_DIR") or DEFAULT_STATE_DIR, LEDGER_FILENAME))
+
+
+def require_durable_ledger(component: str) -> str:
+    """
+    Check that refunds are recorded in a file before a long-running component starts.
+
+    Queue workers run one process per core and batch runs are resumed after a
+    crash; with an in-memory ledger each would start without the keys already
+    paid and could refund a redelivered issue twice.
+
+    Args:
+        component: Name used in the error message, e.g. "queue worker".
+
+    Returns:
+        The ledger path the component will use.
+
+    Raises:
+        RuntimeError: If CX_REFUND_LEDGER is ":memory:".
+    """
+    path = ledger_path()
+    if path == IN_MEMORY_LEDGER:
+        raise RuntimeError(f"The {component} needs a durable refund ledger shared by every process; "
+                           f"set CX_REFUND_LEDGER to a file path (or unset it to use {LEDGER_FILENAME} "
+                           f"in the state directory) instead of {IN_MEMORY_LEDGER}")
+    return path
+
+
+class RefundLedger:
+    """
+    SQLite ledger of refund attempts, one row per idempotency key.
+
+    Status moves pending -> succeeded | failed. The database runs in WAL mode
+    so readers never block the batcher's writes.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        path = path or ledger_path()
+        self.path = path
+        if path != IN_MEMORY_LEDGER:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT idempotency_key, order_id, amount, status, result, error, attempts "
+                "FROM refunds WHERE idempotency_key = ?", (key,)).fetchone()
+        return self._row(row) if row else None
+
+    @staticmethod
+    def _row(row) -> dict:
+        key, order_id, amount, status, result, error, attempts = row
+        return {"idempotency_key": key, "order_id": order_id, "amount": amount, "status": status,
+                "result": json.loads(result) if result else None, "error": error, "attempts": attempts}
+
+    def mark_pending(self, refunds: List[dict]):
+        """Record a batch as pending (one transaction) before it is submitted."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT INTO refunds (idempotency_key, order_id, amount, status, attempts, created_at, updated_at) "
+                "VALUES (?, ?, ?, 'pending', 1, ?, ?) "
+                "ON CONFLICT(idempotency_key) DO UPDATE SET status = 'pending', error = NULL, "
+                "attempts = attempts + 1, updated_at = excluded.updated_at",
+                [(r["idempotency_key"], r["order_id"], r["amount"], now, now) for r in refunds],
+            )
+
+    def record_outcomes(self, outcomes: List[tuple]):
+        """Store (key, status, result, error) outcomes of a submitted batch."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "UPDATE refunds SET status = ?, result = ?, error = ?, updated_at = ? WHERE idempotency_key = ?",
+                [(status, json.dumps(result) if result is not None else None, error, now, key)
+                 for key, status, result, error in outcomes],
+            )
+
+    def pending(self) -> List[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT idempotency_key, order_id, amount, status, result, error, attempts "
+                "FROM refunds WHERE status = 'pending' ORDER BY created_at").fetchall()
+        return [self._row(row) for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM refunds GROUP BY status").fetchall())
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def submit_to_payments(refunds: List[dict]) -> List[dict]:
+    """
+    Send one batch to the payments backend.
+
+    Returns one {"idempotency_key", "status", ...} result per refund; the
+    mock path (no payments URL) accepts every refund.
+    """
+    pool = get_backend_pool()
+    if pool.is_remote("payments"):
+        return pool.request_json("payments", "POST", "/refunds/batch", json={"refunds": refunds})["results"]
+    for refund in refunds:
+        print(f"Refund of ${refund['amount']} for order {refund['order_id']} processed successfully.")
+    return [{"idempotency_key": refund["idempotency_key"], "status": "success"} for refund in refunds]
+
+
+class RefundEngine:
+    """
+    Coalesces refund requests into batches for the payments backend.
+
+    Args:
+        ledger: Where refund attempts and outcomes are recorded.
+        submit_batch: Callable sending a list of refunds and returning one
+            result dict per refund (default: ``submit_to_payments``).
+        max_batch_size: Refunds per backend call.
+        max_wait: Longest a refund waits for its batch to fill, in seconds.
+        max_concurrent_batches: Batches that may be awaiting the backend at
+            once; the batcher stops taking new batches while all are busy.
+    """
+
+    def __init__(self, ledger: RefundLedger, submit_batch: Callable[[List[dict]], List[dict]] = submit_to_payments,
+                 max_batch_size: int = DEFAULT_BATCH_SIZE, max_wait: float = DEFAULT_BATCH_WINDOW,
+                 max_concurrent_batches: int = DEFAULT_CONCURRENT_BATCHES):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.ledger = ledger
+        self.submit_batch = submit_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_concurrent_batches = max_concurrent_batches
+        self._batch_slots = threading.BoundedSemaphore(max_concurrent_batches)
+        self._executor = None
+        self._condition = threading.Condition()
+        self._queue: List[tuple] = []          # (enqueued_at, refund dict)
+        self._in_flight: Dict[str, Future] = {}
+        self._thread = None
+        self._closed = False
+        self.batches = 0
+        self.submitted = 0
+        self.deduplicated = 0
+
+    @classmethod
+    def from_env(cls) -> "RefundEngine":
+        return cls(
+            RefundLedger(ledger_path()),
+            max_batch_size=int(os.environ.get("CX_REFUND_BATCH_SIZE", DEFAULT_BATCH_SIZE)),
+            max_wait=float(os.environ.get("CX_REFUND_BATCH_WINDOW", DEFAULT_BATCH_WINDOW)),
+            max_concurrent_batches=int(os.environ.get("CX_REFUND_CONCURRENT_BATCHES", DEFAULT_CONCURRENT_BATCHES)),
+        )
+
+    def submit(self, order_id: str, amount: float, idempotency_key: str) -> Future:
+        """
+        Queue a refund and return a future resolving to its result dict.
+
+        A key that already succeeded resolves immediately with the recorded
+        result, its status replaced by ``"already_refunded"`` and marked
+        ``"duplicate": True``; a key already in flight returns the existing
+        future. A key the payments backend reports as a duplicate resolves
+        the same way.
+        """
+        if not idempotency_key:
+            raise ValueError("idempotency_key is required")
+        key = idempotency_key
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("RefundEngine is closed")
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.deduplicated += 1
+                return future
+            recorded = self.ledger.get(key)
+            if recorded is not None and recorded["status"] == "succeeded":
+                self.deduplicated += 1
+                future = Future()
+                future.set_result(dict(recorded["result"] or {}, status=ALREADY_REFUNDED, duplicate=True))
+                return future
+            future = Future()
+            self._in_flight[key] = future
+            self._queue.append((time.monotonic(), {"idempotency_key": key, "order_id": order_id,
+                                                   "amount": float(amount)}))
+            self._ensure_thread()
+            self._condition.notify()
+        return future
+
+    def recover(self) -> int:
+        """Resubmit refunds left pending by a previous process; returns how many."""
+        recovered = 0
+        for row in self.ledger.pending():
+            with self._condition:
+                if row["idempotency_key"] in self._in_flight:
+                    continue
+            self.submit(row["order_id"], row["amount"], row["idempotency_key"])
+            recovered += 1
+        return recovered
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent_batches,
+                                                thread_name_prefix="refund-batch")
+            self._thread = threading.Thread(target=self._run, name="refund-batcher", daemon=True)
+            self._thread.start()
+
+    def _next_batch(self) -> List[dict]:
+        """Block until a batch is due (full, window elapsed, or closing) and take it."""
+        with self._condition:
+            while True:
+                if self._queue:
+                    due = self._queue[0][0] + self.max_wait
+                    now = time.monotonic()
+                    if len(self._queue) >= self.max_batch_size or now >= due or self._closed:
+                        batch = [refund for _, refund in self._queue[:self.max_batch_size]]
+                        del self._queue[:self.max_batch_size]
+                        return batch
+                    self._condition.wait(due - now)
+                elif self._closed:
+                    return []
+                else:
+                    self._condition.wait()
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            self._batch_slots.acquire()
+            self._executor.submit(self._flush_and_release, batch)
+
+    def _flush_and_release(self, batch: List[dict]):
+        try:
+            self._flush(batch)
+        finally:
+            self._batch_slots.release()
+
+    def _flush(self, batch: List[dict]):
+        outcomes = []
+        try:
+            self.ledger.mark_pending(batch)
+            with span("refund.batch", size=len(batch)):
+                results = {result["idempotency_key"]: result for result in self.submit_batch(batch)}
+        except Exception as exc:
+            # Transport failure: the outcome is unknown, so rows stay retryable
+            # under the same key and every waiter sees the error.
+            error = f"{type(exc).__name__}: {exc}"
+            outcomes = [(refund["idempotency_key"], "failed", None, error) for refund in batch]
+            results = None
+        if results is not None:
+            for refund in batch:
+                result = results.get(refund["idempotency_key"])
+                if result is None:
+                    outcomes.append((refund["idempotency_key"], "failed", None, "No result returned for refund"))
+                elif result.get("status") == "success":
+                    outcomes.append((refund["idempotency_key"], "succeeded", result, None))
+                else:
+                    outcomes.append((refund["idempotency_key"], "failed", result,
+                                     result.get("error") or f"Refund {result.get('status', 'failed')}"))
+        try:
+            self.ledger.record_outcomes(outcomes)
+        except Exception:
+            # The backend outcome stands even if it could not be recorded;
+            # the rows stay pending and recover() resubmits them by key.
+            pass
+
+        with self._condition:
+            self.batches += 1
+            self.submitted += len(batch)
+            futures = [self._in_flight.pop(key, None) for key, _, _, _ in outcomes]
+        for future, (key, status, result, error) in zip(futures, outcomes):
+            if future is None:
+                continue
+            if status == "succeeded" and result.get("duplicate"):
+                future.set_result(dict(result, idempotency_key=key, status=ALREADY_REFUNDED))
+            elif status == "succeeded":
+                future.set_result(dict(result, idempotency_key=key))
+            else:
+                future.set_exception(RefundError(error))
+
+    def stats(self) -> dict:
+        with self._condition:
+            queued = len(self._queue)
+        return {
+            "batches": self.batches,
+            "submitted": self.submitted,
+            "deduplicated": self.deduplicated,
+            "queued": queued,
+            "average_batch_size": self.submitted / self.batches if self.batches else 0.0,
+            "ledger": self.ledger.counts(),
+        }
+
+    def close(self, timeout: Optional[float] = None):
+        """Flush everything queued, stop the batcher and close the ledger."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+            self._executor.shutdown(wait=True)
+        self.ledger.close()
+
+
+_refund_engine = None
+_refund_engine_lock = threading.Lock()
+
+
+def get_refund_engine() -> RefundEngine:
+    """Return the process-wide refund engine, creating it (and recovering pending refunds) on first use."""
+    global _refund_engine
+    with _refund_engine_lock:
+        if _refund_engine is None:
+            _refund_engine = RefundEngine.from_env()
+            _refund_engine.recover()
+        return _refund_engine
+
+
+def submit_refund(order_id: str, amount: float, idempotency_key: str) -> Future:
+    """Queue a refund on the shared engine (see ``RefundEngine.submit``)."""
+    return get_refund_engine().submit(order_id, amount, idempotency_key)
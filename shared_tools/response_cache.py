@@ -0,0 +1,485 @@
+"""
+Shared response cache for agents - answers repeated and near-duplicate
+requests without a model run
+
+Usage:
+    from shared_tools.response_cache import RESPONSE_CACHE
+
+    Agent(name="triage_agent", ..., **RESPONSE_CACHE.callbacks(make_triage_decision))
+
+Retries and dashboards re-send the same request ("Customer C67890 with
+transcript T12345 is complaining about a damaged item"), often reworded a
+little. The cache sits in front of the agent as its before/after agent
+callbacks:
+
+  - a request is looked up by agent and normalised text (lowercased,
+    punctuation and spacing folded); failing an exact match, by MinHash
+    similarity of its character shingles (locality-sensitive buckets, estimated
+    Jaccard of at least ``similarity``). Near matches must name exactly the
+    same customer, transcript and order IDs.
+  - each entry keeps fingerprints of the data the answer was built on: the
+    CRM record of every customer and the status of every order named in the
+    request, plus the results of the read-only tools the run called. Before
+    an entry is served these are fetched again, bypassing the tools' own
+    caches, and any change drops the entry, so answers follow the CRM and
+    order data. ``invalidate(entity_id)`` drops entries at once.
+  - only requests naming at least one ID are cached; follow-ups such as
+    "yes, go ahead" depend on the conversation, not on their text.
+  - only read-only runs are cached. An agent opts in by passing its own
+    read-only tools to ``callbacks()``; a run that calls any other tool
+    (a refund, an email, a whole workflow) is never stored, so a hit can
+    never stand in for a side effect. Agents that act on customers are not
+    put behind the cache at all.
+
+``stats()`` (or ``get_response_cache_stats()``) reports hits, misses and
+the model and tool calls the hits avoided, per agent and in total.
+
+Configuration:
+    CX_RESPONSE_CACHE=1                  "0", "false" or "off" disables it
+    CX_RESPONSE_CACHE_SIZE=10000         entries
+    CX_RESPONSE_CACHE_TTL=600            seconds
+    CX_RESPONSE_CACHE_SIMILARITY=0.8     near-duplicate threshold (Jaccard)
+"""
+import hashlib
+import inspect
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .crm_tools import _fetch_customers, crm_lookup_tool, transcript_retrieval_tool
+from .policy_tools import order_status_bulk_tool, order_status_tool, policy_lookup_tool
+from .tracing import span
+
+DEFAULT_SIZE = 10_000
+DEFAULT_TTL = 600.0
+DEFAULT_SIMILARITY = 0.8
+
+ENTITY_RE = re.compile(r"\b(C\d+|T\d+|O-\d+)\b")
+_WORD_RE = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+def _fresh_customers(customer_ids: List[str]) -> dict:
+    """crm_bulk_lookup_tool's result, fetched without the CRM cache."""
+    fetched = _fetch_customers(list(dict.fromkeys(customer_ids)))
+    return {customer_id: fetched[customer_id] for customer_id in customer_ids}
+
+
+# Read-only tools whose results an answer may depend on, by ADK tool name.
+# Re-running them is how an entry is checked against current data, so each
+# maps to a function that goes to the source: a CRM record served from the
+# 300s lookup cache would hide the very change the check is looking for.
+VALIDATORS: Dict[str, Callable[..., object]] = {
+    "crm_lookup_tool": inspect.unwrap(crm_lookup_tool),
+    "crm_bulk_lookup_tool": _fresh_customers,
+    "order_status_tool": order_status_tool,
+    "order_status_bulk_tool": order_status_bulk_tool,
+    "policy_lookup_tool": inspect.unwrap(policy_lookup_tool),
+    "transcript_retrieval_tool": transcript_retrieval_tool,
+}
+
+# Data every request naming these IDs depends on, checked even when the
+# answer came from a path that called no tools (e.g. the triage fast path)
+_ENTITY_LOOKUPS = {"C": ("crm_lookup_tool", "customer_id"), "O": ("order_status_tool", "order_id")}
+
+_PRIME = (1 << 61) - 1
+_MASK = (1 << 32) - 1
+
+
+def normalize_request(text: str) -> str:
+    """Lowercase ``text`` and reduce it to its words, single-spaced."""
+    return " ".join(_WORD_RE.findall(text.lower()))
+
+
+def fingerprint(value) -> str:
+    """Stable digest of a tool result (non-dict results are wrapped like ADK does)."""
+    if not isinstance(value, dict):
+        value = {"result": value}
+    return hashlib.blake2b(json.dumps(value, sort_keys=True, default=str).encode("utf-8"),
+                           digest_size=12).hexdigest()
+
+
+class MinHasher:
+    """
+    MinHash signatures of character shingles, with banding for candidate lookup.
+
+    Character shingles suit short requests: one added or dropped word
+    changes only a few of them, where it would change most word shingles.
+
+    Args:
+        num_perm: Signature length.
+        bands: LSH bands; ``num_perm`` must divide evenly. Two texts share a
+            bucket in at least one band with high probability once their
+            Jaccard similarity is above about (1 / bands) ** (bands / num_perm).
+        shingle: Characters per shingle.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, shingle: int = 5, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle = shingle
+        digest = hashlib.blake2b(str(seed).encode(), digest_size=64).digest()
+        self._params = []
+        for index in range(num_perm):
+            a, b = (int.from_bytes(hashlib.blake2b(digest + bytes([index, part]), digest_size=8).digest(), "big")
+                    for part in (0, 1))
+            self._params.append((a % (_PRIME - 1) + 1, b % _PRIME))
+
+    def shingles(self, normalized: str) -> set:
+        if len(normalized) <= self.shingle:
+            return {normalized}
+        return {normalized[i:i + self.shingle] for i in range(len(normalized) - self.shingle + 1)}
+
+    def signature(self, normalized: str) -> Tuple[int, ...]:
+        hashes = [int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+                  for shingle in self.shingles(normalized)]
+        return tuple(min(((a * value + b) % _PRIME) & _MASK for value in hashes) for a, b in self._params)
+
+    def bands_of(self, signature: Tuple[int, ...]):
+        return [(band, signature[band * self.rows:(band + 1) * self.rows]) for band in range(self.bands)]
+
+    @staticmethod
+    def similarity(first: Tuple[int, ...], second: Tuple[int, ...]) -> float:
+        """Estimated Jaccard similarity of the texts behind two signatures."""
+        return sum(a == b for a, b in zip(first, second)) / len(first)
+
+
+class _Entry:
+    __slots__ = ("key", "agent", "entities", "signature", "response", "dependencies",
+                 "model_calls", "tool_calls", "stored_at")
+
+    def __init__(self, key, agent, entities, signature, response, dependencies, model_calls, tool_calls, stored_at):
+        self.key = key
+        self.agent = agent
+        self.entities = entities
+        self.signature = signature
+        self.response = response
+        self.dependencies = dependencies
+        self.model_calls = model_calls
+        self.tool_calls = tool_calls
+        self.stored_at = stored_at
+
+
+class _Pending:
+    """A cache miss whose run is in progress: what the entry will need once it finishes."""
+
+    __slots__ = ("key", "agent", "entities", "signature", "dependencies", "tool_calls", "read_only")
+
+    def __init__(self, key, agent, entities, signature, dependencies):
+        self.key = key
+        self.agent = agent
+        self.entities = entities
+        self.signature = signature
+        self.dependencies = dependencies
+        self.tool_calls = 0
+        self.read_only = True
+
+
+class ResponseCache:
+    """
+    Cache of final agent responses keyed by request text, validated against
+    the data they were built from.
+
+    Args:
+        enabled: When False the callbacks do nothing.
+        maxsize: Entries kept; the least recently used is evicted beyond it.
+        ttl: Seconds an entry may be served at all.
+        similarity: Estimated Jaccard similarity a near-duplicate needs.
+        validators: Read-only tool name -> function used to re-check the
+            data an entry depends on (default ``VALIDATORS``).
+        hasher: MinHash settings.
+        clock: Time source for ``ttl``.
+    """
+
+    def __init__(self, enabled: bool = True, maxsize: int = DEFAULT_SIZE, ttl: float = DEFAULT_TTL,
+                 similarity: float = DEFAULT_SIMILARITY, validators: Optional[Dict[str, Callable]] = None,
+                 hasher: Optional[MinHasher] = None, clock: Callable[[], float] = time.monotonic):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.enabled = enabled
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.similarity = similarity
+        self.validators = VALIDATORS if validators is None else validators
+        self.hasher = hasher or MinHasher()
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._buckets: Dict[tuple, set] = {}
+        self._by_entity: Dict[str, set] = {}
+        # invocation ID -> _Pending; bounded, since a failed run never reports back
+        self._pending: "OrderedDict[str, _Pending]" = OrderedDict()
+        # Agent-specific tools declared read-only through callbacks()
+        self._read_only_tools = set()
+        self._counts: Counter = Counter()
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        return cls(
+            enabled=os.environ.get("CX_RESPONSE_CACHE", "1").lower() not in ("0", "false", "off"),
+            maxsize=int(os.environ.get("CX_RESPONSE_CACHE_SIZE", DEFAULT_SIZE)),
+            ttl=float(os.environ.get("CX_RESPONSE_CACHE_TTL", DEFAULT_TTL)),
+            similarity=float(os.environ.get("CX_RESPONSE_CACHE_SIMILARITY", DEFAULT_SIMILARITY)),
+        )
+
+    def callbacks(self, *read_only_tools) -> dict:
+        """
+        Agent keyword arguments that put the cache in front of a read-only agent.
+
+        Args:
+            *read_only_tools: The agent's own tools (functions or FunctionTools)
+                that only compute an answer. Together with ``validators``
+                they are the tools a cacheable run may call; a run calling
+                anything else is not stored.
+        """
+        self._read_only_tools.update(getattr(tool, "name", None) or tool.__name__ for tool in read_only_tools)
+        return {
+            "before_agent_callback": self.before_agent,
+            "after_tool_callback": self.after_tool,
+            "after_agent_callback": self.after_agent,
+        }
+
+    # -- lookup -------------------------------------------------------------
+
+    def lookup(self, agent: str, text: str) -> Tuple[Optional[_Entry], str]:
+        """
+        Find a servable cached entry for ``text`` sent to ``agent``.
+
+        Returns:
+            (entry, outcome) where outcome is "exact", "near", "miss",
+            "stale" (an entry existed but its data changed) or "uncacheable";
+            entry is None unless the outcome is a hit.
+        """
+        entities = tuple(sorted(set(ENTITY_RE.findall(text))))
+        if not entities:
+            return None, "uncacheable"
+        normalized = normalize_request(text)
+        key = self._key(agent, normalized)
+        now = self._clock()
+        with self._lock:
+            entry, outcome = self._entries.get(key), "exact"
+            if entry is None:
+                entry, outcome = self._nearest(agent, entities, self.hasher.signature(normalized)), "near"
+            if entry is not None and now - entry.stored_at > self.ttl:
+                self._drop(entry.key)
+                entry = None
+        if entry is None:
+            return None, "miss"
+        if not self._is_current(entry):
+            with self._lock:
+                if self._entries.get(entry.key) is entry:
+                    self._drop(entry.key)
+            return None, "stale"
+        with self._lock:
+            if entry.key in self._entries:
+                self._entries.move_to_end(entry.key)
+        return entry, outcome
+
+    @staticmethod
+    def _key(agent: str, normalized: str) -> str:
+        return hashlib.blake2b(f"{agent}\n{normalized}".encode("utf-8"), digest_size=16).hexdigest()
+
+    def _nearest(self, agent: str, entities: tuple, signature: tuple) -> Optional[_Entry]:
+        candidates = set()
+        for band in self.hasher.bands_of(signature):
+            candidates.update(self._buckets.get((agent, entities, band), ()))
+        best, best_similarity = None, self.similarity
+        for key in candidates:
+            entry = self._entries[key]
+            similarity = self.hasher.similarity(signature, entry.signature)
+            if similarity >= best_similarity:
+                best, best_similarity = entry, similarity
+        return best
+
+    def _fingerprint_call(self, tool: str, args: dict) -> str:
+        return fingerprint(self.validators[tool](**args))
+
+    def _is_current(self, entry: _Entry) -> bool:
+        for tool, args, expected in entry.dependencies:
+            try:
+                if self._fingerprint_call(tool, json.loads(args)) != expected:
+                    return False
+            except Exception:
+                # Cannot confirm the data: never serve on a guess
+                return False
+        return True
+
+    def _entity_dependencies(self, entities: tuple) -> Optional[List[tuple]]:
+        dependencies = []
+        for entity in entities:
+            lookup = _ENTITY_LOOKUPS.get(entity[0])
+            if lookup is None or lookup[0] not in self.validators:
+                continue
+            tool, argument = lookup
+            try:
+                dependencies.append((tool, json.dumps({argument: entity}), self._fingerprint_call(tool, {argument: entity})))
+            except Exception:
+                return None
+        return dependencies
+
+    # -- storage ------------------------------------------------------------
+
+    def store(self, pending: _Pending, response: str, model_calls: int):
+        entry = _Entry(pending.key, pending.agent, pending.entities, pending.signature, response,
+                       tuple(dict.fromkeys(pending.dependencies)), model_calls, pending.tool_calls, self._clock())
+        with self._lock:
+            if entry.key in self._entries:
+                self._drop(entry.key)
+            self._entries[entry.key] = entry
+            for band in self.hasher.bands_of(entry.signature):
+                self._buckets.setdefault((entry.agent, entry.entities, band), set()).add(entry.key)
+            for entity in entry.entities:
+                self._by_entity.setdefault(entity, set()).add(entry.key)
+            while len(self._entries) > self.maxsize:
+                self._drop(next(iter(self._entries)))
+                self._counts["evictions"] += 1
+            self._counts["stored"] += 1
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key)
+        for band in self.hasher.bands_of(entry.signature):
+            bucket_key = (entry.agent, entry.entities, band)
+            bucket = self._buckets.get(bucket_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[bucket_key]
+        for entity in entry.entities:
+            keys = self._by_entity.get(entity)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_entity[entity]
+
+    def invalidate(self, *entity_ids: str) -> int:
+        """Drop every entry naming any of ``entity_ids`` (customer, transcript or order IDs); returns how many."""
+        with self._lock:
+            keys = set().union(*(self._by_entity.get(entity, ()) for entity in entity_ids))
+            for key in keys:
+                self._drop(key)
+            self._counts["invalidated"] += len(keys)
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+            self._by_entity.clear()
+            self._pending.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    # -- ADK callbacks ------------------------------------------------------
+
+    def before_agent(self, callback_context):
+        """Serve a cached response (ending the run) or remember the miss for ``after_agent``."""
+        if not self.enabled or callback_context.user_content is None:
+            return None
+        agent = callback_context.agent_name
+        text = " ".join(part.text for part in callback_context.user_content.parts or () if part.text)
+        with span("response_cache.lookup", agent=agent) as current:
+            entry, outcome = self.lookup(agent, text)
+            current.set_attribute("response_cache.outcome", outcome)
+            with self._lock:
+                self._counts[(agent, outcome)] += 1
+                if entry is not None:
+                    self._counts[(agent, "model_calls_avoided")] += entry.model_calls
+                    self._counts[(agent, "tool_calls_avoided")] += entry.tool_calls
+            if entry is not None:
+                # Only reached inside an ADK run, where this is already loaded
+                from google.genai import types
+                return types.Content(role="model", parts=[types.Part(text=entry.response)])
+            if outcome == "uncacheable":
+                return None
+            entities = tuple(sorted(set(ENTITY_RE.findall(text))))
+            dependencies = self._entity_dependencies(entities)
+            if dependencies is None:
+                current.set_attribute("response_cache.outcome", "unverifiable")
+                return None
+            normalized = normalize_request(text)
+            pending = _Pending(self._key(agent, normalized), agent, entities, self.hasher.signature(normalized),
+                               dependencies)
+            with self._lock:
+                self._pending[callback_context.invocation_id] = pending
+                while len(self._pending) > self.maxsize:
+                    self._pending.popitem(last=False)
+        return None
+
+    def after_tool(self, tool, args, tool_context, tool_response):
+        """Record a tool call of a pending run; read-only results become entry dependencies."""
+        with self._lock:
+            pending = self._pending.get(tool_context.invocation_id)
+            if pending is None:
+                return None
+            pending.tool_calls += 1
+            if tool.name not in self.validators and tool.name not in self._read_only_tools:
+                # The run did something a cached answer could not redo
+                pending.read_only = False
+                self._counts[(pending.agent, "side_effects")] += 1
+                return None
+        if tool.name in self.validators:
+            pending.dependencies.append((tool.name, json.dumps(args, sort_keys=True, default=str),
+                                         fingerprint(tool_response)))
+        return None
+
+    def after_agent(self, callback_context):
+        """Store the final response of a run that missed the cache."""
+        with self._lock:
+            pending = self._pending.pop(callback_context.invocation_id, None)
+        if pending is None or not pending.read_only:
+            return None
+        events = [event for event in callback_context.session.events
+                  if event.invocation_id == callback_context.invocation_id and event.author == pending.agent
+                  and event.content is not None and event.content.role == "model" and not event.partial]
+        if not events or events[-1].get_function_calls():
+            return None
+        response = "".join(part.text for part in events[-1].content.parts or () if part.text)
+        if response:
+            self.store(pending, response, model_calls=len(events))
+        return None
+
+    # -- reporting ----------------------------------------------------------
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._counts)
+            entries = len(self._entries)
+        agents = {}
+        for key, value in counts.items():
+            if isinstance(key, tuple):
+                agent, name = key
+                agents.setdefault(agent, Counter())[name] += value
+        fields = ("exact", "near", "miss", "stale", "uncacheable", "side_effects", "model_calls_avoided",
+                  "tool_calls_avoided")
+        per_agent = {agent: self._summary({field: counter[field] for field in fields})
+                     for agent, counter in sorted(agents.items())}
+        totals = self._summary({field: sum(agent[field] for agent in per_agent.values()) for field in fields})
+        return {
+            "enabled": self.enabled,
+            "entries": entries,
+            "stored": counts.get("stored", 0),
+            "evictions": counts.get("evictions", 0),
+            "invalidated": counts.get("invalidated", 0),
+            **totals,
+            "agents": per_agent,
+        }
+
+    @staticmethod
+    def _summary(counts: dict) -> dict:
+        hits = counts["exact"] + counts["near"]
+        lookups = hits + counts["miss"] + counts["stale"]
+        return dict(counts, hits=hits, hit_rate=hits / lookups if lookups else 0.0)
+
+
+RESPONSE_CACHE = ResponseCache.from_env()
+
+
+def get_response_cache_stats() -> dict:
+    """Hits, misses and model/tool calls avoided by the shared response cache."""
+    return RESPONSE_CACHE.stats()
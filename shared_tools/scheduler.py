@@ -0,0 +1,332 @@
+"""
+Shared priority scheduler - runs workflows on a worker pool in priority
+lanes, so escalations are not queued behind bulk work
+
+Usage:
+    scheduler = PriorityScheduler.from_env()
+    future = scheduler.submit(run_issue, issue, priority="HIGH", ltv=1500)
+    scheduler.stats()["lanes"]["HIGH"]["queue_seconds"]["p99"]
+
+Jobs wait in one of three lanes, HIGH, MEDIUM and LOW (the triage
+priorities). A free worker picks its next job like this:
+  - across lanes, by start-time fair queuing: while all lanes are backed
+    up, they get worker starts in proportion to their weights (8:3:1 by
+    default), and a lane that was idle does not get credit for the time
+    it was idle
+  - a lane already running its concurrency limit is skipped, so bulk LOW
+    work can be kept off some of the workers
+  - within a lane, oldest first, with a head start for valuable customers:
+    every ``ltv_scale`` of customer LTV counts as one second of waiting,
+    up to ``max_ltv_boost`` seconds
+  - aging: a job that has waited ``aging`` seconds in its lane is promoted
+    one lane up (LOW to MEDIUM, MEDIUM to HIGH), so no lane starves
+    however busy the others are
+
+Per lane, ``stats()`` reports jobs queued, running and finished, and
+promotions. It also gives the p50/p95/p99/max queue time (submit to start)
+over the most recent ``window`` jobs submitted to the lane, and how many of
+them waited longer than the lane's SLA.
+
+Configuration:
+    CX_SCHEDULER_WORKERS=16
+    CX_SCHEDULER_AGING=30                  seconds before a job moves up a lane
+    CX_SCHEDULER_LTV_SCALE=1000            LTV worth one second of waiting
+    CX_SCHEDULER_MAX_LTV_BOOST=10          seconds
+    CX_SCHEDULER_<LANE>_WEIGHT=8 / 3 / 1
+    CX_SCHEDULER_<LANE>_LIMIT=...          concurrent jobs (default: all workers; LOW: half)
+    CX_SCHEDULER_<LANE>_SLA=5 / 30 / 300   queue-time target in seconds
+"""
+import collections
+import heapq
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional
+
+from .records import Priority
+
+LANES = (Priority.HIGH, Priority.MEDIUM, Priority.LOW)
+DEFAULT_WORKERS = 16
+DEFAULT_WEIGHTS = {Priority.HIGH: 8.0, Priority.MEDIUM: 3.0, Priority.LOW: 1.0}
+DEFAULT_SLAS = {Priority.HIGH: 5.0, Priority.MEDIUM: 30.0, Priority.LOW: 300.0}
+DEFAULT_AGING = 30.0
+DEFAULT_LTV_SCALE = 1000.0
+DEFAULT_MAX_LTV_BOOST = 10.0
+DEFAULT_WINDOW = 10_000
+
+_LANES_BY_VALUE = {lane.value: lane for lane in LANES}
+
+
+def lane_for(priority) -> Priority:
+    """
+    The lane for ``priority`` (a Priority or its name, in any case); anything
+    else is LOW.
+
+    Looked up by value rather than through ``Priority(...)``, which would
+    intern every unknown string as a new member for good.
+    """
+    return _LANES_BY_VALUE.get(str(priority).upper(), Priority.LOW)
+
+
+def _by_lane(settings: Optional[Dict], what: str) -> Dict[Priority, object]:
+    """Key per-lane ``settings`` by lane; names other than HIGH, MEDIUM and LOW raise ValueError."""
+    by_lane = {}
+    for name, value in (settings or {}).items():
+        if str(name).upper() not in _LANES_BY_VALUE:
+            raise ValueError(f"Unknown lane {name!r} in {what}; expected one of {', '.join(_LANES_BY_VALUE)}")
+        by_lane[lane_for(name)] = value
+    return by_lane
+
+
+class _Job:
+    __slots__ = ("key", "seq", "origin", "lane", "submitted", "promote_at", "fn", "args", "kwargs", "future")
+
+    def __init__(self, key, seq, origin, submitted, promote_at, fn, args, kwargs):
+        self.key = key
+        self.seq = seq
+        self.origin = origin
+        self.lane = origin
+        self.submitted = submitted
+        self.promote_at = promote_at
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+
+    def __lt__(self, other):
+        return (self.key, self.seq) < (other.key, other.seq)
+
+
+class _Lane:
+    """Queue, limits, fair-queuing tag and counters of one priority lane."""
+
+    def __init__(self, name: Priority, weight: float, limit: Optional[int], sla: float, window: int):
+        self.name = name
+        self.weight = weight
+        self.limit = limit
+        self.sla = sla
+        self.heap = []
+        self.running = 0
+        # Virtual finish tag of the lane's last started job
+        self.finish = 0.0
+        self.submitted = 0
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self.promoted = 0
+        self.queue_times = collections.deque(maxlen=window)
+
+    def has_capacity(self) -> bool:
+        return self.limit is None or self.running < self.limit
+
+
+def _percentile(ordered, fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class PriorityScheduler:
+    """
+    Worker pool fed from priority lanes.
+
+    Args:
+        workers: Worker threads (jobs run at the same time, across lanes).
+        weights: Fair-queuing weight per lane, keyed by Priority or lane
+            name in any case (as are ``limits`` and ``slas``); other keys
+            raise ValueError.
+        limits: Concurrent jobs per lane; None or missing means no limit
+            beyond ``workers``.
+        slas: Queue-time target per lane in seconds, for ``stats()``.
+        aging: Seconds a job waits in a lane before moving up one.
+        ltv_scale: Customer LTV that counts as one second of waiting.
+        max_ltv_boost: Cap on the LTV head start, in seconds.
+        window: Queue times kept per lane for the percentiles.
+        clock: Monotonic clock (injectable for tests).
+    """
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, weights: Optional[Dict] = None, limits: Optional[Dict] = None,
+                 slas: Optional[Dict] = None, aging: float = DEFAULT_AGING, ltv_scale: float = DEFAULT_LTV_SCALE,
+                 max_ltv_boost: float = DEFAULT_MAX_LTV_BOOST, window: int = DEFAULT_WINDOW,
+                 clock: Callable[[], float] = time.monotonic):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        weights = {**DEFAULT_WEIGHTS, **_by_lane(weights, "weights")}
+        limits = _by_lane(limits, "limits")
+        slas = {**DEFAULT_SLAS, **_by_lane(slas, "slas")}
+        self.workers = workers
+        self.aging = aging
+        self.ltv_scale = ltv_scale
+        self.max_ltv_boost = max_ltv_boost
+        self._clock = clock
+        self._lanes = {name: _Lane(name, weights[name], limits.get(name), slas[name], window) for name in LANES}
+        self._condition = threading.Condition()
+        self._seq = itertools.count()
+        # Start tag of the most recently started job (the virtual clock)
+        self._virtual_time = 0.0
+        self._queued = 0
+        self._closed = False
+        self._threads = [threading.Thread(target=self._work, name=f"scheduler-{index}", daemon=True)
+                         for index in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    @classmethod
+    def from_env(cls, **overrides) -> "PriorityScheduler":
+        workers = int(overrides.pop("workers", os.environ.get("CX_SCHEDULER_WORKERS", DEFAULT_WORKERS)))
+        weights, limits, slas = {}, {}, {}
+        for lane in LANES:
+            prefix = f"CX_SCHEDULER_{lane.value}_"
+            weights[lane] = float(os.environ.get(prefix + "WEIGHT", DEFAULT_WEIGHTS[lane]))
+            slas[lane] = float(os.environ.get(prefix + "SLA", DEFAULT_SLAS[lane]))
+            limit = os.environ.get(prefix + "LIMIT")
+            if limit:
+                limits[lane] = int(limit)
+        # Bulk work keeps at most half the workers unless configured otherwise
+        limits.setdefault(Priority.LOW, max(1, workers // 2))
+        settings = {
+            "workers": workers,
+            "weights": weights,
+            "limits": limits,
+            "slas": slas,
+            "aging": float(os.environ.get("CX_SCHEDULER_AGING", DEFAULT_AGING)),
+            "ltv_scale": float(os.environ.get("CX_SCHEDULER_LTV_SCALE", DEFAULT_LTV_SCALE)),
+            "max_ltv_boost": float(os.environ.get("CX_SCHEDULER_MAX_LTV_BOOST", DEFAULT_MAX_LTV_BOOST)),
+        }
+        settings.update(overrides)
+        return cls(**settings)
+
+    def submit(self, fn: Callable, *args, priority="LOW", ltv: float = 0.0, **kwargs) -> Future:
+        """
+        Queue ``fn(*args, **kwargs)`` in the lane for ``priority``; returns its future.
+
+        Priorities other than HIGH, MEDIUM and LOW go to LOW.
+        """
+        lane = lane_for(priority)
+        now = self._clock()
+        boost = min(max(ltv, 0.0) / self.ltv_scale, self.max_ltv_boost) if self.ltv_scale > 0 else 0.0
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("PriorityScheduler is shut down")
+            job = _Job(now - boost, next(self._seq), lane, now, now - boost + self.aging, fn, args, kwargs)
+            self._enqueue(self._lanes[lane], job)
+            self._lanes[lane].submitted += 1
+            self._condition.notify()
+        return job.future
+
+    def _enqueue(self, lane: _Lane, job: _Job):
+        if not lane.heap:
+            # A lane coming back from idle starts at the current virtual time
+            lane.finish = max(lane.finish, self._virtual_time)
+        job.lane = lane.name
+        heapq.heappush(lane.heap, job)
+        self._queued += 1
+
+    def _promote(self, now: float):
+        """Move jobs that have waited out ``aging`` one lane up."""
+        for lower, higher in ((Priority.MEDIUM, Priority.HIGH), (Priority.LOW, Priority.MEDIUM)):
+            lane = self._lanes[lower]
+            while lane.heap and lane.heap[0].promote_at <= now:
+                job = heapq.heappop(lane.heap)
+                self._queued -= 1
+                self._lanes[job.origin].promoted += 1
+                job.promote_at = now + self.aging
+                self._enqueue(self._lanes[higher], job)
+
+    def _next_job(self) -> Optional[_Job]:
+        """Take the job to run next, waiting for one; None once shut down and drained."""
+        with self._condition:
+            while True:
+                if self._queued:
+                    self._promote(self._clock())
+                    best = None
+                    for lane in self._lanes.values():
+                        if lane.heap and lane.has_capacity():
+                            finish = lane.finish + 1 / lane.weight
+                            if best is None or finish < best[0]:
+                                best = (finish, lane.finish, lane)
+                    if best is not None:
+                        finish, start, lane = best
+                        self._virtual_time = start
+                        lane.finish = finish
+                        job = heapq.heappop(lane.heap)
+                        self._queued -= 1
+                        lane.running += 1
+                        origin = self._lanes[job.origin]
+                        origin.started += 1
+                        origin.queue_times.append(self._clock() - job.submitted)
+                        return job
+                elif self._closed:
+                    return None
+                # Jobs held back by lane limits may be promoted into a free
+                # lane while we wait, so look again after a while
+                self._condition.wait(min(self.aging, 1.0) if self._queued else None)
+
+    def _work(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            if not job.future.set_running_or_notify_cancel():
+                self._finished(job, None)
+                continue
+            try:
+                result = job.fn(*job.args, **job.kwargs)
+            except BaseException as exc:
+                job.future.set_exception(exc)
+                self._finished(job, "failed")
+            else:
+                job.future.set_result(result)
+                self._finished(job, "completed")
+
+    def _finished(self, job: _Job, outcome: Optional[str]):
+        with self._condition:
+            self._lanes[job.lane].running -= 1
+            if outcome is not None:
+                origin = self._lanes[job.origin]
+                setattr(origin, outcome, getattr(origin, outcome) + 1)
+            self._condition.notify_all()
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting jobs; queued jobs still run. With ``wait``, block until they have."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+    def stats(self) -> dict:
+        """Per-lane counters and queue-time percentiles (lanes keyed by the priority jobs were submitted with)."""
+        with self._condition:
+            lanes = {}
+            for name, lane in self._lanes.items():
+                ordered = sorted(lane.queue_times)
+                lanes[name.value] = {
+                    "weight": lane.weight,
+                    "limit": lane.limit,
+                    "sla_seconds": lane.sla,
+                    # Jobs in this lane now, promoted ones included
+                    "queued": len(lane.heap),
+                    "running": lane.running,
+                    "submitted": lane.submitted,
+                    "started": lane.started,
+                    "completed": lane.completed,
+                    "failed": lane.failed,
+                    # Jobs submitted here that aged into a higher lane
+                    "promoted": lane.promoted,
+                    "queue_seconds": {
+                        "p50": _percentile(ordered, 0.50),
+                        "p95": _percentile(ordered, 0.95),
+                        "p99": _percentile(ordered, 0.99),
+                        "max": ordered[-1],
+                    } if ordered else None,
+                    "sla_breaches": sum(1 for wait in ordered if wait > lane.sla),
+                }
+            return {"workers": self.workers, "queued": self._queued, "lanes": lanes}
@@ -0,0 +1,380 @@
+"""
+Shared session store for the ADK agents - bounded history, compaction and
+LRU/TTL eviction of idle sessions
+
+Usage:
+    runner = create_runner(root_agent)      # any package's root_agent
+    get_session_service().session_memory("triage_agent", "user-1", session_id)
+
+or, for ADK Web, ``adk web --session_service_uri bounded://`` (registered in
+the repo's services.py; query parameters override the settings below, e.g.
+``bounded://?max_sessions=500&ttl=600``).
+
+The stock InMemorySessionService keeps every event of every session forever,
+which is where the per-request memory growth in long runs comes from. This
+store bounds it three ways:
+  - tool results from finished invocations are replaced by a short summary
+    once they exceed CX_SESSION_RESULT_CHARS characters;
+  - when a session holds more than CX_SESSION_MAX_EVENTS events, its oldest
+    complete invocations are folded into a single ADK compaction event
+    (a text summary the model sees in their place), keeping at least the
+    last CX_SESSION_KEEP_EVENTS events verbatim;
+  - sessions idle for CX_SESSION_TTL seconds expire, and beyond
+    CX_SESSION_MAX_SESSIONS the least recently used session is evicted.
+Session state (e.g. ``triage_decision``) is never compacted.
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlparse
+
+from google.adk.events import Event, EventActions
+from google.adk.events.event_actions import EventCompaction
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+SUMMARY_HEADER = "[Summary of the earlier conversation]"
+
+
+class _SessionEntry:
+    """Bookkeeping for one stored session."""
+
+    __slots__ = ("last_access", "sizes", "bytes", "compactions", "compacted_results", "trimmed_upto")
+
+    def __init__(self, now: float):
+        self.last_access = now
+        # event id -> serialized size in bytes
+        self.sizes: Dict[str, int] = {}
+        self.bytes = 0
+        self.compactions = 0
+        self.compacted_results = 0
+        # events before this index belong to finished, already trimmed invocations
+        self.trimmed_upto = 0
+
+
+def _event_size(event: Event) -> int:
+    return len(event.model_dump_json(exclude_none=True))
+
+
+def _clip(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit] + "…"
+
+
+class BoundedSessionService(InMemorySessionService):
+    """
+    InMemorySessionService with bounded per-session history and eviction.
+
+    Args:
+        max_sessions: Sessions kept before the least recently used is evicted.
+        ttl: Seconds a session may sit idle before it expires (0 disables).
+        max_events: Events a session may hold before older invocations are
+            folded into a compaction summary.
+        keep_events: Most recent events always kept verbatim.
+        result_chars: Tool results from finished invocations longer than this
+            (serialized) are replaced by a summary of this length.
+        summary_chars: Upper bound on a compaction summary's length; the
+            oldest lines are dropped first.
+    """
+
+    def __init__(self, max_sessions: int = 1000, ttl: float = 1800.0, max_events: int = 40,
+                 keep_events: int = 20, result_chars: int = 400, summary_chars: int = 4000,
+                 clock=time.monotonic):
+        super().__init__()
+        if max_sessions < 1:
+            raise ValueError("max_sessions must be at least 1")
+        if not 0 < keep_events < max_events:
+            raise ValueError("keep_events must be positive and below max_events")
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_events = max_events
+        self.keep_events = keep_events
+        self.result_chars = result_chars
+        self.summary_chars = summary_chars
+        self._clock = clock
+        self._lock = threading.Lock()
+        # (app_name, user_id, session_id) -> entry, least recently used first
+        self._entries: "OrderedDict[tuple, _SessionEntry]" = OrderedDict()
+        self.evicted = 0
+        self.expired = 0
+        self.compactions = 0
+        self.compacted_results = 0
+
+    @classmethod
+    def from_env(cls, **overrides) -> "BoundedSessionService":
+        settings = {
+            "max_sessions": int(os.environ.get("CX_SESSION_MAX_SESSIONS", 1000)),
+            "ttl": float(os.environ.get("CX_SESSION_TTL", 1800)),
+            "max_events": int(os.environ.get("CX_SESSION_MAX_EVENTS", 40)),
+            "keep_events": int(os.environ.get("CX_SESSION_KEEP_EVENTS", 20)),
+            "result_chars": int(os.environ.get("CX_SESSION_RESULT_CHARS", 400)),
+        }
+        settings.update(overrides)
+        return cls(**settings)
+
+    # -- bookkeeping -------------------------------------------------------
+
+    def _touch(self, key: tuple) -> Optional[_SessionEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.last_access = self._clock()
+                self._entries.move_to_end(key)
+            return entry
+
+    def _evict(self):
+        """Drop expired sessions and, beyond max_sessions, the least recently used."""
+        now = self._clock()
+        while True:
+            with self._lock:
+                if not self._entries:
+                    return
+                key, entry = next(iter(self._entries.items()))
+                if self.ttl and now - entry.last_access > self.ttl:
+                    self.expired += 1
+                elif len(self._entries) > self.max_sessions:
+                    self.evicted += 1
+                else:
+                    return
+                del self._entries[key]
+            self._drop(*key)
+
+    def _drop(self, app_name: str, user_id: str, session_id: str):
+        users = self.sessions.get(app_name, {})
+        sessions = users.get(user_id, {})
+        sessions.pop(session_id, None)
+        if not sessions:
+            users.pop(user_id, None)
+
+    # -- session service API ----------------------------------------------
+
+    def _create_session_impl(self, *, app_name: str, user_id: str, state=None, session_id=None):
+        self._evict()
+        session = super()._create_session_impl(app_name=app_name, user_id=user_id, state=state,
+                                               session_id=session_id)
+        entry = _SessionEntry(self._clock())
+        with self._lock:
+            self._entries[(app_name, user_id, session.id)] = entry
+        self._evict()
+        return session
+
+    def _get_session_impl(self, *, app_name: str, user_id: str, session_id: str, config=None):
+        self._evict()
+        session = super()._get_session_impl(app_name=app_name, user_id=user_id, session_id=session_id,
+                                            config=config)
+        if session is not None:
+            self._touch((app_name, user_id, session.id))
+        return session
+
+    def _delete_session_impl(self, *, app_name: str, user_id: str, session_id: str):
+        super()._delete_session_impl(app_name=app_name, user_id=user_id, session_id=session_id)
+        with self._lock:
+            self._entries.pop((app_name, user_id, session_id), None)
+        users = self.sessions.get(app_name, {})
+        if user_id in users and not users[user_id]:
+            del users[user_id]
+
+    async def append_event(self, session, event: Event) -> Event:
+        event = await super().append_event(session=session, event=event)
+        if event.partial:
+            return event
+        key = (session.app_name, session.user_id, session.id)
+        entry = self._touch(key)
+        stored = self.sessions.get(session.app_name, {}).get(session.user_id, {}).get(session.id)
+        if entry is None or stored is None:
+            return event
+        if event.id not in entry.sizes:
+            size = _event_size(event)
+            entry.sizes[event.id] = size
+            entry.bytes += size
+        events = stored.events
+        if len(events) > 1 and events[-2].invocation_id != event.invocation_id:
+            # A new invocation started: the previous ones are finished
+            self._trim_results(entry, events, len(events) - 1)
+        if len(events) > self.max_events:
+            self._fold(entry, stored)
+        return event
+
+    # -- compaction ---------------------------------------------------------
+
+    def _trim_results(self, entry: _SessionEntry, events: list, upto: int):
+        """Replace long tool results in events[entry.trimmed_upto:upto] with summaries."""
+        for index in range(entry.trimmed_upto, upto):
+            event = events[index]
+            if not event.content or not any(part.function_response for part in event.content.parts or ()):
+                continue
+            trimmed = None
+            for position, part in enumerate(event.content.parts):
+                response = part.function_response
+                if response is None or response.response is None:
+                    continue
+                text = json.dumps(response.response, default=str)
+                if len(text) <= self.result_chars:
+                    continue
+                if trimmed is None:
+                    # Events may be shared with a session copy held by a caller
+                    trimmed = event.model_copy(deep=True)
+                trimmed.content.parts[position].function_response.response = {
+                    "summary": _clip(text, self.result_chars), "compacted": True}
+                entry.compacted_results += 1
+                self.compacted_results += 1
+            if trimmed is not None:
+                size = _event_size(trimmed)
+                entry.bytes += size - entry.sizes.get(event.id, 0)
+                entry.sizes[event.id] = size
+                events[index] = trimmed
+        entry.trimmed_upto = max(entry.trimmed_upto, upto)
+
+    def _fold(self, entry: _SessionEntry, stored):
+        """Fold the oldest complete invocations into one compaction event."""
+        events = stored.events
+        boundary = 0
+        for index in range(len(events) - self.keep_events, 0, -1):
+            if (events[index].invocation_id != events[index - 1].invocation_id
+                    and events[index].timestamp > events[index - 1].timestamp):
+                boundary = index
+                break
+        if boundary < 2:
+            return
+        self._trim_results(entry, events, boundary)
+        folded = events[:boundary]
+        first = folded[0]
+        start = first.actions.compaction.start_timestamp if first.actions and first.actions.compaction \
+            else first.timestamp
+        end = folded[-1].timestamp
+        summary = Event(
+            invocation_id=first.invocation_id,
+            author=folded[-1].author,
+            timestamp=end,
+            actions=EventActions(compaction=EventCompaction(
+                start_timestamp=start,
+                end_timestamp=end,
+                compacted_content=types.Content(role="model", parts=[types.Part(text=self._summarize(folded))]),
+            )),
+        )
+        stored.events[:boundary] = [summary]
+        for event in folded:
+            entry.bytes -= entry.sizes.pop(event.id, 0)
+        size = _event_size(summary)
+        entry.sizes[summary.id] = size
+        entry.bytes += size
+        entry.trimmed_upto = max(1, entry.trimmed_upto - boundary + 1)
+        entry.compactions += 1
+        self.compactions += 1
+
+    def _summarize(self, events: list) -> str:
+        lines = []
+        line_chars = max(80, self.result_chars // 2)
+        for event in events:
+            if event.actions and event.actions.compaction:
+                previous = "".join(part.text or "" for part in event.actions.compaction.compacted_content.parts or ())
+                lines.extend(line for line in previous.splitlines() if line != SUMMARY_HEADER)
+                continue
+            for part in (event.content.parts or ()) if event.content else ():
+                if part.text:
+                    lines.append(_clip(f"{event.author}: {part.text.strip()}", line_chars))
+                elif part.function_call:
+                    arguments = json.dumps(part.function_call.args or {}, default=str)
+                    lines.append(_clip(f"{event.author} called {part.function_call.name}({arguments})", line_chars))
+                elif part.function_response:
+                    response = part.function_response.response or {}
+                    result = response["summary"] if response.get("compacted") else json.dumps(response, default=str)
+                    lines.append(_clip(f"{part.function_response.name} returned {result}", line_chars))
+        # Keep the most recent lines within the summary budget
+        kept, total = [], len(SUMMARY_HEADER)
+        for line in reversed(lines):
+            total += len(line) + 1
+            if total > self.summary_chars:
+                break
+            kept.append(line)
+        return "\n".join([SUMMARY_HEADER] + kept[::-1])
+
+    # -- accounting ---------------------------------------------------------
+
+    def session_memory(self, app_name: str, user_id: str, session_id: str) -> Optional[dict]:
+        """
+        Memory accounting for one session, or None if it is not stored.
+
+        Returns:
+            Dictionary with the stored event count, the approximate size of
+            the events and state in bytes, the number of compactions and
+            compacted tool results, and the seconds since the last access
+        """
+        stored = self.sessions.get(app_name, {}).get(user_id, {}).get(session_id)
+        with self._lock:
+            entry = self._entries.get((app_name, user_id, session_id))
+            if stored is None or entry is None:
+                return None
+            return {
+                "events": len(stored.events),
+                "event_bytes": entry.bytes,
+                "state_bytes": len(json.dumps(stored.state, default=str)),
+                "compactions": entry.compactions,
+                "compacted_results": entry.compacted_results,
+                "idle_seconds": self._clock() - entry.last_access,
+            }
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = list(self._entries.values())
+        return {
+            "sessions": len(entries),
+            "max_sessions": self.max_sessions,
+            "ttl": self.ttl,
+            "event_bytes": sum(entry.bytes for entry in entries),
+            "largest_session_bytes": max((entry.bytes for entry in entries), default=0),
+            "compactions": self.compactions,
+            "compacted_results": self.compacted_results,
+            "evicted": self.evicted,
+            "expired": self.expired,
+        }
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_session_service() -> BoundedSessionService:
+    """Return the process-wide bounded session store, configured from the environment."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = BoundedSessionService.from_env()
+        return _service
+
+
+def create_runner(agent, app_name: str = None, session_service: BoundedSessionService = None, **kwargs):
+    """
+    Build an ADK Runner for ``agent`` on the bounded session store.
+
+    Args:
+        agent: The agent to run, e.g. a package's ``root_agent``.
+        app_name: Session namespace; defaults to the agent's name.
+        session_service: Store to use; defaults to the shared one.
+        **kwargs: Passed on to Runner (plugins, artifact_service, ...).
+    """
+    from google.adk.runners import Runner
+
+    return Runner(agent=agent, app_name=app_name or agent.name,
+                  session_service=session_service or get_session_service(), **kwargs)
+
+
+def bounded_session_factory(uri: str, **_) -> BoundedSessionService:
+    """
+    ADK service-registry factory for ``bounded://`` session URIs.
+
+    A bare ``bounded://`` returns the shared store; query parameters
+    (max_sessions, ttl, max_events, keep_events, result_chars) create one
+    with those settings.
+    """
+    overrides = {}
+    for name, value in parse_qsl(urlparse(uri).query):
+        if name in ("max_sessions", "max_events", "keep_events", "result_chars"):
+            overrides[name] = int(value)
+        elif name == "ttl":
+            overrides[name] = float(value)
+        else:
+            raise ValueError(f"Unknown session setting {name!r} in {uri!r}")
+    return BoundedSessionService.from_env(**overrides) if overrides else get_session_service()
@@ -0,0 +1,215 @@
+"""
+Shared severity scoring for transcripts - one weighted phrase lexicon and a
+compiled multi-pattern matcher used by every triage path
+
+The lexicon is compiled once at import into an Aho-Corasick automaton, so a
+transcript is lowercased once and scanned in a single pass whose cost is
+linear in the transcript length regardless of how many phrases are tracked.
+"""
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+# Phrase -> weight. A transcript is severely dissatisfied once the combined
+# weight of the distinct phrases it contains reaches SEVERE_THRESHOLD.
+DISSATISFACTION_LEXICON: Dict[str, float] = {
+    "never again": 1.0,
+    "worst experience": 1.0,
+    "damaged": 1.0,
+    "unhappy": 1.0,
+    "furious": 1.0,
+    "angry": 1.0,
+}
+
+SEVERE_THRESHOLD = 1.0
+
+
+class PhraseMatcher:
+    """
+    Aho-Corasick automaton over a fixed set of lowercase phrases.
+
+    The failure links are folded into the transition tables at build time,
+    so scanning is at most two dict lookups per character with no
+    backtracking along failure chains.
+    """
+
+    def __init__(self, phrases: Iterable[str]):
+        self.phrases: List[str] = []
+        transitions: List[Dict[str, int]] = [{}]
+        outputs: List[List[int]] = [[]]
+
+        for phrase in dict.fromkeys(p.lower() for p in phrases if p):
+            state = 0
+            for char in phrase:
+                next_state = transitions[state].get(char)
+                if next_state is None:
+                    next_state = len(transitions)
+                    transitions[state][char] = next_state
+                    transitions.append({})
+                    outputs.append([])
+                state = next_state
+            outputs[state].append(len(self.phrases))
+            self.phrases.append(phrase)
+
+        # Breadth-first pass: compute failure links and fold each failure
+        # state's transitions into the tables so scans never walk the chain.
+        fail = [0] * len(transitions)
+        queue = deque(transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in transitions[state].items():
+                queue.append(child)
+                fallback = fail[state]
+                while fallback and char not in transitions[fallback]:
+                    fallback = fail[fallback]
+                candidate = transitions[fallback].get(char, 0)
+                fail[child] = candidate if candidate != child else 0
+                outputs[child].extend(outputs[fail[child]])
+            # Root transitions are looked up as the fallback while scanning,
+            # so only non-root failure targets are copied in (keeps memory
+            # proportional to the lexicon instead of states x alphabet).
+            if state and fail[state]:
+                for char, target in transitions[fail[state]].items():
+                    transitions[state].setdefault(char, target)
+
+        self._transitions = transitions
+        self._outputs = [tuple(out) for out in outputs]
+
+    def __len__(self):
+        return len(self.phrases)
+
+    def scan(self, text: str, state: int = 0) -> Tuple[List[Tuple[int, int]], int]:
+        """
+        Scan already-lowercased text starting from automaton ``state``.
+
+        Returns the (end_offset, phrase_index) of every occurrence and the
+        final state, which can be passed back in to continue a scan across
+        chunk boundaries.
+        """
+        transitions = self._transitions
+        outputs = self._outputs
+        root = transitions[0]
+        found = []
+        for offset, char in enumerate(text):
+            state = transitions[state].get(char) or root.get(char, 0)
+            if outputs[state]:
+                for phrase_index in outputs[state]:
+                    found.append((offset + 1, phrase_index))
+        return found, state
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, str]]:
+        """Yield (start_offset, phrase) for every occurrence in ``text``."""
+        matches, _ = self.scan(text.lower())
+        for end, phrase_index in matches:
+            phrase = self.phrases[phrase_index]
+            yield end - len(phrase), phrase
+
+
+@dataclass(frozen=True)
+class SeverityResult:
+    """Outcome of scoring one transcript."""
+    score: float
+    severe: bool
+    matches: Tuple[Tuple[str, float], ...]
+
+
+class SeverityScorer:
+    """Weighted phrase scorer built on a compiled ``PhraseMatcher``."""
+
+    def __init__(self, lexicon: Dict[str, float], threshold: float = SEVERE_THRESHOLD):
+        self.threshold = threshold
+        self.matcher = PhraseMatcher(lexicon)
+        weights = {phrase.lower(): weight for phrase, weight in lexicon.items()}
+        self._weights = [weights[phrase] for phrase in self.matcher.phrases]
+
+    def score(self, text: str) -> SeverityResult:
+        """Score a transcript; each distinct phrase counts once."""
+        occurrences, _ = self.matcher.scan(text.lower())
+        return self._result(dict.fromkeys(phrase_index for _, phrase_index in occurrences))
+
+    def score_chunks(self, chunks: Iterable[str]) -> SeverityResult:
+        """
+        Score a transcript delivered as consecutive text chunks.
+
+        The automaton state is carried from one chunk to the next, so phrases
+        spanning a chunk boundary are still found and the full transcript is
+        never held in memory.
+        """
+        seen = {}
+        state = 0
+        for chunk in chunks:
+            occurrences, state = self.matcher.scan(chunk.lower(), state)
+            for _, phrase_index in occurrences:
+                seen[phrase_index] = None
+        return self._result(seen)
+
+    def tracker(self) -> "SeverityTracker":
+        """A running score for a transcript that is still arriving."""
+        return SeverityTracker(self)
+
+    def _result(self, seen) -> SeverityResult:
+        matches = tuple((self.matcher.phrases[i], self._weights[i]) for i in seen)
+        total = sum(weight for _, weight in matches)
+        return SeverityResult(score=total, severe=total >= self.threshold, matches=matches)
+
+
+class SeverityTracker:
+    """
+    Running severity score of a live transcript.
+
+    Each ``feed`` scans only the text it is given, resuming the automaton
+    from where the previous feed stopped, so the work per utterance is
+    proportional to the utterance and phrases split across feeds are still
+    found. After any sequence of feeds, ``result()`` equals scoring their
+    concatenation in one go.
+    """
+
+    def __init__(self, scorer: SeverityScorer):
+        self._scorer = scorer
+        self._state = 0
+        self._seen = {}
+        self.score = 0.0
+        self.chars = 0
+
+    @property
+    def severe(self) -> bool:
+        return self.score >= self._scorer.threshold
+
+    def feed(self, text: str) -> Tuple[Tuple[str, float], ...]:
+        """Scan the next piece of the transcript; returns the phrases it matched for the first time."""
+        self.chars += len(text)
+        occurrences, self._state = self._scorer.matcher.scan(text.lower(), self._state)
+        new = []
+        for _, phrase_index in occurrences:
+            if phrase_index not in self._seen:
+                self._seen[phrase_index] = None
+                weight = self._scorer._weights[phrase_index]
+                self.score += weight
+                new.append((self._scorer.matcher.phrases[phrase_index], weight))
+        return tuple(new)
+
+    def result(self) -> SeverityResult:
+        return self._scorer._result(self._seen)
+
+
+DEFAULT_SCORER = SeverityScorer(DISSATISFACTION_LEXICON)
+
+
+def score_severity(text: str) -> SeverityResult:
+    """Score a transcript against the shared dissatisfaction lexicon."""
+    return DEFAULT_SCORER.score(text)
+
+
+def score_severity_chunks(chunks: Iterable[str]) -> SeverityResult:
+    """Score a chunked transcript (e.g. from ``iter_transcript_chunks``)."""
+    return DEFAULT_SCORER.score_chunks(chunks)
+
+
+def track_severity() -> SeverityTracker:
+    """A running score against the shared lexicon, fed as the transcript arrives."""
+    return DEFAULT_SCORER.tracker()
+
+
+def detect_severe_dissatisfaction(text: str) -> bool:
+    """True when the transcript crosses the severe-dissatisfaction threshold."""
+    return DEFAULT_SCORER.score(text).severe
@@ -0,0 +1,191 @@
+"""
+In-process HTTP stub serving the mock CRM, policy, logistics, payments and
+communications APIs - used to benchmark the pooled clients offline
+
+The server runs an asyncio loop on a single background thread, so simulated
+backend latency costs no threads and does not compete with the client under
+test for the GIL.
+"""
+import asyncio
+import json
+import threading
+from collections import Counter
+from urllib.parse import parse_qs, unquote, urlparse
+
+from .crm_tools import _mock_customer_record, _mock_transcript
+from .policy_tools import _mock_order_status, _mock_policy
+
+
+def _route(method: str, target: str, fixtures: dict, body: bytes = b""):
+    """Return (status, payload) for a request against the stub APIs."""
+    url = urlparse(target)
+    parts = [unquote(part) for part in url.path.strip("/").split("/")]
+    if method == "GET":
+        if len(parts) == 2 and parts[0] == "customers":
+            record = fixtures["customers"].get(parts[1])
+            return 200, record if record is not None else _mock_customer_record(parts[1])
+        if len(parts) == 2 and parts[0] == "transcripts":
+            text = fixtures["transcripts"].get(parts[1])
+            return 200, {"transcript_id": parts[1], "text": text if text is not None else _mock_transcript(parts[1])}
+        if len(parts) == 2 and parts[0] == "orders":
+            order = fixtures["orders"].get(parts[1])
+            return 200, order if order is not None else _mock_order_status(parts[1])
+        if parts == ["policies"]:
+            query = parse_qs(url.query).get("q", [""])[0]
+            return 200, {"text": _mock_policy(query)}
+    elif method == "POST":
+        if parts == ["customers", "batch"]:
+            customers = {}
+            for customer_id in json.loads(body)["customer_ids"]:
+                record = fixtures["customers"].get(customer_id)
+                customers[customer_id] = record if record is not None else _mock_customer_record(customer_id)
+            return 200, {"customers": customers}
+        if parts == ["orders", "batch"]:
+            orders = {}
+            for order_id in json.loads(body)["order_ids"]:
+                order = fixtures["orders"].get(order_id)
+                orders[order_id] = order if order is not None else _mock_order_status(order_id)
+            return 200, {"orders": orders}
+        if parts in (["refunds"], ["communications"]):
+            return 200, {"status": "success"}
+        if parts == ["refunds", "batch"]:
+            # Honors idempotency keys the way a real payment API does
+            results = []
+            for refund in json.loads(body)["refunds"]:
+                key = refund["idempotency_key"]
+                duplicate = key in fixtures["refunds"]
+                fixtures["refunds"].setdefault(key, refund)
+                results.append({"idempotency_key": key, "status": "success", "duplicate": duplicate})
+            return 200, {"results": results}
+        if parts == ["communications", "batch"]:
+            # Deduplicates redelivered message IDs like a real provider
+            request = json.loads(body)
+            results = []
+            for message in request["messages"]:
+                duplicate = message["message_id"] in fixtures["communications"]
+                fixtures["communications"].setdefault(message["message_id"], dict(message, channel=request["channel"]))
+                results.append({"message_id": message["message_id"], "status": "success", "duplicate": duplicate})
+            return 200, {"results": results}
+    return 404, {"error": f"Unknown path: {method} {url.path}"}
+
+
+def _route_name(method: str, target: str) -> str:
+    """Route a request is counted under: "GET /customers", "POST /customers/batch", ..."""
+    parts = urlparse(target).path.strip("/").split("/")
+    return f"{method} /{parts[0]}" + ("/batch" if parts[-1] == "batch" else "")
+
+
+class StubBackendServer:
+    """
+    Keep-alive HTTP/1.1 server exposing every backend on one port.
+
+    Args:
+        latency: Artificial per-request latency in seconds, to mimic a real
+            I/O-bound backend.
+        port: Port to bind on localhost (0 picks a free port).
+        customers, transcripts, orders: Optional fixture data keyed by ID,
+            served instead of the built-in mock records.
+
+    Every request is counted in ``round_trips`` under its route, so batched
+    and single lookups can be compared.
+    """
+
+    def __init__(self, latency: float = 0.0, port: int = 0, customers: dict = None,
+                 transcripts: dict = None, orders: dict = None):
+        self.latency = latency
+        self.port = port
+        self.fixtures = {
+            "customers": customers or {},
+            "transcripts": transcripts or {},
+            "orders": orders or {},
+            # idempotency key -> refund, for every refund issued
+            "refunds": {},
+            "communications": {},
+        }
+        self.request_count = 0
+        # Round-trips per route (see _route_name), to measure batching
+        self.round_trips = Counter()
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                content_length = 0
+                keep_alive = True
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    name = name.strip().lower()
+                    if name == "content-length":
+                        content_length = int(value.strip())
+                    elif name == "connection" and value.strip().lower() == "close":
+                        keep_alive = False
+                body = await reader.readexactly(content_length) if content_length else b""
+
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                self.request_count += 1
+                self.round_trips[_route_name(method, target)] += 1
+
+                status, payload = _route(method, target, self.fixtures, body)
+                body = json.dumps(payload).encode("utf-8")
+                reason = "OK" if status == 200 else "Not Found"
+                writer.write(
+                    f"HTTP/1.1 {status} {reason}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def _serve(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self._handle_connection, "127.0.0.1", self.port, backlog=1024)
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._server.close()
+            self._server.close_clients()
+            self._loop.run_until_complete(self._server.wait_closed())
+            self._loop.close()
+
+    def start(self) -> "StubBackendServer":
+        self._thread = threading.Thread(target=self._serve, name="stub-backend", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
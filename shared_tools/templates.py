@@ -0,0 +1,320 @@
+"""
+Shared communication templates - customer message wording kept in one
+registry, compiled once and keyed by (action, channel, locale)
+
+Templates use ``str.format`` field syntax ("{order_id}", "{amount:.2f}").
+Registering a template parses it once and compiles it into an f-string
+function over the fields it needs, so rendering does no parsing and formats
+exactly like the inline f-strings it replaces. Rendered bodies are cached
+per template and parameter values (``functools.lru_cache``), which makes
+the common case (the same action for the same amounts and statuses) a
+cache lookup. Bulk sends go through ``render_batch``, one generated list
+comprehension per call.
+
+Lookups fall back from a regional locale to its language and then to the
+default locale, e.g. ("full_refund", "sms", "es-MX") -> "es" -> "en".
+
+Usage:
+    body = render_message("full_refund", {"amount": 75.5, "order_id": "O-9987"}, locale="es")
+    bodies = TEMPLATES.render_batch("generate_coupon", "email", "en", recipients)
+"""
+import string
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+DEFAULT_LOCALE = "en"
+DEFAULT_CHANNEL = "email"
+DEFAULT_CACHE_SIZE = 4096
+DEFAULT_CACHE_PROBE = 1024
+DEFAULT_MIN_HIT_RATE = 0.5
+
+
+class CompiledTemplate:
+    """
+    One template compiled to Python functions.
+
+    ``source`` is parsed once into a generated formatting function - an
+    f-string over the template's fields - so rendering costs the same as
+    the hand-written f-strings it replaces:
+      - ``render(params)`` formats one parameter mapping
+      - ``render_cached(params)`` does the same through an LRU cache of
+        rendered bodies (typed, so 75 and 75.0 are cached apart). The cache
+        only pays off when parameters repeat, so after ``probe`` misses the
+        hit rate is checked; below ``min_hit_rate`` the template switches
+        ``render_cached`` to plain ``render`` (unique order IDs, say).
+      - ``render_many(params_list)`` formats many mappings in one generated
+        list comprehension
+    """
+
+    __slots__ = ("key", "source", "fields", "render", "render_cached", "render_many",
+                 "_cache", "_cached_render", "_misses")
+
+    def __init__(self, key: Tuple[str, str, str], source: str, cache_size: int = DEFAULT_CACHE_SIZE,
+                 probe: int = DEFAULT_CACHE_PROBE, min_hit_rate: float = DEFAULT_MIN_HIT_RATE):
+        self.key = key
+        self.source = source
+        by_name = []
+        by_position = []
+        fields = []
+        for literal, field, spec, conversion in string.Formatter().parse(source):
+            literal = literal.replace("{", "{{").replace("}", "}}")
+            by_name.append(literal)
+            by_position.append(literal)
+            if field is None:
+                continue
+            if not field.isidentifier():
+                raise ValueError(f"Template {key}: field {field!r} must be a plain name")
+            if conversion or (spec and ("{" in spec or "}" in spec)):
+                raise ValueError(f"Template {key}: conversions and nested format specs are not supported")
+            if field not in fields:
+                fields.append(field)
+            spec = ":" + spec if spec else ""
+            by_name.append("{_p[%r]%s}" % (field, spec))
+            by_position.append("{_%d%s}" % (fields.index(field), spec))
+        self.fields = tuple(fields)
+        positions = ", ".join(f"_{index}" for index in range(len(fields)))
+        arguments = ", ".join(f"_p[{field!r}]" for field in fields)
+        self._misses = 0
+
+        def on_miss(*values):
+            # Only misses reach Python code, so hits stay a C-level lookup
+            self._misses += 1
+            if self._misses == probe:
+                info = self._cache.cache_info()
+                if info.hits < min_hit_rate * (info.hits + info.misses):
+                    self.render_cached = self.render
+                    self._cache.cache_clear()
+            return format_values(*values)
+
+        namespace = {}
+        exec("\n".join((
+            "def _format(%s): return f%r" % (positions, "".join(by_position)),
+            "render = lambda _p: _format(%s)" % arguments,
+            "render_cached = lambda _p: _cached(%s)" % arguments,
+            "render_many = lambda _ps: [f%r for _p in _ps]" % "".join(by_name),
+        )), namespace)
+        format_values = namespace["_format"]
+        self._cache = namespace["_cached"] = lru_cache(maxsize=cache_size, typed=True)(on_miss)
+        self.render = namespace["render"]
+        self.render_many = namespace["render_many"]
+        # A template without fields renders to a constant: nothing to cache
+        self._cached_render = namespace["render_cached"] if fields and cache_size else self.render
+        self.render_cached = self._cached_render
+
+    @property
+    def caching(self) -> bool:
+        return self.render_cached is not self.render
+
+    def cache_info(self):
+        return self._cache.cache_info()
+
+    def cache_clear(self):
+        """Empty the render cache and re-enable it if the hit-rate probe turned it off."""
+        self._cache.cache_clear()
+        self._misses = 0
+        self.render_cached = self._cached_render
+
+
+class TemplateRegistry:
+    """
+    Templates keyed by (action, channel, locale), each with its own render cache.
+
+    Args:
+        default_locale: Locale used when neither the requested locale nor its
+            language has a template.
+        cache_size: Rendered bodies kept per template; 0 disables the cache.
+        probe: Cache misses after which a template's hit rate is checked.
+        min_hit_rate: Hit rate below which a template stops caching.
+    """
+
+    def __init__(self, default_locale: str = DEFAULT_LOCALE, cache_size: int = DEFAULT_CACHE_SIZE,
+                 probe: int = DEFAULT_CACHE_PROBE, min_hit_rate: float = DEFAULT_MIN_HIT_RATE):
+        self.default_locale = default_locale
+        self.cache_size = cache_size
+        self.probe = probe
+        self.min_hit_rate = min_hit_rate
+        self._templates: Dict[Tuple[str, str, str], CompiledTemplate] = {}
+        self._resolved: Dict[Tuple[str, str, str], CompiledTemplate] = {}
+        self._actions = set()
+        self._lock = threading.Lock()
+
+    def register(self, action: str, channel: str, locale: str, source: str) -> CompiledTemplate:
+        """Compile and register a template, replacing any with the same key."""
+        template = CompiledTemplate((action, channel, locale), source, self.cache_size, self.probe,
+                                    self.min_hit_rate)
+        with self._lock:
+            self._templates[template.key] = template
+            self._actions.add((action, channel))
+            self._resolved.clear()
+        return template
+
+    def register_all(self, templates: Mapping[Tuple[str, str, str], str]):
+        for (action, channel, locale), source in templates.items():
+            self.register(action, channel, locale, source)
+
+    def has(self, action: str, channel: str = DEFAULT_CHANNEL) -> bool:
+        """True if ``action`` has a template for ``channel`` in any locale."""
+        return (action, channel) in self._actions
+
+    def get(self, action: str, channel: str = DEFAULT_CHANNEL, locale: str = DEFAULT_LOCALE) -> CompiledTemplate:
+        """The template for a key, falling back to the locale's language and then the default locale."""
+        key = (action, channel, locale)
+        template = self._resolved.get(key)
+        if template is not None:
+            return template
+        for candidate in (locale, locale.split("-")[0].split("_")[0], self.default_locale):
+            template = self._templates.get((action, channel, candidate))
+            if template is not None:
+                self._resolved[key] = template
+                return template
+        raise KeyError(f"No template for action {action!r} on channel {channel!r}")
+
+    def render(self, action: str, channel: str = DEFAULT_CHANNEL, locale: str = DEFAULT_LOCALE,
+               params: Optional[Mapping] = None) -> str:
+        """Render one message; identical parameters are served from the template's cache."""
+        template = self._resolved.get((action, channel, locale)) or self.get(action, channel, locale)
+        if params is None:
+            params = {}
+        try:
+            return template.render_cached(params)
+        except KeyError as exc:
+            raise KeyError(f"Template {template.key} needs parameter {exc.args[0]!r}") from None
+        except TypeError:
+            # Unhashable parameter values cannot be cached
+            return template.render(params)
+
+    def render_batch(self, action: str, channel: str, locale: str, params: Iterable[Mapping]) -> List[str]:
+        """
+        Render one template for many recipients.
+
+        The template is resolved once and the bodies are built by one
+        generated list comprehension, bypassing the per-message cache.
+        """
+        template = self.get(action, channel, locale)
+        try:
+            return template.render_many(params)
+        except KeyError as exc:
+            raise KeyError(f"Template {template.key} needs parameter {exc.args[0]!r}") from None
+
+    def cache_clear(self):
+        """Empty every template's render cache."""
+        for template in list(self._templates.values()):
+            template.cache_clear()
+
+    def keys(self) -> List[Tuple[str, str, str]]:
+        return sorted(self._templates)
+
+    def cache_info(self) -> dict:
+        """Render cache statistics summed over all templates."""
+        infos = [template.cache_info() for template in list(self._templates.values())]
+        return {
+            "hits": sum(info.hits for info in infos),
+            "misses": sum(info.misses for info in infos),
+            "size": sum(info.currsize for info in infos),
+            "caching": sum(1 for template in list(self._templates.values()) if template.caching),
+            "templates": len(infos),
+        }
+
+
+_SIGNATURE = {
+    "en": "Best regards,\nCustomer Experience Team",
+    "es": "Atentamente,\nEquipo de Experiencia del Cliente",
+    "fr": "Cordialement,\nL'équipe Expérience Client",
+}
+
+# Built-in templates; the English email wording is what the agents have always sent
+BUILTIN_TEMPLATES: Dict[Tuple[str, str, str], str] = {
+    # Action agent (coordinate_action_execution)
+    ("full_refund", "email", "en"): (
+        "Dear Valued Customer,\n\n"
+        "We have processed a full refund of ${amount} for your order {order_id}. "
+        "The refund will appear in your account within 3-5 business days.\n\n"
+        "We sincerely apologize for the inconvenience and appreciate your understanding.\n\n"
+        + _SIGNATURE["en"]),
+    ("full_refund", "email", "es"): (
+        "Estimado cliente:\n\n"
+        "Hemos procesado el reembolso completo de ${amount} de su pedido {order_id}. "
+        "El reembolso aparecerá en su cuenta en un plazo de 3 a 5 días hábiles.\n\n"
+        "Lamentamos sinceramente las molestias y agradecemos su comprensión.\n\n"
+        + _SIGNATURE["es"]),
+    ("full_refund", "email", "fr"): (
+        "Cher client,\n\n"
+        "Nous avons procédé au remboursement intégral de {amount} $ pour votre commande {order_id}. "
+        "Le remboursement apparaîtra sur votre compte sous 3 à 5 jours ouvrés.\n\n"
+        "Nous vous prions de nous excuser pour ce désagrément et vous remercions de votre compréhension.\n\n"
+        + _SIGNATURE["fr"]),
+    ("full_refund", "sms", "en"): "We've refunded ${amount} for order {order_id}. Expect it within 3-5 business days.",
+    ("full_refund", "sms", "es"): "Hemos reembolsado ${amount} del pedido {order_id}. Lo verá en 3 a 5 días hábiles.",
+    ("full_refund", "sms", "fr"): "Remboursement de {amount} $ effectué pour la commande {order_id}, sous 3 à 5 jours ouvrés.",
+
+    ("reship_express", "email", "en"): (
+        "Dear Valued Customer,\n\n"
+        "We are expediting a replacement for your order {order_id}. "
+        "You will receive tracking information within the next hour.\n\n"
+        "Expected delivery: 1-2 business days.\n\n"
+        + _SIGNATURE["en"]),
+    ("reship_express", "email", "es"): (
+        "Estimado cliente:\n\n"
+        "Estamos enviando con urgencia un reemplazo de su pedido {order_id}. "
+        "Recibirá la información de seguimiento en la próxima hora.\n\n"
+        "Entrega estimada: 1 a 2 días hábiles.\n\n"
+        + _SIGNATURE["es"]),
+    ("reship_express", "email", "fr"): (
+        "Cher client,\n\n"
+        "Nous expédions en urgence un remplacement pour votre commande {order_id}. "
+        "Vous recevrez les informations de suivi dans l'heure.\n\n"
+        "Livraison prévue : 1 à 2 jours ouvrés.\n\n"
+        + _SIGNATURE["fr"]),
+    ("reship_express", "sms", "en"): "A replacement for order {order_id} ships express today. Tracking within the hour.",
+    ("reship_express", "sms", "es"): "El reemplazo del pedido {order_id} sale hoy por envío urgente. Seguimiento en una hora.",
+    ("reship_express", "sms", "fr"): "Le remplacement de la commande {order_id} part en express aujourd'hui. Suivi dans l'heure.",
+
+    ("generate_coupon", "email", "en"): (
+        "Dear Valued Customer,\n\n"
+        "As a gesture of goodwill, we're providing you with a special discount for your next purchase.\n\n"
+        "Thank you for your patience and continued loyalty.\n\n"
+        + _SIGNATURE["en"]),
+    ("generate_coupon", "email", "es"): (
+        "Estimado cliente:\n\n"
+        "Como gesto de buena voluntad, le ofrecemos un descuento especial en su próxima compra.\n\n"
+        "Gracias por su paciencia y su fidelidad.\n\n"
+        + _SIGNATURE["es"]),
+    ("generate_coupon", "email", "fr"): (
+        "Cher client,\n\n"
+        "En geste de bonne volonté, nous vous offrons une remise spéciale sur votre prochain achat.\n\n"
+        "Merci pour votre patience et votre fidélité.\n\n"
+        + _SIGNATURE["fr"]),
+    ("generate_coupon", "sms", "en"): "Thanks for your patience - a special discount is waiting on your next purchase.",
+    ("generate_coupon", "sms", "es"): "Gracias por su paciencia: tiene un descuento especial en su próxima compra.",
+    ("generate_coupon", "sms", "fr"): "Merci de votre patience : une remise spéciale vous attend sur votre prochain achat.",
+
+    # Planning note for actions without customer-facing wording
+    ("follow_up", "email", "en"): "Standard follow-up communication recommended.",
+
+    # Orchestrator resolution notice
+    ("resolution_notice", "email", "en"): (
+        "Dear {customer_status} Customer,\n\n"
+        "We sincerely apologize for the issue with your recent order. \n\n"
+        "We have immediately processed the following resolution:\n"
+        "{explanation}\n\n"
+        "Thank you for your patience and continued loyalty.\n\n"
+        + _SIGNATURE["en"]),
+
+    # Consolidated swarm resolution notice
+    ("resolution_summary", "email", "en"): (
+        "Dear Valued Customer,\n\n"
+        "I sincerely apologize for the issue with your recent order. As a {customer_status} customer, \n"
+        "we want to make this right immediately.\n\n"
+        "I have processed a {solution} for you.\n\n"
+        + _SIGNATURE["en"]),
+}
+
+TEMPLATES = TemplateRegistry()
+TEMPLATES.register_all(BUILTIN_TEMPLATES)
+
+
+def render_message(action: str, params: Optional[Mapping] = None, channel: str = DEFAULT_CHANNEL,
+                   locale: str = DEFAULT_LOCALE) -> str:
+    """Render a message from the shared registry (see ``TemplateRegistry.render``)."""
+    return TEMPLATES.render(action, channel, locale, params)
@@ -0,0 +1,338 @@
+"""
+Shared tracing for tools and workflows - lightweight spans with pluggable
+exporters
+
+Usage:
+    collector = InMemoryCollector()
+    add_exporter(collector)
+
+    with span("orchestrator.triage", customer_id=customer_id) as current:
+        ...
+        current.set_attribute("triage.escalate", escalate)
+
+    @traced("tool.crm_lookup")
+    def crm_lookup_tool(customer_id: str) -> dict: ...
+
+Spans nest through a context variable, so tool spans opened inside a phase
+become its children. Nothing is recorded until an exporter is registered:
+with no exporters ``span`` hands back a shared no-op object and ``traced``
+calls straight through, so the instrumented code pays one attribute check.
+
+Exporters receive ``on_start(span)`` and ``on_end(span)``. Two are provided:
+``InMemoryCollector`` (no dependencies, for tests and the load-test harness)
+and ``OpenTelemetryExporter``, which mirrors every span into an
+OpenTelemetry tracer. Setting CX_TRACE_EXPORTER=otel installs the latter at
+import time.
+"""
+import contextvars
+import functools
+import inspect
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+# Strings longer than this are recorded by size only
+MAX_ATTRIBUTE_LENGTH = 128
+
+_current_span = contextvars.ContextVar("cx_current_span", default=None)
+_span_ids = itertools.count(1)
+_exporters: List = []
+_exporters_lock = threading.Lock()
+
+
+class Span:
+    """A timed operation with attributes, an outcome and an optional parent."""
+
+    __slots__ = ("name", "span_id", "trace_id", "parent_id", "attributes",
+                 "start_time", "end_time", "status", "error", "_start", "_token")
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, attributes: Optional[dict] = None):
+        self.name = name
+        self.span_id = next(_span_ids)
+        self.trace_id = parent.trace_id if parent is not None else self.span_id
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes = {}
+        if attributes:
+            for key, value in attributes.items():
+                self.set_attribute(key, value)
+        self.start_time = time.time()
+        self.end_time = None
+        self.status = "ok"
+        self.error = None
+        self._start = time.perf_counter()
+        self._token = None
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Duration in seconds, or None while the span is still open."""
+        if self.end_time is None:
+            return None
+        return self.end_time - self.start_time
+
+    def set_attribute(self, key: str, value):
+        """Record an attribute; long strings are replaced by their length."""
+        if isinstance(value, str) and len(value) > MAX_ATTRIBUTE_LENGTH:
+            self.attributes[key + ".size"] = len(value)
+        elif isinstance(value, (str, bool, int, float)) or value is None:
+            self.attributes[key] = value
+        else:
+            self.attributes[key] = repr(value)[:MAX_ATTRIBUTE_LENGTH]
+
+    def record_error(self, error: BaseException):
+        self.status = "error"
+        self.error = f"{type(error).__name__}: {error}"
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "trace_id": self.trace_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "duration": self.duration,
+            "status": self.status,
+            "error": self.error,
+            "attributes": dict(self.attributes),
+        }
+
+    # -- context manager -----------------------------------------------------
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        for exporter in _exporters:
+            exporter.on_start(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Wall-clock end derived from the monotonic duration
+        self.end_time = self.start_time + (time.perf_counter() - self._start)
+        if exc is not None:
+            self.record_error(exc)
+        _current_span.reset(self._token)
+        for exporter in _exporters:
+            exporter.on_end(self)
+        return False
+
+
+class _NoopSpan:
+    """Stand-in returned while tracing is disabled."""
+
+    __slots__ = ()
+    name = span_id = trace_id = parent_id = duration = error = None
+    status = "ok"
+    attributes = {}
+
+    def set_attribute(self, key, value):
+        pass
+
+    def record_error(self, error):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def is_enabled() -> bool:
+    """True when at least one exporter is registered."""
+    return bool(_exporters)
+
+
+def add_exporter(exporter):
+    """Register an exporter; spans are recorded from now on."""
+    with _exporters_lock:
+        if exporter not in _exporters:
+            # Replace the list so iterating threads never see it mutate
+            _exporters[:] = _exporters + [exporter]
+    return exporter
+
+
+def remove_exporter(exporter):
+    with _exporters_lock:
+        _exporters[:] = [registered for registered in _exporters if registered is not exporter]
+
+
+def span(name: str, **attributes):
+    """
+    Open a span as a context manager, as a child of the current span.
+
+    Returns the shared no-op span when tracing is disabled.
+    """
+    if not _exporters:
+        return NOOP_SPAN
+    return Span(name, _current_span.get(), attributes)
+
+
+def current_span():
+    """The innermost open span, or the no-op span if there is none."""
+    return _current_span.get() or NOOP_SPAN
+
+
+def set_attribute(key: str, value):
+    """Set an attribute on the current span, if any."""
+    active = _current_span.get()
+    if active is not None:
+        active.set_attribute(key, value)
+
+
+def _result_size(result) -> Optional[int]:
+    if isinstance(result, (str, bytes, dict, list, tuple)):
+        return len(result)
+    return None
+
+
+def traced(name: str):
+    """
+    Decorator recording each call of a tool as a span named ``name``.
+
+    Scalar arguments become ``arg.<name>`` attributes (long strings by size)
+    and the result size is recorded as ``result.size``. Works on plain and
+    ``async`` functions and keeps the wrapped signature for FunctionTool.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        def open_span(args, kwargs) -> Span:
+            bound = signature.bind(*args, **kwargs)
+            attributes = {f"arg.{key}": value for key, value in bound.arguments.items()
+                          if isinstance(value, (str, bool, int, float))}
+            return Span(name, _current_span.get(), attributes)
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not _exporters:
+                    return await func(*args, **kwargs)
+                with open_span(args, kwargs) as active:
+                    result = await func(*args, **kwargs)
+                    active.set_attribute("result.size", _result_size(result))
+                    return result
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _exporters:
+                return func(*args, **kwargs)
+            with open_span(args, kwargs) as active:
+                result = func(*args, **kwargs)
+                active.set_attribute("result.size", _result_size(result))
+                return result
+        return wrapper
+
+    return decorator
+
+
+def propagate(func):
+    """
+    Bind ``func`` to the caller's context so spans opened in another thread
+    (e.g. an executor worker) keep their parent.
+    """
+    if not _exporters:
+        return func
+    context = contextvars.copy_context()
+    return functools.partial(context.run, func)
+
+
+class InMemoryCollector:
+    """
+    Exporter keeping finished spans in memory, grouped by trace.
+
+    At most ``max_traces`` traces are retained; the oldest are dropped first.
+    """
+
+    def __init__(self, max_traces: int = 10_000):
+        self.max_traces = max_traces
+        self._traces: "OrderedDict[int, List[Span]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def on_start(self, span: Span):
+        pass
+
+    def on_end(self, span: Span):
+        with self._lock:
+            spans = self._traces.get(span.trace_id)
+            if spans is None:
+                spans = self._traces[span.trace_id] = []
+                while len(self._traces) > self.max_traces:
+                    self._traces.popitem(last=False)
+            spans.append(span)
+
+    @property
+    def spans(self) -> List[Span]:
+        """Every retained span, in completion order within each trace."""
+        with self._lock:
+            return [span for spans in self._traces.values() for span in spans]
+
+    def trace(self, trace_id: int) -> List[Span]:
+        with self._lock:
+            return list(self._traces.get(trace_id, ()))
+
+    def pop_trace(self, trace_id: int) -> List[Span]:
+        """Return and forget the spans of one trace."""
+        with self._lock:
+            return self._traces.pop(trace_id, [])
+
+    def durations(self) -> Dict[str, List[float]]:
+        """Span durations in seconds grouped by span name."""
+        grouped: Dict[str, List[float]] = {}
+        for span in self.spans:
+            grouped.setdefault(span.name, []).append(span.duration)
+        return grouped
+
+    def clear(self):
+        with self._lock:
+            self._traces.clear()
+
+
+class OpenTelemetryExporter:
+    """
+    Exporter mirroring spans into OpenTelemetry.
+
+    Requires ``opentelemetry-api``; spans go to ``tracer_provider`` (default:
+    the globally configured provider), so any OpenTelemetry SDK exporter
+    (OTLP, Cloud Trace, console) can ship them.
+    """
+
+    def __init__(self, tracer_provider=None, instrumentation_name: str = "cx_rescue_swarm"):
+        try:
+            from opentelemetry import trace
+        except ImportError as exc:
+            raise ImportError("OpenTelemetryExporter requires the opentelemetry-api package") from exc
+        self._trace = trace
+        self._tracer = trace.get_tracer(instrumentation_name, tracer_provider=tracer_provider)
+        self._open: Dict[int, object] = {}
+        self._lock = threading.Lock()
+
+    def on_start(self, span: Span):
+        with self._lock:
+            parent = self._open.get(span.parent_id)
+        context = self._trace.set_span_in_context(parent) if parent is not None else None
+        otel_span = self._tracer.start_span(
+            span.name, context=context, attributes=dict(span.attributes),
+            start_time=int(span.start_time * 1e9),
+        )
+        with self._lock:
+            self._open[span.span_id] = otel_span
+
+    def on_end(self, span: Span):
+        with self._lock:
+            otel_span = self._open.pop(span.span_id, None)
+        if otel_span is None:
+            return
+        otel_span.set_attributes(dict(span.attributes))
+        if span.status == "error":
+            from opentelemetry.trace import Status, StatusCode
+            otel_span.set_status(Status(StatusCode.ERROR, span.error))
+        otel_span.end(end_time=int(span.end_time * 1e9))
+
+
+if os.environ.get("CX_TRACE_EXPORTER", "").lower() == "otel":
+    add_exporter(OpenTelemetryExporter())
@@ -0,0 +1,156 @@
+"""
+File-backed transcript store - append-only segment file plus offset index,
+memory-mapped for reads
+
+Layout inside the store directory:
+    transcripts.seg   UTF-8 transcript bodies written back to back
+    transcripts.idx   one "<transcript_id>\\t<offset>\\t<length>" line per body
+
+Lookups slice the mapped segment, so fetching one transcript copies only
+that transcript and the corpus itself is never read into process memory.
+``iter_chunks`` goes further and decodes a transcript piece by piece for
+callers that can scan incrementally.
+"""
+import codecs
+import mmap
+import os
+import threading
+from typing import Dict, Iterator, Optional, Tuple
+
+SEGMENT_FILE = "transcripts.seg"
+INDEX_FILE = "transcripts.idx"
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class TranscriptStore:
+    """
+    Append-only transcript store rooted at ``directory``.
+
+    Writes append the body to the segment file before recording it in the
+    index, so a crash can at worst leave unreferenced bytes at the segment
+    tail; index entries pointing past the end of the segment are ignored on
+    open. Re-appending an existing ID supersedes the previous body.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._segment_path = os.path.join(directory, SEGMENT_FILE)
+        self._index_path = os.path.join(directory, INDEX_FILE)
+        self._lock = threading.Lock()
+        self._offsets: Dict[str, Tuple[int, int]] = {}
+        self._map: Optional[mmap.mmap] = None
+        self._mapped_size = 0
+
+        open(self._segment_path, "ab").close()
+        segment_size = os.path.getsize(self._segment_path)
+        if os.path.exists(self._index_path):
+            with open(self._index_path, "r", encoding="utf-8") as handle:
+                for line in handle:
+                    parts = line.rstrip("\n").split("\t")
+                    if len(parts) != 3:
+                        continue
+                    transcript_id, offset, length = parts[0], int(parts[1]), int(parts[2])
+                    if offset + length <= segment_size:
+                        self._offsets[transcript_id] = (offset, length)
+
+        self._segment = open(self._segment_path, "ab")
+        self._index = open(self._index_path, "a", encoding="utf-8")
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __contains__(self, transcript_id: str) -> bool:
+        return transcript_id in self._offsets
+
+    def ids(self):
+        return self._offsets.keys()
+
+    def append(self, transcript_id: str, text: str, sync: bool = False):
+        """Append a transcript; with ``sync`` both files are fsynced before returning."""
+        if not transcript_id or any(char in transcript_id for char in "\t\r\n"):
+            raise ValueError(f"Invalid transcript id: {transcript_id!r}")
+        body = text.encode("utf-8")
+        with self._lock:
+            offset = self._segment.tell()
+            self._segment.write(body)
+            self._segment.flush()
+            if sync:
+                os.fsync(self._segment.fileno())
+            self._index.write(f"{transcript_id}\t{offset}\t{len(body)}\n")
+            self._index.flush()
+            if sync:
+                os.fsync(self._index.fileno())
+            self._offsets[transcript_id] = (offset, len(body))
+
+    def _view(self, transcript_id: str) -> Optional[memoryview]:
+        location = self._offsets.get(transcript_id)
+        if location is None:
+            return None
+        offset, length = location
+        if not length:
+            return memoryview(b"")
+        with self._lock:
+            if offset + length > self._mapped_size:
+                # The segment grew since it was mapped; map the new size. The
+                # old map is left to the garbage collector because readers on
+                # other threads may still hold views into it.
+                with open(self._segment_path, "rb") as handle:
+                    self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+                self._mapped_size = len(self._map)
+            mapped = self._map
+        return memoryview(mapped)[offset:offset + length]
+
+    def get(self, transcript_id: str) -> Optional[str]:
+        """Return the full transcript text, or None if the ID is unknown."""
+        view = self._view(transcript_id)
+        if view is None:
+            return None
+        try:
+            return str(view, "utf-8")
+        finally:
+            view.release()
+
+    def iter_chunks(self, transcript_id: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+        """
+        Yield a transcript as decoded text chunks of about ``chunk_size``
+        bytes, without materialising the whole transcript.
+
+        Raises:
+            KeyError: If the transcript ID is unknown.
+        """
+        view = self._view(transcript_id)
+        if view is None:
+            raise KeyError(transcript_id)
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        try:
+            for start in range(0, len(view), chunk_size):
+                piece = view[start:start + chunk_size]
+                text = decoder.decode(piece)
+                piece.release()
+                if text:
+                    yield text
+            tail = decoder.decode(b"", final=True)
+            if tail:
+                yield tail
+        finally:
+            view.release()
+
+    def close(self):
+        with self._lock:
+            self._segment.close()
+            self._index.close()
+            if self._map is not None:
+                try:
+                    self._map.close()
+                except BufferError:
+                    # A reader still holds a view; the map closes once it is released
+                    pass
+                self._map = None
+                self._mapped_size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,290 @@
+"""
+Work queue - durable SQLite queue of customer issues with leases, retries
+and a dead-letter state
+
+Producers ``put`` issues; workers ``lease`` them for a visibility timeout,
+then ``ack`` them with a result or ``nack`` them with an error. A worker
+that dies mid-issue simply stops renewing its lease: once the lease
+expires the issue becomes visible again and another worker picks it up.
+Issues that fail (or time out) ``max_attempts`` times move to the dead
+state, where they stay for inspection until ``requeue_dead`` puts them
+back.
+
+Item status moves queued -> leased -> done, or leased -> queued (retry,
+after a jittered exponential backoff) -> ... -> dead.
+
+The database runs in WAL mode and every lease is one IMMEDIATE
+transaction, so any number of worker processes on a host can share one
+file. SQLite locking is not reliable over network filesystems; to spread
+workers over several nodes, put a broker with the same put / lease / ack /
+nack contract behind the ``queue_factory`` that ``queue_service.py``
+hands to its workers.
+
+Configuration:
+    CX_QUEUE_PATH=work_queue.db
+    CX_QUEUE_VISIBILITY_TIMEOUT=60   seconds a lease lasts without renewal
+    CX_QUEUE_MAX_ATTEMPTS=5          deliveries before an issue is dead-lettered
+"""
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional
+
+DEFAULT_QUEUE_PATH = "work_queue.db"
+DEFAULT_QUEUE_NAME = "issues"
+DEFAULT_VISIBILITY_TIMEOUT = 60.0
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_BACKOFF = 1.0
+DEFAULT_MAX_BACKOFF = 60.0
+
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+DEAD = "dead"
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS work_items (
+        item_id TEXT PRIMARY KEY,
+        queue TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        available_at REAL NOT NULL,
+        lease_owner TEXT,
+        lease_expires REAL,
+        result TEXT,
+        error TEXT,
+        created_at REAL NOT NULL,
+        updated_at REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS work_items_ready ON work_items (queue, status, available_at)",
+)
+
+
+class WorkQueue:
+    """
+    SQLite-backed work queue, one row per item.
+
+    Args:
+        path: Database file shared by producers and workers.
+        queue: Queue name; several queues can live in one file.
+        visibility_timeout: Seconds a lease lasts unless it is extended.
+        max_attempts: Deliveries (including expired leases) before an item
+            is dead-lettered.
+        backoff: Base retry delay in seconds after a failed attempt.
+        max_backoff: Cap on the retry delay.
+        clock: Wall-clock source (leases are compared across processes).
+    """
+
+    def __init__(self, path: str = DEFAULT_QUEUE_PATH, queue: str = DEFAULT_QUEUE_NAME,
+                 visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT, max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                 backoff: float = DEFAULT_BACKOFF, max_backoff: float = DEFAULT_MAX_BACKOFF,
+                 clock: Callable[[], float] = time.time):
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.path = path
+        self.queue = queue
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._clock = clock
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        # Generous busy timeout: with many workers on one file, writers queue
+        # up behind each other's (short) lease transactions
+        self._conn = sqlite3.connect(path, timeout=30.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+
+    @classmethod
+    def from_env(cls, **overrides) -> "WorkQueue":
+        settings = {
+            "path": os.environ.get("CX_QUEUE_PATH", DEFAULT_QUEUE_PATH),
+            "visibility_timeout": float(os.environ.get("CX_QUEUE_VISIBILITY_TIMEOUT", DEFAULT_VISIBILITY_TIMEOUT)),
+            "max_attempts": int(os.environ.get("CX_QUEUE_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS)),
+        }
+        settings.update(overrides)
+        return cls(**settings)
+
+    def put(self, payload: dict, item_id: Optional[str] = None, delay: float = 0.0) -> str:
+        """
+        Queue one item and return its ID.
+
+        Putting an ID that is already in the queue is a no-op, so a
+        producer can safely re-send after a crash.
+        """
+        return self.put_many([payload], [item_id], delay)[0]
+
+    def put_many(self, payloads: Iterable[dict], item_ids: Optional[Iterable[Optional[str]]] = None,
+                 delay: float = 0.0) -> List[str]:
+        """Queue several items in one transaction; returns their IDs in order."""
+        payloads = list(payloads)
+        ids = [item_id or uuid.uuid4().hex for item_id in (item_ids or [None] * len(payloads))]
+        now = self._clock()
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO work_items (item_id, queue, payload, status, available_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+                [(item_id, self.queue, json.dumps(payload), now + delay, now, now)
+                 for item_id, payload in zip(ids, payloads)],
+            )
+        return ids
+
+    def lease(self, owner: str, limit: int = 1, visibility_timeout: Optional[float] = None) -> List[dict]:
+        """
+        Lease up to ``limit`` ready items to ``owner``.
+
+        Expired leases are reclaimed first (and dead-lettered if they used
+        up their attempts). Each returned item is
+        ``{"item_id", "payload", "attempts", "lease_expires"}``, where
+        ``attempts`` counts this delivery.
+        """
+        now = self._clock()
+        expires = now + (self.visibility_timeout if visibility_timeout is None else visibility_timeout)
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._reclaim(now)
+            rows = self._conn.execute(
+                "SELECT item_id, payload, attempts FROM work_items "
+                "WHERE queue = ? AND status = 'queued' AND available_at <= ? ORDER BY available_at LIMIT ?",
+                (self.queue, now, limit)).fetchall()
+            self._conn.executemany(
+                "UPDATE work_items SET status = 'leased', attempts = attempts + 1, lease_owner = ?, "
+                "lease_expires = ?, updated_at = ? WHERE item_id = ?",
+                [(owner, expires, now, item_id) for item_id, _, _ in rows],
+            )
+        return [{"item_id": item_id, "payload": json.loads(payload), "attempts": attempts + 1,
+                 "lease_expires": expires} for item_id, payload, attempts in rows]
+
+    def _reclaim(self, now: float):
+        """Return expired leases to the queue, or dead-letter them when out of attempts."""
+        self._conn.execute(
+            "UPDATE work_items SET status = 'dead', lease_owner = NULL, lease_expires = NULL, "
+            "error = 'visibility timeout expired', updated_at = ? "
+            "WHERE queue = ? AND status = 'leased' AND lease_expires <= ? AND attempts >= ?",
+            (now, self.queue, now, self.max_attempts))
+        self._conn.execute(
+            "UPDATE work_items SET status = 'queued', lease_owner = NULL, lease_expires = NULL, "
+            "error = 'visibility timeout expired', available_at = ?, updated_at = ? "
+            "WHERE queue = ? AND status = 'leased' AND lease_expires <= ?",
+            (now, now, self.queue, now))
+
+    def extend(self, item_id: str, owner: str, visibility_timeout: Optional[float] = None) -> bool:
+        """Renew ``owner``'s lease on an item; False if the lease was lost."""
+        now = self._clock()
+        expires = now + (self.visibility_timeout if visibility_timeout is None else visibility_timeout)
+        return self._update_leased(item_id, owner, "lease_expires = ?, updated_at = ?", (expires, now))
+
+    def ack(self, item_id: str, owner: str, result=None) -> bool:
+        """Mark a leased item done; False if the lease expired and was taken over."""
+        return self._update_leased(
+            item_id, owner, "status = 'done', result = ?, error = NULL, lease_owner = NULL, "
+            "lease_expires = NULL, updated_at = ?", (json.dumps(result), self._clock()))
+
+    def nack(self, item_id: str, owner: str, error: str, retry: bool = True) -> bool:
+        """
+        Record a failed attempt.
+
+        The item is queued again after a backoff, or dead-lettered when
+        ``retry`` is False or it has used up ``max_attempts``. Returns False
+        if the lease was already lost.
+        """
+        now = self._clock()
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            row = self._conn.execute(
+                "SELECT attempts FROM work_items WHERE item_id = ? AND lease_owner = ? AND status = 'leased'",
+                (item_id, owner)).fetchone()
+            if row is None:
+                return False
+            attempts = row[0]
+            if retry and attempts < self.max_attempts:
+                status, available_at = QUEUED, now + self._retry_delay(attempts)
+            else:
+                status, available_at = DEAD, now
+            self._conn.execute(
+                "UPDATE work_items SET status = ?, error = ?, available_at = ?, lease_owner = NULL, "
+                "lease_expires = NULL, updated_at = ? WHERE item_id = ?",
+                (status, error, available_at, now, item_id))
+        return True
+
+    def _update_leased(self, item_id: str, owner: str, assignments: str, values: tuple) -> bool:
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                f"UPDATE work_items SET {assignments} WHERE item_id = ? AND lease_owner = ? AND status = 'leased'",
+                (*values, item_id, owner))
+        return cursor.rowcount == 1
+
+    def release(self, owner: str) -> int:
+        """Make every item leased by ``owner`` visible again now (its worker is gone); returns how many."""
+        now = self._clock()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE work_items SET status = 'queued', lease_owner = NULL, lease_expires = NULL, "
+                "available_at = ?, updated_at = ? WHERE queue = ? AND status = 'leased' AND lease_owner = ?",
+                (now, now, self.queue, owner))
+        return cursor.rowcount
+
+    def _retry_delay(self, attempts: int) -> float:
+        """Full-jitter exponential backoff."""
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempts - 1)))
+
+    def get(self, item_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT item_id, payload, status, attempts, result, error FROM work_items WHERE item_id = ?",
+                (item_id,)).fetchone()
+        return self._row(row) if row else None
+
+    def dead_letters(self, limit: int = 100) -> List[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT item_id, payload, status, attempts, result, error FROM work_items "
+                "WHERE queue = ? AND status = 'dead' ORDER BY updated_at LIMIT ?", (self.queue, limit)).fetchall()
+        return [self._row(row) for row in rows]
+
+    def requeue_dead(self, item_ids: Optional[Iterable[str]] = None) -> int:
+        """Give dead-lettered items (all, or just ``item_ids``) a fresh set of attempts; returns how many."""
+        now = self._clock()
+        query = ("UPDATE work_items SET status = 'queued', attempts = 0, error = NULL, available_at = ?, "
+                 "updated_at = ? WHERE queue = ? AND status = 'dead'")
+        with self._lock, self._conn:
+            if item_ids is None:
+                return self._conn.execute(query, (now, now, self.queue)).rowcount
+            self._conn.execute("BEGIN")
+            return sum(self._conn.execute(query + " AND item_id = ?", (now, now, self.queue, item_id)).rowcount
+                       for item_id in item_ids)
+
+    def purge_done(self, older_than: float = 0.0) -> int:
+        """Delete done items last updated more than ``older_than`` seconds ago; returns how many."""
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "DELETE FROM work_items WHERE queue = ? AND status = 'done' AND updated_at <= ?",
+                (self.queue, self._clock() - older_than)).rowcount
+
+    @staticmethod
+    def _row(row) -> dict:
+        item_id, payload, status, attempts, result, error = row
+        return {"item_id": item_id, "payload": json.loads(payload), "status": status, "attempts": attempts,
+                "result": json.loads(result) if result else None, "error": error}
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            counts = dict(self._conn.execute(
+                "SELECT status, COUNT(*) FROM work_items WHERE queue = ? GROUP BY status", (self.queue,)).fetchall())
+        return {status: counts.get(status, 0) for status in (QUEUED, LEASED, DONE, DEAD)}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
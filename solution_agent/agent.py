@@ -1,12 +1,9 @@
 """
 Clean Solution Agent using shared tools - demonstrates best practices
 """
-from google.adk.agents import Agent
-from google.adk.tools import FunctionTool
-import json
+from shared_tools.lazy import function_tool, lazy_attributes
 
-# Import shared tools (no duplication!)
-from shared_tools import POLICY_LOOKUP_TOOL, ORDER_STATUS_TOOL
+from .ranking import rank_json
 
 def rank_solutions(customer_status: str, issue_type: str, policy_text: str, order_value: float = 100.0) -> str:
     """
@@ -24,60 +21,20 @@ def rank_solutions(customer_status: str, issue_type: str, policy_text: str, orde
     Returns:
         A JSON object containing ranked solution options.
     """
-    ranked_solutions = []
+    # Ranking rules live in solution_agent/ranking.py as a compiled rule table
+    return rank_json(customer_status, issue_type, policy_text, order_value)
+
+def _build_root_agent():
+    """Create the solution agent using shared tools + agent-specific logic."""
+    from google.adk.agents import Agent
+    from shared_tools.policy_tools import ORDER_STATUS_TOOL, POLICY_LOOKUP_TOOL
+    from shared_tools.response_cache import RESPONSE_CACHE
     
-    # Solution ranking based on customer tier and policies
-    if "gold tier" in customer_status.lower() or "vip" in customer_status.lower():
-        # Premium solutions for high-value customers
-        if "full refund" in policy_text.lower():
-            ranked_solutions.append({
-                "solution_id": 1,
-                "action": "full_refund",
-                "params": {"order_id": "O-9987", "amount": order_value},
-                "explanation": f"Customer is {customer_status} - immediate full refund is appropriate",
-                "priority": "HIGH"
-            })
-        
-        if "replacement" in policy_text.lower() or "reship" in policy_text.lower():
-            ranked_solutions.append({
-                "solution_id": 2,
-                "action": "reship_express",
-                "params": {"order_id": "O-9987"},
-                "explanation": "Premium customer gets expedited replacement",
-                "priority": "HIGH"
-            })
-        
-    else:
-        # Standard solutions for regular customers
-        if "replacement" in policy_text.lower():
-            ranked_solutions.append({
-                "solution_id": 1,
-                "action": "reship_standard",
-                "params": {"order_id": "O-9987"},
-                "explanation": "Standard replacement with regular shipping",
-                "priority": "MEDIUM"
-            })
-    
-    # Universal options
-    ranked_solutions.append({
-        "solution_id": len(ranked_solutions) + 1,
-        "action": "generate_coupon",
-        "params": {"value": 25 if "gold" in customer_status.lower() else 15, "unit": "percent"},
-        "explanation": f"Goodwill gesture appropriate for {customer_status} customer",
-        "priority": "LOW"
-    })
-    
-    return json.dumps({
-        "ranked_solutions": ranked_solutions,
-        "recommended_solution": ranked_solutions[0] if ranked_solutions else None
-    }, indent=2)
-
-# Create the solution agent using shared tools + agent-specific logic
-root_agent = Agent(
-    name="solution_agent",
-    model="gemini-2.0-flash",
-    description="Specialized agent for finding optimal solutions using shared policy tools.",
-    instruction="""You are a Solution Agent for customer issue resolution.
+    return Agent(
+        name="solution_agent",
+        model="gemini-2.0-flash",
+        description="Specialized agent for finding optimal solutions using shared policy tools.",
+        instruction="""You are a Solution Agent for customer issue resolution.
 
 Your job is to:
 1. Use POLICY_LOOKUP_TOOL to get relevant company policies for the issue
@@ -90,9 +47,14 @@ Example workflow:
 1. Call POLICY_LOOKUP_TOOL with relevant query 
 2. Call ORDER_STATUS_TOOL if order details needed
 3. Call rank_solutions with the gathered policy information""",
-    tools=[
-        POLICY_LOOKUP_TOOL,       # Shared tool - call this first
-        ORDER_STATUS_TOOL,        # Shared tool - call if needed
-        FunctionTool(rank_solutions) # Agent-specific logic - call this last
-    ]
-)
+        tools=[
+            POLICY_LOOKUP_TOOL,       # Shared tool - call this first
+            ORDER_STATUS_TOOL,        # Shared tool - call if needed
+            function_tool(rank_solutions) # Agent-specific logic - call this last
+        ],
+        # Repeated and near-duplicate requests are answered from the response cache
+        **RESPONSE_CACHE.callbacks(rank_solutions)
+    )
+
+# root_agent is built on first access (see shared_tools/lazy.py)
+__getattr__ = lazy_attributes(__name__, {"root_agent": _build_root_agent})
@@ -0,0 +1,229 @@
+"""
+Solution ranking rules as data - a declarative rule table compiled once into
+a lookup keyed by (tier class, issue type, policy features)
+
+A call to ``rank`` reduces its inputs to that key and reads the ranked rule
+list straight out of the compiled table:
+  - the customer status is classified once per distinct status
+  - the policy text is scanned once per distinct text for the features the
+    rules refer to, giving a bitmask
+Both reductions are memoized, as is the rendered ranking for each key, so
+repeated statuses and policy snippets (the common case, since policy lookups
+are cached upstream) cost a few dict lookups plus building the result.
+Results are SolutionRanking records (``shared_tools/records.py``); only
+``rank_json`` produces JSON, for the agent tool.
+"""
+import json
+import math
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import product
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from shared_tools.records import Action, Priority, Solution, SolutionRanking
+
+ANY = "*"
+
+# Policy features and the phrases that signal them in a policy text
+POLICY_FEATURES: Dict[str, Tuple[str, ...]] = {
+    "full_refund": ("full refund",),
+    "replacement": ("replacement",),
+    "reship": ("reship",),
+}
+FEATURE_BITS = {name: 1 << bit for bit, name in enumerate(POLICY_FEATURES)}
+_FEATURE_OF_PHRASE = {phrase: name for name, phrases in POLICY_FEATURES.items() for phrase in phrases}
+_FEATURE_RE = re.compile("|".join(re.escape(phrase) for phrase in _FEATURE_OF_PHRASE))
+
+DEFAULT_ORDER_ID = "O-9987"
+
+
+@dataclass(frozen=True)
+class SolutionRule:
+    """
+    One row of the rule table.
+
+    A rule applies when the tier class and issue type match (``ANY`` matches
+    everything) and the policy text has at least one of ``policy_any``
+    (an empty tuple needs no policy support).
+    """
+    tier: str
+    issue_type: str
+    policy_any: Tuple[str, ...]
+    action: str
+    priority: str
+    explanation: str
+
+
+# Ranked top to bottom: applicable rules are offered in this order.
+SOLUTION_RULES: Tuple[SolutionRule, ...] = (
+    SolutionRule("premium", ANY, ("full_refund",), "full_refund", "HIGH",
+                 "Customer is {status} - immediate full refund is appropriate"),
+    SolutionRule("premium", ANY, ("replacement", "reship"), "reship_express", "HIGH",
+                 "Premium customer gets expedited replacement"),
+    SolutionRule("standard", ANY, ("replacement",), "reship_standard", "MEDIUM",
+                 "Standard replacement with regular shipping"),
+    SolutionRule(ANY, ANY, (), "generate_coupon", "LOW",
+                 "Goodwill gesture appropriate for {status} customer"),
+)
+
+TIER_CLASSES = ("premium", "standard")
+
+
+@dataclass(frozen=True)
+class TierProfile:
+    """What the rules need to know about a customer status."""
+    tier: str
+    coupon_percent: int
+
+
+@lru_cache(maxsize=256)
+def classify_status(customer_status: str) -> TierProfile:
+    """Tier class and goodwill coupon size for a customer status."""
+    status = customer_status.lower()
+    tier = "premium" if "gold tier" in status or "vip" in status else "standard"
+    return TierProfile(tier=tier, coupon_percent=25 if "gold" in status else 15)
+
+
+@lru_cache(maxsize=1024)
+def policy_features(policy_text: str) -> int:
+    """Bitmask of the POLICY_FEATURES mentioned in a policy text (one scan)."""
+    mask = 0
+    for match in _FEATURE_RE.finditer(policy_text.lower()):
+        mask |= FEATURE_BITS[_FEATURE_OF_PHRASE[match.group()]]
+    return mask
+
+
+def compile_rules(rules: Iterable[SolutionRule]) -> Dict[Tuple[str, str, int], Tuple[SolutionRule, ...]]:
+    """
+    Expand a rule table into {(tier, issue_type, feature mask): ranked rules}.
+
+    Issue types named by any rule get their own entries; every other issue
+    type is served by the ``ANY`` entries.
+    """
+    rules = tuple(rules)
+    issue_types = {rule.issue_type for rule in rules} | {ANY}
+    table = {}
+    for tier, issue_type, mask in product(TIER_CLASSES, issue_types, range(1 << len(POLICY_FEATURES))):
+        table[tier, issue_type, mask] = tuple(
+            rule for rule in rules
+            if rule.tier in (ANY, tier)
+            and rule.issue_type in (ANY, issue_type)
+            and (not rule.policy_any or any(mask & FEATURE_BITS[name] for name in rule.policy_any))
+        )
+    return table
+
+
+_COMPILED = compile_rules(SOLUTION_RULES)
+
+
+@lru_cache(maxsize=4096)
+def _template(customer_status: str, issue_type: str, mask: int) -> tuple:
+    """
+    The ranking for one key with everything but the order filled in: a
+    finished Solution for options that do not depend on the order, and
+    (solution_id, action, explanation, priority) for those that do.
+    """
+    profile = classify_status(customer_status)
+    rules = _COMPILED.get((profile.tier, issue_type, mask))
+    if rules is None:
+        rules = _COMPILED[profile.tier, ANY, mask]
+    template = []
+    for position, rule in enumerate(rules, start=1):
+        action, priority = Action(rule.action), Priority(rule.priority)
+        explanation = rule.explanation.format(status=customer_status)
+        if action is Action.GENERATE_COUPON:
+            template.append(Solution(action, (("value", profile.coupon_percent), ("unit", "percent")),
+                                     explanation, priority, position))
+        else:
+            template.append((position, action, explanation, priority))
+    return tuple(template)
+
+
+def _build(template: tuple, order_value, order_id) -> SolutionRanking:
+    solutions = []
+    for entry in template:
+        if isinstance(entry, Solution):
+            solutions.append(entry)
+            continue
+        solution_id, action, explanation, priority = entry
+        if action is Action.FULL_REFUND:
+            params = (("order_id", order_id), ("amount", order_value))
+        else:
+            params = (("order_id", order_id),)
+        solutions.append(Solution(action, params, explanation, priority, solution_id))
+    return SolutionRanking(tuple(solutions))
+
+
+def rank(customer_status: str, issue_type: str, policy_text: str, order_value: float = 100.0,
+         order_id: str = DEFAULT_ORDER_ID) -> SolutionRanking:
+    """
+    Rank solution options for one issue.
+
+    Returns:
+        A SolutionRanking; ``to_dict()`` gives
+        {"ranked_solutions": [...], "recommended_solution": first or None}
+    """
+    return _build(_template(customer_status, issue_type, policy_features(policy_text)), order_value, order_id)
+
+
+# Placeholders encoded into the cached JSON text and spliced at call time
+_ORDER_ID_SLOT = "\x00order_id\x00"
+_AMOUNT_SLOT = "\x00amount\x00"
+_ORDER_ID_MARK = json.dumps(_ORDER_ID_SLOT)
+_AMOUNT_MARK = json.dumps(_AMOUNT_SLOT)
+_SLOT_RE = re.compile("(%s|%s)" % (re.escape(_ORDER_ID_MARK), re.escape(_AMOUNT_MARK)))
+
+
+@lru_cache(maxsize=4096)
+def _json_template(template: tuple) -> tuple:
+    """Compact JSON for a ranking template, split into literal text and slot markers."""
+    return tuple(_SLOT_RE.split(json.dumps(_build(template, _AMOUNT_SLOT, _ORDER_ID_SLOT).to_dict())))
+
+
+def _encode_number(value) -> str:
+    if type(value) is int or (type(value) is float and math.isfinite(value)):
+        return repr(value)
+    return json.dumps(value)
+
+
+def rank_json(customer_status: str, issue_type: str, policy_text: str, order_value: float = 100.0,
+              order_id: str = DEFAULT_ORDER_ID, pretty: bool = False) -> str:
+    """
+    ``rank`` serialized as JSON.
+
+    Compact output is spliced from JSON text cached per ranking key, so no
+    dicts are built or encoded; ``pretty`` produces indented JSON the slow way.
+    """
+    template = _template(customer_status, issue_type, policy_features(policy_text))
+    if pretty:
+        return _build(template, order_value, order_id).to_json(indent=2)
+    parts = _json_template(template)
+    if len(parts) == 1:
+        return parts[0]
+    slots = {_ORDER_ID_MARK: json.dumps(order_id), _AMOUNT_MARK: _encode_number(order_value)}
+    # split() with a capturing group puts the slot markers at odd positions
+    return "".join(part if index % 2 == 0 else slots[part] for index, part in enumerate(parts))
+
+
+def rank_batch(issues: Iterable[dict]) -> List[SolutionRanking]:
+    """
+    Rank many issues in one call.
+
+    Each issue is a dict with customer_status, issue_type and policy_text,
+    and optionally order_value and order_id. Results are returned in input
+    order.
+    """
+    return [
+        rank(issue["customer_status"], issue["issue_type"], issue["policy_text"],
+             issue.get("order_value", 100.0), issue.get("order_id", DEFAULT_ORDER_ID))
+        for issue in issues
+    ]
+
+
+def recommended_action(customer_status: str, issue_type: str, policy_text: str) -> Optional[str]:
+    """The top-ranked action alone, without building the solution records."""
+    template = _template(customer_status, issue_type, policy_features(policy_text))
+    if not template:
+        return None
+    return template[0].action if isinstance(template[0], Solution) else template[0][1]
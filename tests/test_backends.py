@@ -0,0 +1,57 @@
+"""
+Tests for the async backend clients: one per event loop, closed with the
+loop and never keeping it alive
+"""
+import asyncio
+import gc
+import weakref
+
+import pytest
+
+from shared_tools import configure_backend, get_backend_pool
+from shared_tools.stub_backend import StubBackendServer
+
+CUSTOMERS = {"C00001": {"ltv": 100, "status": "Silver Tier", "recent_order_count": 1}}
+
+
+@pytest.fixture
+def crm():
+    with StubBackendServer(customers=CUSTOMERS) as server:
+        configure_backend("crm", base_url=server.url)
+        try:
+            yield server
+        finally:
+            configure_backend("crm", base_url="")
+
+
+def test_async_clients_are_closed_when_their_loop_ends(crm):
+    pool = get_backend_pool()
+    runs = []
+
+    async def lookup():
+        runs.append((weakref.ref(asyncio.get_running_loop()), pool.async_client("crm")))
+        return await pool.arequest_json("crm", "GET", "/customers/C00001")
+
+    for _ in range(3):
+        assert asyncio.run(lookup()) == CUSTOMERS["C00001"]
+    gc.collect()
+
+    assert all(client.is_closed for _, client in runs)
+    assert all(loop() is None for loop, _ in runs)
+    assert len(pool._async_clients["crm"]) == 0
+
+
+def test_client_of_a_loop_closed_by_hand_is_closed_when_evicted(crm):
+    pool = get_backend_pool()
+
+    async def client():
+        await pool.arequest_json("crm", "GET", "/customers/C00001")
+        return pool.async_client("crm")
+
+    loop = asyncio.new_event_loop()
+    stale = loop.run_until_complete(client())
+    loop.close()
+    fresh = asyncio.run(client())
+
+    assert stale.is_closed and fresh.is_closed
+    assert len(pool._async_clients["crm"]) == 0
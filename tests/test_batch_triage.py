@@ -0,0 +1,42 @@
+"""
+Property test: triage_batch makes the same decisions as make_triage_decision
+"""
+import json
+import random
+
+import numpy as np
+import pytest
+
+from shared_tools.severity import DISSATISFACTION_LEXICON, score_severity
+from triage_agent.agent import HIGH_VALUE_LTV, make_triage_decision
+from triage_agent.batch_triage import ACTION_SETS, PRIORITY_LABELS, TIER_CODES, encode_tiers, triage_batch
+
+STATUSES = list(TIER_CODES) + ["Bronze", "", "gold tier"]
+EDGE_LTVS = [HIGH_VALUE_LTV, HIGH_VALUE_LTV - 0.01, HIGH_VALUE_LTV + 0.01, 0.0, -1.0,
+             float("nan"), float("inf"), float("-inf")]
+FILLER = "Customer: my order came late and I called support twice about it"
+
+
+def random_case(rng: random.Random):
+    """LTVs on and around the high-value line, NaN/inf, unknown tiers, zero to three lexicon phrases."""
+    ltv = rng.choice(EDGE_LTVS) if rng.random() < 0.3 else rng.uniform(0, 2 * HIGH_VALUE_LTV)
+    phrases = rng.sample(list(DISSATISFACTION_LEXICON), rng.randint(0, 3))
+    words = FILLER.split() + phrases
+    rng.shuffle(words)
+    return ltv, rng.choice(STATUSES), " ".join(words)
+
+
+@pytest.mark.parametrize("seed", [11, 12, 13])
+def test_triage_batch_matches_make_triage_decision(seed):
+    rng = random.Random(seed)
+    rows = [random_case(rng) for _ in range(5_000)]
+    ltv = np.array([row[0] for row in rows])
+    statuses = [row[1] for row in rows]
+    scores = np.array([score_severity(row[2]).score for row in rows])
+    result = triage_batch(ltv, encode_tiers(statuses), scores)
+    for i, (row_ltv, status, text) in enumerate(rows):
+        expected = json.loads(make_triage_decision(row_ltv, status, text))
+        assert result.decision(i, status).to_dict() == expected, (row_ltv, status, text)
+        assert bool(result.escalate[i]) == expected["escalate"], (row_ltv, status, text)
+        assert PRIORITY_LABELS[result.priority[i]] == expected["priority"], (row_ltv, status, text)
+        assert list(ACTION_SETS[result.action_set[i]]) == expected["recommended_actions"], (row_ltv, status, text)
@@ -0,0 +1,89 @@
+"""
+Tests for request coalescing against the stub backend: results reach the
+right callers, round-trips drop, and a failed batch fails every caller in it
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from shared_tools import configure_backend
+from shared_tools.coalescer import BatchCoalescer
+from shared_tools.crm_tools import CRM_CACHE, CRM_COALESCER, _fetch_customers, crm_lookup_tool
+from shared_tools.stub_backend import StubBackendServer
+
+CUSTOMERS = {f"C{index:05d}": {"ltv": index, "status": "Silver Tier", "recent_order_count": index % 7}
+             for index in range(20)}
+
+
+@pytest.fixture
+def crm():
+    with StubBackendServer(latency=0.005, customers=CUSTOMERS) as server:
+        configure_backend("crm", base_url=server.url)
+        try:
+            yield server
+        finally:
+            configure_backend("crm", base_url="")
+
+
+def test_overlapping_concurrent_lookups_each_get_their_own_record(crm):
+    coalescer = BatchCoalescer("test-crm", _fetch_customers, max_wait=0.01)
+    threads, lookups = 8, 30
+    # Every thread walks the same 20 IDs from a different offset, so keys overlap across threads
+    plans = [[f"C{(offset * 3 + step) % 20:05d}" for step in range(lookups)] for offset in range(threads)]
+    start = threading.Barrier(threads)
+
+    def run(plan):
+        start.wait()
+        return [(customer_id, coalescer.get(customer_id)) for customer_id in plan]
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = [result for results in pool.map(run, plans) for result in results]
+
+    assert len(results) == threads * lookups
+    for customer_id, record in results:
+        assert record == CUSTOMERS[customer_id]
+    assert "GET /customers" not in crm.round_trips
+    assert crm.round_trips["POST /customers/batch"] == coalescer.stats()["batches"]
+    assert crm.round_trips["POST /customers/batch"] < threads * lookups / 4
+
+
+def test_failed_batch_reaches_every_caller(crm):
+    def fetch_many(customer_ids):
+        if "C-BAD" in customer_ids:
+            raise RuntimeError("CRM unavailable")
+        return _fetch_customers(customer_ids)
+
+    coalescer = BatchCoalescer("test-crm-errors", fetch_many, max_wait=0.05)
+    customer_ids = ["C00001", "C00002", "C-BAD", "C00001", "C00003"]
+    futures = [coalescer.submit(customer_id) for customer_id in customer_ids]
+
+    for future in futures:
+        with pytest.raises(RuntimeError, match="CRM unavailable"):
+            future.result(timeout=5)
+    stats = coalescer.stats()
+    assert stats["batches"] == stats["errors"] == 1
+    assert crm.round_trips["POST /customers/batch"] == 0
+
+    # The next batch is unaffected
+    assert coalescer.get("C00002") == CUSTOMERS["C00002"]
+
+
+def test_crm_lookup_tool_coalesces_by_default(crm):
+    assert CRM_COALESCER.enabled
+    CRM_CACHE.clear()
+    start = threading.Barrier(len(CUSTOMERS))
+
+    def run(customer_id):
+        start.wait()
+        return customer_id, crm_lookup_tool(customer_id)
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(CUSTOMERS)) as pool:
+            results = list(pool.map(run, CUSTOMERS))
+    finally:
+        CRM_CACHE.clear()
+
+    assert results == list(CUSTOMERS.items())
+    assert "GET /customers" not in crm.round_trips
+    assert crm.round_trips["POST /customers/batch"] < len(CUSTOMERS)
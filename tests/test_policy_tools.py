@@ -0,0 +1,88 @@
+"""
+Tests for the policy lookup: tier filtering and the snippet the workflows
+decide on
+"""
+import asyncio
+import threading
+
+import customer_experience_rescue_swarm.agent as swarm
+import shared_tools.policy_tools as policy_tools
+from customer_rescue_orchestrator.agent import _select_solution
+from shared_tools.policy_index import PolicyIndex
+from shared_tools.policy_tools import policy_lookup_tool, policy_lookup_tool_async, top_policy_snippet
+from shared_tools.records import Action
+
+SILVER_DAMAGED = "policy for damaged item for Silver Tier customer"
+GOLD_DAMAGED = "policy for damaged item for Gold Tier customer"
+
+
+def test_silver_query_gets_no_gold_or_vip_clause():
+    policy = policy_lookup_tool(SILVER_DAMAGED)
+    assert "Gold Tier" not in policy
+    assert "VIP" not in policy
+
+
+def test_gold_query_keeps_its_tier_clause_first():
+    assert "immediate full refund" in top_policy_snippet(policy_lookup_tool(GOLD_DAMAGED))
+
+
+def test_silver_damaged_item_is_not_refunded_by_the_orchestrator():
+    solution = _select_solution(policy_lookup_tool(SILVER_DAMAGED), "O-1", 80.0)
+    assert solution.action is Action.REPLACEMENT
+
+
+def test_gold_damaged_item_is_refunded_by_the_orchestrator():
+    solution = _select_solution(policy_lookup_tool(GOLD_DAMAGED), "O-1", 80.0)
+    assert solution.action is Action.FULL_REFUND
+    assert solution.param("amount") == 80.0
+
+
+def test_escalated_silver_customer_is_not_refunded_by_the_swarm(monkeypatch):
+    refunds = []
+    # High LTV escalates a Silver Tier customer; the policy must still be the Silver one
+    monkeypatch.setattr(swarm, "crm_lookup_tool",
+                        lambda customer_id: {"ltv": 900, "status": "Silver Tier", "recent_order_count": 3})
+    monkeypatch.setattr(swarm, "iter_transcript_chunks",
+                        lambda transcript_id: iter(["Customer: This is unacceptable, I am furious."]))
+    monkeypatch.setattr(swarm, "submit_refund", lambda *args, **kwargs: refunds.append(args))
+    monkeypatch.setattr(swarm, "enqueue_communication", lambda *args, **kwargs: "message-1")
+
+    result = swarm.process_customer_issue("C1", "T1", "damaged item")
+
+    assert "replacement offered" in result
+    assert refunds == []
+
+
+def test_tier_filter_survives_reload_and_edits(tmp_path):
+    (tmp_path / "damaged.md").write_text(
+        "Gold Tier customers with a damaged item get a full refund.\n\n"
+        "Silver Tier customers with a damaged item get a replacement.\n\n"
+        "Damaged item claims need a photo.\n", encoding="utf-8")
+    PolicyIndex(str(tmp_path)).load_or_build()
+
+    index = PolicyIndex(str(tmp_path))
+    assert index.load()
+    texts = {result["text"] for result in index.search("damaged item refund", top_k=5, tier="silver")}
+    assert texts == {"Silver Tier customers with a damaged item get a replacement.",
+                     "Damaged item claims need a photo."}
+
+    (tmp_path / "damaged.md").write_text("Silver Tier customers with a damaged item get a full refund.\n",
+                                         encoding="utf-8")
+    index.refresh()
+    assert [result["text"] for result in index.search("damaged item refund", top_k=5, tier="gold")] == []
+    assert index.chunk_tiers == {next(iter(index.chunks)): frozenset({"silver"})}
+
+
+def test_async_lookup_searches_off_the_event_loop(monkeypatch):
+    search = policy_tools._search_policies
+    threads = []
+
+    def recorded(query):
+        threads.append(threading.current_thread())
+        return search(query)
+
+    monkeypatch.setattr(policy_tools, "_search_policies", recorded)
+    policy = asyncio.run(policy_lookup_tool_async("async policy for damaged item for Gold Tier customer"))
+
+    assert "immediate full refund" in top_policy_snippet(policy)
+    assert threads and threads[0] is not threading.main_thread()
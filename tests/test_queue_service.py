@@ -0,0 +1,50 @@
+"""
+Tests for enqueueing a JSONL file into the work queue
+"""
+import json
+
+import pytest
+
+from queue_service import enqueue_file, main
+from shared_tools.work_queue import WorkQueue
+
+ISSUE = {"customer_id": "C67890", "transcript_id": "T12345", "issue_description": "damaged item"}
+
+
+def write_lines(path, lines):
+    path.write_text("\n".join(line if isinstance(line, str) else json.dumps(line) for line in lines) + "\n",
+                    encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue.db"))
+    yield queue
+    queue.close()
+
+
+def test_invalid_lines_are_skipped_and_reported(queue, tmp_path):
+    lines = [dict(ISSUE, issue_id="a"), [1, 2], 42, "{not json", {"customer_id": "C1"},
+             dict(ISSUE, issue_id="b"), "", dict(ISSUE, issue_id="c")]
+    # chunk_size=1 puts every valid issue in its own chunk, around the bad lines
+    result = enqueue_file(queue, write_lines(tmp_path / "issues.jsonl", lines), chunk_size=1)
+
+    assert result["submitted"] == 3
+    assert len(result["rejected"]) == 4
+    assert "line 2" in result["rejected"][0] and "JSON object" in result["rejected"][0]
+    assert "missing fields: transcript_id, issue_description" in result["rejected"][3]
+    leased = queue.lease("test", limit=10)
+    assert sorted(item["payload"]["issue_id"] for item in leased) == ["a", "b", "c"]
+
+
+def test_enqueue_command_reports_rejected_lines(tmp_path, capsys):
+    path = write_lines(tmp_path / "issues.jsonl", [ISSUE, ["not", "an", "issue"]])
+
+    status = main(["--queue", str(tmp_path / "queue.db"), "enqueue", path])
+
+    out, err = capsys.readouterr()
+    assert status == 1
+    assert json.loads(out)["submitted"] == 1
+    assert json.loads(out)["rejected"] == 1
+    assert "Invalid issue on line 2" in err
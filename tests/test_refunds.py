@@ -0,0 +1,106 @@
+"""
+Tests for the refund engine: ledger defaults, idempotency keys and the
+order the workflows refund
+"""
+from concurrent.futures import Future
+
+import pytest
+
+import customer_experience_rescue_swarm.agent as swarm
+from batch_processor import run_batch
+from queue_service import run_service
+from shared_tools.refunds import ALREADY_REFUNDED, IN_MEMORY_LEDGER, RefundEngine, RefundLedger
+
+
+def accept_all(refunds):
+    return [{"idempotency_key": refund["idempotency_key"], "status": "success"} for refund in refunds]
+
+
+@pytest.fixture
+def engine():
+    engine = RefundEngine(RefundLedger(IN_MEMORY_LEDGER), submit_batch=accept_all, max_wait=0)
+    yield engine
+    engine.close()
+
+
+def test_ledger_defaults_to_a_file_in_the_state_dir(monkeypatch, tmp_path):
+    monkeypatch.delenv("CX_REFUND_LEDGER", raising=False)
+    monkeypatch.setenv("CX_STATE_DIR", str(tmp_path / "state"))
+    engines = []
+    for _ in range(2):
+        # Each engine stands in for a separate process (a restart or another worker)
+        engine = RefundEngine.from_env()
+        engine.submit_batch = accept_all
+        try:
+            engines.append((engine.ledger.path, engine.submit("O-1", 10.0, "refund:T1:O-1").result(timeout=5)))
+        finally:
+            engine.close()
+
+    (first_path, first), (second_path, second) = engines
+    assert first_path == second_path == str(tmp_path / "state" / "refunds.db")
+    assert first["status"] == "success"
+    assert second["status"] == ALREADY_REFUNDED
+
+
+def test_workers_refuse_an_in_memory_ledger(monkeypatch, tmp_path):
+    monkeypatch.setenv("CX_REFUND_LEDGER", IN_MEMORY_LEDGER)
+    with pytest.raises(RuntimeError, match="CX_REFUND_LEDGER"):
+        run_service(lambda: pytest.fail("the queue must not be opened"))
+    with pytest.raises(RuntimeError, match="CX_REFUND_LEDGER"):
+        run_batch(str(tmp_path / "issues.jsonl"), str(tmp_path / "results.jsonl"))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_idempotency_key_is_required(engine):
+    with pytest.raises(ValueError):
+        engine.submit("O-1", 10.0, "")
+
+
+def test_retry_with_same_key_is_a_duplicate(engine):
+    first = engine.submit("O-1", 10.0, "refund:T1:O-1").result(timeout=5)
+    retry = engine.submit("O-1", 10.0, "refund:T1:O-1").result(timeout=5)
+    assert "duplicate" not in first
+    assert first["status"] == "success"
+    assert retry["duplicate"] is True
+    assert retry["status"] == ALREADY_REFUNDED
+
+
+def test_key_the_backend_already_paid_is_reported_as_already_refunded():
+    def backend_has_seen_it(refunds):
+        return [{"idempotency_key": refund["idempotency_key"], "status": "success", "duplicate": True}
+                for refund in refunds]
+
+    engine = RefundEngine(RefundLedger(IN_MEMORY_LEDGER), submit_batch=backend_has_seen_it, max_wait=0)
+    try:
+        assert engine.submit("O-1", 10.0, "refund:T1:O-1").result(timeout=5)["status"] == ALREADY_REFUNDED
+    finally:
+        engine.close()
+
+
+def test_second_refund_of_same_order_and_amount_is_paid(engine):
+    engine.submit("O-1", 10.0, "refund:T1:O-1").result(timeout=5)
+    second = engine.submit("O-1", 10.0, "refund:T2:O-1").result(timeout=5)
+    assert "duplicate" not in second
+    assert engine.stats()["submitted"] == 2
+
+
+def test_swarm_refunds_the_order_it_is_given(monkeypatch):
+    refunds = []
+
+    def submit_refund(order_id, amount, idempotency_key):
+        refunds.append((order_id, amount, idempotency_key))
+        future = Future()
+        future.set_result({"status": "success"})
+        return future
+
+    monkeypatch.setattr(swarm, "crm_lookup_tool",
+                        lambda customer_id: {"ltv": 5000, "status": "Gold Tier", "recent_order_count": 12})
+    monkeypatch.setattr(swarm, "iter_transcript_chunks",
+                        lambda transcript_id: iter(["Customer: This is unacceptable, I am furious."]))
+    monkeypatch.setattr(swarm, "submit_refund", submit_refund)
+    monkeypatch.setattr(swarm, "enqueue_communication", lambda *args, **kwargs: "message-1")
+
+    result = swarm.process_customer_issue("C1", "T7", "damaged item", order_id="O-42", order_value=19.99)
+
+    assert "full refund processed" in result
+    assert refunds == [("O-42", 19.99, "refund:T7:O-42")]
@@ -0,0 +1,83 @@
+"""
+Tests for the response cache: side-effecting runs are never served, and
+entries are checked against the backends rather than the tool caches
+"""
+from types import SimpleNamespace
+
+import pytest
+from google.genai import types
+
+from shared_tools import configure_backend
+from shared_tools.crm_tools import CRM_CACHE, crm_lookup_tool
+from shared_tools.response_cache import ResponseCache
+from shared_tools.stub_backend import StubBackendServer
+
+REQUEST = "Customer C10001 with transcript T12345 is complaining about a damaged item"
+
+
+def make_triage_decision():
+    """Stands in for an agent's own read-only tool."""
+
+
+def run_agent(cache: ResponseCache, agent: str, invocation_id: str, tools=(), response="Escalate: full refund"):
+    """Drive the cache's callbacks through one run; returns the served text, or None on a miss."""
+    context = SimpleNamespace(agent_name=agent, invocation_id=invocation_id,
+                              user_content=types.Content(role="user", parts=[types.Part(text=REQUEST)]))
+    served = cache.before_agent(context)
+    if served is not None:
+        return served.parts[0].text
+    for name, args, result in tools:
+        cache.after_tool(SimpleNamespace(name=name), args, SimpleNamespace(invocation_id=invocation_id), result)
+    final = SimpleNamespace(invocation_id=invocation_id, author=agent, partial=False,
+                            content=types.Content(role="model", parts=[types.Part(text=response)]),
+                            get_function_calls=lambda: [])
+    context.session = SimpleNamespace(events=[final])
+    cache.after_agent(context)
+    return None
+
+
+@pytest.fixture
+def crm():
+    with StubBackendServer(customers={"C10001": {"ltv": 100, "status": "Silver Tier",
+                                                 "recent_order_count": 1}}) as server:
+        configure_backend("crm", base_url=server.url)
+        CRM_CACHE.clear()
+        try:
+            yield server
+        finally:
+            configure_backend("crm", base_url="")
+            CRM_CACHE.clear()
+
+
+def test_read_only_run_is_served_again(crm):
+    cache = ResponseCache()
+    cache.callbacks(make_triage_decision)
+    tools = [("crm_lookup_tool", {"customer_id": "C10001"}, crm_lookup_tool("C10001")),
+             ("make_triage_decision", {}, {"escalate": False})]
+    assert run_agent(cache, "triage_agent", "run-1", tools) is None
+    assert run_agent(cache, "triage_agent", "run-2", tools) == "Escalate: full refund"
+
+
+def test_run_with_side_effects_is_never_served(crm):
+    cache = ResponseCache()
+    cache.callbacks()
+    tools = [("refund_tool", {"order_id": "O-1", "amount": 10.0, "idempotency_key": "refund:T12345:O-1"},
+              {"status": "success"})]
+    assert run_agent(cache, "action_agent", "run-1", tools, response="Refund processed") is None
+    assert run_agent(cache, "action_agent", "run-2", tools, response="Refund processed") is None
+    assert len(cache) == 0
+    assert cache.stats()["side_effects"] == 2
+
+
+def test_changed_crm_record_is_caught_inside_the_lookup_cache_ttl(crm):
+    cache = ResponseCache()
+    tools = [("crm_lookup_tool", {"customer_id": "C10001"}, crm_lookup_tool("C10001"))]
+    run_agent(cache, "triage_agent", "run-1", tools)
+    crm.fixtures["customers"]["C10001"]["ltv"] = 5000
+
+    # The CRM lookup cache still holds the old record ...
+    assert crm_lookup_tool("C10001")["ltv"] == 100
+    # ... but the entry is checked against the CRM itself
+    entry, outcome = cache.lookup("triage_agent", REQUEST)
+    assert entry is None
+    assert outcome == "stale"
@@ -0,0 +1,90 @@
+"""
+Tests for priority scheduling of orchestrator workflows: lane lookup, and
+triage work shared between classification and the workflow
+"""
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+import customer_rescue_orchestrator.agent as orchestrator
+from shared_tools.records import Priority
+from shared_tools.scheduler import PriorityScheduler, lane_for
+
+ISSUE = {"customer_id": "C67890", "transcript_id": "T12345", "issue_description": "damaged item"}
+
+
+def test_unknown_priorities_go_to_low_without_new_members():
+    members = len(Priority._value2member_map_)
+    assert lane_for("high") is Priority.HIGH
+    assert lane_for(Priority.MEDIUM) is Priority.MEDIUM
+    assert lane_for("urgent-please") is Priority.LOW
+    with PriorityScheduler(workers=1) as scheduler:
+        scheduler.submit(lambda: None, priority="whenever").result(timeout=5)
+        assert scheduler.stats()["lanes"]["LOW"]["submitted"] == 1
+    assert len(Priority._value2member_map_) == members
+
+
+def test_lane_settings_accept_names_and_reject_unknown_lanes():
+    members = len(Priority._value2member_map_)
+    with PriorityScheduler(workers=1, weights={"high": 20}, limits={"low": 1}, slas={Priority.MEDIUM: 9}) as scheduler:
+        lanes = scheduler.stats()["lanes"]
+    assert set(lanes) == {"HIGH", "MEDIUM", "LOW"}
+    assert (lanes["HIGH"]["weight"], lanes["LOW"]["limit"], lanes["MEDIUM"]["sla_seconds"]) == (20, 1, 9)
+    with pytest.raises(ValueError, match="urgent"):
+        PriorityScheduler(workers=1, weights={"urgent": 50})
+    assert len(Priority._value2member_map_) == members
+
+
+def count_calls(monkeypatch, name):
+    calls = []
+    original = getattr(orchestrator, name)
+
+    def counted(*args, **kwargs):
+        calls.append(args)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(orchestrator, name, counted)
+    return calls
+
+
+def no_side_effects(monkeypatch):
+    def submit_refund(*args, **kwargs):
+        future = Future()
+        future.set_result({"status": "success"})
+        return future
+
+    monkeypatch.setattr(orchestrator, "submit_refund", submit_refund)
+    monkeypatch.setattr(orchestrator, "enqueue_communication", lambda *args, **kwargs: "message-1")
+
+
+def test_prioritized_workflow_reuses_the_triage_lookups(monkeypatch):
+    no_side_effects(monkeypatch)
+    lookups = count_calls(monkeypatch, "crm_lookup_tool")
+    scans = count_calls(monkeypatch, "iter_transcript_chunks")
+    issues = [dict(ISSUE, order_id=f"O-{index}") for index in range(3)]
+
+    with PriorityScheduler(workers=2) as scheduler:
+        outcomes = list(orchestrator.orchestrate_customer_issues_prioritized(issues, scheduler=scheduler))
+
+    assert [outcome["status"] for outcome in outcomes] == ["success"] * 3
+    assert {outcome["priority"] for outcome in outcomes} == {"HIGH"}
+    assert all("ESCALATE" in outcome["result"] for outcome in outcomes)
+    assert len(lookups) == 3
+    assert len(scans) == 3
+
+
+def test_submit_returns_before_classification_finishes(monkeypatch):
+    no_side_effects(monkeypatch)
+    release = threading.Event()
+    lookup = orchestrator._lookup_customer
+
+    def slow_lookup(customer_id):
+        release.wait(5)
+        return lookup(customer_id)
+
+    monkeypatch.setattr(orchestrator, "_lookup_customer", slow_lookup)
+    summary = orchestrator.submit_customer_issue(**ISSUE)
+    assert not summary.done()
+    release.set()
+    assert "ESCALATE" in summary.result(timeout=10)
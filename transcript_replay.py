@@ -0,0 +1,99 @@
+"""
+Transcript replay - feeds recorded call transcripts through streaming triage
+as if the calls were live
+
+Usage:
+    python transcript_replay.py --customer C67890 --transcript T12345 --speed 10
+    python transcript_replay.py --input calls.jsonl --speed 0 --concurrency 100
+
+Each input line is a JSON object with customer_id and either transcript_id
+(fetched like transcript_retrieval_tool does) or the transcript text itself
+under "transcript". Transcripts are split into utterances (lines, then
+sentences), and each utterance is delivered after the time it takes to say
+it at --words-per-second, divided by --speed (0 = no waiting). Calls are
+replayed concurrently, up to --concurrency at a time.
+
+Every triage update is printed as a JSON line. A summary on stderr shows how
+many calls escalated, and when: seconds into the replay, and the share of
+the call heard at that point.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+
+from shared_tools.crm_tools import transcript_retrieval_tool_async
+from triage_agent.streaming import WORDS_PER_SECOND, replay_transcript, split_utterances, stream_triage
+
+
+async def replay_call(call: dict, speed: float, words_per_second: float, emit) -> dict:
+    """Replay one recorded call through stream_triage; returns its outcome."""
+    text = call.get("transcript")
+    if text is None:
+        text = await transcript_retrieval_tool_async(call["transcript_id"])
+    utterances = list(split_utterances(text))
+    outcome = {"customer_id": call["customer_id"], "transcript_id": call.get("transcript_id"),
+               "utterances": len(utterances), "escalated_at": None, "escalated_after": None}
+    async for update in stream_triage(call["customer_id"], replay_transcript(utterances, speed, words_per_second)):
+        if update.event == "escalate":
+            outcome["escalated_at"] = update.utterances
+            outcome["escalated_after"] = update.elapsed
+        emit({"customer_id": call["customer_id"], "transcript_id": call.get("transcript_id"), **update.to_dict()})
+    return outcome
+
+
+async def replay_calls(calls, speed: float = 1.0, words_per_second: float = WORDS_PER_SECOND,
+                       concurrency: int = 50, emit=None) -> list:
+    """Replay many calls concurrently; returns their outcomes in input order."""
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one(call):
+        async with limit:
+            return await replay_call(call, speed, words_per_second, emit or (lambda _: None))
+
+    return await asyncio.gather(*(one(call) for call in calls))
+
+
+def summarize(outcomes: list, elapsed: float) -> dict:
+    escalated = [outcome for outcome in outcomes if outcome["escalated_at"] is not None]
+    summary = {"calls": len(outcomes), "escalated": len(escalated), "elapsed_seconds": round(elapsed, 3)}
+    if escalated:
+        after = sorted(outcome["escalated_after"] for outcome in escalated)
+        summary["escalated_after_seconds"] = {"median": round(statistics.median(after), 3),
+                                              "max": round(after[-1], 3)}
+        # Share of the call heard when it escalated (1.0 = only at the very end)
+        summary["call_heard_at_escalation"] = round(
+            statistics.mean(outcome["escalated_at"] / outcome["utterances"] for outcome in escalated), 3)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", help="JSONL file of recorded calls")
+    parser.add_argument("--customer", help="Customer ID of a single call")
+    parser.add_argument("--transcript", help="Transcript ID of a single call")
+    parser.add_argument("--speed", type=float, default=1.0, help="Playback speed (1 = real time, 0 = no waiting)")
+    parser.add_argument("--words-per-second", type=float, default=WORDS_PER_SECOND)
+    parser.add_argument("--concurrency", type=int, default=50, help="Calls replayed at the same time")
+    parser.add_argument("--quiet", action="store_true", help="Print the summary only")
+    args = parser.parse_args(argv)
+
+    if args.input:
+        with open(args.input, "r", encoding="utf-8") as handle:
+            calls = [json.loads(line) for line in handle if line.strip()]
+    elif args.customer and args.transcript:
+        calls = [{"customer_id": args.customer, "transcript_id": args.transcript}]
+    else:
+        parser.error("give --input, or --customer and --transcript")
+
+    emit = None if args.quiet else lambda update: print(json.dumps(update, ensure_ascii=False), flush=True)
+    started = time.perf_counter()
+    outcomes = asyncio.run(replay_calls(calls, args.speed, args.words_per_second, args.concurrency, emit))
+    print(json.dumps(summarize(outcomes, time.perf_counter() - started)), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,21 @@
 """
 Clean Triage Agent using shared tools - demonstrates best practices
 """
-from google.adk.agents import Agent
-from google.adk.tools import FunctionTool
-import json
+import os
+import re
+import threading
+from functools import lru_cache
+from typing import Optional
 
 # Import shared tools (no duplication!)
-from shared_tools import CRM_LOOKUP_TOOL, TRANSCRIPT_RETRIEVAL_TOOL
+from shared_tools.crm_tools import crm_lookup_tool, iter_transcript_chunks
+from shared_tools.lazy import function_tool, lazy_attributes
+from shared_tools.records import Action, CustomerRecord, Priority, Tier, TriageDecision
+from shared_tools.severity import SEVERE_THRESHOLD, detect_severe_dissatisfaction, score_severity_chunks
+from shared_tools.tracing import span
+
+HIGH_VALUE_LTV = 500
+HIGH_VALUE_TIERS = (Tier.GOLD, Tier.VIP, Tier.PLATINUM)
 
 def make_triage_decision(customer_ltv: float, customer_status: str, transcript_sentiment: str) -> str:
     """
@@ -24,49 +33,168 @@ def make_triage_decision(customer_ltv: float, customer_status: str, transcript_s
         A JSON string with the triage decision and reasoning.
     """
     # Triage-specific business logic
-    severe_dissatisfaction = any(phrase in transcript_sentiment.lower() 
-                               for phrase in ["never again", "worst experience", "damaged", "unhappy", "furious", "angry"])
+    severe_dissatisfaction = detect_severe_dissatisfaction(transcript_sentiment)
+    return _triage_decision(customer_ltv, customer_status, severe_dissatisfaction).to_json(indent=2)
+
+def _triage_decision(customer_ltv: float, customer_status: str, severe_dissatisfaction: bool) -> TriageDecision:
+    """Triage rules shared by make_triage_decision and the fast path."""
+    high_value_customer = customer_ltv > HIGH_VALUE_LTV or customer_status in HIGH_VALUE_TIERS
+    if high_value_customer:
+        return _high_value_decision(customer_status, severe_dissatisfaction)
+    return _SEVERE_DECISION if severe_dissatisfaction else _STANDARD_DECISION
+
+# Decisions are immutable records, so each one is built once: the reason of a
+# high-value decision quotes the status, the other two are constants.
+@lru_cache(maxsize=256)
+def _high_value_decision(customer_status: str, severe_dissatisfaction: bool) -> TriageDecision:
+    # Triage decision logic (specific to this agent)
+    if severe_dissatisfaction:
+        return TriageDecision(
+            escalate=True,
+            priority=Priority.HIGH,
+            reason=f"High-value {customer_status} customer with severe dissatisfaction detected",
+            recommended_actions=(Action.IMMEDIATE_RESPONSE, Action.MANAGER_REVIEW, Action.RETENTION_MEASURES)
+        )
+    return TriageDecision(
+        escalate=True,
+        priority=Priority.MEDIUM,
+        reason=f"High-value {customer_status} customer requires attention",
+        recommended_actions=(Action.PRIORITY_HANDLING, Action.PERSONALIZED_RESPONSE)
+    )
+
+_SEVERE_DECISION = TriageDecision(
+    escalate=True,
+    priority=Priority.MEDIUM,
+    reason="Severe customer dissatisfaction detected",
+    recommended_actions=(Action.EMPATHETIC_RESPONSE, Action.SOLUTION_FOCUSED)
+)
+
+_STANDARD_DECISION = TriageDecision(
+    escalate=False,
+    priority=Priority.LOW,
+    reason="Standard issue, can be handled through normal channels",
+    recommended_actions=(Action.STANDARD_SUPPORT_PROCESS,)
+)
+
+class TriageFastPath:
+    """
+    Pre-model router that settles clear-cut triage requests without a model turn.
+
+    Registered as the agent's ``before_model_callback``. On the first model
+    turn of a request it pulls the customer and transcript IDs from the
+    user's message, runs the CRM lookup and severity scoring itself and,
+    when the rules leave no room for judgement, answers with the
+    make_triage_decision result directly. Everything else (no IDs, lookup
+    failures, cases near a rule boundary, later turns) goes to the model.
+
+    A case is clear-cut when:
+      - LOW: standard tier, LTV at least ``ltv_margin`` below the high-value
+        line and not a single dissatisfaction phrase in the transcript
+      - HIGH: high-value tier (or LTV ``ltv_margin`` above the line) and a
+        severity score of at least ``severity_margin`` x SEVERE_THRESHOLD
+    """
     
-    high_value_customer = customer_ltv > 500 or customer_status in ["Gold Tier", "VIP", "Platinum"]
+    CUSTOMER_ID_RE = re.compile(r"\b(C\d+)\b")
+    TRANSCRIPT_ID_RE = re.compile(r"\b(T\d+)\b")
     
-    # Triage decision logic (specific to this agent)
-    if high_value_customer and severe_dissatisfaction:
-        decision = {
-            "escalate": True,
-            "priority": "HIGH",
-            "reason": f"High-value {customer_status} customer with severe dissatisfaction detected",
-            "recommended_actions": ["immediate_response", "manager_review", "retention_measures"]
-        }
-    elif high_value_customer:
-        decision = {
-            "escalate": True,
-            "priority": "MEDIUM", 
-            "reason": f"High-value {customer_status} customer requires attention",
-            "recommended_actions": ["priority_handling", "personalized_response"]
-        }
-    elif severe_dissatisfaction:
-        decision = {
-            "escalate": True,
-            "priority": "MEDIUM",
-            "reason": "Severe customer dissatisfaction detected",
-            "recommended_actions": ["empathetic_response", "solution_focused"]
-        }
-    else:
-        decision = {
-            "escalate": False,
-            "priority": "LOW",
-            "reason": "Standard issue, can be handled through normal channels",
-            "recommended_actions": ["standard_support_process"]
-        }
+    def __init__(self, enabled: bool = True, ltv_margin: float = 0.2, severity_margin: float = 2.0):
+        self.enabled = enabled
+        self.ltv_margin = ltv_margin
+        self.severity_margin = severity_margin
+        self._lock = threading.Lock()
+        self.fast_path = 0
+        self.deferred = 0
+        self.unparsed = 0
+        self.errors = 0
+    
+    @classmethod
+    def from_env(cls) -> "TriageFastPath":
+        return cls(enabled=os.environ.get("CX_TRIAGE_FAST_PATH", "1").lower() not in ("0", "false", "off"))
+    
+    def _count(self, outcome: str):
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+    
+    def _is_clear_cut(self, customer: CustomerRecord, severity) -> bool:
+        ltv = customer.ltv
+        if customer.tier in HIGH_VALUE_TIERS or ltv > HIGH_VALUE_LTV * (1 + self.ltv_margin):
+            return severity.score >= SEVERE_THRESHOLD * self.severity_margin
+        if ltv <= HIGH_VALUE_LTV * (1 - self.ltv_margin):
+            return severity.score == 0
+        return False
     
-    return json.dumps(decision, indent=2)
+    def decide(self, customer_id: str, transcript_id: str) -> Optional[TriageDecision]:
+        """
+        Return the triage decision for a clear-cut case, or None when
+        the case should go to the model. Outcomes are counted in ``stats()``.
+        """
+        with span("triage.fast_path", customer_id=customer_id, transcript_id=transcript_id) as current:
+            try:
+                customer = CustomerRecord.from_dict(crm_lookup_tool(customer_id))
+                severity = score_severity_chunks(iter_transcript_chunks(transcript_id))
+            except Exception as exc:
+                self._count("errors")
+                current.set_attribute("fast_path.outcome", "error")
+                current.set_attribute("fast_path.error", str(exc))
+                return None
+            if not self._is_clear_cut(customer, severity):
+                self._count("deferred")
+                current.set_attribute("fast_path.outcome", "deferred")
+                return None
+            self._count("fast_path")
+            current.set_attribute("fast_path.outcome", "fast_path")
+            return _triage_decision(customer.ltv, customer.tier, severity.severe)
+    
+    def __call__(self, callback_context, llm_request):
+        if not self.enabled or not llm_request.contents:
+            return None
+        request = llm_request.contents[-1]
+        # Only the opening turn: once tools have run, the model is mid-task
+        if request.role != "user" or any(part.function_response for part in request.parts or ()):
+            return None
+        text = " ".join(part.text for part in request.parts or () if part.text)
+        customer_match = self.CUSTOMER_ID_RE.search(text)
+        transcript_match = self.TRANSCRIPT_ID_RE.search(text)
+        if not customer_match or not transcript_match:
+            self._count("unparsed")
+            return None
+        decision = self.decide(customer_match.group(1), transcript_match.group(1))
+        if decision is None:
+            return None
+        # Session state and the reply are the boundary where the record becomes JSON
+        callback_context.state["triage_decision"] = decision.to_dict()
+        # Only reached inside an ADK run, where these are already loaded
+        from google.adk.models import LlmResponse
+        from google.genai import types
+        return LlmResponse(content=types.Content(role="model", parts=[types.Part(
+            text="Triage decision (clear-cut case, decided by the triage rules):\n" + decision.to_json(indent=2)
+        )]))
+    
+    def stats(self) -> dict:
+        routed = self.fast_path + self.deferred + self.unparsed + self.errors
+        return {
+            "enabled": self.enabled,
+            "fast_path": self.fast_path,
+            "deferred": self.deferred,
+            "unparsed": self.unparsed,
+            "errors": self.errors,
+            # Share of requests answered without a model turn
+            "fast_path_rate": self.fast_path / routed if routed else 0.0,
+        }
 
-# Create the triage agent using shared tools + agent-specific logic
-root_agent = Agent(
-    name="triage_agent",
-    model="gemini-2.0-flash",
-    description="Specialized agent for triaging customer complaints using shared CRM tools.",
-    instruction="""You are a Triage Agent for customer complaints. 
+TRIAGE_FAST_PATH = TriageFastPath.from_env()
+
+def _build_root_agent():
+    """Create the triage agent using shared tools + agent-specific logic."""
+    from google.adk.agents import Agent
+    from shared_tools.crm_tools import CRM_LOOKUP_TOOL, TRANSCRIPT_RETRIEVAL_TOOL
+    from shared_tools.response_cache import RESPONSE_CACHE
+    
+    return Agent(
+        name="triage_agent",
+        model="gemini-2.0-flash",
+        description="Specialized agent for triaging customer complaints using shared CRM tools.",
+        instruction="""You are a Triage Agent for customer complaints. 
 
 Your job is to:
 1. Use CRM_LOOKUP_TOOL to get customer information (LTV, status, order history)
@@ -79,9 +207,18 @@ Example workflow:
 1. Call CRM_LOOKUP_TOOL with customer_id
 2. Call TRANSCRIPT_RETRIEVAL_TOOL with transcript_id  
 3. Call make_triage_decision with the gathered data""",
-    tools=[
-        CRM_LOOKUP_TOOL,          # Shared tool - call this first
-        TRANSCRIPT_RETRIEVAL_TOOL, # Shared tool - call this second
-        FunctionTool(make_triage_decision) # Agent-specific logic - call this last
-    ]
-)
+        tools=[
+            CRM_LOOKUP_TOOL,          # Shared tool - call this first
+            TRANSCRIPT_RETRIEVAL_TOOL, # Shared tool - call this second
+            function_tool(make_triage_decision) # Agent-specific logic - call this last
+        ],
+        # Clear-cut cases are answered by the rules before any model turn
+        before_model_callback=TRIAGE_FAST_PATH,
+        # Repeated and near-duplicate requests are answered from the response cache
+        **RESPONSE_CACHE.callbacks(make_triage_decision)
+    )
+
+# root_agent is built on first access (ADK Web loading the agent, or an
+# explicit import), so importing this module for its triage logic does not
+# load google.adk.
+__getattr__ = lazy_attributes(__name__, {"root_agent": _build_root_agent})
@@ -0,0 +1,120 @@
+"""
+Vectorized batch triage - applies the triage rules to columnar backlog data
+in one NumPy pass
+
+Inputs are parallel arrays, one element per ticket:
+    ltv             customer lifetime value (float)
+    tier_code       customer tier encoded with ``encode_tiers`` (uint8)
+    severity_score  transcript severity score (e.g. ``score_severity(...).score``)
+
+Each row gets a decision code that identifies the make_triage_decision
+branch it falls into:
+    0  standard issue                     LOW     not escalated
+    1  severe dissatisfaction only        MEDIUM  escalated
+    2  high-value customer only           MEDIUM  escalated
+    3  high-value and severe              HIGH    escalated
+
+``priority`` and ``action_set`` are derived from it by table lookup, and
+``decision`` returns the exact TriageDecision the scalar rules give a row.
+"""
+from dataclasses import dataclass
+from typing import Iterable, List
+
+import numpy as np
+
+from shared_tools.records import TriageDecision
+from shared_tools.severity import SEVERE_THRESHOLD
+
+from .agent import HIGH_VALUE_LTV, HIGH_VALUE_TIERS, _triage_decision
+
+# 0 is reserved for tiers the rules do not know about
+TIER_CODES = {"Silver Tier": 1, "Gold Tier": 2, "VIP": 3, "Platinum": 4}
+
+PRIORITY_LABELS = ("LOW", "MEDIUM", "HIGH")
+
+
+def _branch_decision(code: int, customer_status: str = "") -> TriageDecision:
+    """Run the scalar rules on inputs that land in the branch for ``code``."""
+    high_value, severe = bool(code & 2), bool(code & 1)
+    # An LTV just over the line (or zero) selects the branch; the status only
+    # appears in the reason of the high-value branches.
+    return _triage_decision(HIGH_VALUE_LTV + 1 if high_value else 0,
+                            customer_status if high_value else "", severe)
+
+
+# Per-decision-code outcome tables, derived from the scalar rules so the two
+# can never drift apart
+DECISION_ESCALATE = np.array([_branch_decision(code).escalate for code in range(4)])
+DECISION_PRIORITY = np.array([PRIORITY_LABELS.index(_branch_decision(code).priority) for code in range(4)],
+                             dtype=np.int8)
+ACTION_SETS = tuple(tuple(action.value for action in _branch_decision(code).recommended_actions)
+                    for code in range(4))
+
+# tier_code -> high-value tier, as a lookup table over the whole uint8 range
+_HIGH_VALUE_TIER = np.zeros(256, dtype=bool)
+for _name in HIGH_VALUE_TIERS:
+    _HIGH_VALUE_TIER[TIER_CODES[_name]] = True
+
+
+@dataclass(frozen=True)
+class TriageBatchResult:
+    """Per-row triage outcomes; every array has one element per input row."""
+    decision_code: np.ndarray
+    escalate: np.ndarray
+    priority: np.ndarray
+    action_set: np.ndarray
+
+    def __len__(self):
+        return len(self.decision_code)
+
+    def decision(self, row: int, customer_status: str) -> TriageDecision:
+        """The make_triage_decision result for ``row`` (the reason quotes the status)."""
+        return _branch_decision(int(self.decision_code[row]), customer_status)
+
+
+def encode_tiers(statuses: Iterable[str]) -> np.ndarray:
+    """Encode tier names as uint8 tier codes; unknown tiers become 0."""
+    statuses = np.asarray(statuses if isinstance(statuses, np.ndarray) else list(statuses), dtype=object)
+    if not len(statuses):
+        return np.zeros(0, dtype=np.uint8)
+    names, inverse = np.unique(statuses, return_inverse=True)
+    codes = np.array([TIER_CODES.get(name, 0) for name in names], dtype=np.uint8)
+    return codes[inverse.reshape(-1)]
+
+
+def triage_batch(ltv, tier_code, severity_score, threshold: float = SEVERE_THRESHOLD) -> TriageBatchResult:
+    """
+    Triage every row of a columnar backlog in one vectorized pass.
+
+    Args:
+        ltv: Customer lifetime values.
+        tier_code: Tier codes from ``encode_tiers``.
+        severity_score: Transcript severity scores; a row is severe when its
+            score reaches ``threshold``.
+
+    Returns:
+        A TriageBatchResult with decision codes, escalate flags, priority
+        codes (indexes into PRIORITY_LABELS) and action-set codes (indexes
+        into ACTION_SETS).
+    """
+    ltv = np.asarray(ltv, dtype=np.float64)
+    tier_code = np.asarray(tier_code, dtype=np.uint8)
+    severity_score = np.asarray(severity_score, dtype=np.float64)
+    if not (ltv.shape == tier_code.shape == severity_score.shape):
+        raise ValueError("ltv, tier_code and severity_score must have the same shape")
+
+    high_value = ltv > HIGH_VALUE_LTV
+    high_value |= _HIGH_VALUE_TIER[tier_code]
+    decision_code = high_value.view(np.uint8) << 1
+    decision_code |= (severity_score >= threshold).view(np.uint8)
+    return TriageBatchResult(
+        decision_code=decision_code,
+        escalate=DECISION_ESCALATE[decision_code],
+        priority=DECISION_PRIORITY[decision_code],
+        action_set=decision_code,
+    )
+
+
+def decode_priorities(priority: np.ndarray) -> List[str]:
+    """Priority codes back to their labels."""
+    return np.asarray(PRIORITY_LABELS, dtype=object)[priority].tolist()
@@ -0,0 +1,137 @@
+"""
+Streaming triage - escalates a live call the moment its transcript crosses
+the severity threshold, instead of waiting for the finished transcript
+
+Usage:
+    async for update in stream_triage("C67890", utterances):
+        if update.event == "escalate":
+            notify_supervisor(update.decision)
+
+    # Recorded calls replayed at 10x speaking pace
+    async for update in stream_triage("C67890", replay_transcript(text, speed=10)):
+        ...
+
+``utterances`` is any iterable or async iterable of transcript text, e.g.
+speech-to-text results as they come in. Every utterance is fed to a
+``SeverityTracker``, which scans only the new text, so the cost per
+utterance does not grow with the length of the call. The generator yields:
+    score     an utterance matched new dissatisfaction phrases
+    escalate  the severity threshold was just crossed (once per call); the
+              decision is what make_triage_decision gives from that point on
+    final     the stream has ended; the decision for the whole call
+
+The final score equals ``score_severity`` of the utterances joined with
+``separator``.
+"""
+import asyncio
+import re
+import time
+from dataclasses import dataclass
+from typing import AsyncIterable, AsyncIterator, Iterable, Tuple, Union
+
+from shared_tools.crm_tools import crm_lookup_tool_async
+from shared_tools.records import CustomerRecord, TriageDecision
+from shared_tools.severity import DEFAULT_SCORER, SeverityScorer
+
+from .agent import _triage_decision
+
+# Average speaking pace (150 words a minute) used to time replayed utterances
+WORDS_PER_SECOND = 2.5
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+@dataclass(frozen=True, slots=True)
+class TriageUpdate:
+    """One event of a streaming triage."""
+    event: str
+    utterances: int
+    score: float
+    new_matches: Tuple[Tuple[str, float], ...]
+    decision: TriageDecision
+    elapsed: float
+
+    def to_dict(self) -> dict:
+        return {
+            "event": self.event,
+            "utterances": self.utterances,
+            "score": self.score,
+            "new_matches": [phrase for phrase, _ in self.new_matches],
+            "decision": self.decision.to_dict(),
+            "elapsed": round(self.elapsed, 3),
+        }
+
+
+async def _aiter(items: Union[Iterable, AsyncIterable]):
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def stream_triage(customer: Union[str, CustomerRecord], utterances: Union[Iterable[str], AsyncIterable[str]],
+                        separator: str = "\n", scorer: SeverityScorer = DEFAULT_SCORER) -> AsyncIterator[TriageUpdate]:
+    """
+    Triage a call while it is happening.
+
+    Args:
+        customer: Customer ID (looked up in the CRM once, up front) or record.
+        utterances: Transcript text in arrival order.
+        separator: Text assumed between consecutive utterances. A newline
+            keeps phrases from spanning speaker turns; use " " when the
+            utterances are fragments of one running text.
+        scorer: Lexicon and threshold to score against.
+
+    Yields:
+        TriageUpdate records ("score", "escalate", then one "final").
+    """
+    if isinstance(customer, str):
+        customer = CustomerRecord.from_dict(await crm_lookup_tool_async(customer))
+    tracker = scorer.tracker()
+    decision = _triage_decision(customer.ltv, customer.tier, False)
+    escalated = False
+    started = time.monotonic()
+    count = 0
+    async for utterance in _aiter(utterances):
+        new_matches = tracker.feed(separator + utterance if count else utterance)
+        count += 1
+        if not new_matches:
+            continue
+        event = "score"
+        if tracker.severe and not escalated:
+            event, escalated = "escalate", True
+            decision = _triage_decision(customer.ltv, customer.tier, True)
+        yield TriageUpdate(event, count, tracker.score, new_matches, decision, time.monotonic() - started)
+    yield TriageUpdate("final", count, tracker.score, (), decision, time.monotonic() - started)
+
+
+def split_utterances(text: str) -> Iterable[str]:
+    """Split a recorded transcript into utterances: lines, then sentences."""
+    for line in text.splitlines():
+        for sentence in _SENTENCE_END_RE.split(line.strip()):
+            if sentence:
+                yield sentence
+
+
+async def replay_transcript(transcript: Union[str, Iterable[str]], speed: float = 1.0,
+                            words_per_second: float = WORDS_PER_SECOND) -> AsyncIterator[str]:
+    """
+    Feed a recorded transcript as if it were being spoken.
+
+    Args:
+        transcript: Full transcript text (split with ``split_utterances``)
+            or a sequence of utterances.
+        speed: Playback speed; 1.0 is real time, 10.0 ten times faster and
+            0 delivers everything without waiting.
+        words_per_second: Speaking pace the utterance durations are based on.
+
+    Yields:
+        Each utterance once it has "been said".
+    """
+    utterances = split_utterances(transcript) if isinstance(transcript, str) else transcript
+    for utterance in utterances:
+        if speed > 0:
+            await asyncio.sleep(len(utterance.split()) / words_per_second / speed)
+        yield utterance